@@ -1,11 +1,8 @@
 from dotenv import dotenv_values
-from flask import Flask, request, abort
+from flask import Flask, Response, request, abort
 from linebot.v3 import WebhookHandler
 from linebot.v3.exceptions import InvalidSignatureError
 from linebot.v3.messaging import (
-    Configuration,
-    ApiClient,
-    MessagingApi,
     ReplyMessageRequest,
     TextMessage,
 )
@@ -15,17 +12,22 @@ from linebot.v3.webhooks import (
     PostbackEvent,
 )
 
+import atexit
+
 from feature.line import RichMenuManager
+from feature.line.service_container import ServiceContainer
+from feature.line.webhook_dispatcher import AsyncWebhookHandler, event_context
 from feature.line.handlers import (
-    CommandHandler,
-    FavoriteHandler,
-    RecommendHandler,
-    ScenarioHandler,
     user_states,
     user_queries,
     recent_recommendations,
 )
 from feature.nosql_mongo.mongo_trip.db_helper import trip_db
+from feature.nosql_mongo.mongo_rec.mongo_client import close_mongo_clients, ensure_indexes
+from feature.trip.src.core.utils.logger import setup_logging
+from feature.monitoring import render_prometheus
+from feature.llm.context_builder import warm_up_tokenizer
+from main.main_trip.trip_service import get_history_summarizer
 
 
 # 載入 .env 檔案中的環境變數
@@ -53,9 +55,47 @@ LINE_CHANNEL_SECRET = config["LINE_CHANNEL_SECRET"]
 # 初始化 Flask 應用
 app = Flask(__name__)
 
-# 初始化 Configuration, WebhookHandler, RichMenuManager
-configuration = Configuration(access_token=LINE_CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(LINE_CHANNEL_SECRET)
+# 行程規劃模組的 log 等級由 TRIP_LOG_LEVEL 控制(預設 WARNING)
+setup_logging()
+
+# 初始化共用服務(ApiClient 與各 handler 每個 worker 只建立一次), WebhookHandler, RichMenuManager
+services = ServiceContainer(config, LINE_CHANNEL_ACCESS_TOKEN, app.logger)
+atexit.register(services.close)
+
+# 推薦/收藏用的 MongoDB 連線池每個 worker 共用一個,索引只在啟動時建立
+ensure_indexes(config)
+atexit.register(close_mongo_clients)
+
+# 有安裝 tiktoken 時先載入編碼;沒有安裝時 token 預算為估算值
+warm_up_tokenizer()
+atexit.register(lambda: get_history_summarizer().shutdown(wait=False))
+
+
+def reply_busy(event):
+    """背景佇列已滿時,直接用 reply token 通知使用者"""
+    services.raw_messaging_api.reply_message(
+        ReplyMessageRequest(
+            reply_token=event.reply_token,
+            messages=[TextMessage(text="目前使用人數較多或上一個請求仍在處理中，請稍後再試")]
+        )
+    )
+
+
+# WEBHOOK_MODE=sync(預設): 在 request 內處理完才回應
+# WEBHOOK_MODE=async: /callback 驗證簽名後立即回 200,事件在背景處理
+#   Cloud Run 預設只在處理 request 時分配 CPU,回應後背景執行緒會被限速,
+#   使用 async 時部署需加上 --no-cpu-throttling(CPU 一律分配)
+if os.getenv('WEBHOOK_MODE', 'sync') == 'sync':
+    handler = WebhookHandler(LINE_CHANNEL_SECRET)
+else:
+    handler = AsyncWebhookHandler(
+        LINE_CHANNEL_SECRET,
+        max_workers=int(os.getenv('LINE_EVENT_WORKERS', '4')),
+        max_pending=int(os.getenv('LINE_EVENT_MAX_PENDING', '32')),
+        on_reject=reply_busy,
+        logger=app.logger,
+    )
+    atexit.register(handler.dispatcher.shutdown)
 
 try:
     rich_menu_manager = RichMenuManager(LINE_CHANNEL_ACCESS_TOKEN)
@@ -91,6 +131,15 @@ def callback():
     return 'OK'
 
 
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    """各階段耗時直方圖(Prometheus text format),每個 worker 各自統計"""
+    return Response(
+        render_prometheus(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @handler.add(PostbackEvent)
 def handle_postback(event):
     """處理postback事件
@@ -107,9 +156,9 @@ def handle_postback(event):
     表示第3個行程的第5個景點
     """
     try:
-        with ApiClient(configuration) as api_client:
-            messaging_api = MessagingApi(api_client)
-            command_handler = CommandHandler(messaging_api, app.logger)
+        with event_context(event):
+            messaging_api = services.messaging_api
+            command_handler = services.command_handler
 
             data = event.postback.data
             line_id = event.source.user_id
@@ -157,9 +206,8 @@ def handle_postback(event):
     except Exception as e:
         app.logger.error(f"處理postback時發生錯誤: {str(e)}")
         try:
-            with ApiClient(configuration) as api_client:
-                messaging_api = MessagingApi(api_client)
-                messaging_api.reply_message_with_http_info(
+            with event_context(event):
+                services.messaging_api.reply_message_with_http_info(
                     ReplyMessageRequest(
                         reply_token=event.reply_token,
                         messages=[TextMessage(text="處理請求時發生錯誤，請稍後再試")]
@@ -185,17 +233,15 @@ def handle_message(event):
 
     if trip_db.record_user_input(line_id, text_message):
         print(f"已記錄{line_id}說:{text_message}")
+        # 新對話滿門檻時在背景整理歷史摘要,不佔用這次請求
+        get_history_summarizer().notify(line_id)
 
     try:
-        with ApiClient(configuration) as api_client:
-            messaging_api = MessagingApi(api_client)
-            command_handler = CommandHandler(messaging_api, app.logger)
-            scenario_handler = ScenarioHandler(
-                messaging_api, config, app.logger)
-            recommend_handler = RecommendHandler(
-                messaging_api, config, app.logger)
-            favorite_handler = FavoriteHandler(
-                messaging_api, config, app.logger)
+        with event_context(event):
+            command_handler = services.command_handler
+            scenario_handler = services.scenario_handler
+            recommend_handler = services.recommend_handler
+            favorite_handler = services.favorite_handler
 
             # 解析與處理指令
             command, parameter = command_handler.parse_command(text_message)
@@ -249,9 +295,8 @@ def handle_message(event):
     except Exception as e:
         app.logger.error(f"Error handling message: {str(e)}")
         try:
-            with ApiClient(configuration) as api_client:
-                messaging_api = MessagingApi(api_client)
-                messaging_api.reply_message_with_http_info(
+            with event_context(event):
+                services.messaging_api.reply_message_with_http_info(
                     ReplyMessageRequest(
                         reply_token=event.reply_token,
                         messages=[TextMessage(text="處理訊息時發生錯誤，請稍後再試")]
@@ -74,7 +74,7 @@ class CommandHandler:
         try:
 
 
-            latest = trip_db.get_latest_plan(line_id)
+            latest = trip_db.get_latest_plan(line_id, projection={"_id": 0, "plan_index": 1})
             if latest:
                 plan_index = latest.get('plan_index', 1)
             else:
@@ -11,7 +11,7 @@ from linebot.v3.messaging import MessagingApi, ReplyMessageRequest, TextMessage,
 from linebot.v3.webhooks import MessageEvent
 
 from feature.line.rec_bubble_setting.line_bubble_favo import generate_remove_flex_messages
-from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_favo import MongoDBManage_favorite
+from feature.nosql_mongo.mongo_rec.favorite_cache import CachedFavoriteManager, FavoriteCache
 
 
 class FavoriteHandler:
@@ -28,6 +28,8 @@ class FavoriteHandler:
         self.messaging_api = messaging_api
         self.config = config
         self.logger = logger
+        # 同一個用戶的收藏文件在各流程間共用,寫入後失效
+        self.favorite_cache = FavoriteCache()
 
     def show_favorites(self, event: MessageEvent, recent_recommendations: dict):
         """顯示收藏清單
@@ -39,7 +41,7 @@ class FavoriteHandler:
         user_id = event.source.user_id
 
         try:
-            mongodb_obj = MongoDBManage_favorite(self.config)
+            mongodb_obj = CachedFavoriteManager(self.config, self.favorite_cache)
 
             if mongodb_obj.check_user(user_id):
                 favorites = mongodb_obj.show_favorite(user_id)
@@ -105,7 +107,7 @@ class FavoriteHandler:
                 }
 
                 # 初始化 MongoDB 管理器並處理收藏
-                mongodb_obj = MongoDBManage_favorite(self.config)
+                mongodb_obj = CachedFavoriteManager(self.config, self.favorite_cache)
 
                 if mongodb_obj.check_user(user_id):
                     if mongodb_obj.check_place(user_id, place_id):
@@ -142,7 +144,7 @@ class FavoriteHandler:
             user_id = event.source.user_id
             place_name = event.message.text[2:]  # 去掉"移除"兩個字
 
-            mongodb_obj = MongoDBManage_favorite(self.config)
+            mongodb_obj = CachedFavoriteManager(self.config, self.favorite_cache)
 
             favorites = mongodb_obj.show_favorite(user_id)
             if favorites:
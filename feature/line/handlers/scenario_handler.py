@@ -14,12 +14,13 @@ from pprint import pprint
 from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_disat import MongoDBManage_unsatisfied
 from feature.line.rec_bubble_setting.change_format import transform_location_data
 from feature.line.rec_bubble_setting.line_bubble_changer import generate_flex_messages
+from feature.line.session_store import SessionStore
 from main.main_plan.recommandation_service import recommandation
 
-# 儲存狀態用的字典
-user_states = {}  # 使用者狀態
-recent_recommendations = {}  # 最近推薦結果
-user_queries = {}  # 查詢紀錄
+# 儲存狀態用的 SessionStore(用法與 dict 相同,backend 見 session_store.py)
+user_states = SessionStore("user_states")  # 使用者狀態
+recent_recommendations = SessionStore("recent_recommendations")  # 最近推薦結果
+user_queries = SessionStore("user_queries")  # 查詢紀錄
 
 
 class ScenarioHandler:
@@ -52,7 +53,6 @@ class ScenarioHandler:
             mongodb_obj.close()
 
             # 設定使用者狀態
-            global user_states
             user_states[user_id] = "waiting_for_query"
 
             # 發送提示訊息
@@ -78,8 +78,7 @@ class ScenarioHandler:
         user_text = event.message.text
 
         # 檢查是否在等待輸入狀態
-        global user_states, recent_recommendations, user_queries
-        if user_id not in user_states or user_states[user_id] != "waiting_for_query":
+        if user_states.get(user_id) != "waiting_for_query":
             return False
 
         # 檢查是否為特殊指令
@@ -95,8 +94,8 @@ class ScenarioHandler:
             return True
 
         try:
-            # 清除使用者狀態
-            del user_states[user_id]
+            # 清除使用者狀態(其他 worker 可能已經清除)
+            user_states.pop(user_id, None)
 
             # 執行推薦
             final_results, query_info = recommandation(user_text, self.config)
@@ -0,0 +1,65 @@
+"""
+LINE bot 的共用服務
+
+每個 gunicorn worker 建立一次,持有:
+1. Configuration 與長駐的 ApiClient(內部 urllib3 連線池可跨執行緒共用)
+2. 共用的 MessagingApi(reply token 過期時改用 push,事件由 event_context 決定)
+3. Command / Scenario / Recommend / Favorite handler(本身不保存單一事件的狀態)
+
+原本每則訊息都要重新建立以上物件,現在只在 worker 啟動時建立一次。
+"""
+
+import threading
+
+from linebot.v3.messaging import ApiClient, Configuration, MessagingApi
+
+from feature.line.handlers import (
+    CommandHandler,
+    FavoriteHandler,
+    RecommendHandler,
+    ScenarioHandler,
+)
+from feature.line.webhook_dispatcher import ReplyOrPushMessagingApi
+
+
+class ServiceContainer:
+    """worker 內共用的 LINE client 與 handler
+
+    使用範例:
+        >>> services = ServiceContainer(config, LINE_CHANNEL_ACCESS_TOKEN, app.logger)
+        >>> with event_context(event):
+        >>>     services.command_handler.handle_help_command(event)
+    """
+
+    def __init__(self, config: dict, channel_access_token: str, logger=None):
+        """初始化
+
+        Args:
+            config: 設定字典(jina / qdrant / ChatGPT 等)
+            channel_access_token: LINE channel access token
+            logger: 可選的logger實例
+        """
+        self.config = config
+        self.logger = logger
+        self.configuration = Configuration(access_token=channel_access_token)
+        self.api_client = ApiClient(self.configuration)
+
+        # raw_messaging_api 直接呼叫 LINE API;messaging_api 會依 event_context 自動改用 push
+        self.raw_messaging_api = MessagingApi(self.api_client)
+        self.messaging_api = ReplyOrPushMessagingApi(self.raw_messaging_api)
+
+        self.command_handler = CommandHandler(self.messaging_api, logger)
+        self.scenario_handler = ScenarioHandler(self.messaging_api, config, logger)
+        self.recommend_handler = RecommendHandler(self.messaging_api, config, logger)
+        self.favorite_handler = FavoriteHandler(self.messaging_api, config, logger)
+
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def close(self):
+        """關閉 ApiClient 的連線池(可重複呼叫)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.api_client.close()
@@ -0,0 +1,237 @@
+"""
+對話狀態(情境搜索的 user_states / user_queries / recent_recommendations)的儲存
+
+SessionStore 的用法與 dict 相同(`in`、`[]`、`get`、`del`),實際資料放在可替換的 backend:
+    MemoryBackend - process 內的 LRU + TTL(預設,單一 worker 使用)
+    SQLiteBackend - 同一台主機的 SQLite(WAL 模式),多個 gunicorn worker 共用
+
+backend 由環境變數選擇:
+    SESSION_STORE       memory(預設) / sqlite
+    SESSION_STORE_PATH  SQLite 檔案路徑(預設為暫存目錄下的 travel_router_sessions.db)
+    SESSION_TTL         狀態保存秒數(預設 3600)
+    SESSION_MAX_ENTRIES MemoryBackend 最多保存的筆數(預設 10000)
+
+注意: 從 SQLiteBackend 取出的是複本,修改後要再寫回(`store[key] = value`)。
+
+使用方式:
+```python
+user_states = SessionStore("user_states")
+user_states[user_id] = "waiting_for_query"
+if user_id in user_states:
+    del user_states[user_id]
+```
+"""
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Optional, Tuple
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """
+    process 內的 LRU + TTL 儲存(thread-safe)
+
+    Args:
+        ttl: 每筆資料的保存秒數
+        max_entries: 最多保存的筆數,超過時移除最久沒用到的
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Any:
+        """取得資料,不存在或過期時回傳 _MISSING"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[(namespace, key)]
+                return _MISSING
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """刪除資料,回傳是否存在"""
+        with self._lock:
+            return self._entries.pop((namespace, key), None) is not None
+
+    def keys(self, namespace: str) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [k for (ns, k), (expires_at, _) in self._entries.items()
+                    if ns == namespace and expires_at > now]
+
+
+class SQLiteBackend:
+    """
+    SQLite(WAL 模式)儲存,同一台主機的多個 process 共用
+
+    值以 pickle 保存(query_info 內的 black_list 是 set),
+    過期資料在讀取時視為不存在,寫入時定期清除。
+
+    Args:
+        path: SQLite 檔案路徑
+        ttl: 每筆資料的保存秒數
+        purge_every: 每寫入幾次清除一次過期資料
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, purge_every: int = 100):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        # sqlite3 連線不跨執行緒使用,每個執行緒各自建立
+        self._local = threading.local()
+        self._connect().execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Any:
+        """取得資料,不存在或過期時回傳 _MISSING"""
+        row = self._connect().execute(
+            "SELECT value FROM sessions WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else _MISSING
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, pickle.dumps(value), time.time() + self.ttl)
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """刪除資料,回傳是否存在"""
+        cursor = self._connect().execute(
+            "DELETE FROM sessions WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def keys(self, namespace: str) -> list:
+        rows = self._connect().execute(
+            "SELECT key FROM sessions WHERE namespace = ? AND expires_at > ?",
+            (namespace, time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self) -> int:
+        """清除過期資料,回傳清除的筆數"""
+        cursor = self._connect().execute(
+            "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+
+def create_session_backend():
+    """依環境變數建立 backend(見模組說明)"""
+    ttl = float(os.getenv("SESSION_TTL", DEFAULT_TTL))
+    if os.getenv("SESSION_STORE", "memory") == "sqlite":
+        path = os.getenv(
+            "SESSION_STORE_PATH",
+            os.path.join(tempfile.gettempdir(), "travel_router_sessions.db"))
+        return SQLiteBackend(path, ttl=ttl)
+    return MemoryBackend(
+        ttl=ttl, max_entries=int(os.getenv("SESSION_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+
+
+_default_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_session_backend():
+    """取得 process 共用的 backend,第一次呼叫時建立"""
+    global _default_backend
+    if _default_backend is None:
+        with _backend_lock:
+            if _default_backend is None:
+                _default_backend = create_session_backend()
+    return _default_backend
+
+
+class SessionStore(MutableMapping):
+    """
+    以 user_id 為 key 的對話狀態,介面與 dict 相同
+
+    Args:
+        namespace: 區分不同用途的狀態(例如 "user_states")
+        backend: 儲存 backend,預設使用 get_session_backend()
+    """
+
+    def __init__(self, namespace: str, backend=None):
+        self.namespace = namespace
+        self._backend = backend
+
+    @property
+    def backend(self):
+        # 第一次使用時才建立,讓環境變數在 import 之後設定也有效
+        if self._backend is None:
+            self._backend = get_session_backend()
+        return self._backend
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.backend.get(self.namespace, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.backend.set(self.namespace, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.backend.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self.backend.get(self.namespace, key) is not _MISSING
+
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        value = self.backend.get(self.namespace, key)
+        return default if value is _MISSING else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.backend.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return len(self.backend.keys(self.namespace))
@@ -0,0 +1,112 @@
+# feature/line/tests/test_service_container.py
+
+import threading
+import time
+
+import pytest
+from linebot.v3.messaging import ApiClient, Configuration, MessagingApi
+
+from feature.line.handlers import (
+    CommandHandler,
+    FavoriteHandler,
+    RecommendHandler,
+    ScenarioHandler,
+)
+from feature.line.service_container import ServiceContainer
+from feature.line.webhook_dispatcher import ReplyOrPushMessagingApi, event_context
+from main.main_trip import trip_service
+from main.main_trip.controllers.controller import TripController
+
+CONFIG = {
+    'jina_url': 'http://jina',
+    'jina_headers_Authorization': 'jina',
+    'qdrant_url': 'http://qdrant',
+    'qdrant_api_key': 'qdrant',
+    'ChatGPT_api_key': 'sk-test',
+}
+
+
+@pytest.fixture
+def services():
+    container = ServiceContainer(CONFIG, 'token')
+    yield container
+    container.close()
+
+
+@pytest.fixture
+def trip_config(monkeypatch):
+    """讓 get_trip_controller 使用測試設定,並清掉執行緒的快取"""
+    monkeypatch.setattr(trip_service, '_config', CONFIG)
+    monkeypatch.setattr(trip_service, '_local', threading.local())
+
+
+def test_handlers_share_one_messaging_api(services):
+    """測試所有 handler 共用同一個 ApiClient / MessagingApi"""
+    handlers = [
+        services.command_handler,
+        services.scenario_handler,
+        services.recommend_handler,
+        services.favorite_handler,
+    ]
+    assert all(h.messaging_api is services.messaging_api for h in handlers)
+    assert services.raw_messaging_api.api_client is services.api_client
+
+
+def test_close_is_idempotent(services):
+    """測試 close 可重複呼叫(atexit 與手動關閉)"""
+    services.close()
+    services.close()
+
+
+def test_trip_controller_reused_per_thread(trip_config):
+    """測試同一個執行緒重複使用 TripController,不同執行緒各自一個"""
+    controller = trip_service.get_trip_controller()
+    assert trip_service.get_trip_controller() is controller
+
+    others = []
+    thread = threading.Thread(target=lambda: others.append(trip_service.get_trip_controller()))
+    thread.start()
+    thread.join()
+    assert others[0] is not controller
+
+
+def test_per_message_overhead_benchmark(trip_config):
+    """比較每則訊息重新建立 client / handler / TripController 與共用服務的成本"""
+    def old_message():
+        with ApiClient(Configuration(access_token='token')) as api_client:
+            messaging_api = ReplyOrPushMessagingApi(MessagingApi(api_client), None)
+            CommandHandler(messaging_api)
+            ScenarioHandler(messaging_api, CONFIG)
+            RecommendHandler(messaging_api, CONFIG)
+            FavoriteHandler(messaging_api, CONFIG)
+            TripController(CONFIG)
+
+    container = ServiceContainer(CONFIG, 'token')
+    trip_service.get_trip_controller()
+
+    def new_message():
+        with event_context(None):
+            container.command_handler
+            container.scenario_handler
+            container.recommend_handler
+            container.favorite_handler
+            trip_service.get_trip_controller()
+
+    def timeit(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    old = timeit(old_message, 20)
+    new = timeit(new_message, 1000)
+    container.close()
+
+    print(f"\n原本每則訊息建立物件: {old * 1e3:.2f} ms")
+    print(f"共用服務: {new * 1e6:.2f} µs")
+
+    assert new < old
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,114 @@
+# feature/line/tests/test_session_store.py
+
+import threading
+import time
+
+import pytest
+
+from feature.line import session_store
+from feature.line.session_store import MemoryBackend, SessionStore, SQLiteBackend
+
+QUERY_INFO = {
+    "line_user_id": "U1",
+    "query": "請推薦我淡水好吃的餐廳",
+    "special_requirement": {"內用座位": True},
+    "black_list": {"place_a", "place_b"},
+}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(ttl=60)
+    return SQLiteBackend(str(tmp_path / "sessions.db"), ttl=60)
+
+
+def test_dict_interface(backend):
+    """SessionStore 的用法與原本的 dict 相同"""
+    user_states = SessionStore("user_states", backend)
+    user_queries = SessionStore("user_queries", backend)
+
+    assert "U1" not in user_states
+    assert user_states.get("U1") is None
+
+    user_states["U1"] = "waiting_for_query"
+    user_queries["U1"] = QUERY_INFO
+
+    assert "U1" in user_states
+    assert user_states["U1"] == "waiting_for_query"
+    assert user_queries.get("U1") == QUERY_INFO
+    assert list(user_states) == ["U1"]
+
+    del user_states["U1"]
+    assert "U1" not in user_states
+    assert user_states.pop("U1", None) is None
+    with pytest.raises(KeyError):
+        user_states["U1"]
+
+    # 不同 namespace 互不影響
+    assert user_queries["U1"]["black_list"] == {"place_a", "place_b"}
+
+
+def test_sqlite_shared_between_workers(tmp_path):
+    """兩個 worker(各自的 backend)透過同一個 SQLite 檔案共用狀態"""
+    path = str(tmp_path / "sessions.db")
+    worker_a = SessionStore("user_states", SQLiteBackend(path))
+    worker_b = SessionStore("user_states", SQLiteBackend(path))
+
+    worker_a["U1"] = "waiting_for_query"
+    assert worker_b.get("U1") == "waiting_for_query"
+
+    del worker_b["U1"]
+    assert "U1" not in worker_a
+
+
+def test_sqlite_threads(tmp_path):
+    """多個執行緒同時寫入同一個 backend"""
+    store = SessionStore("recent_recommendations", SQLiteBackend(str(tmp_path / "sessions.db")))
+
+    def write(i):
+        store[f"U{i}"] = {f"place_{i}": {"name": f"地點{i}"}}
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store) == 16
+    assert store["U3"] == {"place_3": {"name": "地點3"}}
+
+
+def test_ttl_expiry(tmp_path):
+    """過期的狀態視為不存在,SQLite 會清除過期資料"""
+    memory = SessionStore("user_states", MemoryBackend(ttl=0.01))
+    sqlite_backend = SQLiteBackend(str(tmp_path / "sessions.db"), ttl=0.01)
+    sqlite = SessionStore("user_states", sqlite_backend)
+
+    memory["U1"] = sqlite["U1"] = "waiting_for_query"
+    time.sleep(0.02)
+
+    assert "U1" not in memory
+    assert "U1" not in sqlite
+    assert sqlite_backend.purge() == 1
+
+
+def test_memory_size_bound():
+    """超過上限時移除最久沒用到的使用者,記憶體不會無限增長"""
+    store = SessionStore("recent_recommendations", MemoryBackend(max_entries=2))
+    store["U1"] = {}
+    store["U2"] = {}
+    store.get("U1")
+    store["U3"] = {}
+
+    assert sorted(store) == ["U1", "U3"]
+
+
+def test_backend_from_env(monkeypatch, tmp_path):
+    """SESSION_STORE 選擇 backend"""
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "sessions.db"))
+    assert isinstance(session_store.create_session_backend(), SQLiteBackend)
+
+    monkeypatch.delenv("SESSION_STORE")
+    assert isinstance(session_store.create_session_backend(), MemoryBackend)
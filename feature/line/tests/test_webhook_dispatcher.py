@@ -0,0 +1,247 @@
+# feature/line/tests/test_webhook_dispatcher.py
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+import pytest
+from linebot.v3.exceptions import InvalidSignatureError
+from linebot.v3.messaging import ReplyMessageRequest, TextMessage
+from linebot.v3.messaging.exceptions import ApiException
+from linebot.v3.webhooks import MessageEvent, TextMessageContent
+
+from feature.line.webhook_dispatcher import (
+    AsyncWebhookHandler,
+    EventDispatcher,
+    ReplyOrPushMessagingApi,
+    event_context,
+)
+
+CHANNEL_SECRET = 'test_secret'
+
+
+def make_body(*events):
+    return json.dumps({'destination': 'Ubot', 'events': list(events)})
+
+
+def text_event(user_id, text, timestamp=None):
+    return {
+        'type': 'message',
+        'mode': 'active',
+        'timestamp': timestamp or int(time.time() * 1000),
+        'source': {'type': 'user', 'userId': user_id},
+        'webhookEventId': f'id-{user_id}-{text}',
+        'deliveryContext': {'isRedelivery': False},
+        'replyToken': f'token-{user_id}-{text}',
+        'message': {'id': '1', 'type': 'text', 'text': text, 'quoteToken': 'q'},
+    }
+
+
+def sign(body):
+    digest = hmac.new(CHANNEL_SECRET.encode(), body.encode(), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+class FakeEvent:
+    def __init__(self, user_id, timestamp=None):
+        self.source = type('Source', (), {'user_id': user_id})()
+        self.timestamp = timestamp or int(time.time() * 1000)
+        self.reply_token = 'token'
+
+
+class FakeMessagingApi:
+    def __init__(self, reply_error=None):
+        self.reply_error = reply_error
+        self.replies, self.pushes = [], []
+
+    def reply_message(self, request):
+        if self.reply_error:
+            raise self.reply_error
+        self.replies.append(request)
+
+    def push_message(self, request):
+        self.pushes.append(request)
+
+    def get_profile(self, user_id):
+        return user_id
+
+
+def test_handle_returns_before_event_is_processed():
+    """測試 handle() 驗證簽名後立即返回,事件在背景處理"""
+    handler = AsyncWebhookHandler(CHANNEL_SECRET, max_workers=2)
+    started, release = threading.Event(), threading.Event()
+    received = []
+
+    @handler.add(MessageEvent, message=TextMessageContent)
+    def on_message(event):
+        started.set()
+        release.wait(5)
+        received.append(event.message.text)
+
+    body = make_body(text_event('U1', '旅遊推薦'))
+    start = time.perf_counter()
+    handler.handle(body, sign(body))
+    elapsed = time.perf_counter() - start
+
+    assert started.wait(5)
+    assert received == []
+    assert elapsed < 0.5
+
+    release.set()
+    handler.dispatcher.shutdown()
+    assert received == ['旅遊推薦']
+
+
+def test_invalid_signature_rejected_synchronously():
+    handler = AsyncWebhookHandler(CHANNEL_SECRET)
+    body = make_body(text_event('U1', 'hi'))
+    with pytest.raises(InvalidSignatureError):
+        handler.handle(body, 'bad-signature')
+    handler.dispatcher.shutdown()
+
+
+def test_per_user_concurrency_is_one():
+    """測試同一個使用者的事件依序處理,不同使用者可同時處理"""
+    active, max_active = {}, {}
+    lock = threading.Lock()
+    order = []
+
+    def handle(event):
+        user = event.source.user_id
+        with lock:
+            active[user] = active.get(user, 0) + 1
+            max_active[user] = max(max_active.get(user, 0), active[user])
+        time.sleep(0.05)
+        with lock:
+            active[user] -= 1
+            order.append(user)
+
+    dispatcher = EventDispatcher(handle, max_workers=4, max_pending=20, max_pending_per_user=5)
+    for _ in range(3):
+        assert dispatcher.submit(FakeEvent('A'))
+        assert dispatcher.submit(FakeEvent('B'))
+
+    start = time.perf_counter()
+    dispatcher.shutdown()
+    elapsed = time.perf_counter() - start
+
+    assert max_active == {'A': 1, 'B': 1}
+    assert order.count('A') == 3 and order.count('B') == 3
+    # A 與 B 平行處理,總時間約 3 * 0.05 秒而非 6 * 0.05 秒
+    assert elapsed < 0.28
+    assert dispatcher.pending == 0
+
+
+def test_backpressure():
+    """測試全域與單一使用者的佇列上限"""
+    release = threading.Event()
+    dispatcher = EventDispatcher(lambda event: release.wait(5),
+                                 max_workers=1, max_pending=3, max_pending_per_user=2)
+
+    assert dispatcher.submit(FakeEvent('A'))
+    assert dispatcher.submit(FakeEvent('A'))
+    assert not dispatcher.submit(FakeEvent('A'))   # 單一使用者已滿
+    assert dispatcher.submit(FakeEvent('B'))
+    assert not dispatcher.submit(FakeEvent('C'))   # 全域已滿
+
+    release.set()
+    dispatcher.shutdown()
+    assert dispatcher.pending == 0
+
+
+def test_on_reject_called_when_full():
+    release = threading.Event()
+    rejected = []
+    handler = AsyncWebhookHandler(CHANNEL_SECRET, max_workers=1, max_pending=1,
+                                  on_reject=lambda event: rejected.append(event.reply_token))
+
+    @handler.add(MessageEvent, message=TextMessageContent)
+    def on_message(event):
+        release.wait(5)
+
+    body = make_body(text_event('U1', 'a'), text_event('U2', 'b'))
+    handler.handle(body, sign(body))
+    assert rejected == ['token-U2-b']
+
+    release.set()
+    handler.dispatcher.shutdown()
+
+
+def test_handler_exception_does_not_block_user_queue():
+    handled = []
+
+    def handle(event):
+        handled.append(event)
+        if len(handled) == 1:
+            raise RuntimeError("boom")
+
+    dispatcher = EventDispatcher(handle, max_workers=1)
+    dispatcher.submit(FakeEvent('A'))
+    dispatcher.submit(FakeEvent('A'))
+    dispatcher.shutdown()
+    assert len(handled) == 2
+    assert dispatcher.pending == 0
+
+
+def reply_request(text='hi'):
+    return ReplyMessageRequest(reply_token='token', messages=[TextMessage(text=text)])
+
+
+def test_reply_when_token_fresh():
+    api = FakeMessagingApi()
+    ReplyOrPushMessagingApi(api, FakeEvent('U1')).reply_message(reply_request())
+    assert len(api.replies) == 1 and api.pushes == []
+
+
+def test_push_when_token_stale():
+    """測試事件超過 reply token 有效時間時改用 push_message"""
+    api = FakeMessagingApi()
+    stale = FakeEvent('U1', timestamp=int((time.time() - 120) * 1000))
+    ReplyOrPushMessagingApi(api, stale).reply_message(reply_request('行程'))
+
+    assert api.replies == []
+    assert api.pushes[0].to == 'U1'
+    assert api.pushes[0].messages[0].text == '行程'
+
+
+def test_push_when_reply_token_invalid():
+    api = FakeMessagingApi(reply_error=ApiException(status=400, reason='Invalid reply token'))
+    ReplyOrPushMessagingApi(api, FakeEvent('U1')).reply_message(reply_request())
+    assert api.pushes[0].to == 'U1'
+
+
+def test_other_errors_and_methods_pass_through():
+    api = FakeMessagingApi(reply_error=ApiException(status=500))
+    proxy = ReplyOrPushMessagingApi(api, FakeEvent('U1'))
+    with pytest.raises(ApiException):
+        proxy.reply_message(reply_request())
+    assert proxy.get_profile('U1') == 'U1'
+
+
+def test_shared_proxy_uses_event_context():
+    """測試共用的代理依 event_context 決定 push 對象,執行緒間互不影響"""
+    api = FakeMessagingApi()
+    proxy = ReplyOrPushMessagingApi(api)
+    stale = int((time.time() - 120) * 1000)
+
+    def worker(user_id):
+        with event_context(FakeEvent(user_id, timestamp=stale)):
+            time.sleep(0.01)
+            proxy.reply_message(reply_request(user_id))
+
+    threads = [threading.Thread(target=worker, args=(f'U{i}',)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted((p.to, p.messages[0].text) for p in api.pushes) == [
+        (f'U{i}', f'U{i}') for i in range(5)
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,274 @@
+"""
+LINE webhook 背景處理
+
+負責:
+1. /callback 只驗證簽名就回 200,事件丟到背景執行
+2. 有上限的 worker pool + 等待佇列,滿了就拒絕(backpressure)
+3. 同一個使用者同時只處理一個事件,其餘依序排隊
+4. reply token 過期(或已用過)時改用 push_message 送出
+"""
+
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from linebot.v3 import WebhookHandler
+from linebot.v3.messaging import PushMessageRequest
+from linebot.v3.messaging.exceptions import ApiException
+from linebot.v3.webhooks import MessageEvent
+
+# LINE 的 reply token 需在收到事件後約 1 分鐘內使用,保留一點緩衝
+REPLY_TOKEN_TTL_SECONDS = 50
+
+# 目前正在處理的事件,讓共用的 ReplyOrPushMessagingApi 知道要 push 給誰
+_current_event: ContextVar = ContextVar('line_current_event', default=None)
+
+
+@contextmanager
+def event_context(event) -> Iterator[None]:
+    """在區塊內把 event 設為目前處理中的事件
+
+    使用範例:
+        >>> with event_context(event):
+        >>>     command_handler.handle_trip_command(event, parameter, line_id)
+    """
+    token = _current_event.set(event)
+    try:
+        yield
+    finally:
+        _current_event.reset(token)
+
+
+def event_user_id(event) -> Optional[str]:
+    """取得事件的使用者ID,沒有則回傳None"""
+    source = getattr(event, 'source', None)
+    return getattr(source, 'user_id', None)
+
+
+def event_age_seconds(event) -> float:
+    """事件從 LINE 送出到現在經過的秒數(event.timestamp 為毫秒)"""
+    timestamp = getattr(event, 'timestamp', None)
+    if not timestamp:
+        return 0.0
+    return max(0.0, time.time() - timestamp / 1000)
+
+
+class ReplyOrPushMessagingApi:
+    """MessagingApi 代理
+
+    handler 照原本呼叫 reply_message / reply_message_with_http_info,
+    reply token 已過期或回覆失敗(400)時改用 push_message 送給同一個使用者。
+    其他方法直接轉給原本的 MessagingApi。
+
+    沒有指定 event 時使用 event_context() 設定的事件,
+    因此同一個實例可以在多個執行緒間共用。
+    """
+
+    def __init__(self, messaging_api, event=None, reply_token_ttl: float = REPLY_TOKEN_TTL_SECONDS):
+        """初始化
+
+        Args:
+            messaging_api: LINE Bot的MessagingApi實例
+            event: 固定的 LINE event,None 則每次從 event_context 取得
+            reply_token_ttl: reply token 視為有效的秒數
+        """
+        self._api = messaging_api
+        self._event = event
+        self._reply_token_ttl = reply_token_ttl
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    def reply_message(self, reply_message_request, *args, **kwargs):
+        return self._reply(self._api.reply_message, self._api.push_message,
+                           reply_message_request, *args, **kwargs)
+
+    def reply_message_with_http_info(self, reply_message_request, *args, **kwargs):
+        return self._reply(self._api.reply_message_with_http_info,
+                           self._api.push_message_with_http_info,
+                           reply_message_request, *args, **kwargs)
+
+    def _reply(self, reply_func, push_func, request, *args, **kwargs):
+        event = self._event if self._event is not None else _current_event.get()
+        user_id = event_user_id(event)
+        if user_id is None:
+            return reply_func(request, *args, **kwargs)
+
+        if event_age_seconds(event) > self._reply_token_ttl:
+            return self._push(push_func, user_id, request)
+
+        try:
+            return reply_func(request, *args, **kwargs)
+        except ApiException as e:
+            # Invalid reply token: 過期或同一個 token 已經回覆過
+            if e.status != 400:
+                raise
+            return self._push(push_func, user_id, request)
+
+    def _push(self, push_func, user_id, request):
+        return push_func(PushMessageRequest(
+            to=user_id,
+            messages=request.messages,
+            notification_disabled=request.notification_disabled,
+        ))
+
+
+class EventDispatcher:
+    """有上限的背景事件處理器
+
+    - max_workers: 同時處理的事件數
+    - max_pending: 整個 process 內排隊 + 處理中的事件上限
+    - max_pending_per_user: 單一使用者排隊 + 處理中的事件上限
+    同一個使用者的事件依序處理(同時最多 1 個)。
+    """
+
+    def __init__(self,
+                 handle_event: Callable,
+                 max_workers: int = 4,
+                 max_pending: int = 32,
+                 max_pending_per_user: int = 3,
+                 logger=None):
+        """初始化
+
+        Args:
+            handle_event: 實際處理單一事件的函式
+            max_workers: worker 數量
+            max_pending: 全部使用者的事件上限
+            max_pending_per_user: 單一使用者的事件上限
+            logger: 可選的logger實例
+        """
+        self.handle_event = handle_event
+        self.max_pending = max_pending
+        self.max_pending_per_user = max_pending_per_user
+        self.logger = logger
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='line-event')
+        self._lock = threading.Lock()
+        self._user_queues: Dict[str, deque] = {}
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """目前排隊 + 處理中的事件數"""
+        return self._pending
+
+    def submit(self, event, *args, user_id: Optional[str] = None) -> bool:
+        """把事件放進佇列
+
+        Args:
+            event: LINE event
+            *args: 額外傳給 handle_event 的參數
+            user_id: 分組用的使用者ID,預設取 event.source.user_id
+
+        Returns:
+            bool: False 表示佇列已滿,事件沒有被接受
+        """
+        key = user_id or event_user_id(event) or id(event)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+
+            queue = self._user_queues.get(key)
+            if queue is not None and len(queue) >= self.max_pending_per_user:
+                return False
+
+            self._pending += 1
+            if queue is not None:
+                # 這個使用者已有事件在處理,排在後面
+                queue.append((event, args))
+                return True
+
+            self._user_queues[key] = deque([(event, args)])
+
+        self._executor.submit(self._drain, key)
+        return True
+
+    def _drain(self, key):
+        """依序處理同一個使用者的事件,直到佇列清空"""
+        while True:
+            with self._lock:
+                event, args = self._user_queues[key][0]
+
+            try:
+                self.handle_event(event, *args)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"背景處理事件時發生錯誤: {str(e)}")
+
+            with self._lock:
+                queue = self._user_queues[key]
+                queue.popleft()
+                self._pending -= 1
+                if not queue:
+                    del self._user_queues[key]
+                    return
+
+    def shutdown(self, wait: bool = True):
+        """停止接受新事件並等待處理中的事件完成"""
+        self._executor.shutdown(wait=wait)
+
+
+class AsyncWebhookHandler(WebhookHandler):
+    """簽名驗證後立即返回,事件交給 EventDispatcher 在背景處理
+
+    用法與 WebhookHandler 相同(@handler.add(...)),
+    handle() 只負責驗證簽名與排入佇列;佇列已滿時呼叫 on_reject(event)。
+    """
+
+    def __init__(self,
+                 channel_secret: str,
+                 max_workers: int = 4,
+                 max_pending: int = 32,
+                 max_pending_per_user: int = 3,
+                 on_reject: Optional[Callable] = None,
+                 logger=None):
+        super().__init__(channel_secret)
+        self.on_reject = on_reject
+        self.logger = logger
+        self.dispatcher = EventDispatcher(
+            self.dispatch,
+            max_workers=max_workers,
+            max_pending=max_pending,
+            max_pending_per_user=max_pending_per_user,
+            logger=logger,
+        )
+
+    def handle(self, body, signature):
+        """驗證簽名並把事件排入背景佇列(簽名錯誤時拋出 InvalidSignatureError)"""
+        payload = self.parser.parse(body, signature, as_payload=True)
+
+        for event in payload.events:
+            if not self.dispatcher.submit(event, payload.destination) and self.on_reject:
+                try:
+                    self.on_reject(event)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"通知使用者系統忙碌時發生錯誤: {str(e)}")
+
+    def dispatch(self, event, destination=None):
+        """依事件類型呼叫 @handler.add 註冊的函式(規則與 WebhookHandler.handle 相同)"""
+        func = None
+        if isinstance(event, MessageEvent):
+            func = self._handlers.get(
+                f"{event.__class__.__name__}_{event.message.__class__.__name__}")
+        if func is None:
+            func = self._handlers.get(event.__class__.__name__)
+        if func is None:
+            func = self._default
+        if func is None:
+            return
+
+        arg_spec = inspect.getfullargspec(func)
+        if arg_spec.varargs is not None or len(arg_spec.args) == 2:
+            func(event, destination)
+        elif len(arg_spec.args) == 1:
+            func(event)
+        else:
+            func()
@@ -2,40 +2,156 @@ import openai
 import json
 from dotenv import load_dotenv
 import os
+import threading
 import concurrent.futures  # 引入並行處理模組
 
+from feature.llm.async_client import AsyncLLMClient, get_async_llm_client
+from feature.llm.response_cache import get_llm_cache, make_cache_key
 from feature.llm.utils import system_prompt
-from feature.llm.utils.extractor.plan_basic_req_extractor import plan_basic_req_extractor
-from feature.llm.utils.extractor.special_request_extractor import special_request_extractor
-from feature.llm.utils.extractor.trip_basic_req_extractor import trip_basic_req_extractor
-from feature.llm.utils.extractor.plan_preferred_statement_extractor import plan_preferred_statement_extractor
-from feature.llm.utils.extractor.trip_preferred_statement_extractor import trip_preferred_statement_extractor
-from feature.llm.utils.extractor.trip_restart_extractor import trip_restart_extractor
-from feature.llm.utils.extractor.summarize_history_extractor import summarize_history_extractor
+from feature.llm.utils.extractor.schemas import validate_section
+from feature.trip.src.core.utils.logger import get_logger, lazy
+
+logger = get_logger('llm')
+
+# 同步呼叫時每個請求的逾時秒數(非同步 client 另有整體期限與 hedge,見 async_client.py)
+REQUEST_TIMEOUT = float(os.getenv('LLM_DEADLINE', 20))
+
+# 所有 LLM_Manager 共用的執行緒池,每個 worker 一個,不再每次 Thinking_fun / Cloud_fun 建立
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """取得 process 共用的執行緒池(LLM_EXECUTOR_WORKERS,預設 32)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=int(os.getenv('LLM_EXECUTOR_WORKERS', 32)),
+                    thread_name_prefix='llm'
+                )
+    return _executor
+
+
+def _then(future, fn):
+    """
+    future 完成後(在完成它的執行緒上)執行 fn(result),回傳新的 Future
+    不佔用執行緒池,所以在池內等待也不會互相卡住;例外會傳給新的 Future
+    """
+    chained = concurrent.futures.Future()
+
+    def callback(done):
+        try:
+            chained.set_result(fn(done.result()))
+        except Exception as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(callback)
+    return chained
+
+
+# Thinking_fun mode="fused" 回傳的 JSON 物件各段,依序對應 Thinking_A / B / C / restart
+FUSED_SECTIONS = ("preferred", "special", "basic", "restart")
+
+
+def validated(section, data):
+    """
+    依 schemas 認證一段 LLM 輸出,回傳認證後的值
+    整段使用預設值時記錄 warning,部分欄位使用預設值時記錄 debug(明細見 ValidationReport)
+    """
+    report = validate_section(section, data)
+    if report.fallback:
+        logger.warning("%s", lazy(report.describe))
+    elif not report.ok:
+        logger.debug("%s", lazy(report.describe))
+    return report.value
+
+
+# Thinking_fun 各段的 (prompt, 格式, 認證),順序即回傳順序
+THINKING_SECTIONS = {
+    'Thinking_A': (system_prompt.Thinking_A, "List[5 x Dict]", lambda data: validated('Thinking_A', data)),
+    'Thinking_B': (system_prompt.Thinking_B, "List[Dict]", lambda data: validated('Thinking_B', data)),
+    'Thinking_C': (system_prompt.Thinking_C, "List[Dict]", lambda data: validated('Thinking_C', data)),
+    'restart': (system_prompt.restart, "List", lambda data: validated('restart', data)),
+}
+
 
 class LLM_Manager:
-    def __init__(self, ChatGPT_api_key):
+    MODEL = "gpt-3.5-turbo"
+    TEMPERATURE = 0.7
+
+    def __init__(self, ChatGPT_api_key, use_cache=True, client=None):
+        """
+        Args:
+            ChatGPT_api_key: OpenAI API 金鑰
+            use_cache: 是否使用 LLM 回應快取(見 response_cache.py),個別呼叫可再用 use_cache 覆寫
+            client: "sync"(openai.ChatCompletion.create)、"async"(共用的 AsyncLLMClient)
+                    或 AsyncLLMClient 物件,None 時依環境變數 LLM_CLIENT(預設 sync)
+        """
         openai.api_key = ChatGPT_api_key  # 使用 ChatGPT_api_key 來設定 OpenAI API 金鑰
+        self.use_cache = use_cache
+
+        client = client or os.getenv('LLM_CLIENT', 'sync')
+        if client == 'async':
+            client = get_async_llm_client(ChatGPT_api_key)
+        self.client = client if isinstance(client, AsyncLLMClient) else None
+        # 累計實際呼叫 API 的次數與 token 數(命中快取不計),A/B 比較用
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._usage_lock = threading.Lock()
 
-    def __Query(self, prompt, user_input, format):
+    def __Query(self, prompt, user_input, format, use_cache=None, **options):
         """
         使用 OpenAI API 生成回應
         format = "list" or "List[Dict]"
+        use_cache = None 時依 self.use_cache
+        options = 覆寫或額外的 ChatCompletion 參數(例如 max_tokens、response_format)
         """
         # 檢查類型檢查和轉換,使用 json.dumps 轉換為字符串
         if isinstance(user_input, (list, dict)):
             user_input = json.dumps(user_input, ensure_ascii=False)
 
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        if use_cache is None:
+            use_cache = self.use_cache
+        cache = get_llm_cache() if use_cache else None
+        if cache is not None:
+            cache_key = make_cache_key(self.MODEL, prompt, user_input, self.TEMPERATURE)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        params = {
+            "model": self.MODEL,
+            "messages": [
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": user_input}
             ],
-            temperature=0.7,
-            max_tokens=800
-        )
+            "temperature": self.TEMPERATURE,
+            "max_tokens": 800,
+            **options
+        }
+        if self.client is not None:
+            response = self.client.complete(**params)
+        else:
+            response = openai.ChatCompletion.create(request_timeout=REQUEST_TIMEOUT, **params)
+        self.__record_usage(response)
         content = response['choices'][0]['message']['content'].strip()
+        data = self.__parse(content, format)
+
+        # 解析失敗('none')不快取,下次重新詢問
+        if cache is not None and data != 'none':
+            cache.set(cache_key, data)
+        return data
+
+    def __record_usage(self, response):
+        usage = response.get('usage') or {}
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += usage.get('prompt_tokens', 0)
+            self.usage["completion_tokens"] += usage.get('completion_tokens', 0)
+
+    def __parse(self, content, format):
+        """把 LLM 回應整理成 JSON 物件,失敗時回傳 'none'"""
         content = (
             content
                 .replace("：", ":")
@@ -69,7 +185,7 @@ class LLM_Manager:
                 return data
 
             except Exception as e:
-                print('LLM 在解 json 格式時即錯誤，將其回傳 "none" 給提取器輸出 預設值')
+                logger.warning('LLM 回應無法解析為 JSON,回傳 "none" 由認證使用預設值: %s', e)
                 return 'none'
 
     def summarize_history(self, history_text: str) -> str:
@@ -84,89 +200,113 @@ class LLM_Manager:
         response = self.__Query(
             prompt=system_prompt.summarize_history,
             user_input=history_text,
-            format="List"
+            format="List",
+            use_cache=False  # 每次的歷史記錄都不同,不需要快取
         )
 
-        '''
-        歷史大綱 LLM 認證程序 
-        '''
-        print('========歷史大綱 LLM 認證程序========')
-        print('認證 - 總共一項資料 :')
-        # 歷史大剛提取器，確保  history 值格式正確無誤，為 list, length=1, 內容為一個字串, 字數大於 limit
-        response = summarize_history_extractor(response, 10)
-        print('=======================================\n\n')
+        # 歷史大綱認證，確保 history 值為 list, length=1, 內容為一個字串, 字數大於 10
+        response = validated('summarize_history', response)
 
         # __Query會回傳['歷史總結語句'],取第一個元素
         return response[0]
 
 
-    def Thinking_fun(self, user_input):
-        # 使用 ThreadPoolExecutor 來並行處理 API 請求
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {
-                'Thinking_A': executor.submit(self.__Query, system_prompt.Thinking_A, user_input, "List[5 x Dict]"),
-                'Thinking_B': executor.submit(self.__Query, system_prompt.Thinking_B, user_input, "List[Dict]"),
-                'Thinking_C': executor.submit(self.__Query, system_prompt.Thinking_C, user_input, "List[Dict]"),
-                'restart': executor.submit(self.__Query, system_prompt.restart, user_input, "List")
-            }
+    def Thinking_fun(self, user_input, use_cache=None, mode=None):
+        """
+        旅遊推薦的意圖分析,回傳 [Thinking_A, Thinking_B, Thinking_C, restart](皆經過提取器認證)
 
-            # 等待所有任務完成並取得結果
-            Thinking = []
-            for future in futures.values():
-                result = future.result()
-                Thinking.append(result)
-            
-            '''
-            旅遊推薦端 LLM 認證程序 
-            '''
-            print('========旅遊推薦端 LLM 認證程序========')
-            print('認證 - 總共四項資料 :')
-            # 使用偏好語句篩選器，確保每句字數 > limit
-            Thinking[0] = trip_preferred_statement_extractor(Thinking[0], limit=10)
-
-            # 使用特殊篩選提取器，確保其格式無誤
-            Thinking[1] = special_request_extractor(Thinking[1]) 
-
-            # 使用旅遊基本需求提取器，除了 [出發地點、結束地點] 只能確認是字串格式外 , 確保LLM格式無誤
-            Thinking[2] = trip_basic_req_extractor(Thinking[2])
-
-            # 使用 restart 提取器 確保  LLM restart 值格式正確無誤，為 [int], length=1
-            Thinking[3] = trip_restart_extractor(Thinking[3])
-            print('=======================================\n\n')
-
-            return Thinking
-
-    def Cloud_fun(self, user_input):
-        # 使用 ThreadPoolExecutor 來並行處理 API 請求
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {
-                'Cloud_A': executor.submit(self.__Query, system_prompt.Cloud_A, user_input, "List"),
-                'Cloud_B': executor.submit(self.__Query, system_prompt.Cloud_B, user_input, "List[Dict]"),
-                'Cloud_C': executor.submit(self.__Query, system_prompt.Cloud_C, user_input, "List[Dict]")
-            }
+        mode:
+            "split" - 四個 prompt 各自並行呼叫(預設)
+            "fused" - 一次呼叫取得四段 JSON(見 system_prompt.Thinking_fused)
+            None 時依環境變數 LLM_THINKING_MODE
+        """
+        mode = mode or os.getenv('LLM_THINKING_MODE', 'split')
+        if mode == 'fused':
+            return self.__validate_thinking(self.__Thinking_fused(user_input, use_cache))
+
+        # 使用共用的執行緒池來並行處理 API 請求
+        executor = get_llm_executor()
+        futures = {
+            name: executor.submit(self.__Query, prompt, user_input, format, use_cache)
+            for name, (prompt, format, _) in THINKING_SECTIONS.items()
+        }
+
+        # 等待所有任務完成並取得結果
+        Thinking = []
+        for future in futures.values():
+            result = future.result()
+            Thinking.append(result)
+
+        return self.__validate_thinking(Thinking)
+
+    def Thinking_futures(self, user_input, use_cache=None, mode=None):
+        """
+        與 Thinking_fun 相同,但各段分別回傳 Future,結果已經過提取器認證
+        先完成的段落可以先使用,例如 Thinking_A 認證後就開始向量檢索,其他段落繼續呼叫 LLM
 
-            # 等待所有任務完成並取得結果
-            Cloud = []
-            for future in futures.values():
-                result = future.result()
-                Cloud.append(result)
+        fused 模式只有一次呼叫,四個 Future 會同時完成
 
-            '''
-            情境搜索端 LLM 認證程序 
-            '''
-            print('========情境搜索端 LLM 認證程序========')
-            print('認證 - 總共三項資料 :')
-            # 使用情境搜尋偏好句篩選器，確保格式字串長度無誤
-            Cloud[0] = plan_preferred_statement_extractor(Cloud[0], limit = 10)
+        Returns:
+            Dict[str, Future]: {'Thinking_A', 'Thinking_B', 'Thinking_C', 'restart'}
+        """
+        mode = mode or os.getenv('LLM_THINKING_MODE', 'split')
+        executor = get_llm_executor()
+
+        if mode == 'fused':
+            fused = executor.submit(self.__Thinking_fused, user_input, use_cache)
+            return {
+                name: _then(fused, lambda raw, i=i, validate=validate: validate(raw[i]))
+                for i, (name, (_, _, validate)) in enumerate(THINKING_SECTIONS.items())
+            }
 
-            # 使用特殊篩選提取器，確保其格式無誤
-            Cloud[1] = special_request_extractor(Cloud[1]) 
+        return {
+            name: _then(executor.submit(self.__Query, prompt, user_input, format, use_cache), validate)
+            for name, (prompt, format, validate) in THINKING_SECTIONS.items()
+        }
 
-            # 使用旅遊基本需求提取器, 確保LLM格式無誤
-            Cloud[2] = plan_basic_req_extractor(Cloud[2])
-            print('=======================================\n\n')
+    def __Thinking_fused(self, user_input, use_cache=None):
+        """
+        一次呼叫取得四段結果,整理成與四次呼叫相同的未認證格式
+        任何一段缺少或整體解析失敗時,該段為 'none',由提取器使用預設值
+        """
+        fused = self.__Query(
+            system_prompt.Thinking_fused, user_input, "Dict", use_cache,
+            max_tokens=1500,
+            response_format={"type": "json_object"}
+        )
+        if not isinstance(fused, dict):
+            fused = {}
+
+        preferred, special, basic, restart = (
+            fused.get(section, 'none') for section in FUSED_SECTIONS)
+        # Thinking_B / Thinking_C 在四次呼叫時是 "List[Dict]" 格式
+        return [preferred, [special], [basic], restart]
 
-            return Cloud
+    def __validate_thinking(self, Thinking):
+        '''
+        旅遊推薦端 LLM 認證程序(各段規則見 utils/extractor/schemas.py)
+        '''
+        return [validate(data) for data, (_, _, validate) in zip(Thinking, THINKING_SECTIONS.values())]
+
+    def Cloud_fun(self, user_input, use_cache=None):
+        # 使用共用的執行緒池來並行處理 API 請求
+        executor = get_llm_executor()
+        futures = {
+            'Cloud_A': executor.submit(self.__Query, system_prompt.Cloud_A, user_input, "List", use_cache),
+            'Cloud_B': executor.submit(self.__Query, system_prompt.Cloud_B, user_input, "List[Dict]", use_cache),
+            'Cloud_C': executor.submit(self.__Query, system_prompt.Cloud_C, user_input, "List[Dict]", use_cache)
+        }
+
+        # 等待所有任務完成並取得結果
+        Cloud = []
+        for future in futures.values():
+            result = future.result()
+            Cloud.append(result)
+
+        # 情境搜索端 LLM 認證程序
+        Cloud = [validated(section, data) for section, data in zip(futures, Cloud)]
+
+        return Cloud
 
 
 if __name__ == "__main__":
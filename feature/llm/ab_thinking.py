@@ -0,0 +1,138 @@
+"""
+Thinking_fun 四次呼叫 (split) 與單次呼叫 (fused) 的 A/B 比較
+
+對每個輸入分別執行兩種模式(不使用快取),比較:
+    1. 延遲
+    2. 實際送出的 prompt / completion token 數
+    3. 提取器認證後四段結果的一致程度
+       - preferred: 時段順序一致且兩邊都不是預設句的比例(形容句本身不會完全相同)
+       - special / basic: 相同欄位值的比例
+       - restart: 是否相同
+
+使用方式:
+    python -m feature.llm.ab_thinking                  # 使用內建的範例輸入
+    python -m feature.llm.ab_thinking -f inputs.txt    # 一行一個輸入
+    python -m feature.llm.ab_thinking -n 3             # 每個輸入重複 3 次
+"""
+
+import argparse
+import os
+import time
+from statistics import mean
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from feature.llm.LLM import LLM_Manager
+from feature.llm.utils.extractor.schemas import TRIP_PREFERRED_DEFAULTS
+
+SAMPLE_INPUTS = [
+    "隨便規劃台北一日遊",
+    "想去台北文青的地方，吃午餐要便宜又好吃，下午想去逛有特色的景點，晚餐要可以跟朋友聚餐",
+    "下禮拜六帶小孩去淡水玩,開車,要有免費停車場,預算3000",
+    "早上十點從西門町出發,晚上八點前在信義區結束,想吃火鍋",
+    "不想去星巴克,其他照舊",
+]
+
+MODES = ("split", "fused")
+
+
+def _field_agreement(a: Dict, b: Dict) -> float:
+    keys = set(a) | set(b)
+    if not keys:
+        return 1.0
+    return sum(a.get(k) == b.get(k) for k in keys) / len(keys)
+
+
+def _preferred_agreement(a: List[Dict], b: List[Dict], defaults: List[Dict]) -> float:
+    # 形容句每次生成都不同,只比較時段順序與是否通過認證(不是預設句)
+    pairs = list(zip(a, b))
+    if not pairs:
+        return 0.0
+    return sum(
+        list(x) == list(y) and x not in defaults and y not in defaults
+        for x, y in pairs
+    ) / len(pairs)
+
+
+def agreement(split: List, fused: List) -> Dict[str, float]:
+    """
+    比較兩種模式認證後的結果
+
+    Returns:
+        Dict[str, float]: 各段的一致比例 (0~1)
+    """
+    # 認證失敗時使用的預設句
+    defaults = TRIP_PREFERRED_DEFAULTS
+
+    return {
+        "preferred": _preferred_agreement(split[0], fused[0], defaults),
+        "special": _field_agreement(split[1][0], fused[1][0]),
+        "basic": _field_agreement(split[2][0], fused[2][0]),
+        "restart": float(split[3] == fused[3]),
+    }
+
+
+def run_ab(llm: LLM_Manager, inputs: List[str], repeat: int = 1) -> Dict:
+    """
+    執行 A/B 比較
+
+    Args:
+        llm: LLM_Manager(會累計 usage)
+        inputs: 使用者輸入列表
+        repeat: 每個輸入重複的次數
+
+    Returns:
+        Dict: {
+            "split" / "fused": {"latency": [秒], "prompt_tokens": int, "completion_tokens": int, "calls": int},
+            "agreement": [每次的各段一致比例]
+        }
+    """
+    report = {mode: {"latency": [], "prompt_tokens": 0, "completion_tokens": 0, "calls": 0}
+              for mode in MODES}
+    report["agreement"] = []
+
+    for user_input in inputs:
+        for _ in range(repeat):
+            results = {}
+            for mode in MODES:
+                before = dict(llm.usage)
+                start = time.perf_counter()
+                results[mode] = llm.Thinking_fun(user_input, use_cache=False, mode=mode)
+                report[mode]["latency"].append(time.perf_counter() - start)
+                for key in ("prompt_tokens", "completion_tokens", "calls"):
+                    report[mode][key] += llm.usage[key] - before[key]
+            report["agreement"].append(agreement(results["split"], results["fused"]))
+
+    return report
+
+
+def print_report(report: Dict) -> None:
+    print("\n======== Thinking_fun A/B ========")
+    for mode in MODES:
+        stats = report[mode]
+        latency = sorted(stats["latency"])
+        p95 = latency[min(len(latency) - 1, int(len(latency) * 0.95))]
+        print(f"{mode:>6}: 平均 {mean(latency) * 1e3:.0f} ms, p95 {p95 * 1e3:.0f} ms, "
+              f"呼叫 {stats['calls']} 次, prompt {stats['prompt_tokens']} tokens, "
+              f"completion {stats['completion_tokens']} tokens")
+
+    print("一致程度:")
+    for section in ("preferred", "special", "basic", "restart"):
+        print(f"  {section:>9}: {mean(a[section] for a in report['agreement']):.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thinking_fun split / fused A/B 比較")
+    parser.add_argument("-f", "--file", help="輸入檔,一行一個使用者輸入")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="每個輸入重複的次數")
+    args = parser.parse_args()
+
+    load_dotenv()
+    inputs = SAMPLE_INPUTS
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            inputs = [line.strip() for line in f if line.strip()]
+
+    llm = LLM_Manager(os.getenv('ChatGPT_api_key'))
+    print_report(run_ab(llm, inputs, args.repeat))
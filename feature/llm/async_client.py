@@ -0,0 +1,215 @@
+"""
+OpenAI 非同步呼叫(共用連線池、每次呼叫的期限與 hedged retry)
+
+每個 process(gunicorn worker)有一個背景執行緒跑 event loop,
+所有請求透過同一個 aiohttp.ClientSession 送出,連線會重複使用。
+同步程式(例如 LLM_Manager 的執行緒)以 complete() 把請求交給這個 loop 並等待結果。
+
+每次呼叫:
+    1. 整體不超過 deadline 秒,超過時丟出 LLMTimeoutError
+    2. 第一個請求超過 hedge_after 秒還沒回應時,再送一個相同的請求(hedge),取先回來的
+    3. 逾時、連線錯誤、5xx、429 會在期限內重試,最多送出 max_attempts 個請求
+    4. 其他錯誤(例如 400、401)直接丟出
+
+環境變數(get_async_llm_client 使用):
+    LLM_DEADLINE       每次呼叫的期限秒數(預設 20)
+    LLM_HEDGE_AFTER    幾秒沒回應就送出 hedge 請求(預設 6)
+    LLM_MAX_ATTEMPTS   最多送出的請求數(預設 2)
+    LLM_POOL_SIZE      連線池大小(預設 32)
+
+使用方式:
+```python
+client = get_async_llm_client(api_key)
+response = client.complete(model="gpt-3.5-turbo", messages=[...])   # 同步呼叫
+response = await client.acomplete(model="gpt-3.5-turbo", messages=[...])  # 在 client.loop 內
+```
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import aiohttp
+import openai
+from openai import error as openai_error
+
+# 可以重試的錯誤
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai_error.Timeout,
+    openai_error.APIConnectionError,
+    openai_error.APIError,
+    openai_error.RateLimitError,
+    openai_error.ServiceUnavailableError,
+)
+
+
+class LLMTimeoutError(TimeoutError):
+    """超過呼叫期限仍沒有成功的回應"""
+
+
+class AsyncLLMClient:
+    """
+    共用連線池的 OpenAI ChatCompletion 非同步呼叫
+
+    Args:
+        api_key: OpenAI API 金鑰
+        api_base: API 位址,None 時使用 openai.api_base(測試時指向本機的假伺服器)
+        deadline: 每次呼叫的期限秒數
+        hedge_after: 幾秒沒回應就送出 hedge 請求
+        max_attempts: 最多送出的請求數(含 hedge 與重試)
+        pool_size: 連線池大小
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: Optional[str] = None,
+        deadline: float = 20.0,
+        hedge_after: float = 6.0,
+        max_attempts: int = 2,
+        pool_size: int = 32
+    ):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.max_attempts = max_attempts
+        self.pool_size = pool_size
+
+        self.loop = asyncio.new_event_loop()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="llm-event-loop", daemon=True)
+        self._thread.start()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # 只在 self.loop 內建立與使用
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60))
+        return self._session
+
+    async def _create(self, **params) -> Dict[str, Any]:
+        # openai.aiosession 是 ContextVar,每個 task 各自設定
+        openai.aiosession.set(await self._get_session())
+        return await openai.ChatCompletion.acreate(
+            api_key=self.api_key, api_base=self.api_base, **params)
+
+    async def acomplete(self, deadline: Optional[float] = None, **params) -> Dict[str, Any]:
+        """
+        在 self.loop 內呼叫 ChatCompletion(含期限、hedge 與重試)
+
+        Args:
+            deadline: 這次呼叫的期限秒數,None 時使用 self.deadline
+            **params: ChatCompletion 參數(model、messages、temperature...)
+
+        Returns:
+            Dict[str, Any]: ChatCompletion 回應
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + (deadline or self.deadline)
+        pending = set()
+        attempts = 0
+        last_error = None
+
+        def launch():
+            nonlocal attempts
+            attempts += 1
+            pending.add(asyncio.ensure_future(
+                self._create(request_timeout=max(end - loop.time(), 0.001), **params)))
+
+        launch()
+        try:
+            while pending:
+                remaining = end - loop.time()
+                if remaining <= 0:
+                    break
+                can_hedge = attempts < self.max_attempts
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=min(remaining, self.hedge_after) if can_hedge else remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    if not isinstance(last_error, RETRYABLE_ERRORS):
+                        raise last_error
+
+                # 沒有回應時送出 hedge;失敗且沒有其他請求時立即重試
+                if can_hedge and (not done or not pending):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is not None and end - loop.time() > 0:
+            raise last_error
+        raise LLMTimeoutError(
+            f"LLM 呼叫超過 {deadline or self.deadline} 秒(共送出 {attempts} 個請求)"
+        ) from last_error
+
+    def complete(self, deadline: Optional[float] = None, **params) -> Dict[str, Any]:
+        """
+        同步呼叫 acomplete(從其他執行緒呼叫,不能在 self.loop 內使用)
+
+        Returns:
+            Dict[str, Any]: ChatCompletion 回應
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.acomplete(deadline=deadline, **params), self.loop)
+        return future.result()
+
+    def close(self) -> None:
+        """關閉連線池並停止 event loop"""
+        if self.loop.is_closed():
+            return
+
+        async def _close():
+            if self._session is not None:
+                await self._session.close()
+
+        asyncio.run_coroutine_threadsafe(_close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_clients: Dict[tuple, AsyncLLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_async_llm_client(api_key: str) -> AsyncLLMClient:
+    """
+    取得 process 共用的 AsyncLLMClient(依 API 金鑰與 process 各一個)
+
+    gunicorn fork 出的 worker 不會沿用父 process 的 event loop 執行緒。
+    """
+    key = (os.getpid(), api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = AsyncLLMClient(
+                    api_key,
+                    deadline=float(os.getenv("LLM_DEADLINE", 20)),
+                    hedge_after=float(os.getenv("LLM_HEDGE_AFTER", 6)),
+                    max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", 2)),
+                    pool_size=int(os.getenv("LLM_POOL_SIZE", 32))
+                )
+                _clients[key] = client
+    return client
+
+
+def close_async_llm_clients() -> None:
+    """關閉這個 process 的所有 AsyncLLMClient(程式結束或測試時使用)"""
+    with _clients_lock:
+        clients = [c for (pid, _), c in _clients.items() if pid == os.getpid()]
+        _clients.clear()
+    for client in clients:
+        client.close()
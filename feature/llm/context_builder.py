@@ -0,0 +1,230 @@
+"""
+給 LLM 的輸入文字(歷史摘要、新對話、之前的行程、當前輸入)在 token 預算內組合
+
+之前的行程只保留 restart 判斷需要的欄位(step、名稱、類型、時段、時間),
+不再送出營業時間、座標與交通明細。超過預算時依序:
+    1. 之前的行程去掉時間欄位
+    2. 從最舊的新對話開始捨棄
+    3. 截短歷史摘要
+當前輸入一定保留。
+
+token 數以本機計算: 有安裝 tiktoken 時使用對應模型的編碼,否則以字元估算
+(中日韓字元每字 1 token,其他字元每 4 個 1 token)。
+tiktoken 不在專案依賴中,預設部署下預算與 ContextReport 的數字都是估算值,
+與 API 回傳的 usage 可能有落差。有安裝 tiktoken 時,第一次取得編碼會下載 BPE 檔,
+請在啟動時呼叫 warm_up_tokenizer(),取得失敗時改用估算。
+
+環境變數:
+    LLM_CONTEXT_BUDGET  輸入文字的 token 上限(預設 1500)
+
+使用方式:
+```python
+builder = ContextBuilder()
+text, report = builder.build("不想去星巴克", summary=..., new_messages=[...], previous_trip=[...])
+print(report.saved)   # 與原本 str(previous_trip) 組合方式相比省下的 token 數
+```
+"""
+
+import json
+import math
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from feature.trip.src.core.utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # 沒有安裝時以字元估算
+    tiktoken = None
+
+# 之前的行程送給 LLM 的欄位(見 system_prompt.restart 的輸入格式)
+TRIP_CONTEXT_FIELDS = ("step", "name", "label", "period", "start_time", "end_time")
+# 超過預算時只保留的欄位
+TRIP_MINIMAL_FIELDS = ("step", "name", "period")
+
+TRUNCATED_MARK = "…"
+
+# 中日韓文字、標點與全形字元
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+logger = get_logger('llm.context')
+
+# None: 尚未載入,False: 載入失敗(改用估算)
+_encoding = None
+
+
+def _get_encoding(model: str):
+    """取得 tiktoken 編碼,沒有安裝或載入失敗時回傳 None"""
+    global _encoding
+    if tiktoken is None:
+        return None
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(model)
+        except Exception as e:  # 例如無法下載 BPE 檔
+            logger.warning("無法載入 tiktoken 編碼,token 數改用估算: %s", e)
+            _encoding = False
+    return _encoding or None
+
+
+def warm_up_tokenizer(model: str = "gpt-3.5-turbo") -> bool:
+    """
+    啟動時先載入 tiktoken 編碼,避免第一個請求等待下載
+
+    Returns:
+        bool: token 數是否為實際值(False 表示之後都是估算值)
+    """
+    return _get_encoding(model) is not None
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """計算文字的 token 數(有 tiktoken 時為實際值,否則為估算值)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def compact_trip(previous_trip: List[Dict], fields: Tuple[str, ...] = TRIP_CONTEXT_FIELDS) -> str:
+    """把之前的行程序列化成精簡的 JSON(只保留 fields)"""
+    return json.dumps(
+        [{field: item[field] for field in fields if item.get(field) is not None}
+         for item in previous_trip],
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """把文字截短到 budget 個 token 以內(保留開頭,結尾加上 …)"""
+    if count_tokens(text) <= budget:
+        return text
+    if budget <= count_tokens(TRUNCATED_MARK):
+        return ""
+
+    # 二分搜尋可保留的字數
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid] + TRUNCATED_MARK) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + TRUNCATED_MARK if low else ""
+
+
+class ContextReport(NamedTuple):
+    """一次組合的 token 統計"""
+    tokens: int            # 實際送出的 token 數
+    baseline_tokens: int   # 原本組合方式(完整 str(previous_trip),不設上限)的 token 數
+    dropped_messages: int  # 因預算捨棄的新對話數
+    truncated: bool        # 是否截短或精簡了任何段落
+
+    @property
+    def saved(self) -> int:
+        return self.baseline_tokens - self.tokens
+
+
+class ContextBuilder:
+    """
+    在 token 預算內組合給 LLM 的輸入文字
+
+    Args:
+        budget: token 上限,None 時依環境變數 LLM_CONTEXT_BUDGET(預設 1500)
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget if budget is not None else int(os.getenv("LLM_CONTEXT_BUDGET", 1500))
+
+    def build(
+        self,
+        text: str,
+        summary: Optional[str] = None,
+        new_messages: Optional[List[str]] = None,
+        previous_trip: Optional[List[Dict]] = None
+    ) -> Tuple[str, ContextReport]:
+        """
+        組合輸入文字
+
+        Args:
+            text: 當前輸入
+            summary: 歷史摘要
+            new_messages: 尚未摘要的新對話(舊到新)
+            previous_trip: 之前的行程
+
+        Returns:
+            Tuple[str, ContextReport]: 組合後的文字與 token 統計
+        """
+        new_messages = [m for m in (new_messages or []) if m]
+        baseline = self.baseline(text, summary, new_messages, previous_trip)
+        truncated = False
+
+        current = f"當前輸入:\n{text}"
+        remaining = self.budget - count_tokens(current)
+
+        trip = None
+        if previous_trip:
+            trip = "之前的行程:\n" + compact_trip(previous_trip)
+            if count_tokens(trip) > remaining:
+                trip = "之前的行程:\n" + compact_trip(previous_trip, TRIP_MINIMAL_FIELDS)
+                truncated = True
+            # restart 需要之前的行程,精簡後仍超過預算也保留(段落之間的空行算 1 token)
+            remaining -= count_tokens(trip) + 1
+
+        # 新對話從最新的開始保留
+        header = "新對話:\n"
+        kept = []
+        for message in reversed(new_messages):
+            cost = count_tokens(message) + 1
+            if cost > remaining - count_tokens(header) - 1:
+                break
+            kept.insert(0, message)
+            remaining -= cost
+        dropped = len(new_messages) - len(kept)
+        if kept:
+            remaining -= count_tokens(header) + 1
+
+        parts = []
+        if summary:
+            prefix = "用戶歷史偏好:\n"
+            body = truncate_to_tokens(summary, remaining - count_tokens(prefix) - 1)
+            truncated = truncated or body != summary
+            if body:
+                parts.append(prefix + body)
+        if kept:
+            parts.append(header + "\n".join(kept))
+        if trip:
+            parts.append(trip)
+        parts.append(current)
+        result = "\n\n".join(parts)
+
+        report = ContextReport(
+            tokens=count_tokens(result),
+            baseline_tokens=count_tokens(baseline),
+            dropped_messages=dropped,
+            truncated=truncated or dropped > 0
+        )
+        return result, report
+
+    @staticmethod
+    def baseline(
+        text: str,
+        summary: Optional[str] = None,
+        new_messages: Optional[List[str]] = None,
+        previous_trip: Optional[List[Dict]] = None
+    ) -> str:
+        """原本的組合方式(完整 str(previous_trip),不設上限),用來計算省下的 token 數"""
+        parts = []
+        if summary:
+            parts.append(f"用戶歷史偏好:\n{summary}")
+        if new_messages:
+            parts.append("新對話:\n" + "\n".join(new_messages))
+        if previous_trip:
+            parts.append("之前的行程:\n" + str(previous_trip))
+        parts.append(f"當前輸入:\n{text}")
+        return "\n\n".join(parts)
@@ -0,0 +1,252 @@
+"""
+固定格式旅遊需求的本機解析(不呼叫 LLM)
+
+很多輸入只是「旅遊推薦」、「隨便規劃台北一日遊」或圖文選單的 action=trip_planning,
+LLM 的結果經過提取器後也只是預設值。這裡以正規表達式與關鍵字表解析:
+    - 出發/結束時間  例: 早上十點出發、晚上8點前結束、10:30出發
+    - 出發日          例: 12/25、12月25日、明天、週六、下禮拜六
+    - 交通方式        例: 開車、騎車、走路、搭捷運
+    - 出發/結束地點   例: 從西門町出發、在信義區結束(只接受 PLACES 內的地標)
+    - 預算            例: 預算3000、2000元以內
+其他內容(例如「想吃火鍋」、「去淡水」)無法解析,信心度會降低,由 LLM 處理。
+關鍵字前有否定詞(「不要開車」、「別騎車」)時不解析該關鍵字,且整句標記為 negated,一律交給 LLM。
+
+回傳與 Thinking_fun 相同的 [Thinking_A, Thinking_B, Thinking_C, restart](Thinking_C 經過 schema 認證),
+Thinking_A / Thinking_B 為認證失敗時的預設值,restart 為 [0]。
+
+使用方式:
+```python
+result = parse_trip_request("早上十點從西門町出發,開車")
+if result.thinking is not None:
+    period_describe, unique_requirement, base_requirement, restart_index = result.thinking
+```
+
+覆蓋率:
+    python -m feature.llm.fast_intent -f inputs.txt    # 一行一個輸入,統計可走快速路徑的比例
+"""
+
+import argparse
+import re
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from feature.llm.utils.extractor.format_valid.format_valid import is_valid_mm_dd
+from feature.llm.utils.extractor.schemas import (
+    SPECIAL_DEFAULT,
+    TRIP_BASIC_DEFAULT,
+    TRIP_PREFERRED_DEFAULTS,
+    validate_trip_basic,
+)
+
+# 信心度達到此值才使用快速路徑
+FAST_PATH_MIN_CONFIDENCE = 0.9
+
+# 與 LLM 認證失敗時的預設值相同
+DEFAULT_BASIC_REQ = TRIP_BASIC_DEFAULT
+
+# 交通方式關鍵字(長的放前面)
+TRANSPORT_KEYWORDS = {
+    '大眾運輸': '大眾運輸', '搭捷運': '大眾運輸', '坐捷運': '大眾運輸', '捷運': '大眾運輸',
+    '搭公車': '大眾運輸', '坐公車': '大眾運輸', '公車': '大眾運輸',
+    '自己開車': '開車', '開車': '開車', '自駕': '開車',
+    '騎機車': '騎車', '騎腳踏車': '騎車', '騎車': '騎車', '機車': '騎車',
+    '走路': '步行', '步行': '步行',
+}
+
+# 否定詞(長的放前面),出現在關鍵字前時不解析該關鍵字
+NEGATIONS = ('不要', '不想', '不用', '不必', '沒有', '不', '別', '勿')
+
+# 可以當作出發/結束地點的地標
+PLACES = (
+    '台北車站', '台北101', '西門町', '信義區', '東區', '中山站', '士林夜市', '饒河夜市',
+    '松山機場', '中正紀念堂', '大安森林公園', '台大', '公館', '北投', '淡水', '南港',
+    '內湖', '大稻埕', '龍山寺', '市政府站', '南京復興', '忠孝復興', '象山',
+)
+
+# 沒有意義、可以忽略的字詞(長的放前面)
+FILLER_WORDS = (
+    '旅遊推薦', '旅遊規劃', '一日遊', '隨便', '規劃', '安排', '推薦', '行程', '旅遊', '台北',
+    '幫我', '給我', '一下', '好了', '就好', '可以', '出去', '走走', '一天', '今天想', '想',
+    '要', '去', '玩', '請', '我', '的', '吧', '啊', '喔', '囉', '個', '排', '搭', '坐', '用',
+)
+
+_CN_DIGITS = {'零': 0, '一': 1, '二': 2, '兩': 2, '三': 3, '四': 4, '五': 5,
+              '六': 6, '七': 7, '八': 8, '九': 9}
+_WEEKDAYS = {'一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6}
+
+_NUMBER = r'\d{1,2}|[零一二兩三四五六七八九十]{1,3}'
+_TIME = (
+    r'(?P<ampm>早上|上午|中午|下午|傍晚|晚上)?(?P<hour>' + _NUMBER + r')'
+    r'(?:[:](?P<minute>\d{2})|點(?:(?P<half>半)|(?P<minute2>\d{1,2})分?)?)'
+)
+_PLACE = '|'.join(map(re.escape, sorted(PLACES, key=len, reverse=True)))
+
+START_PATTERN = re.compile(_TIME + r'(?:從(?P<place>' + _PLACE + r'))?(?:出發|開始)')
+END_PATTERN = re.compile(_TIME + r'前?(?:在|到)?(?P<place>' + _PLACE + r')?(?:結束|回家|回來)')
+START_PLACE_PATTERN = re.compile(r'從(?P<place>' + _PLACE + r')(?:出發|開始)')
+END_PLACE_PATTERN = re.compile(r'(?:在|到)(?P<place>' + _PLACE + r')(?:結束)')
+DATE_PATTERN = re.compile(r'(?P<month>\d{1,2})\s*[/月]\s*(?P<day>\d{1,2})\s*[日號]?')
+RELATIVE_DATE_PATTERN = re.compile(r'今天|明天|後天')
+WEEKDAY_PATTERN = re.compile(r'(?P<next>下個?|這個?|本)?(?:週|星期|禮拜)(?P<weekday>[一二三四五六日天])')
+BUDGET_PATTERN = re.compile(
+    r'預算\s*(?P<amount>\d+)\s*(?:元|塊)?(?:以內|內)?|(?P<amount2>\d+)\s*(?:元|塊)(?:以內|內)?')
+TRANSPORT_PATTERN = re.compile(
+    '|'.join(map(re.escape, sorted(TRANSPORT_KEYWORDS, key=len, reverse=True))))
+FILLER_PATTERN = re.compile('|'.join(map(re.escape, FILLER_WORDS)))
+NEGATION_PATTERN = re.compile('|'.join(map(re.escape, NEGATIONS)))
+_NEGATED_BEFORE = re.compile('(?:' + NEGATION_PATTERN.pattern + r')$')
+# 有意義的字元(中文、英文、數字),用來計算信心度
+_MEANINGFUL = re.compile(r'[0-9A-Za-z\u3400-\u9fff]')
+
+_FULLWIDTH = str.maketrans('０１２３４５６７８９：／，。！？　', '0123456789:/,.!? ')
+
+
+class FastIntent(NamedTuple):
+    """本機解析結果"""
+    thinking: Optional[List]   # [Thinking_A, Thinking_B, Thinking_C, restart],格式同 Thinking_fun;信心度不足時為 None
+    confidence: float          # 0~1,已解析(或可忽略)的字元比例
+    slots: Dict[str, object]   # 解析出的欄位(Thinking_C 的 key)
+    negated: bool = False      # 有未解析的否定詞(例如「不要開車」),slots 不可覆蓋 LLM 的結果
+
+
+def _to_int(number: str) -> int:
+    """阿拉伯數字或中文數字(到九十九)轉整數"""
+    if number.isdigit():
+        return int(number)
+    if '十' in number:
+        tens, _, ones = number.partition('十')
+        return (_CN_DIGITS[tens] if tens else 1) * 10 + (_CN_DIGITS[ones] if ones else 0)
+    return _CN_DIGITS[number]
+
+
+def _parse_time(match: re.Match) -> Optional[str]:
+    """把 _TIME 的比對結果轉成 HH:MM,不合理時回傳 None"""
+    try:
+        hour = _to_int(match.group('hour'))
+    except KeyError:
+        return None
+    minute = match.group('minute') or match.group('minute2')
+    minute = 30 if match.group('half') else int(minute or 0)
+
+    if match.group('ampm') in ('下午', '傍晚', '晚上') and hour < 12:
+        hour += 12
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return f'{hour:02d}:{minute:02d}'
+
+
+def _weekday_date(match: re.Match, today: date) -> date:
+    weekday = _WEEKDAYS[match.group('weekday')]
+    this_week = today + timedelta(days=weekday - today.weekday())
+    if match.group('next') and match.group('next').startswith('下'):
+        return this_week + timedelta(days=7)
+    return this_week if this_week >= today else this_week + timedelta(days=7)
+
+
+def parse_trip_request(
+    text: Optional[str],
+    today: Optional[date] = None,
+    min_confidence: float = FAST_PATH_MIN_CONFIDENCE
+) -> FastIntent:
+    """
+    解析固定格式的旅遊需求
+
+    Args:
+        text: 使用者輸入(不含歷史與之前的行程)
+        today: 計算明天、週六等相對日期的基準日,None 時為今天
+        min_confidence: 信心度達到此值才產生 thinking
+
+    Returns:
+        FastIntent: confidence >= min_confidence 時 thinking 可以直接使用,否則為 None
+    """
+    today = today or date.today()
+    text = (text or '').translate(_FULLWIDTH).replace(' ', '')
+    total = len(_MEANINGFUL.findall(text))
+    rest = text
+    slots = {}
+
+    def consume(pattern, handler):
+        nonlocal rest
+        current = rest
+        for match in list(pattern.finditer(current)):
+            # 「不要開車」: 否定的關鍵字保留在 rest,由 LLM 判斷
+            if _NEGATED_BEFORE.search(current[:match.start()]):
+                continue
+            if handler(match) is not False:
+                rest = rest.replace(match.group(0), ' ', 1)
+
+    def on_start(match):
+        value = _parse_time(match)
+        if value is None:
+            return False
+        slots['出發時間'] = value
+        if match.group('place'):
+            slots['出發地點'] = match.group('place')
+
+    def on_end(match):
+        value = _parse_time(match)
+        if value is None:
+            return False
+        slots['結束時間'] = value
+        if match.group('place'):
+            slots['結束地點'] = match.group('place')
+
+    def on_date(match):
+        value = f"{int(match.group('month')):02d}-{int(match.group('day')):02d}"
+        if not is_valid_mm_dd(value):
+            return False
+        slots['出發日'] = value
+
+    def on_relative_date(match):
+        offset = {'今天': 0, '明天': 1, '後天': 2}[match.group(0)]
+        slots['出發日'] = (today + timedelta(days=offset)).strftime('%m-%d')
+
+    def on_weekday(match):
+        slots['出發日'] = _weekday_date(match, today).strftime('%m-%d')
+
+    def on_budget(match):
+        slots['預算'] = int(match.group('amount') or match.group('amount2'))
+
+    consume(START_PATTERN, on_start)
+    consume(END_PATTERN, on_end)
+    consume(START_PLACE_PATTERN, lambda m: slots.__setitem__('出發地點', m.group('place')))
+    consume(END_PLACE_PATTERN, lambda m: slots.__setitem__('結束地點', m.group('place')))
+    consume(DATE_PATTERN, on_date)
+    consume(RELATIVE_DATE_PATTERN, on_relative_date)
+    consume(WEEKDAY_PATTERN, on_weekday)
+    consume(BUDGET_PATTERN, on_budget)
+    consume(TRANSPORT_PATTERN, lambda m: slots.__setitem__('交通方式', TRANSPORT_KEYWORDS[m.group(0)]))
+    negated = NEGATION_PATTERN.search(rest) is not None
+    rest = FILLER_PATTERN.sub(' ', rest)
+
+    leftover = len(_MEANINGFUL.findall(rest))
+    confidence = 1.0 if total == 0 else 1 - leftover / total
+    if confidence < min_confidence or negated:
+        return FastIntent(None, confidence, slots, negated)
+
+    thinking = [
+        [dict(d) for d in TRIP_PREFERRED_DEFAULTS],
+        [dict(SPECIAL_DEFAULT)],
+        validate_trip_basic([{**DEFAULT_BASIC_REQ, **slots}]).value,
+        [0],
+    ]
+    return FastIntent(thinking, confidence, slots)
+
+
+if __name__ == "__main__":
+    from statistics import mean
+
+    parser = argparse.ArgumentParser(description="統計可以走本機解析的輸入比例")
+    parser.add_argument("-f", "--file", required=True, help="輸入檔,一行一個使用者輸入")
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8") as f:
+        inputs = [line.strip() for line in f]
+
+    results = [parse_trip_request(text) for text in inputs]
+    hits = [r for r in results if r.thinking is not None]
+    print(f"本機解析: {len(hits)} / {len(results)} ({len(hits) / max(len(results), 1):.0%}),"
+          f"平均信心度 {mean(r.confidence for r in results):.2f}")
+    for text, result in zip(inputs, results):
+        mark = "O" if result.thinking is not None else "X"
+        print(f"{mark} {result.confidence:.2f} {text!r} {result.slots}")
@@ -0,0 +1,196 @@
+"""
+LLM 回應快取
+
+相同的 (model, system prompt, 使用者輸入, temperature) 直接回傳上次解析好的結果,
+不再呼叫 OpenAI。使用者輸入會先正規化(NFKC、去除多餘空白),
+全形/半形或空白不同的相同問題視為同一個。
+
+兩層快取:
+    1. process 內的 LRU + TTL
+    2. SQLite(選用,設定 LLM_CACHE_PATH 時啟用),重啟或多個 worker 之間共用
+
+環境變數:
+    LLM_CACHE       on(預設) / off
+    LLM_CACHE_TTL   保存秒數(預設 86400)
+    LLM_CACHE_SIZE  process 內最多保存的筆數(預設 1024)
+    LLM_CACHE_PATH  SQLite 檔案路徑(未設定時只用 process 內快取)
+
+值以 JSON 保存,每次取出都是新的物件,提取器修改結果不會影響快取。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+DEFAULT_TTL = 86400
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def normalize_input(user_input: str) -> str:
+    """正規化使用者輸入(NFKC、合併空白)"""
+    return " ".join(unicodedata.normalize("NFKC", user_input).split())
+
+
+def make_cache_key(model: str, prompt: str, user_input: str, temperature: float) -> str:
+    """以 model、prompt 的 hash、正規化後的輸入與 temperature 組成快取 key"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    raw = json.dumps(
+        [model, prompt_hash, normalize_input(user_input), temperature],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLM 回應的 LRU + TTL 快取,可選擇加上 SQLite 持久層(thread-safe)
+
+    Args:
+        ttl: 每筆快取的有效秒數
+        max_entries: process 內最多保存的筆數
+        sqlite_path: SQLite 檔案路徑,None 時只用 process 內快取
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        sqlite_path: Optional[str] = None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if sqlite_path:
+            self._connect().execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 連線不跨執行緒使用,每個執行緒各自建立
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        取得快取的結果
+
+        Returns:
+            Optional[Any]: 快取的結果,不存在或過期時回傳 None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._entries[key]
+
+        if self.sqlite_path:
+            try:
+                row = self._connect().execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"讀取 LLM 快取失敗: {e}")
+                row = None
+            if row:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.hits += 1
+                return json.loads(row[0])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """保存結果(無法轉成 JSON 的結果不快取)"""
+        try:
+            serialized = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+
+        expires_at = time.time() + self.ttl
+        self._remember(key, serialized, expires_at)
+
+        if self.sqlite_path:
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, serialized, expires_at)
+                )
+            except sqlite3.Error as e:
+                print(f"寫入 LLM 快取失敗: {e}")
+
+    def _remember(self, key: str, serialized: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, serialized)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空 process 內與 SQLite 的快取"""
+        with self._lock:
+            self._entries.clear()
+        if self.sqlite_path:
+            self._connect().execute("DELETE FROM llm_cache")
+
+    def purge(self) -> int:
+        """清除 SQLite 內過期的資料,回傳清除的筆數"""
+        if not self.sqlite_path:
+            return 0
+        cursor = self._connect().execute(
+            "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    取得 process 共用的快取,第一次呼叫時依環境變數建立
+
+    Returns:
+        Optional[LLMResponseCache]: LLM_CACHE=off 時回傳 None
+    """
+    global _default_cache
+    if os.getenv("LLM_CACHE", "on") == "off":
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                cache = LLMResponseCache(
+                    ttl=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL)),
+                    max_entries=int(os.getenv("LLM_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+                    sqlite_path=os.getenv("LLM_CACHE_PATH") or None
+                )
+                if cache.sqlite_path:
+                    cache.purge()
+                _default_cache = cache
+    return _default_cache
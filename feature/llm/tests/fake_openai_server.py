@@ -0,0 +1,103 @@
+"""
+測試用的本機 OpenAI 相容伺服器(POST /v1/chat/completions)
+
+可以設定每個請求的延遲與狀態碼,並記錄請求數與連線數(檢查連線是否重複使用)。
+
+使用方式:
+```python
+with FakeOpenAIServer(reply=lambda body: '["ok"]') as server:
+    openai.api_base = server.api_base
+    server.delays = [2.0, 0.0]     # 第一個請求延遲 2 秒,第二個立即回應
+    server.statuses = [500]        # 第一個請求回 500
+```
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive,連線可以重複使用
+
+    def setup(self):
+        super().setup()
+        with self.server.fake.lock:
+            self.server.fake.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with fake.lock:
+            fake.requests.append(body)
+            delay = fake.delays.pop(0) if fake.delays else fake.default_delay
+            status = fake.statuses.pop(0) if fake.statuses else 200
+
+        time.sleep(delay)
+
+        if status == 200:
+            content = fake.reply(body)
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+            }
+        else:
+            payload = {"error": {"message": "fake error", "type": "server_error"}}
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # 用戶端已經放棄(逾時或 hedge 取消)
+            pass
+
+
+class FakeOpenAIServer:
+    """
+    Args:
+        reply: 依請求內容回傳 assistant 的文字
+        default_delay: 未指定 delays 時的延遲秒數
+    """
+
+    def __init__(self, reply: Callable[[Dict], str] = lambda body: '["ok"]', default_delay: float = 0.0):
+        self.reply = reply
+        self.default_delay = default_delay
+        self.delays: List[float] = []
+        self.statuses: List[int] = []
+        self.requests: List[Dict] = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_base(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,86 @@
+"""
+測試用的 Thinking 固定輸出與假的 openai.ChatCompletion.create
+
+依 system prompt 回傳 Thinking_A / B / C / restart(或 Thinking_fused)的固定內容,
+記錄每次呼叫,可依 system prompt 設定延遲並記錄每個請求完成的時間。
+
+使用方式:
+```python
+fake = FakeChatCompletion()
+with patch('openai.ChatCompletion.create', side_effect=fake.create):
+    llm.Thinking_fun("淡水一日遊")
+assert len(fake.calls) == 4
+```
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from feature.llm.utils import system_prompt
+
+PREFERRED = [
+    {"上午": "想在老街散步,逛逛有特色的文創小店"},
+    {"中餐": "想吃在地人推薦的平價小吃"},
+    {"下午": "想去看海,欣賞淡水河畔的風景"},
+    {"晚餐": "想和家人一起吃熱炒,氣氛熱鬧"},
+    {"晚上": "想在漁人碼頭看夕陽和夜景"},
+]
+SPECIAL = {
+    "內用座位": True, "洗手間": True, "適合兒童": True, "適合團體": False, "現金": False,
+    "其他支付": False, "收費停車": False, "免費停車": True, "wi-fi": False, "無障礙": False,
+}
+BASIC = {
+    "出發時間": "09:00", "結束時間": "21:00", "出發地點": "淡水捷運站", "結束地點": "none",
+    "交通方式": "開車", "可接受距離門檻(KM)": 30, "早餐時間": "none", "中餐時間": "12:00",
+    "晚餐時間": "18:00", "預算": 3000, "出發日": "none",
+}
+RESTART = [0]
+
+# 分段呼叫: system prompt → 回應內容
+RESPONSES = {
+    system_prompt.Thinking_A: json.dumps(PREFERRED, ensure_ascii=False),
+    system_prompt.Thinking_B: json.dumps(SPECIAL, ensure_ascii=False),
+    system_prompt.Thinking_C: json.dumps(BASIC, ensure_ascii=False),
+    system_prompt.restart: json.dumps(RESTART),
+}
+FUSED_RESPONSE = json.dumps(
+    {"preferred": PREFERRED, "special": SPECIAL, "basic": BASIC, "restart": RESTART},
+    ensure_ascii=False)
+
+
+class FakeChatCompletion:
+    """
+    依 system prompt 回傳固定內容,並附上 usage(prompt token 以字數估算)
+
+    Args:
+        fused_response: Thinking_fused 的回應內容
+        latencies: {system prompt: 延遲秒數},未設定的 prompt 立即回應
+    """
+
+    def __init__(self, fused_response: str = FUSED_RESPONSE, latencies: Optional[Dict[str, float]] = None):
+        self.fused_response = fused_response
+        self.latencies = latencies or {}
+        self.calls = []
+        self.finished = {}      # system prompt → 完成時間(perf_counter)
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        user_input = kwargs["messages"][1]["content"]
+        with self._lock:
+            self.calls.append(kwargs)
+        if prompt in self.latencies:
+            time.sleep(self.latencies[prompt])
+        if prompt == system_prompt.Thinking_fused:
+            content = self.fused_response
+        else:
+            content = RESPONSES[prompt]
+        with self._lock:
+            self.finished[prompt] = time.perf_counter()
+        return {
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": len(prompt) + len(user_input),
+                      "completion_tokens": len(content)},
+        }
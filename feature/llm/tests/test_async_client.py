@@ -0,0 +1,108 @@
+import time
+
+import pytest
+from openai import error as openai_error
+
+from feature.llm.async_client import AsyncLLMClient, LLMTimeoutError
+from feature.llm.LLM import LLM_Manager
+from feature.llm.tests.fake_openai_server import FakeOpenAIServer
+from feature.llm.utils import system_prompt
+
+CLOUD_REPLIES = {
+    system_prompt.Cloud_A: '["想找安靜又有特色的咖啡廳"]',
+    system_prompt.Cloud_B: '{"內用座位": true, "洗手間": false, "適合兒童": false, "適合團體": false, '
+                           '"現金": false, "其他支付": false, "收費停車": false, "免費停車": false, '
+                           '"wi-fi": true, "無障礙": false}',
+    system_prompt.Cloud_C: '{"星期別": "none", "時間": "none", "類別": "咖啡廳", "預算": 500, '
+                           '"出發地點": "none", "可接受距離門檻(KM)": "none", "交通方式": "大眾運輸"}',
+}
+MESSAGES = [{"role": "system", "content": "test"}, {"role": "user", "content": "hi"}]
+
+
+def reply(body):
+    return CLOUD_REPLIES.get(body["messages"][0]["content"], '["ok"]')
+
+
+@pytest.fixture
+def server():
+    with FakeOpenAIServer(reply=reply) as server:
+        yield server
+
+
+@pytest.fixture
+def make_client(server):
+    clients = []
+
+    def make(**kwargs):
+        client = AsyncLLMClient("test_api_key", api_base=server.api_base, **kwargs)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_llm_manager_async_path(server, make_client):
+    """LLM_Manager 使用非同步 client,連續呼叫重複使用連線"""
+    llm = LLM_Manager("test_api_key", use_cache=False, client=make_client())
+
+    first = llm.Cloud_fun("推薦安靜的咖啡廳")
+    second = llm.Cloud_fun("推薦安靜的咖啡廳")
+
+    assert first == second
+    assert first[1][0]["wi-fi"] is True
+    assert first[2][0]["預算"] == 500
+    assert len(server.requests) == 6
+    # 三個並行請求最多三條連線,第二次呼叫沿用
+    assert server.connections <= 3
+    assert llm.usage["calls"] == 6
+
+
+def test_deadline(server, make_client):
+    """超過期限時丟出 LLMTimeoutError,不會一直等待"""
+    server.default_delay = 2.0
+    client = make_client(deadline=0.3, max_attempts=1)
+
+    start = time.perf_counter()
+    with pytest.raises(LLMTimeoutError):
+        client.complete(model="gpt-3.5-turbo", messages=MESSAGES)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_hedged_request(server, make_client):
+    """第一個請求太慢時送出 hedge 請求,取先回來的結果"""
+    server.delays = [1.5, 0.0]
+    client = make_client(deadline=5, hedge_after=0.2, max_attempts=2)
+
+    start = time.perf_counter()
+    response = client.complete(model="gpt-3.5-turbo", messages=MESSAGES)
+    elapsed = time.perf_counter() - start
+
+    assert response["choices"][0]["message"]["content"] == '["ok"]'
+    assert len(server.requests) == 2
+    assert elapsed < 1.0
+
+
+def test_retry_on_server_error(server, make_client):
+    """5xx 在期限內重試"""
+    server.statuses = [500]
+    client = make_client(deadline=5, hedge_after=5, max_attempts=2)
+
+    response = client.complete(model="gpt-3.5-turbo", messages=MESSAGES)
+    assert response["choices"][0]["message"]["content"] == '["ok"]'
+    assert len(server.requests) == 2
+
+
+def test_no_retry_on_client_error(server, make_client):
+    """400 之類的錯誤不重試"""
+    server.statuses = [400]
+    client = make_client(deadline=5, max_attempts=3)
+
+    with pytest.raises(openai_error.InvalidRequestError):
+        client.complete(model="gpt-3.5-turbo", messages=MESSAGES)
+    assert len(server.requests) == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
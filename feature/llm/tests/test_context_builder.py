@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from feature.llm import context_builder
+from feature.llm.context_builder import (
+    ContextBuilder,
+    compact_trip,
+    count_tokens,
+    truncate_to_tokens,
+)
+
+# 與 planner_records 讀出的行程相同的欄位(含之前會一起送出的明細)
+PREVIOUS_TRIP = [
+    {
+        "step": i, "place_id": f"ChIJ{i:020d}", "date": "2025-01-18", "name": f"淡水景點{i}",
+        "label": "景點", "lat": 25.17 + i / 100, "lon": 121.44 + i / 100, "period": "morning",
+        "start_time": f"{9 + i:02d}:00", "end_time": f"{9 + i:02d}:50", "duration": 50,
+        "transport": {"mode": "開車", "time": 12, "distance_km": 3.4},
+        "hours": {str(d): [{"start": "09:00", "end": "18:00"}] for d in range(1, 8)},
+        "route_info": {"polyline": "a~l~Fjk~uOwHJy@P" * 20, "steps": ["直走", "右轉"] * 5},
+    }
+    for i in range(8)
+]
+
+
+def test_compact_trip_keeps_restart_fields():
+    """精簡行程只保留 step、名稱、類型、時段與時間"""
+    trip = json.loads(compact_trip(PREVIOUS_TRIP))
+    assert trip[2] == {"step": 2, "name": "淡水景點2", "label": "景點", "period": "morning",
+                       "start_time": "11:00", "end_time": "11:50"}
+
+
+def test_count_tokens(monkeypatch):
+    """沒有 tiktoken 時的估算: 中文每字 1 token,其他每 4 字元 1 token"""
+    monkeypatch.setattr(context_builder, "tiktoken", None)
+    assert count_tokens("") == 0
+    assert count_tokens("淡水老街") == 4
+    assert count_tokens("abcdefgh") == 2
+
+
+def test_warm_up_falls_back_to_estimate(monkeypatch):
+    """沒有 tiktoken 或編碼載入失敗(例如無法下載 BPE 檔)時改用估算,不讓請求失敗"""
+    monkeypatch.setattr(context_builder, "_encoding", None)
+    monkeypatch.setattr(context_builder, "tiktoken", None)
+    assert not context_builder.warm_up_tokenizer()
+
+    class OfflineTiktoken:
+        calls = 0
+
+        @classmethod
+        def encoding_for_model(cls, model):
+            cls.calls += 1
+            raise OSError("無法下載 BPE 檔")
+
+    monkeypatch.setattr(context_builder, "tiktoken", OfflineTiktoken)
+    assert not context_builder.warm_up_tokenizer()
+    assert count_tokens("淡水一日遊") == 5
+    assert OfflineTiktoken.calls == 1   # 失敗後不再於每次請求重試
+
+
+def test_truncate_to_tokens():
+    text = "用戶偏好文青風景點" * 20
+    truncated = truncate_to_tokens(text, 30)
+    assert count_tokens(truncated) <= 30
+    assert truncated.endswith("…") and text.startswith(truncated[:-1])
+    assert truncate_to_tokens("短句", 30) == "短句"
+
+
+def test_build_saves_tokens():
+    """與原本 str(previous_trip) 的組合方式相比省下大部分 token,內容順序不變"""
+    builder = ContextBuilder(budget=1500)
+    text, report = builder.build(
+        "不想去淡水景點3",
+        summary="用戶偏好文青風景點",
+        new_messages=["想開車"],
+        previous_trip=PREVIOUS_TRIP
+    )
+
+    assert text.index("用戶歷史偏好") < text.index("新對話") < text.index("之前的行程") < text.index("當前輸入")
+    assert "route_info" not in text and "hours" not in text
+    assert report.tokens == count_tokens(text)
+    assert report.saved > report.tokens
+    assert not report.truncated
+
+
+@pytest.mark.parametrize("budget", [120, 200, 300])
+def test_build_respects_budget(budget):
+    """超過預算時捨棄舊的新對話、截短摘要,之前的行程與當前輸入保留"""
+    builder = ContextBuilder(budget=budget)
+    messages = [f"第{i}則訊息:想去有特色的咖啡廳" for i in range(10)]
+    text, report = builder.build(
+        "不想去淡水景點3",
+        summary="用戶偏好文青風景點,不想去吵雜的地方," * 10,
+        new_messages=messages,
+        previous_trip=PREVIOUS_TRIP[:3]
+    )
+
+    assert report.tokens <= budget
+    assert report.truncated
+    assert "淡水景點2" in text and "當前輸入:\n不想去淡水景點3" in text
+    # 保留的是最新的訊息
+    kept = [m for m in messages if m in text]
+    assert kept == messages[report.dropped_messages:]
+
+
+def test_build_minimal_trip_when_over_budget():
+    """行程本身超過預算時去掉時間欄位,但仍保留"""
+    text, report = ContextBuilder(budget=50).build("重新規劃", previous_trip=PREVIOUS_TRIP)
+    assert "start_time" not in text and "淡水景點7" in text
+    assert report.truncated
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("LLM_CONTEXT_BUDGET", "321")
+    assert ContextBuilder().budget == 321
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,71 @@
+from datetime import date
+
+import pytest
+
+from feature.llm.fast_intent import DEFAULT_BASIC_REQ, parse_trip_request
+
+# 2026-10-19 是星期一
+TODAY = date(2026, 10, 19)
+
+
+@pytest.mark.parametrize("text", ["", "旅遊推薦", "隨便規劃台北一日遊", "幫我排一下行程吧", "台北一日遊"])
+def test_template_inputs_use_defaults(text):
+    """固定格式的輸入與 LLM 經過提取器後的預設值相同"""
+    result = parse_trip_request(text, today=TODAY)
+
+    assert result.confidence == 1.0
+    preferred, special, basic, restart = result.thinking
+    assert len(preferred) == 5
+    assert not any(special[0].values())
+    assert basic == [DEFAULT_BASIC_REQ]
+    assert restart == [0]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("早上十點從西門町出發,晚上八點前在信義區結束,開車",
+     {"出發時間": "10:00", "出發地點": "西門町", "結束時間": "20:00", "結束地點": "信義區", "交通方式": "開車"}),
+    ("明天下午兩點半出發", {"出發時間": "14:30", "出發日": "10-20"}),
+    ("12/25 10:30出發 騎車", {"出發時間": "10:30", "出發日": "12-25", "交通方式": "騎車"}),
+    ("１２月３１號，搭捷運，預算３０００", {"出發日": "12-31", "交通方式": "大眾運輸", "預算": 3000}),
+    ("週六走路 2000元以內", {"出發日": "10-24", "交通方式": "步行", "預算": 2000}),
+    ("下禮拜六自駕", {"出發日": "10-31", "交通方式": "開車"}),
+])
+def test_slots(text, expected):
+    result = parse_trip_request(text, today=TODAY)
+
+    assert result.confidence == 1.0
+    assert result.slots == expected
+    assert result.thinking[2][0] == {**DEFAULT_BASIC_REQ, **expected}
+
+
+@pytest.mark.parametrize("text", ["想吃火鍋", "帶小孩去淡水玩", "不想去星巴克", "不要開車", "從第3個點重來"])
+def test_free_text_falls_back_to_llm(text):
+    """有無法解析的內容時信心度不足,交給 LLM"""
+    result = parse_trip_request(text, today=TODAY)
+    assert result.confidence < 0.9
+    assert result.thinking is None
+
+
+@pytest.mark.parametrize("text, slots", [
+    ("隨便規劃台北一日遊,不要騎車", {}),
+    ("隨便規劃台北一日遊,明天不要開車", {"出發日": "10-20"}),
+    ("別搭捷運,預算3000", {"預算": 3000}),
+    ("不想早上十點出發", {}),
+])
+def test_negated_keywords_not_parsed(text, slots):
+    """否定詞後的關鍵字不解析,整句交給 LLM"""
+    result = parse_trip_request(text, today=TODAY)
+    assert result.negated
+    assert result.thinking is None
+    assert result.slots == slots
+
+
+def test_invalid_values_not_consumed():
+    """不合理的時間與日期不當作已解析"""
+    result = parse_trip_request("13/45 晚上25點出發", today=TODAY)
+    assert result.thinking is None
+    assert "出發日" not in result.slots and "出發時間" not in result.slots
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,143 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from feature.llm import response_cache
+from feature.llm.LLM import LLM_Manager
+from feature.llm.response_cache import LLMResponseCache, make_cache_key
+from feature.llm.utils import system_prompt
+
+CLOUD_RESPONSES = {
+    system_prompt.Cloud_A: '["想找安靜的咖啡廳"]',
+    system_prompt.Cloud_B: '{"內用座位": true, "wi-fi": true}',
+    system_prompt.Cloud_C: '{"類別": "咖啡廳", "預算": 500}',
+}
+
+
+def fake_create(**kwargs):
+    """依 system prompt 回傳對應的模擬回應"""
+    prompt = kwargs["messages"][0]["content"]
+    content = CLOUD_RESPONSES.get(prompt, '["ok"]')
+    return {'choices': [{'message': {'content': content}}]}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """每個測試使用新的快取"""
+    cache = LLMResponseCache(ttl=60)
+    monkeypatch.setattr(response_cache, "_default_cache", cache)
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    return cache
+
+
+@pytest.fixture
+def mock_chat():
+    with patch('openai.ChatCompletion.create', side_effect=fake_create) as mock_chat:
+        yield mock_chat
+
+
+def test_repeat_query_skips_api(cache, mock_chat):
+    """相同輸入第二次不呼叫 API,結果相同"""
+    llm = LLM_Manager("test_api_key")
+    first = llm.Cloud_fun("推薦台北咖啡廳")
+    assert mock_chat.call_count == 3
+
+    second = LLM_Manager("test_api_key").Cloud_fun("  推薦台北咖啡廳 ")
+    assert mock_chat.call_count == 3
+    assert second == first
+    assert cache.hits == 3
+
+
+def test_opt_out(cache, mock_chat):
+    """use_cache=False 時每次都呼叫 API"""
+    llm = LLM_Manager("test_api_key")
+    llm.Cloud_fun("推薦台北咖啡廳", use_cache=False)
+    llm.Cloud_fun("推薦台北咖啡廳", use_cache=False)
+    assert mock_chat.call_count == 6
+
+    LLM_Manager("test_api_key", use_cache=False).Cloud_fun("推薦台北咖啡廳")
+    assert mock_chat.call_count == 9
+
+    with patch.dict("os.environ", {"LLM_CACHE": "off"}):
+        llm.Cloud_fun("推薦台北咖啡廳")
+    assert mock_chat.call_count == 12
+
+
+def test_cached_value_is_copy(cache):
+    """提取器修改取出的結果不影響快取"""
+    key = make_cache_key("gpt-3.5-turbo", "prompt", "輸入", 0.7)
+    cache.set(key, [{"a": 1}])
+    cache.get(key)[0]["a"] = 2
+    assert cache.get(key) == [{"a": 1}]
+
+
+def test_key_fields():
+    """model、prompt、temperature 不同時不共用快取,全形與空白差異視為相同輸入"""
+    key = make_cache_key("gpt-3.5-turbo", "prompt", "台北 一日遊", 0.7)
+    assert key == make_cache_key("gpt-3.5-turbo", "prompt", "台北　一日遊 ", 0.7)
+    assert key != make_cache_key("gpt-4", "prompt", "台北 一日遊", 0.7)
+    assert key != make_cache_key("gpt-3.5-turbo", "prompt2", "台北 一日遊", 0.7)
+    assert key != make_cache_key("gpt-3.5-turbo", "prompt", "台北 一日遊", 0.2)
+
+
+def test_ttl_and_size_bound():
+    """過期或超過上限的結果重新詢問"""
+    cache = LLMResponseCache(ttl=0.01)
+    cache.set("k", ["v"])
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+    cache = LLMResponseCache(max_entries=2)
+    for key in ("k1", "k2", "k3"):
+        cache.set(key, [key])
+    assert cache.get("k1") is None
+    assert cache.get("k3") == ["k3"]
+
+
+def test_sqlite_layer(tmp_path):
+    """SQLite 持久層在新的 process(新的快取物件)仍可讀取"""
+    path = str(tmp_path / "llm_cache.db")
+    LLMResponseCache(sqlite_path=path).set("k", [{"類別": "咖啡廳"}])
+
+    cache = LLMResponseCache(sqlite_path=path)
+    assert cache.get("k") == [{"類別": "咖啡廳"}]
+    assert cache.hits == 1
+
+    expired = LLMResponseCache(ttl=-1, sqlite_path=path)
+    expired.set("old", ["v"])
+    assert expired.purge() == 1
+
+
+def test_parse_failure_not_cached(cache):
+    """LLM 回應無法解析時不快取"""
+    bad = {'choices': [{'message': {'content': 'not json'}}]}
+    with patch('openai.ChatCompletion.create', return_value=bad) as mock_chat:
+        llm = LLM_Manager("test_api_key")
+        llm._LLM_Manager__Query("prompt", "輸入", "List")
+        llm._LLM_Manager__Query("prompt", "輸入", "List")
+    assert mock_chat.call_count == 2
+
+
+def test_latency_report(cache):
+    """比較未命中(模擬 1 秒的 API)與命中快取的耗時"""
+    def slow_create(**kwargs):
+        time.sleep(1)
+        return fake_create(**kwargs)
+
+    with patch('openai.ChatCompletion.create', side_effect=slow_create):
+        llm = LLM_Manager("test_api_key")
+        start = time.perf_counter()
+        llm.Cloud_fun("隨便推薦台北咖啡廳")
+        miss = time.perf_counter() - start
+
+        start = time.perf_counter()
+        llm.Cloud_fun("隨便推薦台北咖啡廳")
+        hit = time.perf_counter() - start
+
+    print(f"\n未命中: {miss * 1e3:.0f} ms, 命中快取: {hit * 1e3:.2f} ms")
+    assert hit < miss / 10
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -7,8 +7,8 @@ from feature.llm.LLM import LLM_Manager
 
 @pytest.fixture
 def mock_llm():
-    """建立測試用的LLM物件"""
-    return LLM_Manager("test_api_key")
+    """建立測試用的LLM物件(不使用快取,每次都讀取模擬的API回應)"""
+    return LLM_Manager("test_api_key", use_cache=False)
 
 
 def create_mock_response(content: str) -> dict:
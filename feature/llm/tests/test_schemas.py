@@ -0,0 +1,162 @@
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from feature.llm import LLM as llm_module
+from feature.llm.utils.extractor.format_valid.format_valid import (
+    is_float,
+    is_valid_24_hour_time,
+    is_valid_mm_dd,
+)
+from feature.llm.utils.extractor.schemas import (
+    PLAN_BASIC_DEFAULT,
+    SPECIAL_DEFAULT,
+    TRIP_BASIC_DEFAULT,
+    TRIP_PREFERRED_DEFAULTS,
+    validate_plan_basic,
+    validate_plan_preferred,
+    validate_restart,
+    validate_section,
+    validate_special,
+    validate_summary,
+    validate_trip_basic,
+    validate_trip_preferred,
+)
+
+BASIC = {**TRIP_BASIC_DEFAULT, "出發地點": "西門町", "預算": 3000, "出發日": "12-25"}
+
+
+def legacy_trip_basic(basic_req):
+    """原本 trip_basic_req_extractor 的逐欄位判斷(不含 print),用來比對結果"""
+    try:
+        basic_req = basic_req[0]
+        return [{
+            '出發時間': str(basic_req['出發時間']) if is_valid_24_hour_time(basic_req['出發時間']) else '09:00',
+            '結束時間': str(basic_req['結束時間']) if is_valid_24_hour_time(basic_req['結束時間']) else '21:00',
+            '出發地點': str(basic_req['出發地點']),
+            '結束地點': str(basic_req['結束地點']),
+            '交通方式': basic_req['交通方式'] if basic_req['交通方式'] in ['大眾運輸', '開車', '騎車', '步行'] else '大眾運輸',
+            '可接受距離門檻(KM)': basic_req['可接受距離門檻(KM)'] if is_float(basic_req['可接受距離門檻(KM)']) else 30,
+            '早餐時間': str(basic_req['早餐時間']) if is_valid_24_hour_time(basic_req['早餐時間']) else 'none',
+            '中餐時間': str(basic_req['中餐時間']) if is_valid_24_hour_time(basic_req['中餐時間']) else '12:00',
+            '晚餐時間': str(basic_req['晚餐時間']) if is_valid_24_hour_time(basic_req['晚餐時間']) else '18:00',
+            '預算': basic_req['預算'] if is_float(basic_req['預算']) else 'none',
+            '出發日': str(basic_req['出發日']) if is_valid_mm_dd(basic_req['出發日']) else 'none',
+        }]
+    except Exception:
+        return [dict(TRIP_BASIC_DEFAULT)]
+
+
+def random_basic(rng):
+    """隨機產生 LLM 可能給的 Thinking_C(合法值、錯誤值、缺欄位)"""
+    values = ["10:00", "25:00", "none", None, 3, -1, 2.5, "開車", "飛機", [], "12-25", "13-45", "台北101", True]
+    basic = {key: rng.choice(values + [value]) for key, value in TRIP_BASIC_DEFAULT.items()}
+    if rng.random() < 0.1:
+        basic.pop(rng.choice(list(basic)))
+    return [basic]
+
+
+def test_trip_basic_matches_legacy_extractor():
+    """隨機輸入下與原本提取器的結果相同"""
+    rng = random.Random(0)
+    for _ in range(500):
+        data = random_basic(rng)
+        assert validate_trip_basic(data).value == legacy_trip_basic(data), data
+
+
+def test_trip_basic_field_errors():
+    report = validate_trip_basic([{**BASIC, "出發時間": "25:00", "交通方式": "飛機", "早餐時間": "none"}])
+
+    assert not report.ok and not report.fallback
+    assert report.value[0]["出發時間"] == "09:00" and report.value[0]["交通方式"] == "大眾運輸"
+    # LLM 明確給 'none'(等於預設值)不算錯誤
+    assert [(e.field, e.value) for e in report.errors] == [("出發時間", "25:00"), ("交通方式", "飛機")]
+    assert "出發時間='25:00'" in report.describe()
+
+
+@pytest.mark.parametrize("data", [None, "none", [], ["none"], [{"出發時間": "10:00"}]])
+def test_trip_basic_fallback(data):
+    """格式錯誤或缺少欄位時全部使用預設值"""
+    report = validate_trip_basic(data)
+    assert report.fallback and report.value == [TRIP_BASIC_DEFAULT]
+    assert report.errors[0].field == "*"
+
+
+def test_trip_basic_ignores_extra_fields():
+    report = validate_trip_basic([{**BASIC, "備註": "多的欄位"}])
+    assert report.ok and report.value == [BASIC]
+
+
+def test_special():
+    report = validate_special([{**SPECIAL_DEFAULT, "適合兒童": True, "wi-fi": 123}])
+    assert report.value == [{**SPECIAL_DEFAULT, "適合兒童": True}]
+    assert [e.field for e in report.errors] == ["wi-fi"]
+    assert validate_special("格式錯誤").value == [SPECIAL_DEFAULT]
+
+
+def test_plan_basic_checks_category():
+    """類別依自己的值認證(原本的提取器誤用 交通方式 判斷,類別 幾乎都是 'none')"""
+    data = [{**PLAN_BASIC_DEFAULT, "類別": "咖啡廳", "交通方式": "開車", "出發地點": [25.03, 121.56]}]
+    assert validate_plan_basic(data).value == data
+    assert validate_plan_basic([{**data[0], "類別": "夜店"}]).value[0]["類別"] == "none"
+
+
+def test_preferred_statements():
+    data = [{"上午": "想在老街散步,逛逛有特色的文創小店"}, {"中餐": "小吃"}]
+    report = validate_trip_preferred(data, limit=10)
+
+    assert report.value == [data[0], TRIP_PREFERRED_DEFAULTS[1]]
+    assert [e.field for e in report.errors] == ["中餐"]
+    assert validate_trip_preferred(None).value == TRIP_PREFERRED_DEFAULTS
+
+    assert validate_plan_preferred(["喜歡安靜可以看書的咖啡廳"]).ok
+    assert not validate_plan_preferred(["短句"]).ok
+
+
+@pytest.mark.parametrize("data, expected", [([2], [2]), ([], [0]), ([2, 3], [0]), (["2"], [0]), (None, [0])])
+def test_restart(data, expected):
+    assert validate_restart(data).value == expected
+
+
+def test_summary_and_sections():
+    assert validate_summary(["喜歡咖啡廳與文青風格的景點"]).value == ["喜歡咖啡廳與文青風格的景點"]
+    assert validate_summary(["短"]).value == [""]
+    assert validate_section("Cloud_B", None).section == "Cloud_B"
+
+
+def test_validated_logs_instead_of_printing(capsys):
+    """認證失敗時寫入 logger,不輸出到 stdout"""
+    with patch.object(llm_module, "logger") as logger:
+        assert llm_module.validated('Thinking_C', None) == [TRIP_BASIC_DEFAULT]
+        llm_module.validated('Thinking_C', [{**BASIC, "交通方式": "飛機"}])
+        llm_module.validated('Thinking_C', [BASIC])
+
+    assert capsys.readouterr().out == ""
+    assert logger.warning.call_count == 1 and logger.debug.call_count == 1
+    assert "交通方式='飛機'" in str(logger.debug.call_args.args[1])
+
+
+def test_validation_cost():
+    """預先宣告的規則與原本逐欄位判斷的成本相當(不含原本提取器的 print)"""
+    rng = random.Random(1)
+    inputs = [random_basic(rng) for _ in range(2000)]
+
+    start = time.perf_counter()
+    for data in inputs:
+        legacy_trip_basic(data)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in inputs:
+        validate_trip_basic(data)
+    schema = time.perf_counter() - start
+
+    print(f"\nThinking_C 認證: 逐欄位 {legacy / len(inputs) * 1e6:.1f}us, "
+          f"schema {schema / len(inputs) * 1e6:.1f}us / 次")
+    assert schema / len(inputs) < 0.001
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
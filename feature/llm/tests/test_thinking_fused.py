@@ -0,0 +1,120 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from feature.llm.ab_thinking import print_report, run_ab
+from feature.llm.context_builder import ContextBuilder
+from feature.llm.LLM import LLM_Manager
+from feature.llm.tests.fake_thinking import BASIC, PREFERRED, RESTART, SPECIAL, FakeChatCompletion
+from feature.llm.utils import system_prompt
+
+@pytest.fixture
+def llm():
+    return LLM_Manager("test_api_key", use_cache=False)
+
+
+def test_fused_single_call_matches_split(llm):
+    """fused 只呼叫一次,認證後的結果與四次呼叫相同"""
+    fake = FakeChatCompletion()
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        split = llm.Thinking_fun("下禮拜六帶小孩去淡水玩", mode="split")
+        assert len(fake.calls) == 4
+
+        fused = llm.Thinking_fun("下禮拜六帶小孩去淡水玩", mode="fused")
+        assert len(fake.calls) == 5
+
+    assert fused == split
+    assert fused == [PREFERRED, [SPECIAL], [BASIC], RESTART]
+    assert fake.calls[-1]["response_format"] == {"type": "json_object"}
+
+
+def test_fused_invalid_sections_fall_back(llm):
+    """fused 某段格式錯誤時,只有該段使用提取器的預設值"""
+    broken = json.dumps(
+        {"preferred": PREFERRED, "special": "不知道", "restart": ["3"]},
+        ensure_ascii=False)
+    fake = FakeChatCompletion(fused_response=broken)
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        preferred, special, basic, restart = llm.Thinking_fun("淡水一日遊", mode="fused")
+
+    assert preferred == PREFERRED
+    assert not any(special[0].values())
+    assert basic[0]["出發地點"] == "台北車站"
+    assert restart == [0]
+
+
+def test_fused_unparseable_response(llm):
+    """fused 整體無法解析時全部使用預設值,不會丟出例外"""
+    fake = FakeChatCompletion(fused_response="抱歉,我無法回答")
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        result = llm.Thinking_fun("淡水一日遊", mode="fused")
+
+    assert len(result) == 4 and result[3] == [0]
+
+
+def test_mode_from_env(llm, monkeypatch):
+    """LLM_THINKING_MODE 決定預設模式"""
+    monkeypatch.setenv("LLM_THINKING_MODE", "fused")
+    fake = FakeChatCompletion()
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        llm.Thinking_fun("淡水一日遊")
+    assert len(fake.calls) == 1
+
+
+@pytest.mark.parametrize("mode", ["split", "fused"])
+def test_thinking_futures_match_thinking_fun(llm, mode):
+    """Thinking_futures 各段的認證結果與 Thinking_fun 相同"""
+    fake = FakeChatCompletion()
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        futures = llm.Thinking_futures("下禮拜六帶小孩去淡水玩", mode=mode)
+        sections = [futures[name].result() for name in ("Thinking_A", "Thinking_B", "Thinking_C", "restart")]
+
+    assert sections == [PREFERRED, [SPECIAL], [BASIC], RESTART]
+    assert len(fake.calls) == (1 if mode == "fused" else 4)
+
+
+def test_thinking_futures_error_propagates(llm):
+    """某段呼叫失敗時只有該段的 Future 丟出例外"""
+    fake = FakeChatCompletion()
+
+    def create(**kwargs):
+        if kwargs["messages"][0]["content"] == system_prompt.Thinking_C:
+            raise TimeoutError("LLM 逾時")
+        return fake.create(**kwargs)
+
+    with patch('openai.ChatCompletion.create', side_effect=create):
+        futures = llm.Thinking_futures("淡水一日遊", mode="split")
+        assert futures["Thinking_A"].result() == PREFERRED
+        with pytest.raises(TimeoutError):
+            futures["Thinking_C"].result()
+
+
+def test_ab_harness(llm, capsys):
+    """A/B 比較: 輸入含歷史與之前的行程時,fused 的 prompt token 較少,結果完全一致"""
+    previous_trip = [
+        {"step": i, "name": f"地點{i}", "label": "景點", "period": "morning",
+         "start_time": f"{9 + i:02d}:00", "end_time": f"{9 + i:02d}:50"}
+        for i in range(8)
+    ]
+    # 未精簡前 TripController._prepare_input_text 的組合方式
+    user_input = ContextBuilder.baseline(
+        text="下禮拜六帶小孩去淡水玩,開車,預算3000",
+        summary="用戶偏好文青風景點,不想去吵雜的地方,午餐預算500內,希望10點開始行程。",
+        previous_trip=previous_trip
+    )
+
+    fake = FakeChatCompletion()
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        report = run_ab(llm, [user_input], repeat=2)
+
+    assert report["split"]["calls"] == 8 and report["fused"]["calls"] == 2
+    assert report["fused"]["prompt_tokens"] < report["split"]["prompt_tokens"]
+    assert all(value == 1.0 for a in report["agreement"] for value in a.values())
+
+    print_report(report)
+    assert "一致程度" in capsys.readouterr().out
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
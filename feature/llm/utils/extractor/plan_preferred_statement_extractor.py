@@ -1,3 +1,6 @@
+from feature.llm.utils.extractor.schemas import validate_plan_preferred
+
+
 def plan_preferred_statement_extractor(preferred_statement:list, limit:int, debuger: bool=False) -> list[str]:
     '''
     確保字數大於一定字數
@@ -7,25 +10,12 @@ def plan_preferred_statement_extractor(preferred_statement:list, limit:int, debu
     return :
         ['喜歡探索文青風格的地方']
     '''
-    default_statement = '喜歡探索文青風格的地方,喜歡尋找便宜又美味的午餐選擇,喜歡探訪獨特景點,並享受與朋友聚餐的晚餐時光'
-    extract_preferred_statement = ['']
-    try : 
-        if len(preferred_statement[0]) > limit:
-            extract_preferred_statement = [preferred_statement[0]]
-            print(f'O : 情境搜索偏好句子 LLM 經過認證，格式無誤，超過 Limit : {limit} 個字')
-        else:
-            extract_preferred_statement = [default_statement]
-            print(f'X : 情境搜索偏好句子 LLM 錯誤，小於 Limit : {limit} 個字，使用預設字串')
-    except:
-        print('X : 情境搜索偏好句子 LLM 格式錯誤 使用預設字串')
-        extract_preferred_statement[0] = default_statement
-
-
+    report = validate_plan_preferred(preferred_statement, limit)
     if debuger == True:
-        print(extract_preferred_statement)
-
-    return extract_preferred_statement
+        print(report.describe())
+        print(report.value)
 
+    return report.value
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+"""
+LLM 輸出的 schema 認證
+
+每一段輸出(Thinking_A/B/C、restart、Cloud_A/B/C、歷史摘要)的欄位規則只宣告一次(Schema / Rule),
+一次走過所有欄位完成認證與轉換,回傳 ValidationReport(結果 + 錯誤明細),不輸出任何訊息,由呼叫端決定如何記錄。
+規則與原本的提取器相同:
+    - 欄位值不合法時,只有該欄位使用預設值(記錄一筆 FieldError)
+    - 整段格式錯誤(不是 list[dict]、缺少欄位)時,全部使用預設值(fallback=True)
+
+使用方式:
+```python
+report = validate_section('Thinking_C', llm_output)
+base_requirement = report.value
+if not report.ok:
+    logger.debug("%s", lazy(report.describe))
+```
+"""
+
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+from feature.llm.utils.extractor.format_valid.format_valid import (
+    is_float,
+    is_valid_lat_lon,
+    is_valid_mm_dd,
+    is_valid_one_to_seven,
+)
+
+_TIME_PATTERN = re.compile(r"^(?:[01]\d|2[0-3]):[0-5]\d|24:00$")
+
+TRANSPORTS = ('大眾運輸', '開車', '騎車', '步行')
+PLAN_TRANSPORTS = ('大眾運輸', '開車', '騎自行車', '步行')
+PLAN_CATEGORIES = ('餐廳', '咖啡廳', '小吃', '景點')
+
+TRIP_PREFERRED_DEFAULTS = [
+    {'上午': '我想逛充滿文青氛圍的街道,探索各種獨特的小店和咖啡館,'},
+    {'中餐': '我想吃美味又平價的小吃 !!!'},
+    {'下午': '我想去充滿藝術氣息和特色景點,享受不同的文化'},
+    {'晚餐': '晚上想去適合與朋友聚餐的餐廳,可以享受美食同時聊天交流,'},
+    {'晚上': '晚上想去可以看夜景, 氣氛幽靜可以約會的地方, 放鬆一天的行程'}
+]
+PLAN_PREFERRED_DEFAULT = '喜歡探索文青風格的地方,喜歡尋找便宜又美味的午餐選擇,喜歡探訪獨特景點,並享受與朋友聚餐的晚餐時光'
+TAIPEI_101 = (25.0418, 121.5654)
+
+
+# ---------欄位檢查----------------------------------
+
+def is_time(value: Any) -> bool:
+    """24 小時制 HH:MM(與 is_valid_24_hour_time 相同,pattern 預先編譯)"""
+    return isinstance(value, str) and _TIME_PATTERN.fullmatch(value) is not None
+
+
+def one_of(*choices) -> Callable[[Any], bool]:
+    def check(value):
+        try:
+            return value in choices
+        except Exception:
+            return False
+    check.__name__ = f"one_of{choices}"
+    return check
+
+
+def is_bool(value: Any) -> bool:
+    return isinstance(value, bool)
+
+
+def anything(value: Any) -> bool:
+    return True
+
+
+# ---------報告----------------------------------
+
+class FieldError(NamedTuple):
+    """單一欄位(或整段)的認證錯誤"""
+    field: str      # 欄位名稱,整段錯誤時為 '*'
+    value: Any      # LLM 給的值
+    reason: str
+
+
+class ValidationReport(NamedTuple):
+    """一段 LLM 輸出的認證結果"""
+    section: str
+    value: Any                  # 認證後的結果(格式與原本的提取器相同)
+    errors: List[FieldError]
+    fallback: bool = False      # 整段格式錯誤,全部使用預設值
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def describe(self) -> str:
+        """一行的錯誤摘要"""
+        if self.ok:
+            return f"O : {self.section} 認證通過"
+        if self.fallback:
+            return f"X : {self.section} 格式錯誤,全部使用預設值 ({self.errors[0].reason})"
+        fields = ", ".join(f"{e.field}={e.value!r}" for e in self.errors)
+        return f"X : {self.section} {len(self.errors)} 個欄位使用預設值: {fields}"
+
+
+# ---------schema----------------------------------
+
+class Rule(NamedTuple):
+    """一個欄位的規則: 值通過 check 時(經過 coerce)保留,否則使用 default"""
+    key: str
+    check: Callable[[Any], bool]
+    default: Any
+    coerce: Optional[Callable[[Any], Any]] = None
+
+
+class Schema:
+    """
+    宣告一次的欄位規則,validate 一次走過所有欄位
+    缺少任何欄位時整段使用預設值(與原本提取器遇到 KeyError 相同),多的欄位忽略
+    """
+
+    def __init__(self, section: str, rules: List[Rule]):
+        self.section = section
+        self.rules = tuple(rules)
+        self.defaults = {rule.key: rule.default for rule in self.rules}
+
+    def validate(self, data: Any, section: Optional[str] = None) -> ValidationReport:
+        """data 為 list[dict],取第一個 dict 認證,結果為 [dict]"""
+        section = section or self.section
+        if not isinstance(data, list) or not data or not isinstance(data[0], dict):
+            return self._fallback(section, data, '不是 list[dict]')
+        item = data[0]
+        missing = [rule.key for rule in self.rules if rule.key not in item]
+        if missing:
+            return self._fallback(section, data, f'缺少欄位 {missing}')
+
+        value, errors = {}, []
+        for key, check, default, coerce in self.rules:
+            field = item[key]
+            if check(field):
+                value[key] = coerce(field) if coerce else field
+                continue
+            value[key] = default
+            # LLM 明確給預設值(例如 'none')不算錯誤
+            if not (type(field) is type(default) and field == default):
+                errors.append(FieldError(key, field, check.__name__))
+        return ValidationReport(section, [value], errors)
+
+    def _fallback(self, section: str, data: Any, reason: str) -> ValidationReport:
+        return ValidationReport(section, [dict(self.defaults)], [FieldError('*', data, reason)], fallback=True)
+
+
+# Thinking_C: 旅遊基本需求(出發地點、結束地點只能確認是字串)
+TRIP_BASIC = Schema('Thinking_C', [
+    Rule('出發時間', is_time, '09:00', str),
+    Rule('結束時間', is_time, '21:00', str),
+    Rule('出發地點', anything, '台北車站', str),
+    Rule('結束地點', anything, 'none', str),
+    Rule('交通方式', one_of(*TRANSPORTS), '大眾運輸'),
+    Rule('可接受距離門檻(KM)', is_float, 30),
+    Rule('早餐時間', is_time, 'none', str),
+    Rule('中餐時間', is_time, '12:00', str),
+    Rule('晚餐時間', is_time, '18:00', str),
+    Rule('預算', is_float, 'none'),
+    Rule('出發日', is_valid_mm_dd, 'none', str),
+])
+
+# Thinking_B / Cloud_B: 特殊需求,不是 bool 的欄位為 False(不篩選)
+SPECIAL = Schema('Thinking_B', [
+    Rule(key, is_bool, False)
+    for key in ('內用座位', '洗手間', '適合兒童', '適合團體', '現金',
+                '其他支付', '收費停車', '免費停車', 'wi-fi', '無障礙')
+])
+
+# Cloud_C: 情境搜索基本需求
+PLAN_BASIC = Schema('Cloud_C', [
+    Rule('星期別', is_valid_one_to_seven, 'none'),
+    Rule('時間', is_time, 'none', str),
+    Rule('類別', one_of(*PLAN_CATEGORIES), 'none', str),
+    Rule('預算', is_float, 'none'),
+    Rule('出發地點', is_valid_lat_lon, TAIPEI_101),
+    Rule('可接受距離門檻(KM)', is_float, 30),
+    Rule('交通方式', one_of(*PLAN_TRANSPORTS), '大眾運輸', str),
+])
+
+TRIP_BASIC_DEFAULT = TRIP_BASIC.defaults
+SPECIAL_DEFAULT = SPECIAL.defaults
+PLAN_BASIC_DEFAULT = PLAN_BASIC.defaults
+
+
+# ---------各段認證----------------------------------
+
+def validate_trip_basic(data: Any) -> ValidationReport:
+    """Thinking_C"""
+    return TRIP_BASIC.validate(data)
+
+
+def validate_special(data: Any, section: str = 'Thinking_B') -> ValidationReport:
+    """Thinking_B / Cloud_B"""
+    return SPECIAL.validate(data, section)
+
+
+def validate_plan_basic(data: Any) -> ValidationReport:
+    """Cloud_C"""
+    return PLAN_BASIC.validate(data)
+
+
+def validate_trip_preferred(data: Any, limit: int = 10) -> ValidationReport:
+    """Thinking_A: 各時段一句 {時段: 形容句},字數需大於 limit,否則使用該時段的預設句"""
+    errors: List[FieldError] = []
+    value = []
+    try:
+        for idx, item in enumerate(data):
+            key, statement = next(iter(item.items()))
+            if len(statement) > limit:
+                value.append({key: statement})
+            else:
+                value.append(dict(TRIP_PREFERRED_DEFAULTS[idx]))
+                errors.append(FieldError(key, statement, f'字數不超過 {limit}'))
+        return ValidationReport('Thinking_A', value, errors)
+    except Exception as e:
+        return ValidationReport('Thinking_A', [dict(d) for d in TRIP_PREFERRED_DEFAULTS],
+                                [FieldError('*', data, type(e).__name__)], fallback=True)
+
+
+def validate_plan_preferred(data: Any, limit: int = 10) -> ValidationReport:
+    """Cloud_A: [形容句],字數需大於 limit"""
+    try:
+        if len(data[0]) > limit:
+            return ValidationReport('Cloud_A', [data[0]], [])
+        return ValidationReport('Cloud_A', [PLAN_PREFERRED_DEFAULT],
+                                [FieldError('0', data[0], f'字數不超過 {limit}')])
+    except Exception as e:
+        return ValidationReport('Cloud_A', [PLAN_PREFERRED_DEFAULT],
+                                [FieldError('*', data, type(e).__name__)], fallback=True)
+
+
+def validate_restart(data: Any) -> ValidationReport:
+    """restart: [int]"""
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], int):
+        return ValidationReport('restart', data, [])
+    return ValidationReport('restart', [0], [FieldError('*', data, '不是 [int]')], fallback=True)
+
+
+def validate_summary(data: Any, limit: int = 10) -> ValidationReport:
+    """歷史摘要: [str],字數需大於 limit"""
+    if isinstance(data, list) and len(data) == 1 and isinstance(data[0], str) and len(data[0]) > limit:
+        return ValidationReport('summarize_history', data, [])
+    return ValidationReport('summarize_history', [''], [FieldError('*', data, '不是 [str] 或字數不足')],
+                            fallback=True)
+
+
+# 依 LLM 呼叫的段落名稱取得認證函式
+VALIDATORS: Dict[str, Callable[[Any], ValidationReport]] = {
+    'Thinking_A': validate_trip_preferred,
+    'Thinking_B': validate_special,
+    'Thinking_C': validate_trip_basic,
+    'restart': validate_restart,
+    'Cloud_A': validate_plan_preferred,
+    'Cloud_B': lambda data: validate_special(data, section='Cloud_B'),
+    'Cloud_C': validate_plan_basic,
+    'summarize_history': validate_summary,
+}
+
+
+def validate_section(section: str, data: Any) -> ValidationReport:
+    """依段落名稱認證 LLM 輸出"""
+    return VALIDATORS[section](data)
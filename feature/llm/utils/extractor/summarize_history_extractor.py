@@ -1,21 +1,17 @@
+from feature.llm.utils.extractor.schemas import validate_summary
+
+
 def summarize_history_extractor(history:str, limit:int, debuger: bool=False) -> str:
     '''
     確保  history 值格式正確無誤，為 list, length=1, 內容為一個字串, 字數大於 limit
     '''
-    extract_history_summarize = ['']
-    try:
-        if isinstance(history, list) and len(history) == 1 and isinstance(history[0], str) and len(history[0]) > limit:
-            extract_history_summarize = history
-            print(f'O :  history 值LLM 經過認證，格式正確無誤 ，為 list, length=1, 內容為一個字串, 字數大於 {limit}')
-        else:
-            print("X : history 值LLM 錯誤， 使用預設值 ['']")
-    except :    # 基本上這個不會用到，上面已經排除完全錯誤，但還是多一層保護留著
-        print('X : history 值LLM 格式錯誤， 使用預設值 ['']')
-    
+    report = validate_summary(history, limit)
     if debuger == True:
-        print(extract_history_summarize)
-    
-    return extract_history_summarize
+        print(report.describe())
+        print(report.value)
+
+    return report.value
+
 
 if __name__ == '__main__':
     test_cases = [
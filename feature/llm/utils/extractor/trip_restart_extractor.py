@@ -1,21 +1,16 @@
+from feature.llm.utils.extractor.schemas import validate_restart
+
+
 def trip_restart_extractor(restart:list[int], debuger: bool=False) -> list[int]:
     '''
     確保  LLM restart 值格式正確無誤，為 [int], length=1
     '''
-    extract_restart = [0]
-    try:
-        if isinstance(restart, list) and len(restart) == 1 and isinstance(restart[0], int):
-            extract_restart = restart
-            print('O : LLM restart 值格式正確無誤，為 [int], length=1')
-        else:
-            print("X : LLM restart 不符合為list 或 list內不只一個 或 list內非int, 使用預設值")
-    except :
-        print('X : LLM restart 格式錯誤，使用預設值 [0]')
-    
+    report = validate_restart(restart)
     if debuger == True:
-        print(extract_restart)
-    
-    return extract_restart
+        print(report.describe())
+        print(report.value)
+
+    return report.value
 
 
 if __name__ == '__main__':
@@ -162,3 +162,25 @@ Cloud_C = """
                 "交通方式" : "大眾運輸" | "開車" | "騎車" | "步行",
             }}
             """
+
+# Thinking_A / Thinking_B / Thinking_C / restart 合併為一次呼叫 (Thinking_fun mode="fused")
+# 各段規則直接引用上面的 prompt,修改時只需要改一處
+Thinking_fused = f"""
+你是旅行規劃助手,請根據用戶輸入一次完成以下四項任務,
+並只回傳一個 JSON 物件,不要回傳其他任何文字:
+{{
+    "preferred": [{{"上午": ""}}, {{"中餐": ""}}, {{"下午": ""}}, {{"晚餐": ""}}, {{"晚上": ""}}],
+    "special": {{ 特殊需求,格式見 special }},
+    "basic": {{ 行程基本資訊,格式見 basic }},
+    "restart": [數字]
+}}
+
+===== preferred: 各時段的形容 =====
+{Thinking_A}
+===== special: 特殊需求 =====
+{Thinking_B}
+===== basic: 行程基本資訊 =====
+{Thinking_C}
+===== restart: 重新規劃的起點 =====
+{restart}
+"""
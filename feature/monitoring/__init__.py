@@ -0,0 +1,15 @@
+from .timer import (
+    REGISTRY,
+    span,
+    timed,
+    request_timer,
+    render_prometheus,
+)
+
+__all__ = [
+    'REGISTRY',
+    'span',
+    'timed',
+    'request_timer',
+    'render_prometheus',
+]
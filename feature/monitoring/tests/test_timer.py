@@ -0,0 +1,147 @@
+# feature/monitoring/tests/test_timer.py
+
+import io
+import json
+import time
+
+import pytest
+
+from feature.monitoring import REGISTRY, request_timer, span, timed
+from feature.monitoring.timer import METRIC_NAME, MetricsRegistry
+from feature.trip.src.core.utils.logger import setup_logging
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    """每個測試前後清空全域直方圖"""
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+def test_span_records_histogram():
+    """測試 span 會把耗時記錄到對應的 (pipeline, stage)"""
+    with span('llm_intent'):
+        time.sleep(0.01)
+
+    histogram = REGISTRY.get('trip', 'llm_intent')
+    cumulative, total, count = histogram.snapshot()
+    assert count == 1
+    assert total >= 0.01
+    assert cumulative[-1] == 1
+    # 0.005 秒的區間不應包含這次觀測
+    assert cumulative[0] == 0
+
+
+def test_span_records_on_exception():
+    """測試區塊拋出例外時仍會記錄耗時"""
+    with pytest.raises(ValueError):
+        with span('planner'):
+            raise ValueError("boom")
+
+    assert REGISTRY.get('trip', 'planner').count == 1
+
+
+def test_timed_decorator():
+    """測試 decorator 版本保留函式回傳值與名稱"""
+    @timed('get_places', 'plan')
+    def get_places(x):
+        return x * 2
+
+    assert get_places(3) == 6
+    assert get_places.__name__ == 'get_places'
+    assert REGISTRY.get('plan', 'get_places').count == 1
+
+
+def test_request_timer_breakdown():
+    """測試 request_timer 收集各階段明細並記錄 total"""
+    with request_timer('trip', log_breakdown=False) as breakdown:
+        with span('google_maps_directions'):
+            pass
+        with span('google_maps_directions'):
+            pass
+        with span('mongo_save_plan'):
+            pass
+
+    assert breakdown['google_maps_directions'][1] == 2
+    assert breakdown['mongo_save_plan'][1] == 1
+    assert REGISTRY.get('trip', 'total').count == 1
+
+    # 請求結束後的 span 不再寫入明細
+    with span('mongo_save_plan'):
+        pass
+    assert breakdown['mongo_save_plan'][1] == 1
+
+
+def test_request_timer_logs_breakdown():
+    """測試開啟明細時輸出一行結構化 log"""
+    stream = io.StringIO()
+    setup_logging(level='INFO', structured=True, stream=stream)
+    try:
+        with request_timer('plan', log_breakdown=True):
+            with span('llm_cloud', 'plan'):
+                pass
+    finally:
+        setup_logging(level='WARNING', structured=True)
+
+    record = json.loads(stream.getvalue().strip())
+    assert record['logger'] == 'trip.monitoring'
+    assert record['pipeline'] == 'plan'
+    assert 'llm_cloud' in record['stages']
+
+
+def test_prometheus_render():
+    """測試輸出格式符合 Prometheus histogram 規範"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe('trip', 'planner', 0.05)
+    registry.observe('trip', 'planner', 0.5)
+    registry.observe('trip', 'planner', 5.0)
+
+    text = registry.render()
+    labels = 'pipeline="trip",stage="planner"'
+    assert f"# TYPE {METRIC_NAME} histogram" in text
+    assert f'{METRIC_NAME}_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'{METRIC_NAME}_bucket{{{labels},le="1"}} 2' in text
+    assert f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f'{METRIC_NAME}_count{{{labels}}} 3' in text
+    assert f'{METRIC_NAME}_sum{{{labels}}} 5.550000' in text
+
+
+def test_metrics_route():
+    """測試 /metrics 路由回傳 text/plain 的直方圖內容"""
+    flask = pytest.importorskip('flask')
+    from feature.monitoring import render_prometheus
+
+    app = flask.Flask(__name__)
+
+    @app.route('/metrics')
+    def metrics():
+        return flask.Response(
+            render_prometheus(),
+            mimetype='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+    with span('vector_retrieval'):
+        pass
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'stage="vector_retrieval"' in response.get_data(as_text=True)
+
+
+def test_span_overhead():
+    """量測 span 本身的成本,確保遠低於任何外部呼叫"""
+    iterations = 20000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with span('overhead'):
+            pass
+    per_call = (time.perf_counter() - start) / iterations
+
+    print(f"\nspan 成本: {per_call * 1e6:.2f} µs/次")
+    assert per_call < 1e-4
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
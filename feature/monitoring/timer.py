@@ -0,0 +1,219 @@
+"""各階段耗時量測
+
+提供:
+1. span: context manager,量測一段程式的耗時
+2. timed: decorator 版本的 span
+3. request_timer: 包住整個請求,收集各階段耗時並可輸出明細
+4. REGISTRY: 全域直方圖,可輸出 Prometheus text format
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from feature.trip.src.core.utils.logger import get_logger
+
+# 掛在 trip 命名空間下,沿用 setup_logging 的等級與追蹤ID
+logger = get_logger('monitoring')
+
+# 預設直方圖區間(秒),涵蓋 Mongo 幾毫秒到 LLM 十幾秒
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 20.0, 30.0,
+)
+
+METRIC_NAME = 'travel_router_stage_duration_seconds'
+
+# 目前請求的各階段耗時明細 {stage: [總秒數, 次數]}
+_breakdown: ContextVar[Optional[Dict[str, list]]] = ContextVar(
+    'stage_breakdown', default=None
+)
+
+
+class Histogram:
+    """單一 label 組合的累積直方圖(thread-safe)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後一格為 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """記錄一次耗時(秒)"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[list, float, int]:
+        """取得 (累積次數, 總和, 次數) 的快照"""
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.sum, self.count
+
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """以 (pipeline, stage) 為 label 的直方圖集合"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, pipeline: str, stage: str, seconds: float) -> None:
+        """記錄某個階段的耗時"""
+        key = (pipeline, stage)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(
+                    key, Histogram(self.buckets)
+                )
+        histogram.observe(seconds)
+
+    def get(self, pipeline: str, stage: str) -> Optional[Histogram]:
+        """取得指定階段的直方圖,沒有記錄過則回傳None"""
+        return self._histograms.get((pipeline, stage))
+
+    def clear(self) -> None:
+        """清除所有記錄(測試用)"""
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """輸出 Prometheus text exposition format
+
+        Returns:
+            str: 可直接回傳給 /metrics 的文字內容
+        """
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of each request stage in seconds.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items())
+
+        for (pipeline, stage), histogram in items:
+            labels = f'pipeline="{_escape(pipeline)}",stage="{_escape(stage)}"'
+            cumulative, total, count = histogram.snapshot()
+            for bound, value in zip(histogram.buckets, cumulative):
+                lines.append(
+                    f'{METRIC_NAME}_bucket{{{labels},le="{bound:g}"}} {value}'
+                )
+            lines.append(
+                f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {cumulative[-1]}'
+            )
+            lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """跳脫 label 值中的特殊字元"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 全域 registry,每個 worker 一份
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def span(stage: str, pipeline: str = 'trip') -> Iterator[None]:
+    """量測區塊耗時並記錄到 REGISTRY
+
+    使用範例:
+        >>> with span('vector_retrieval'):
+        >>>     results = qdrant_obj.cloud_search(query)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        REGISTRY.observe(pipeline, stage, elapsed)
+
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            entry = breakdown.setdefault(stage, [0.0, 0])
+            entry[0] += elapsed
+            entry[1] += 1
+
+
+def timed(stage: str, pipeline: str = 'trip') -> Callable:
+    """span 的 decorator 版本
+
+    使用範例:
+        >>> @timed('llm_intent')
+        >>> def _analyze_intent(self, text): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, pipeline):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def request_timer(
+    pipeline: str = 'trip',
+    log_breakdown: Optional[bool] = None
+) -> Iterator[Dict[str, list]]:
+    """包住一次完整請求,記錄 total 並收集各階段明細
+
+    Args:
+        pipeline: str - 'trip' | 'plan'
+        log_breakdown: Optional[bool] - 是否在結束時輸出明細,
+            預設讀取環境變數 METRICS_LOG_BREAKDOWN
+
+    Yields:
+        Dict[str, list]: {stage: [總秒數, 次數]},請求結束後才完整
+    """
+    if log_breakdown is None:
+        log_breakdown = os.getenv('METRICS_LOG_BREAKDOWN', '0') == '1'
+
+    breakdown: Dict[str, list] = {}
+    token = _breakdown.set(breakdown)
+    start = time.perf_counter()
+    try:
+        yield breakdown
+    finally:
+        total = time.perf_counter() - start
+        _breakdown.reset(token)
+        REGISTRY.observe(pipeline, 'total', total)
+
+        if log_breakdown:
+            logger.info(
+                "%s 請求耗時 %.3f 秒: %s",
+                pipeline, total,
+                ", ".join(
+                    f"{stage}={seconds:.3f}s" + (f"(x{n})" if n > 1 else "")
+                    for stage, (seconds, n) in breakdown.items()
+                ),
+                extra={'data': {
+                    'pipeline': pipeline,
+                    'total': round(total, 4),
+                    'stages': {k: round(v[0], 4) for k, v in breakdown.items()},
+                }}
+            )
+
+
+def render_prometheus() -> str:
+    """輸出全域 REGISTRY 的 Prometheus text format"""
+    return REGISTRY.render()
@@ -0,0 +1,293 @@
+"""
+MongoDBManage_unsatisfied / MongoDBManage_favorite 的非同步版本
+
+方法名稱、參數與回傳值都與同步版本相同,只是需要 await。
+使用 pymongo 內建的 AsyncMongoClient(與 Motor 相同的 API),必須在 event loop 內建立。
+
+使用方式:
+```python
+async def main():
+    favorite = AsyncMongoDBManage_favorite(config)
+    if not await favorite.check_place("Uxxxx", "place_id"):
+        await favorite.fix_favorite("Uxxxx", "place_id", place_data)
+```
+"""
+
+from typing import Any, Dict, List, Optional
+
+from feature.nosql_mongo.mongo_rec.mongo_client import (
+    DB_NAME,
+    FAVORITE_COLLECTION,
+    UNSATISFIED_COLLECTION,
+    get_async_mongo_client,
+)
+from feature.nosql_mongo.mongo_rec import queries
+
+
+class AsyncMongoDBManage_unsatisfied:
+    '''
+    MongoDBManage_unsatisfied 的非同步版本
+    主要用於管理用戶對推薦不滿意的記錄，包含黑名單管理和查詢記錄存儲
+    '''
+
+    def __init__(self, config: Dict[str, str]):
+        """初始化MongoDB連接(需在 event loop 內呼叫)"""
+        self.mongodb_uri = config.get("MONGODB_URI")
+        if not self.mongodb_uri:
+            raise ValueError("MongoDB URI在設定中是必要的")
+
+        # 使用目前 event loop 共用的連線池(索引由 ensure_indexes 在啟動時建立)
+        self.client = get_async_mongo_client(self.mongodb_uri)
+        self.db = self.client[DB_NAME]
+        self.unsatisfied_collection = self.db[UNSATISFIED_COLLECTION]
+
+    async def test_connection(self) -> bool:
+        """測試數據庫連接是否正常"""
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception as e:
+            print(f"連接錯誤: {e}")
+            return False
+
+    async def add_unsatisfied(self, query_info: Dict[str, Any]) -> bool:
+        """新增用戶的不滿意記錄(同 MongoDBManage_unsatisfied.add_unsatisfied)"""
+        try:
+            await self.unsatisfied_collection.insert_one(queries.unsatisfied_record(query_info))
+            return True
+
+        except Exception as e:
+            print(f"新增不滿意記錄時發生錯誤: {e}")
+            return False
+
+    async def update_blacklist(self, line_user_id: str, place_ids: List[str]) -> bool:
+        """將新的 place_ids 加入到現有黑名單中(同 MongoDBManage_unsatisfied.update_blacklist)"""
+        try:
+            user_record = await self.unsatisfied_collection.find_one(queries.user_filter(line_user_id))
+            if not user_record:
+                print(f"找不到用戶 {line_user_id} 的記錄")
+                return False
+
+            new_blacklist = queries.merged_blacklist(user_record, place_ids)
+            result = await self.unsatisfied_collection.update_one(
+                queries.user_filter(line_user_id),
+                queries.set_blacklist(new_blacklist)
+            )
+
+            success = result.modified_count > 0
+            if success:
+                print(f"用戶 {line_user_id} 的黑名單更新成功，共 {len(new_blacklist)} 個地點")
+            else:
+                print(f"用戶 {line_user_id} 的黑名單無變化")
+
+            return success
+
+        except Exception as e:
+            print(f"更新黑名單時發生錯誤: {e}")
+            return False
+
+    async def compare_query(self, query_info: Dict[str, Any]) -> bool:
+        """比對用戶輸入的query和資料庫中已存在的query是否相同"""
+        try:
+            user_record = await self.unsatisfied_collection.find_one(
+                queries.user_filter(query_info["line_user_id"])
+            )
+            return queries.is_same_query(user_record, query_info)
+
+        except Exception as e:
+            print(f"比對查詢時發生錯誤: {e}")
+            return False
+
+    async def update_query_info(self, query_info: Dict[str, Any]) -> bool:
+        """使用新的 query_info 完整覆蓋更新用戶的記錄"""
+        try:
+            line_user_id = query_info["line_user_id"]
+
+            result = await self.unsatisfied_collection.update_one(
+                queries.user_filter(line_user_id),
+                queries.set_query_info(query_info),
+                upsert=True  # 如果不存在則創建新記錄
+            )
+
+            success = result.modified_count > 0 or result.upserted_id is not None
+            if success:
+                print(f"成功更新用戶 {line_user_id} 的查詢記錄")
+            else:
+                print(f"用戶 {line_user_id} 的查詢記錄無變化")
+
+            return success
+
+        except Exception as e:
+            print(f"更新查詢記錄時發生錯誤: {e}")
+            return False
+
+    async def check_user_exists(self, line_user_id: str) -> bool:
+        """檢查用戶是否存在於資料庫中"""
+        try:
+            result = await self.unsatisfied_collection.find_one(queries.user_filter(line_user_id))
+            return result is not None
+
+        except Exception as e:
+            print(f"檢查用戶存在時發生錯誤: {e}")
+            return False
+
+    async def get_user_records(self, line_user_id: str) -> List[Dict[str, Any]]:
+        """獲取指定用戶的所有記錄(_id 轉為字串)"""
+        try:
+            records = await self.unsatisfied_collection.find(queries.user_filter(line_user_id)).to_list(None)
+            return queries.stringify_ids(records)
+
+        except Exception as e:
+            print(f"獲取用戶記錄時發生錯誤: {e}")
+            return []
+
+    async def delete_user_record(self, line_user_id: str) -> bool:
+        """刪除指定用戶的所有記錄"""
+        try:
+            result = await self.unsatisfied_collection.delete_many(queries.user_filter(line_user_id))
+
+            success = result.deleted_count > 0
+            if success:
+                print(f"成功刪除用戶 {line_user_id} 的所有記錄")
+            else:
+                print(f"用戶 {line_user_id} 無記錄可刪除")
+
+            return success
+
+        except Exception as e:
+            print(f"刪除用戶記錄時發生錯誤: {e}")
+            return False
+
+    async def close(self):
+        """連線池為共用,這裡不關閉(保留呼叫介面)"""
+        pass
+
+
+class AsyncMongoDBManage_favorite:
+    '''
+    MongoDBManage_favorite 的非同步版本
+    主要用於管理用戶收藏的地點資訊
+    '''
+
+    def __init__(self, config: Dict[str, str]):
+        """
+        初始化MongoDB連接(需在 event loop 內呼叫)
+
+        Args:
+            config: 包含MongoDB連接資訊的配置字典
+        """
+        self.mongodb_uri = config.get("MONGODB_URI")
+        if not self.mongodb_uri:
+            raise ValueError("MongoDB URI is required in config")
+
+        # 使用目前 event loop 共用的連線池(索引由 ensure_indexes 在啟動時建立)
+        self.client = get_async_mongo_client(self.mongodb_uri)
+        self.db = self.client[DB_NAME]
+        self.favorite_collection = self.db[FAVORITE_COLLECTION]
+
+    async def test_connection(self) -> bool:
+        """測試數據庫連接是否正常"""
+        try:
+            await self.client.admin.command('ping')
+            return True
+        except Exception as e:
+            print(f"Connection error: {e}")
+            return False
+
+    async def check_user(self, line_user_id: str) -> bool:
+        """檢查用戶是否存在於資料庫"""
+        try:
+            return bool(await self.favorite_collection.find_one(queries.user_filter(line_user_id)))
+        except Exception as e:
+            print(f"Error checking user: {e}")
+            return False
+
+    async def check_place(self, line_user_id: str, place_id: str) -> bool:
+        """檢查特定地點是否已被用戶收藏"""
+        try:
+            user_doc = await self.favorite_collection.find_one(queries.user_filter(line_user_id))
+            return queries.is_favorite(user_doc, place_id)
+        except Exception as e:
+            print(f"Error checking place: {e}")
+            return False
+
+    async def add_user(self, line_user_id: str, place_id: str, place_data: Dict[str, Any]) -> bool:
+        """新增用戶和第一個收藏地點到recommend_favorite collection"""
+        try:
+            await self.favorite_collection.insert_one(queries.new_favorite_doc(line_user_id, place_id, place_data))
+            return True
+        except Exception as e:
+            print(f"Error adding user: {e}")
+            return False
+
+    async def delete_favorite(self, line_user_id: str, place_id: str) -> bool:
+        """刪除指定用戶的特定收藏地點,沒有其他收藏時刪除整個文檔"""
+        try:
+            result = await self.favorite_collection.update_one(
+                queries.user_filter(line_user_id),
+                queries.unset_favorite(place_id)
+            )
+
+            if result.modified_count > 0:
+                print(f"Successfully deleted place {place_id} for user {line_user_id}")
+
+                user_doc = await self.favorite_collection.find_one(queries.user_filter(line_user_id))
+                if queries.is_empty_favorite(user_doc):
+                    await self.favorite_collection.delete_one(queries.user_filter(line_user_id))
+                    print(f"Removed empty document for user {line_user_id}")
+
+                return True
+            else:
+                print(f"No matching place found for user {line_user_id} and place {place_id}")
+                return False
+
+        except Exception as e:
+            print(f"Error deleting favorite: {e}")
+            return False
+
+    async def fix_favorite(self, line_user_id: str, place_id: str, place_data: Dict[str, Any]) -> bool:
+        """更新用戶的收藏地點清單，最多保存10個地點"""
+        try:
+            user_doc = await self.favorite_collection.find_one(queries.user_filter(line_user_id))
+            if not user_doc:
+                print(f"User {line_user_id} not found")
+                return False
+
+            current_results = user_doc.get("results", {})
+
+            # 如果該地點已存在，返回False
+            if place_id in current_results:
+                return False
+
+            # 如果收藏數達到上限，刪除最舊的一個
+            oldest_place_id = queries.oldest_favorite(current_results)
+            if oldest_place_id is not None:
+                await self.favorite_collection.update_one(
+                    queries.user_filter(line_user_id),
+                    queries.unset_favorite(oldest_place_id)
+                )
+
+            await self.favorite_collection.update_one(
+                queries.user_filter(line_user_id),
+                queries.set_favorite(place_id, place_data)
+            )
+            return True
+
+        except Exception as e:
+            print(f"Error updating favorite: {e}")
+            return False
+
+    async def show_favorite(self, line_user_id: str) -> Optional[Dict]:
+        """取得用戶收藏的地點清單,若用戶不存在則返回None"""
+        try:
+            user_doc = await self.favorite_collection.find_one(queries.user_filter(line_user_id))
+            return user_doc.get("results") if user_doc else None
+
+        except Exception as e:
+            print(f"Error retrieving favorites: {e}")
+            return None
+
+    async def close(self):
+        """連線池為共用,這裡不關閉(保留呼叫介面)"""
+        pass
+
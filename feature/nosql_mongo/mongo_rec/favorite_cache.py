@@ -0,0 +1,183 @@
+"""
+收藏清單的 process 內快取
+
+收藏流程(顯示、新增、移除)每一步都會查一次同一份收藏文件,
+CachedFavoriteManager 把每個用戶的收藏放在 FavoriteCache,
+同一個用戶在 TTL 內的查詢只讀一次資料庫,check_place 直接查 set。
+
+寫入照常寫到 MongoDB,成功或失敗都讓該用戶的快取失效,下次查詢重新讀取。
+讀取期間若該用戶被 invalidate(寫入與讀取同時發生),這次讀到的結果只回傳不存入快取。
+每個 worker 各自有一份快取,其他 worker 的修改最晚在 TTL 後看得到。
+
+使用方式:
+```python
+cache = FavoriteCache(ttl=300, max_users=1024)   # 與 handler 同生命週期
+mongodb_obj = CachedFavoriteManager(config, cache)
+if mongodb_obj.check_user(user_id) and not mongodb_obj.check_place(user_id, place_id):
+    mongodb_obj.fix_favorite(user_id, place_id, place_data)
+```
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, NamedTuple, Optional
+
+from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_favo import MongoDBManage_favorite
+
+
+class FavoriteEntry(NamedTuple):
+    """一個用戶的收藏快取(results 為 None 表示沒有收藏文件)"""
+    results: Optional[Dict[str, Dict]]
+    place_ids: FrozenSet[str]
+    expires_at: float
+
+
+class FavoriteCache:
+    """
+    依用戶保存收藏清單的 LRU + TTL 快取(thread-safe)
+
+    Args:
+        ttl: 每筆快取的有效秒數
+        max_users: 最多保存的用戶數,超過時移除最久沒用到的
+    """
+
+    def __init__(self, ttl: float = 300, max_users: int = 1024):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, FavoriteEntry]" = OrderedDict()
+        # 用戶最近一次 invalidate 的世代(全域遞增,不會重複),同樣只保留 max_users 筆
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        line_user_id: str,
+        loader: Callable[[str], Optional[Dict[str, Dict]]]
+    ) -> FavoriteEntry:
+        """
+        取得用戶的收藏快取,不存在或過期時以 loader 讀取
+
+        Args:
+            line_user_id: Line用戶ID
+            loader: 讀取收藏 results 的函式(例如 MongoDBManage_favorite.show_favorite)
+
+        Returns:
+            FavoriteEntry: 用戶的收藏
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(line_user_id)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(line_user_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generations.get(line_user_id, 0)
+
+        # 讀取資料庫時不持有鎖,避免慢查詢擋住其他用戶
+        results = loader(line_user_id)
+        entry = FavoriteEntry(
+            results=results,
+            place_ids=frozenset(results or ()),
+            expires_at=time.monotonic() + self.ttl
+        )
+
+        with self._lock:
+            # 讀取期間被 invalidate 過,結果可能是寫入前的舊資料
+            if self._generations.get(line_user_id, 0) != generation:
+                return entry
+            self._entries[line_user_id] = entry
+            self._entries.move_to_end(line_user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, line_user_id: str) -> None:
+        """讓用戶的快取失效(寫入後呼叫)"""
+        with self._lock:
+            self._entries.pop(line_user_id, None)
+            self._generations[line_user_id] = next(self._counter)
+            self._generations.move_to_end(line_user_id)
+            while len(self._generations) > self.max_users:
+                self._generations.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空所有快取"""
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedFavoriteManager(MongoDBManage_favorite):
+    '''
+    讀取走 FavoriteCache 的 MongoDBManage_favorite
+
+    check_user / check_place / show_favorite 共用同一份快取,
+    add_user / fix_favorite / delete_favorite 寫入資料庫後讓快取失效。
+    '''
+
+    def __init__(self, config: Dict[str, str], cache: Optional[FavoriteCache] = None):
+        """
+        初始化
+
+        Args:
+            config: 包含MongoDB連接資訊的配置字典
+            cache: 共用的 FavoriteCache,未提供時只在這個物件內快取
+        """
+        super().__init__(config)
+        self.cache = cache if cache is not None else FavoriteCache()
+
+    def _load(self, line_user_id: str) -> Optional[Dict[str, Dict]]:
+        """從資料庫讀取收藏 results(讀取失敗時丟出例外,不快取錯誤結果)"""
+        user_doc = self.favorite_collection.find_one(
+            {"line_user_id": line_user_id}, {"_id": 0, "results": 1})
+        if user_doc is None:
+            return None
+        return user_doc.get("results", {})
+
+    def check_user(self, line_user_id: str) -> bool:
+        """檢查用戶是否存在於資料庫"""
+        try:
+            return self.cache.get(line_user_id, self._load).results is not None
+        except Exception as e:
+            print(f"Error checking user: {e}")
+            return False
+
+    def check_place(self, line_user_id: str, place_id: str) -> bool:
+        """檢查特定地點是否已被用戶收藏"""
+        try:
+            return place_id in self.cache.get(line_user_id, self._load).place_ids
+        except Exception as e:
+            print(f"Error checking place: {e}")
+            return False
+
+    def show_favorite(self, line_user_id: str) -> Optional[Dict]:
+        """取得用戶收藏的地點清單,若用戶不存在則返回None"""
+        try:
+            results = self.cache.get(line_user_id, self._load).results
+            return dict(results) if results is not None else None
+        except Exception as e:
+            print(f"Error retrieving favorites: {e}")
+            return None
+
+    def add_user(self, line_user_id: str, place_id: str, place_data: Dict[str, Any]) -> bool:
+        try:
+            return super().add_user(line_user_id, place_id, place_data)
+        finally:
+            self.cache.invalidate(line_user_id)
+
+    def delete_favorite(self, line_user_id: str, place_id: str) -> bool:
+        try:
+            return super().delete_favorite(line_user_id, place_id)
+        finally:
+            self.cache.invalidate(line_user_id)
+
+    def fix_favorite(self, line_user_id: str, place_id: str, place_data: Dict[str, Any]) -> bool:
+        try:
+            return super().fix_favorite(line_user_id, place_id, place_data)
+        finally:
+            self.cache.invalidate(line_user_id)
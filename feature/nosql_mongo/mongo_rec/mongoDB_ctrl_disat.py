@@ -1,9 +1,10 @@
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
 from typing import Optional, Dict, Any, Set, List
 from dotenv import dotenv_values
 from datetime import datetime
 
+from feature.nosql_mongo.mongo_rec import queries
+from feature.nosql_mongo.mongo_rec.mongo_client import DB_NAME, UNSATISFIED_COLLECTION, get_mongo_client
+
 class MongoDBManage_unsatisfied:
     '''
     MongoDB管理 - Travel Router專案使用
@@ -35,9 +36,11 @@ class MongoDBManage_unsatisfied:
     
     #刪除用戶所有紀錄
     delete_user_record(line_user_id)
-    # 關閉連接
+    # 關閉(共用連線池,不會真的斷線)
     mongo_manager.close()
     ```
+
+    連線由 mongo_client.get_mongo_client 共用,索引在啟動時由 ensure_indexes 建立。
     '''
     
     def __init__(self, config: Dict[str, str]):
@@ -46,12 +49,10 @@ class MongoDBManage_unsatisfied:
         if not self.mongodb_uri:
             raise ValueError("MongoDB URI在設定中是必要的")
             
-        self.client = MongoClient(self.mongodb_uri, server_api=ServerApi('1'))
-        self.db = self.client.travel_router
-        self.unsatisfied_collection = self.db.recommend_unsatisfied
-        
-        # 創建索引以提高查詢效率
-        self.unsatisfied_collection.create_index([("line_user_id", 1)])
+        # 使用 process 共用的連線池(索引由 ensure_indexes 在啟動時建立)
+        self.client = get_mongo_client(self.mongodb_uri)
+        self.db = self.client[DB_NAME]
+        self.unsatisfied_collection = self.db[UNSATISFIED_COLLECTION]
 
     def test_connection(self) -> bool:
         """測試數據庫連接是否正常"""
@@ -73,11 +74,8 @@ class MongoDBManage_unsatisfied:
             bool: 新增是否成功
         """
         try:
-            # 將 black_list 轉換為 list，因為 MongoDB 不支援 set 類型
-            query_info["black_list"] = list(query_info.get("black_list", []))
-            
-            # 插入文檔
-            self.unsatisfied_collection.insert_one(query_info)
+            # 插入文檔(black_list 轉換為 list，因為 MongoDB 不支援 set 類型)
+            self.unsatisfied_collection.insert_one(queries.unsatisfied_record(query_info))
             return True
             
         except Exception as e:
@@ -97,21 +95,18 @@ class MongoDBManage_unsatisfied:
         """
         try:
             # 取得現有黑名單
-            user_record = self.unsatisfied_collection.find_one(
-                {"line_user_id": line_user_id}
-            )
+            user_record = self.unsatisfied_collection.find_one(queries.user_filter(line_user_id))
             if not user_record:
                 print(f"找不到用戶 {line_user_id} 的記錄")
                 return False
             
             # 合併現有和新的黑名單
-            current_blacklist = set(user_record.get("black_list", []))
-            new_blacklist = current_blacklist.union(place_ids)
+            new_blacklist = queries.merged_blacklist(user_record, place_ids)
             
             # 更新到資料庫
             result = self.unsatisfied_collection.update_one(
-                {"line_user_id": line_user_id},
-                {"$set": {"black_list": list(new_blacklist)}}
+                queries.user_filter(line_user_id),
+                queries.set_blacklist(new_blacklist)
             )
             
             success = result.modified_count > 0
@@ -137,21 +132,13 @@ class MongoDBManage_unsatisfied:
             bool: 如果查詢相同返回True，否則返回False
         """
         try:
-            # 獲取必要資訊
-            line_user_id = query_info["line_user_id"]
-            new_query = query_info["query"]
-            
             # 找到該用戶的記錄
-            user_record = self.unsatisfied_collection.find_one({
-                "line_user_id": line_user_id
-            })
+            user_record = self.unsatisfied_collection.find_one(
+                queries.user_filter(query_info["line_user_id"])
+            )
             
-            if not user_record:
-                return False
-                
             # 比對query是否相同
-            existing_query = user_record.get("query", "")
-            return existing_query == new_query
+            return queries.is_same_query(user_record, query_info)
             
         except Exception as e:
             print(f"比對查詢時發生錯誤: {e}")
@@ -172,8 +159,8 @@ class MongoDBManage_unsatisfied:
             
             # 直接用新的 query_info 替換舊記錄
             result = self.unsatisfied_collection.update_one(
-                {"line_user_id": line_user_id},
-                {"$set": query_info},
+                queries.user_filter(line_user_id),
+                queries.set_query_info(query_info),
                 upsert=True  # 如果不存在則創建新記錄
             )
             
@@ -200,9 +187,7 @@ class MongoDBManage_unsatisfied:
             bool: 用戶是否存在
         """
         try:
-            result = self.unsatisfied_collection.find_one(
-                {"line_user_id": line_user_id}
-            )
+            result = self.unsatisfied_collection.find_one(queries.user_filter(line_user_id))
             
             return result is not None
             
@@ -222,17 +207,10 @@ class MongoDBManage_unsatisfied:
         """
         try:
             # 查詢該用戶的記錄
-            records = list(self.unsatisfied_collection.find(
-                {"line_user_id": line_user_id}
-            ))
-            
-            if records:
-                # 將 _id 轉換為字符串
-                for record in records:
-                    record['_id'] = str(record['_id'])
-                return records
+            records = list(self.unsatisfied_collection.find(queries.user_filter(line_user_id)))
             
-            return []
+            # 將 _id 轉換為字符串
+            return queries.stringify_ids(records)
             
         except Exception as e:
             print(f"獲取用戶記錄時發生錯誤: {e}")
@@ -250,9 +228,7 @@ class MongoDBManage_unsatisfied:
         """
         try:
             # 刪除該用戶的所有記錄
-            result = self.unsatisfied_collection.delete_many(
-                {"line_user_id": line_user_id}
-            )
+            result = self.unsatisfied_collection.delete_many(queries.user_filter(line_user_id))
             
             success = result.deleted_count > 0
             if success:
@@ -266,8 +242,8 @@ class MongoDBManage_unsatisfied:
             print(f"刪除用戶記錄時發生錯誤: {e}")
             return False    
     def close(self):
-        """關閉數據庫連接"""
-        self.client.close()
+        """連線池為 process 共用,這裡不關閉(保留呼叫介面)"""
+        pass
 
 
 # 測試用例
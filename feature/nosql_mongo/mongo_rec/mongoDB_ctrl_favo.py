@@ -1,12 +1,8 @@
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
 from typing import Optional, Dict, Any
 from dotenv import dotenv_values
 
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
-from typing import Optional, Dict, Any
-from dotenv import dotenv_values
+from feature.nosql_mongo.mongo_rec import queries
+from feature.nosql_mongo.mongo_rec.mongo_client import DB_NAME, FAVORITE_COLLECTION, get_mongo_client
 
 class MongoDBManage_favorite:
     '''
@@ -31,6 +27,8 @@ class MongoDBManage_favorite:
     # 確認用戶是否已收藏該地點
     check_place("line_user_id", "place_id")
     ```
+
+    連線由 mongo_client.get_mongo_client 共用,索引在啟動時由 ensure_indexes 建立。
     '''
     
     def __init__(self, config: Dict[str, str]):
@@ -44,12 +42,10 @@ class MongoDBManage_favorite:
         if not self.mongodb_uri:
             raise ValueError("MongoDB URI is required in config")
             
-        self.client = MongoClient(self.mongodb_uri, server_api=ServerApi('1'))
-        self.db = self.client.travel_router
-        self.favorite_collection = self.db.recommend_favorite
-        
-        # 創建索引以提高查詢效率
-        self.favorite_collection.create_index("line_user_id")
+        # 使用 process 共用的連線池(索引由 ensure_indexes 在啟動時建立)
+        self.client = get_mongo_client(self.mongodb_uri)
+        self.db = self.client[DB_NAME]
+        self.favorite_collection = self.db[FAVORITE_COLLECTION]
         
     def test_connection(self) -> bool:
         """測試數據庫連接是否正常"""
@@ -71,7 +67,7 @@ class MongoDBManage_favorite:
             bool: 用戶是否存在
         """
         try:
-            return bool(self.favorite_collection.find_one({"line_user_id": line_user_id}))
+            return bool(self.favorite_collection.find_one(queries.user_filter(line_user_id)))
         except Exception as e:
             print(f"Error checking user: {e}")
             return False
@@ -88,10 +84,8 @@ class MongoDBManage_favorite:
             bool: 地點是否已被收藏
         """
         try:
-            user_doc = self.favorite_collection.find_one({"line_user_id": line_user_id})
-            if not user_doc:
-                return False
-            return place_id in user_doc.get("results", {})
+            user_doc = self.favorite_collection.find_one(queries.user_filter(line_user_id))
+            return queries.is_favorite(user_doc, place_id)
         except Exception as e:
             print(f"Error checking place: {e}")
             return False
@@ -109,19 +103,7 @@ class MongoDBManage_favorite:
             bool: 新增是否成功
         """
         try:
-            new_doc = {
-                "line_user_id": line_user_id,
-                "results": {
-                    place_id: {
-                        "name": place_data["name"],
-                        "rating": place_data["rating"],
-                        "address": place_data["address"],
-                        "location_url": place_data["location_url"],
-                        "image_url": place_data["image_url"]
-                    }
-                }
-            }
-            self.favorite_collection.insert_one(new_doc)
+            self.favorite_collection.insert_one(queries.new_favorite_doc(line_user_id, place_id, place_data))
             return True
         except Exception as e:
             print(f"Error adding user: {e}")
@@ -141,18 +123,18 @@ class MongoDBManage_favorite:
         try:
             # 使用unset操作來移除特定的place_id
             result = self.favorite_collection.update_one(
-                {"line_user_id": line_user_id},
-                {"$unset": {f"results.{place_id}": ""}}
+                queries.user_filter(line_user_id),
+                queries.unset_favorite(place_id)
             )
             
             if result.modified_count > 0:
                 print(f"Successfully deleted place {place_id} for user {line_user_id}")
                 
                 # 檢查用戶是否還有其他收藏
-                user_doc = self.favorite_collection.find_one({"line_user_id": line_user_id})
-                if user_doc and len(user_doc.get("results", {})) == 0:
+                user_doc = self.favorite_collection.find_one(queries.user_filter(line_user_id))
+                if queries.is_empty_favorite(user_doc):
                     # 如果沒有其他收藏了，刪除整個文檔
-                    self.favorite_collection.delete_one({"line_user_id": line_user_id})
+                    self.favorite_collection.delete_one(queries.user_filter(line_user_id))
                     print(f"Removed empty document for user {line_user_id}")
                     
                 return True
@@ -177,7 +159,7 @@ class MongoDBManage_favorite:
             bool: 更新是否成功
         """
         try:
-            user_doc = self.favorite_collection.find_one({"line_user_id": line_user_id})
+            user_doc = self.favorite_collection.find_one(queries.user_filter(line_user_id))
             if not user_doc:
                 print(f"User {line_user_id} not found")
                 return False
@@ -189,23 +171,17 @@ class MongoDBManage_favorite:
                 return False
                 
             # 如果收藏數達到上限，刪除最舊的一個
-            if len(current_results) >= 10:
-                oldest_place_id = next(iter(current_results.keys()))
+            oldest_place_id = queries.oldest_favorite(current_results)
+            if oldest_place_id is not None:
                 self.favorite_collection.update_one(
-                    {"line_user_id": line_user_id},
-                    {"$unset": {f"results.{oldest_place_id}": ""}}
+                    queries.user_filter(line_user_id),
+                    queries.unset_favorite(oldest_place_id)
                 )
             
             # 新增新的收藏
             self.favorite_collection.update_one(
-                {"line_user_id": line_user_id},
-                {"$set": {f"results.{place_id}": {
-                    "name": place_data["name"],
-                    "rating": place_data["rating"],
-                    "address": place_data["address"],
-                    "location_url": place_data["location_url"],
-                    "image_url": place_data["image_url"]
-                }}}
+                queries.user_filter(line_user_id),
+                queries.set_favorite(place_id, place_data)
             )
             return True
             
@@ -224,7 +200,7 @@ class MongoDBManage_favorite:
             Optional[Dict]: 用戶的收藏results，若用戶不存在則返回None
         """
         try:
-            user_doc = self.favorite_collection.find_one({"line_user_id": line_user_id})
+            user_doc = self.favorite_collection.find_one(queries.user_filter(line_user_id))
             return user_doc.get("results") if user_doc else None
                 
         except Exception as e:
@@ -232,8 +208,8 @@ class MongoDBManage_favorite:
             return None
 
     def close(self):
-        """關閉數據庫連接"""
-        self.client.close()
+        """連線池為 process 共用,這裡不關閉(保留呼叫介面)"""
+        pass
 
 # 使用示例
 if __name__ == "__main__":
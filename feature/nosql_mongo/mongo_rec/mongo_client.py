@@ -0,0 +1,141 @@
+"""
+mongo_rec 共用的 MongoClient 與索引建立
+
+MongoClient 本身就是有連線池且 thread-safe 的物件,
+每個 process 依 URI 只建立一個,所有 MongoDBManage_* 共用。
+
+索引在啟動時呼叫 ensure_indexes() 建立一次(重複呼叫不會再送出 create_index),
+不再於每次建立管理器時執行。啟動時建立失敗不會自動重試,
+會以 error 層級記錄,索引需等下次啟動(或手動呼叫 ensure_indexes)才會建立。
+
+使用方式:
+```python
+# 啟動時(例如 app.py)
+ensure_indexes(config)
+
+# 取得共用連線
+client = get_mongo_client(config["MONGODB_URI"])
+
+# 程式結束時
+close_mongo_clients()
+```
+
+非同步版本(AsyncMongoDBManage_*)使用 get_async_mongo_client,
+AsyncMongoClient 會綁定建立時的 event loop,因此依 event loop 各自共用一個。
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Dict
+
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.errors import PyMongoError
+from pymongo.server_api import ServerApi
+
+from feature.trip.src.core.utils.logger import get_logger
+
+logger = get_logger('mongo')
+
+DB_NAME = "travel_router"
+UNSATISFIED_COLLECTION = "recommend_unsatisfied"
+FAVORITE_COLLECTION = "recommend_favorite"
+
+_clients: Dict[str, MongoClient] = {}
+_migrated = set()
+_lock = threading.Lock()
+
+# event loop -> {URI: AsyncMongoClient},loop 結束後自動移除
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_mongo_client(mongodb_uri: str) -> MongoClient:
+    """
+    取得 process 內共用的 MongoClient,第一次呼叫時建立
+
+    Args:
+        mongodb_uri: MongoDB 連線字串
+
+    Returns:
+        MongoClient: 共用的連線(請勿 close)
+    """
+    client = _clients.get(mongodb_uri)
+    if client is None:
+        with _lock:
+            client = _clients.get(mongodb_uri)
+            if client is None:
+                client = MongoClient(mongodb_uri, server_api=ServerApi('1'))
+                _clients[mongodb_uri] = client
+    return client
+
+
+def ensure_indexes(config: Dict[str, str]) -> bool:
+    """
+    建立 mongo_rec 所需的索引,每個 process 每個 URI 只執行一次
+
+    Args:
+        config: 包含 MONGODB_URI 的設定字典
+
+    Returns:
+        bool: 索引是否已建立(失敗時回傳 False 並記錄 error;
+              只有再次呼叫才會重試,管理器不會自動呼叫)
+    """
+    mongodb_uri = config.get("MONGODB_URI")
+    if not mongodb_uri:
+        logger.error("未設定 MONGODB_URI,略過建立索引")
+        return False
+
+    with _lock:
+        if mongodb_uri in _migrated:
+            return True
+
+    try:
+        db = get_mongo_client(mongodb_uri)[DB_NAME]
+        db[UNSATISFIED_COLLECTION].create_index([("line_user_id", 1)])
+        db[FAVORITE_COLLECTION].create_index("line_user_id")
+    except PyMongoError as e:
+        logger.error("建立 mongo_rec 索引失敗,查詢將不使用索引直到下次啟動: %s", e)
+        return False
+
+    with _lock:
+        _migrated.add(mongodb_uri)
+    return True
+
+
+def close_mongo_clients() -> None:
+    """關閉所有共用的 MongoClient(程式結束或測試時使用)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _migrated.clear()
+    for client in clients:
+        client.close()
+
+
+def get_async_mongo_client(mongodb_uri: str) -> AsyncMongoClient:
+    """
+    取得目前 event loop 共用的 AsyncMongoClient,第一次呼叫時建立
+    (必須在 event loop 內呼叫)
+
+    Args:
+        mongodb_uri: MongoDB 連線字串
+
+    Returns:
+        AsyncMongoClient: 共用的連線(請勿 close)
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(mongodb_uri)
+        if client is None:
+            client = AsyncMongoClient(mongodb_uri, server_api=ServerApi('1'))
+            clients[mongodb_uri] = client
+    return client
+
+
+async def close_async_mongo_clients() -> None:
+    """關閉目前 event loop 的所有 AsyncMongoClient"""
+    with _lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.close()
@@ -0,0 +1,100 @@
+"""MongoDBManage_favorite / MongoDBManage_unsatisfied 與非同步版本共用的查詢與文件建構
+
+只負責產生 filter / update / 文件與整理查詢結果,不做任何 I/O,
+同步與非同步版本呼叫同一份邏輯,行為保持一致。
+"""
+
+from typing import Any, Dict, List, Optional
+
+# 每位用戶最多收藏的地點數
+MAX_FAVORITES = 10
+
+
+def user_filter(line_user_id: str) -> Dict:
+    """依用戶查詢的 filter"""
+    return {"line_user_id": line_user_id}
+
+
+# ---------收藏----------------------------------
+
+def favorite_entry(place_data: Dict[str, Any]) -> Dict[str, Any]:
+    """收藏地點存入的欄位"""
+    return {
+        "name": place_data["name"],
+        "rating": place_data["rating"],
+        "address": place_data["address"],
+        "location_url": place_data["location_url"],
+        "image_url": place_data["image_url"]
+    }
+
+
+def new_favorite_doc(line_user_id: str, place_id: str, place_data: Dict[str, Any]) -> Dict:
+    """新用戶與第一個收藏地點的文件"""
+    return {
+        "line_user_id": line_user_id,
+        "results": {place_id: favorite_entry(place_data)}
+    }
+
+
+def set_favorite(place_id: str, place_data: Dict[str, Any]) -> Dict:
+    """新增一個收藏地點的 update"""
+    return {"$set": {f"results.{place_id}": favorite_entry(place_data)}}
+
+
+def unset_favorite(place_id: str) -> Dict:
+    """移除一個收藏地點的 update"""
+    return {"$unset": {f"results.{place_id}": ""}}
+
+
+def is_favorite(user_doc: Optional[Dict], place_id: str) -> bool:
+    """地點是否在用戶的收藏中"""
+    return bool(user_doc) and place_id in user_doc.get("results", {})
+
+
+def is_empty_favorite(user_doc: Optional[Dict]) -> bool:
+    """用戶文件已經沒有任何收藏(刪除最後一個收藏後移除整個文件)"""
+    return bool(user_doc) and len(user_doc.get("results", {})) == 0
+
+
+def oldest_favorite(results: Dict[str, Any]) -> Optional[str]:
+    """收藏數達到上限時要移除的最舊地點,未達上限時回傳 None"""
+    if len(results) >= MAX_FAVORITES:
+        return next(iter(results.keys()))
+    return None
+
+
+# ---------不滿意記錄----------------------------------
+
+def unsatisfied_record(query_info: Dict[str, Any]) -> Dict[str, Any]:
+    """新增的不滿意記錄: black_list 轉為 list(MongoDB 不支援 set),直接修改並回傳 query_info"""
+    query_info["black_list"] = list(query_info.get("black_list", []))
+    return query_info
+
+
+def merged_blacklist(user_record: Dict, place_ids: List[str]) -> List[str]:
+    """合併現有黑名單與新的 place_ids"""
+    return list(set(user_record.get("black_list", [])).union(place_ids))
+
+
+def set_blacklist(black_list: List[str]) -> Dict:
+    """覆蓋黑名單的 update"""
+    return {"$set": {"black_list": black_list}}
+
+
+def is_same_query(user_record: Optional[Dict], query_info: Dict[str, Any]) -> bool:
+    """資料庫中的 query 與本次輸入是否相同"""
+    if not user_record:
+        return False
+    return user_record.get("query", "") == query_info["query"]
+
+
+def set_query_info(query_info: Dict[str, Any]) -> Dict:
+    """以新的 query_info 完整覆蓋記錄的 update"""
+    return {"$set": query_info}
+
+
+def stringify_ids(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """將 _id 轉為字串"""
+    for record in records:
+        record['_id'] = str(record['_id'])
+    return records
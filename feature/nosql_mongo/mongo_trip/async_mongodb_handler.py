@@ -0,0 +1,328 @@
+"""TripDBHandler 的非同步版本
+
+方法與 TripDBHandler 相同(需要 await),查詢與文件建構共用 queries,
+讓 async 的呼叫端(例如 asyncio 的 webhook 處理)不必佔用執行緒等待資料庫。
+
+使用 pymongo 內建的 AsyncMongoClient,必須在 event loop 內建立:
+```python
+async def main():
+    handler = AsyncTripDBHandler()
+    await handler.record_user_input("Uxxxx", "我想去台北玩")
+    latest = await handler.get_latest_plan("Uxxxx", projection=LATEST_PLAN_PROJECTION)
+```
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pymongo
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from feature.nosql_mongo.mongo_rec.mongo_client import get_async_mongo_client
+from feature.nosql_mongo.mongo_trip import queries
+from feature.nosql_mongo.mongo_trip.plan_schema import merge_details, split_itinerary
+from feature.nosql_mongo.mongo_trip.queries import PLAN_INDEX_RETRIES
+
+
+class AsyncMongoDBManager:
+    """
+    MongoDBManager 的非同步版本
+
+    連線依 event loop 共用(見 get_async_mongo_client),
+    索引與 MongoDBManager 相同,由同步版本啟動時建立,
+    沒有同步版本的環境可呼叫 create_indexes()。
+    """
+
+    def __init__(self, mongodb_uri: Optional[str] = None):
+        """初始化資料庫連線(需在 event loop 內呼叫)"""
+        load_dotenv()
+        mongodb_uri = mongodb_uri or os.getenv('MONGODB_URI', "mongodb://localhost:27017")
+
+        self.client = get_async_mongo_client(mongodb_uri)
+        self.db = self.client.travel_router
+        self.planner_records = self.db.planner_records
+        self.planner_details = self.db.planner_details
+        self.user_preferences = self.db.user_preferences
+        self.plan_counters = self.db.plan_counters
+
+    async def create_indexes(self):
+        """建立所需的索引(與 MongoDBManager._create_indexes 相同)"""
+        try:
+            await self.planner_records.create_index([
+                ("line_id", pymongo.ASCENDING),
+                ("plan_index", pymongo.ASCENDING)
+            ], unique=True)
+
+            await self.planner_details.create_index([
+                ("line_id", pymongo.ASCENDING),
+                ("plan_index", pymongo.ASCENDING)
+            ], unique=True)
+
+            await self.user_preferences.create_index(
+                "line_id", unique=True
+            )
+
+        except PyMongoError as e:
+            print(f"建立索引失敗: {str(e)}")
+            raise
+
+
+class AsyncTripDBHandler:
+    """旅遊行程資料庫操作處理器(非同步)
+
+    方法、參數與回傳值與 TripDBHandler 相同,詳細說明見 TripDBHandler。
+    """
+
+    def __init__(self, db: Optional[AsyncMongoDBManager] = None):
+        """初始化,取得資料庫連線(需在 event loop 內呼叫)"""
+        self.db = db or AsyncMongoDBManager()
+
+    async def _push_input_history(self, line_id: str, input_record: Dict):
+        """加入一筆 input_history,超過 MAX_INPUT_HISTORY 時移除最舊的"""
+        return await self.db.user_preferences.update_one(
+            {"line_id": line_id},
+            queries.push_input_history(input_record),
+            upsert=True
+        )
+
+    async def _next_plan_index(self, line_id: str) -> int:
+        """以計數器文件原子地取得下一個 plan_index"""
+        counter = await self.db.plan_counters.find_one_and_update(
+            {"_id": line_id},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
+
+    async def _sync_plan_counter(self, line_id: str) -> None:
+        """計數器落後既有記錄時,推進到目前最大的 plan_index"""
+        last_record = await self.db.planner_records.find_one(
+            {"line_id": line_id},
+            {"plan_index": 1},
+            sort=[("plan_index", pymongo.DESCENDING)]
+        )
+        if last_record:
+            await self.db.plan_counters.update_one(
+                {"_id": line_id},
+                {"$max": {"seq": last_record["plan_index"]}},
+                upsert=True
+            )
+
+    async def record_user_input(self, line_id: str, input_text: str) -> bool:
+        """記錄用戶輸入"""
+        try:
+            input_record = queries.build_input_record(input_text)
+            if input_record is None:
+                return False  # 直接返回,不記錄
+
+            result = await self._push_input_history(line_id, input_record)
+
+            return result.modified_count > 0 or result.upserted_id is not None
+
+        except PyMongoError as e:
+            print(f"記錄用戶輸入失敗: {str(e)}")
+            return False
+
+    async def update_user_dislike(self, line_id: str, dislike_reason: str) -> bool:
+        """更新用戶不喜歡的項目"""
+        try:
+            result = await self._push_input_history(line_id, {
+                "timestamp": queries.now(),
+                "text": dislike_reason
+            })
+            return result.modified_count > 0 or result.upserted_id is not None
+
+        except PyMongoError as e:
+            print(f"更新用戶偏好失敗: {str(e)}")
+            return False
+
+    async def update_plan_restart_index(
+        self,
+        line_id: str,
+        plan_index: int,
+        restart_index: int,
+        button_id: str
+    ) -> bool:
+        """更新重新規劃的起點(同一個按鈕只處理一次)"""
+        try:
+            record = await self.db.planner_records.find_one(
+                {"line_id": line_id, "plan_index": plan_index},
+                {"_id": 0, "clicked_buttons": 1, "restart_index": 1}
+            )
+
+            if record is None:
+                print(f"找不到行程記錄 plan_index={plan_index}")
+                return False
+
+            if "clicked_buttons" not in record:
+                await self.db.planner_records.update_one(
+                    {"line_id": line_id, "plan_index": plan_index},
+                    {"$set": {"clicked_buttons": []}}
+                )
+
+            update_data = queries.restart_index_update(record, restart_index, button_id)
+            if update_data is None:
+                return False
+
+            result = await self.db.planner_records.update_one(
+                {"line_id": line_id, "plan_index": plan_index},
+                update_data
+            )
+            return result.modified_count > 0
+
+        except PyMongoError as e:
+            print(f"更新重啟點失敗: {str(e)}")
+            return False
+
+    async def save_plan(
+        self,
+        line_id: str,
+        input_text: str,
+        requirement: Dict,
+        itinerary: List[Dict]
+    ) -> Optional[int]:
+        """儲存行程規劃,回傳新規劃的index,失敗時返回None"""
+        try:
+            compact_itinerary, details = split_itinerary(itinerary)
+
+            record = queries.build_plan_record(
+                line_id, input_text, requirement, compact_itinerary)
+
+            for _ in range(PLAN_INDEX_RETRIES):
+                record["plan_index"] = await self._next_plan_index(line_id)
+                try:
+                    await self.db.planner_records.insert_one(record)
+                    if any(details):
+                        await self.db.planner_details.replace_one(
+                            {"line_id": line_id, "plan_index": record["plan_index"]},
+                            queries.details_document(line_id, record["plan_index"], details),
+                            upsert=True
+                        )
+                    return record["plan_index"]
+                except DuplicateKeyError:
+                    # (line_id, plan_index) 唯一索引擋下重複,同步計數器後重試
+                    record.pop("_id", None)
+                    await self._sync_plan_counter(line_id)
+
+            print(f"儲存規劃記錄失敗: plan_index 重試 {PLAN_INDEX_RETRIES} 次仍衝突")
+            return None
+
+        except PyMongoError as e:
+            print(f"儲存規劃記錄失敗: {str(e)}")
+            return None
+
+    async def get_input_history(self, line_id: str) -> List[Dict]:
+        """取得用戶輸入歷史,依時間排序"""
+        try:
+            user_prefs = await self.db.user_preferences.find_one(
+                {"line_id": line_id}, {"input_history": 1})
+            if not user_prefs or "input_history" not in user_prefs:
+                return []
+
+            return sorted(
+                user_prefs["input_history"],
+                key=lambda x: x["timestamp"]
+            )
+
+        except PyMongoError as e:
+            print(f"取得輸入歷史失敗: {str(e)}")
+            return []
+
+    async def get_latest_plan(
+        self,
+        line_id: str,
+        projection: Optional[Dict] = None
+    ) -> Optional[Dict]:
+        """取得用戶最新的規劃記錄,無記錄時返回None"""
+        try:
+            return await self.db.planner_records.find_one(
+                {"line_id": line_id},
+                projection,
+                sort=[("plan_index", pymongo.DESCENDING)]
+            )
+        except PyMongoError as e:
+            print(f"取得最新規劃失敗: {str(e)}")
+            return None
+
+    async def get_plan_by_index(
+        self,
+        line_id: str,
+        plan_index: int,
+        with_details: bool = False
+    ) -> Optional[Dict]:
+        """根據索引取得特定規劃記錄,無記錄時返回None"""
+        try:
+            record = await self.db.planner_records.find_one({
+                "line_id": line_id,
+                "plan_index": plan_index
+            })
+            if record and with_details:
+                record["itinerary"] = await self.attach_plan_details(
+                    line_id, plan_index, record.get("itinerary", []))
+            return record
+        except PyMongoError as e:
+            print(f"取得規劃記錄失敗: {str(e)}")
+            return None
+
+    async def attach_plan_details(
+        self,
+        line_id: str,
+        plan_index: int,
+        itinerary: List[Dict]
+    ) -> List[Dict]:
+        """讀取 planner_details,把營業時間、路線等明細放回行程"""
+        try:
+            details = await self.db.planner_details.find_one(
+                {"line_id": line_id, "plan_index": plan_index},
+                {"_id": 0, "steps": 1}
+            )
+        except PyMongoError as e:
+            print(f"取得行程明細失敗: {str(e)}")
+            return itinerary
+
+        if not details:
+            return itinerary
+        return merge_details(itinerary, details.get("steps"))
+
+    async def get_history_status(self, line_id: str, count_threshold: int = 10) -> Dict:
+        """取得歷史紀錄狀態(格式見 TripDBHandler.get_history_status)"""
+        try:
+            cursor = await self.db.user_preferences.aggregate(
+                queries.history_status_pipeline(line_id))
+            users = await cursor.to_list(None)
+            return queries.history_status_result(users, count_threshold)
+        except Exception as e:
+            print(f"取得歷史狀態失敗: {str(e)}")
+            return None
+
+    async def update_summary(
+        self, line_id: str, summary: str, summarized_until: Optional[datetime] = None
+    ) -> bool:
+        """更新歷史摘要(summarized_until 見 TripDBHandler.update_summary)"""
+        try:
+            result = await self.db.user_preferences.update_one(
+                {"line_id": line_id},
+                queries.summary_update(summary, summarized_until),
+                upsert=True
+            )
+            return result.modified_count > 0 or result.upserted_id is not None
+        except Exception as e:
+            print(f"更新摘要失敗: {str(e)}")
+            return False
+
+    async def clear_user_data(self, line_id: str) -> bool:
+        """清除用戶所有資料(測試用)"""
+        try:
+            await self.db.planner_records.delete_many({"line_id": line_id})
+            await self.db.planner_details.delete_many({"line_id": line_id})
+            await self.db.user_preferences.delete_one({"line_id": line_id})
+            await self.db.plan_counters.delete_one({"_id": line_id})
+            return True
+
+        except PyMongoError as e:
+            print(f"清除用戶資料失敗: {str(e)}")
+            return False
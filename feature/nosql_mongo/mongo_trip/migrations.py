@@ -0,0 +1,69 @@
+"""planner_records 轉換為精簡格式
+
+把舊格式(itinerary 內含 hours 等明細)的規劃記錄拆成:
+    planner_records.itinerary  - 精簡行程
+    planner_details.steps      - 營業時間、路線等明細
+
+可以重複執行,已轉換的記錄(有 schema_version)會略過。
+
+使用方式:
+    python -m feature.nosql_mongo.mongo_trip.migrations
+"""
+
+from pymongo.errors import PyMongoError
+
+from feature.nosql_mongo.mongo_trip.mongodb_manager import MongoDBManager
+from feature.nosql_mongo.mongo_trip.plan_schema import PLAN_SCHEMA_VERSION, split_itinerary
+
+
+def migrate_planner_records(db: MongoDBManager = None) -> int:
+    """
+    轉換所有舊格式的規劃記錄
+
+    Args:
+        db: MongoDBManager,預設使用共用連線
+
+    Returns:
+        int: 轉換的記錄數
+    """
+    db = db or MongoDBManager()
+    cursor = db.planner_records.find(
+        {"schema_version": {"$exists": False}},
+        {"line_id": 1, "plan_index": 1, "itinerary": 1}
+    )
+
+    migrated = 0
+    try:
+        for record in cursor:
+            compact_itinerary, details = split_itinerary(record.get("itinerary") or [])
+
+            # 先寫明細再改主記錄,中途失敗時重跑不會遺失資料
+            if any(details):
+                db.planner_details.replace_one(
+                    {"line_id": record["line_id"], "plan_index": record["plan_index"]},
+                    {
+                        "line_id": record["line_id"],
+                        "plan_index": record["plan_index"],
+                        "steps": details
+                    },
+                    upsert=True
+                )
+            db.planner_records.update_one(
+                {"_id": record["_id"]},
+                {"$set": {
+                    "itinerary": compact_itinerary,
+                    "schema_version": PLAN_SCHEMA_VERSION
+                }}
+            )
+            migrated += 1
+
+    except PyMongoError as e:
+        print(f"轉換規劃記錄失敗(已轉換 {migrated} 筆,可重新執行): {str(e)}")
+        raise
+
+    return migrated
+
+
+if __name__ == "__main__":
+    count = migrate_planner_records()
+    print(f"已轉換 {count} 筆規劃記錄")
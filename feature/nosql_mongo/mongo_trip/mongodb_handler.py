@@ -1,10 +1,13 @@
-from datetime import datetime, UTC
+from datetime import datetime
 from typing import Dict, List, Optional
-from zoneinfo import ZoneInfo
 
 import pymongo
-from pymongo.errors import PyMongoError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from feature.nosql_mongo.mongo_trip import queries
 from feature.nosql_mongo.mongo_trip.mongodb_manager import MongoDBManager
+from feature.nosql_mongo.mongo_trip.plan_schema import merge_details, split_itinerary
+from feature.nosql_mongo.mongo_trip.queries import MAX_INPUT_HISTORY, PLAN_INDEX_RETRIES
 
 
 class TripDBHandler:
@@ -21,6 +24,38 @@ class TripDBHandler:
         """初始化,取得資料庫連線"""
         self.db = MongoDBManager()
 
+    def _push_input_history(self, line_id: str, input_record: Dict):
+        """加入一筆 input_history,超過 MAX_INPUT_HISTORY 時移除最舊的"""
+        return self.db.user_preferences.update_one(
+            {"line_id": line_id},
+            queries.push_input_history(input_record),
+            upsert=True
+        )
+
+    def _next_plan_index(self, line_id: str) -> int:
+        """以計數器文件原子地取得下一個 plan_index(一次來回,併發時不會重複)"""
+        counter = self.db.plan_counters.find_one_and_update(
+            {"_id": line_id},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
+
+    def _sync_plan_counter(self, line_id: str) -> None:
+        """計數器落後既有記錄時(例如計數器建立前的舊用戶),推進到目前最大的 plan_index"""
+        last_record = self.db.planner_records.find_one(
+            {"line_id": line_id},
+            {"plan_index": 1},
+            sort=[("plan_index", pymongo.DESCENDING)]
+        )
+        if last_record:
+            self.db.plan_counters.update_one(
+                {"_id": line_id},
+                {"$max": {"seq": last_record["plan_index"]}},
+                upsert=True
+            )
+
     def record_user_input(
         self,
         line_id: str,
@@ -36,35 +71,11 @@ class TripDBHandler:
             bool: 是否成功記錄
         """
         try:
-            skip_messages = [
-                "收藏店家:",
-                "顯示我的收藏",
-                "推薦其他店家",
-                "我想進行情境搜索",
-                "情境搜索說明",
-                "旅遊規劃說明",
-                "紀錄初始化",
-                "記錄初始化",
-                "移除",
-                "推薦其他店家",
-            ]
-
-            if any(input_text.startswith(msg) for msg in skip_messages):
+            input_record = queries.build_input_record(input_text)
+            if input_record is None:
                 return False  # 直接返回,不記錄
 
-            if input_text.startswith("旅遊推薦") and len(input_text) > 4:
-                input_text = input_text[4:]
-
-            input_record = {
-                "timestamp": datetime.now(ZoneInfo('Asia/Taipei')),
-                "text": input_text if input_text.startswith("旅遊推薦") else input_text
-            }
-
-            result = self.db.user_preferences.update_one(
-                {"line_id": line_id},
-                {"$push": {"input_history": input_record}},
-                upsert=True
-            )
+            result = self._push_input_history(line_id, input_record)
 
             return result.modified_count > 0 or result.upserted_id is not None
 
@@ -88,18 +99,10 @@ class TripDBHandler:
         """
         try:
             # 將新的不喜歡原因加入偏好列表
-            result = self.db.user_preferences.update_one(
-                {"line_id": line_id},
-                {
-                    "$push": {
-                        "input_history": {
-                            "timestamp": datetime.now(ZoneInfo('Asia/Taipei')),
-                            "text": dislike_reason
-                        }
-                    }
-                },
-                upsert=True
-            )
+            result = self._push_input_history(line_id, {
+                "timestamp": queries.now(),
+                "text": dislike_reason
+            })
             return result.modified_count > 0 or result.upserted_id is not None
 
         except PyMongoError as e:
@@ -114,12 +117,12 @@ class TripDBHandler:
         button_id: str
     ) -> bool:
         try:
-            record = self.db.planner_records.find_one({
-                "line_id": line_id,
-                "plan_index": plan_index,
-            })
+            record = self.db.planner_records.find_one(
+                {"line_id": line_id, "plan_index": plan_index},
+                {"_id": 0, "clicked_buttons": 1, "restart_index": 1}
+            )
 
-            if not record:
+            if record is None:
                 print(f"找不到行程記錄 plan_index={plan_index}")
                 return False
 
@@ -132,24 +135,10 @@ class TripDBHandler:
                 )
                 print("初始化clicked_buttons陣列")
 
-            if button_id in record.get("clicked_buttons", []):
-                print(f"按鈕 {button_id} 已經按過")
+            update_data = queries.restart_index_update(record, restart_index, button_id)
+            if update_data is None:
                 return False
 
-            current_restart = record.get('restart_index', float('inf'))
-            print(f"比較 current: {current_restart}, new: {restart_index}")
-
-            update_data = {
-                "$push": {"clicked_buttons": button_id}
-            }
-
-            if restart_index < current_restart:
-                update_data["$set"] = {
-                    "restart_index": restart_index,
-                    "updated_at": datetime.now(ZoneInfo('Asia/Taipei'))
-                }
-                print(f"更新 restart_index 為 {restart_index}")
-
             result = self.db.planner_records.update_one(
                 {"line_id": line_id, "plan_index": plan_index},
                 update_data
@@ -169,6 +158,9 @@ class TripDBHandler:
     ) -> Optional[int]:
         """儲存行程規劃
 
+        itinerary 以精簡格式存在 planner_records,
+        營業時間與路線明細另存到 planner_details(見 plan_schema)。
+
         Args:
             line_id: LINE用戶ID 
             input_text: 觸發規劃的輸入文字
@@ -180,40 +172,29 @@ class TripDBHandler:
             Optional[int]: 新規劃的index,失敗時返回None
         """
         try:
-            # 取得新的plan_index
-            last_record = self.db.planner_records.find_one(
-                {"line_id": line_id},
-                sort=[("plan_index", pymongo.DESCENDING)]
-            )
-            new_index = 1 if not last_record else last_record["plan_index"] + 1
-
-            # 建立規劃記錄
-            record = {
-                "line_id": line_id,
-                "plan_index": new_index,
-                "timestamp": datetime.now(ZoneInfo('Asia/Taipei')),
-                "input_text": input_text,
-                "requirement": requirement,
-                # "restart_index": restart_index,
-                "itinerary": [{
-                    "step": item["step"],
-                    "place_id": item["place_id"],
-                    "date": item["date"],
-                    "name": item["name"],
-                    "label": item["label"],
-                    "lat": item["lat"],
-                    "lon": item["lon"],
-                    "period": item["period"],
-                    "start_time": item["start_time"],
-                    "end_time": item["end_time"],
-                    "hours": item["hours"],
-                    "transport": item["transport"],
-                    "duration": item["duration"]
-                } for item in itinerary]
-            }
-
-            self.db.planner_records.insert_one(record)
-            return new_index
+            compact_itinerary, details = split_itinerary(itinerary)
+
+            record = queries.build_plan_record(
+                line_id, input_text, requirement, compact_itinerary)
+
+            for _ in range(PLAN_INDEX_RETRIES):
+                record["plan_index"] = self._next_plan_index(line_id)
+                try:
+                    self.db.planner_records.insert_one(record)
+                    if any(details):
+                        self.db.planner_details.replace_one(
+                            {"line_id": line_id, "plan_index": record["plan_index"]},
+                            queries.details_document(line_id, record["plan_index"], details),
+                            upsert=True
+                        )
+                    return record["plan_index"]
+                except DuplicateKeyError:
+                    # (line_id, plan_index) 唯一索引擋下重複,同步計數器後重試
+                    record.pop("_id", None)
+                    self._sync_plan_counter(line_id)
+
+            print(f"儲存規劃記錄失敗: plan_index 重試 {PLAN_INDEX_RETRIES} 次仍衝突")
+            return None
 
         except PyMongoError as e:
             print(f"儲存規劃記錄失敗: {str(e)}")
@@ -233,7 +214,7 @@ class TripDBHandler:
         """
         try:
             user_prefs = self.db.user_preferences.find_one(
-                {"line_id": line_id})
+                {"line_id": line_id}, {"input_history": 1})
             if not user_prefs or "input_history" not in user_prefs:
                 return []
 
@@ -248,12 +229,14 @@ class TripDBHandler:
 
     def get_latest_plan(
         self,
-        line_id: str
+        line_id: str,
+        projection: Optional[Dict] = None
     ) -> Optional[Dict]:
         """取得用戶最新的規劃記錄
 
         Args:
             line_id: LINE用戶ID
+            projection: 只取需要的欄位(例如 plan_schema.LATEST_PLAN_PROJECTION),None 取全部
 
         Returns:
             Optional[Dict]: 最新規劃記錄,無記錄時返回None
@@ -261,6 +244,7 @@ class TripDBHandler:
         try:
             return self.db.planner_records.find_one(
                 {"line_id": line_id},
+                projection,
                 sort=[("plan_index", pymongo.DESCENDING)]
             )
         except PyMongoError as e:
@@ -270,26 +254,61 @@ class TripDBHandler:
     def get_plan_by_index(
         self,
         line_id: str,
-        plan_index: int
+        plan_index: int,
+        with_details: bool = False
     ) -> Optional[Dict]:
         """根據索引取得特定規劃記錄
 
         Args:
             line_id: LINE用戶ID
             plan_index: 規劃索引
+            with_details: 是否把營業時間、路線等明細放回 itinerary
 
         Returns:
             Optional[Dict]: 對應的規劃記錄,無記錄時返回None
         """
         try:
-            return self.db.planner_records.find_one({
+            record = self.db.planner_records.find_one({
                 "line_id": line_id,
                 "plan_index": plan_index
             })
+            if record and with_details:
+                record["itinerary"] = self.attach_plan_details(
+                    line_id, plan_index, record.get("itinerary", []))
+            return record
         except PyMongoError as e:
             print(f"取得規劃記錄失敗: {str(e)}")
             return None
 
+    def attach_plan_details(
+        self,
+        line_id: str,
+        plan_index: int,
+        itinerary: List[Dict]
+    ) -> List[Dict]:
+        """讀取 planner_details,把營業時間、路線等明細放回行程
+
+        Args:
+            line_id: LINE用戶ID
+            plan_index: 規劃索引
+            itinerary: 精簡格式的行程
+
+        Returns:
+            List[Dict]: 含明細的行程(找不到明細或讀取失敗時為原本的行程)
+        """
+        try:
+            details = self.db.planner_details.find_one(
+                {"line_id": line_id, "plan_index": plan_index},
+                {"_id": 0, "steps": 1}
+            )
+        except PyMongoError as e:
+            print(f"取得行程明細失敗: {str(e)}")
+            return itinerary
+
+        if not details:
+            return itinerary
+        return merge_details(itinerary, details.get("steps"))
+
     def get_history_status(
         self,
         line_id: str,
@@ -297,6 +316,9 @@ class TripDBHandler:
     ) -> Dict:
         """取得歷史紀錄狀態
 
+        只在資料庫端取出 last_summary_time 之後的對話與筆數,
+        不讀取整份 input_history。
+
         Returns:
             Dict: {
                 "summary": str,            # 上次整理的摘要,沒有則None 
@@ -306,36 +328,9 @@ class TripDBHandler:
             }
         """
         try:
-            user = self.db.user_preferences.find_one({"line_id": line_id})
-            if not user:
-                return {
-                    "summary": None,
-                    "new_messages": [],
-                    "needs_summary": False,
-                    "last_summary_time": None
-                }
-
-            summary = user.get("preferences_summary")
-            last_time = user.get("last_summary_time")
-            messages = user.get("input_history", [])
-
-            # 取得最後整理後的對話
-            new_messages = (
-                messages if not last_time
-                else [m for m in messages if m["timestamp"] > last_time]
-            )
-
-            needs_summary = (
-                len(new_messages) >= count_threshold or
-                not last_time  # 沒整理過也要整理
-            )
-
-            return {
-                "summary": summary,
-                "new_messages": new_messages,
-                "needs_summary": needs_summary,
-                "last_summary_time": last_time
-            }
+            users = list(self.db.user_preferences.aggregate(
+                queries.history_status_pipeline(line_id)))
+            return queries.history_status_result(users, count_threshold)
         except Exception as e:
             print(f"取得歷史狀態失敗: {str(e)}")
             return None
@@ -343,13 +338,15 @@ class TripDBHandler:
     def update_summary(
         self,
         line_id: str,
-        summary: str
+        summary: str,
+        summarized_until: Optional[datetime] = None
     ) -> bool:
         """更新歷史摘要
 
         Args:
             line_id: 用戶ID
             summary: 整理後的摘要
+            summarized_until: 摘要涵蓋的最後一則訊息時間(選填,預設為現在)
 
         Returns:
             bool: 是否成功
@@ -357,12 +354,7 @@ class TripDBHandler:
         try:
             result = self.db.user_preferences.update_one(
                 {"line_id": line_id},
-                {
-                    "$set": {
-                        "preferences_summary": summary,
-                        "last_summary_time": datetime.now(ZoneInfo('Asia/Taipei'))
-                    }
-                },
+                queries.summary_update(summary, summarized_until),
                 upsert=True
             )
             return result.modified_count > 0 or result.upserted_id is not None
@@ -385,8 +377,11 @@ class TripDBHandler:
         try:
             # 刪除規劃記錄
             self.db.planner_records.delete_many({"line_id": line_id})
+            self.db.planner_details.delete_many({"line_id": line_id})
             # 刪除用戶偏好
             self.db.user_preferences.delete_one({"line_id": line_id})
+            # 重設 plan_index 計數器
+            self.db.plan_counters.delete_one({"_id": line_id})
             return True
 
         except PyMongoError as e:
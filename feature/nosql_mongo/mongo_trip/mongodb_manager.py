@@ -33,7 +33,11 @@ class MongoDBManager:
             self.client = MongoClient(MONGODB_URI)
             self.db = self.client.travel_router
             self.planner_records = self.db.planner_records
+            # 行程明細(營業時間、路線),需要時才讀取
+            self.planner_details = self.db.planner_details
             self.user_preferences = self.db.user_preferences
+            # 每個用戶的 plan_index 計數器 {_id: line_id, seq: 最後一個 plan_index}
+            self.plan_counters = self.db.plan_counters
             
             self._create_indexes()
             
@@ -50,6 +54,12 @@ class MongoDBManager:
                 ("plan_index", pymongo.ASCENDING)
             ], unique=True)
 
+            # 行程明細與規劃記錄一對一
+            self.planner_details.create_index([
+                ("line_id", pymongo.ASCENDING),
+                ("plan_index", pymongo.ASCENDING)
+            ], unique=True)
+
             # 用戶喜好的索引
             self.user_preferences.create_index(
                 "line_id", unique=True
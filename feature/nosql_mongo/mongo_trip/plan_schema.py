@@ -0,0 +1,72 @@
+"""planner_records 的精簡儲存格式
+
+planner_records 每次對話都會被讀取,只保留規劃與顯示行程需要的欄位:
+    place_id、名稱、時間、座標與交通摘要(transport)
+
+營業時間(hours)、Google 路線(route_info)與導航網址(route_url)
+另存到 planner_details,只有需要時(例如從中間重新規劃)才讀取。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# 目前的儲存格式版本(沒有 schema_version 的為舊格式,itinerary 內含 hours)
+PLAN_SCHEMA_VERSION = 2
+
+# planner_records.itinerary 每個點保留的欄位
+ITINERARY_FIELDS = (
+    "step", "place_id", "date", "name", "label", "lat", "lon",
+    "period", "start_time", "end_time", "transport", "duration",
+)
+
+# 另存到 planner_details 的欄位
+DETAIL_FIELDS = ("hours", "route_info", "route_url")
+
+# 每次對話只需要的欄位(controller 與 command_handler 使用)
+LATEST_PLAN_PROJECTION = {
+    "_id": 0,
+    "plan_index": 1,
+    "itinerary": 1,
+    "restart_index": 1,
+}
+
+
+def split_itinerary(itinerary: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    把行程拆成精簡行程與明細
+
+    Args:
+        itinerary: 規劃結果(TripPlanningSystem.plan_trip 的輸出)
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]:
+            - 精簡行程(存在 planner_records)
+            - 與行程同順序的明細列表(存在 planner_details),沒有明細的點為 {}
+    """
+    compact, details = [], []
+    for item in itinerary:
+        compact.append({field: item[field] for field in ITINERARY_FIELDS if field in item})
+        details.append({
+            field: item[field]
+            for field in DETAIL_FIELDS
+            if item.get(field) is not None
+        })
+    return compact, details
+
+
+def merge_details(itinerary: List[Dict], details: Optional[List[Dict]]) -> List[Dict]:
+    """
+    把明細依順序放回行程(行程中已有的欄位不覆蓋,舊格式的資料不受影響)
+
+    Args:
+        itinerary: 精簡行程
+        details: split_itinerary 拆出的明細列表
+
+    Returns:
+        List[Dict]: 新的行程列表,不修改傳入的資料
+    """
+    details = details or []
+    merged = []
+    for i, item in enumerate(itinerary):
+        detail = details[i] if i < len(details) else {}
+        merged.append({**item, **{k: v for k, v in detail.items() if k not in item}})
+    return merged
@@ -0,0 +1,185 @@
+"""TripDBHandler 與 AsyncTripDBHandler 共用的查詢與文件建構
+
+只負責產生 filter / update / pipeline 與整理查詢結果,不做任何 I/O,
+同步與非同步版本呼叫同一份邏輯,行為保持一致。
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from feature.nosql_mongo.mongo_trip.plan_schema import PLAN_SCHEMA_VERSION
+
+# input_history 只保留最新的筆數,避免活躍用戶的文件無限增長
+# (每 10 則就會整理一次摘要,保留 200 則已足夠)
+MAX_INPUT_HISTORY = 200
+
+# plan_index 與既有記錄衝突時(計數器建立前的舊資料)重試的次數
+PLAN_INDEX_RETRIES = 3
+
+# 指令類訊息不記錄到 input_history
+SKIP_MESSAGES = [
+    "收藏店家:",
+    "顯示我的收藏",
+    "推薦其他店家",
+    "我想進行情境搜索",
+    "情境搜索說明",
+    "旅遊規劃說明",
+    "紀錄初始化",
+    "記錄初始化",
+    "移除",
+    "推薦其他店家",
+]
+
+EMPTY_HISTORY_STATUS = {
+    "summary": None,
+    "new_messages": [],
+    "needs_summary": False,
+    "last_summary_time": None
+}
+
+
+def now() -> datetime:
+    """台北時間的目前時間"""
+    return datetime.now(ZoneInfo('Asia/Taipei'))
+
+
+def build_input_record(input_text: str) -> Optional[Dict]:
+    """建立一筆 input_history,指令類訊息回傳 None(不記錄)"""
+    if any(input_text.startswith(msg) for msg in SKIP_MESSAGES):
+        return None
+
+    if input_text.startswith("旅遊推薦") and len(input_text) > 4:
+        input_text = input_text[4:]
+
+    return {
+        "timestamp": now(),
+        "text": input_text
+    }
+
+
+def push_input_history(input_record: Dict) -> Dict:
+    """加入一筆 input_history 的 update,超過 MAX_INPUT_HISTORY 時移除最舊的"""
+    return {
+        "$push": {
+            "input_history": {
+                "$each": [input_record],
+                "$slice": -MAX_INPUT_HISTORY
+            }
+        }
+    }
+
+
+def restart_index_update(record: Dict, restart_index: int, button_id: str) -> Optional[Dict]:
+    """
+    依目前的記錄建立 update_plan_restart_index 的 update
+
+    Returns:
+        Optional[Dict]: 按鈕已經按過時回傳 None
+    """
+    if button_id in record.get("clicked_buttons", []):
+        print(f"按鈕 {button_id} 已經按過")
+        return None
+
+    current_restart = record.get('restart_index', float('inf'))
+    print(f"比較 current: {current_restart}, new: {restart_index}")
+
+    update_data = {
+        "$push": {"clicked_buttons": button_id}
+    }
+
+    if restart_index < current_restart:
+        update_data["$set"] = {
+            "restart_index": restart_index,
+            "updated_at": now()
+        }
+        print(f"更新 restart_index 為 {restart_index}")
+
+    return update_data
+
+
+def build_plan_record(
+    line_id: str,
+    input_text: str,
+    requirement: Dict,
+    compact_itinerary: List[Dict]
+) -> Dict:
+    """建立規劃記錄(plan_index 在寫入前才分配)"""
+    return {
+        "line_id": line_id,
+        "plan_index": None,
+        "schema_version": PLAN_SCHEMA_VERSION,
+        "timestamp": now(),
+        "input_text": input_text,
+        "requirement": requirement,
+        # "restart_index": restart_index,
+        "itinerary": compact_itinerary
+    }
+
+
+def details_document(line_id: str, plan_index: int, details: List[Dict]) -> Dict:
+    """planner_details 的文件"""
+    return {
+        "line_id": line_id,
+        "plan_index": plan_index,
+        "steps": details
+    }
+
+
+def history_status_pipeline(line_id: str) -> List[Dict]:
+    """只取出 last_summary_time 之後的對話與筆數的 aggregation"""
+    return [
+        {"$match": {"line_id": line_id}},
+        {"$limit": 1},
+        {"$project": {
+            "_id": 0,
+            "preferences_summary": 1,
+            "last_summary_time": 1,
+            # 沒整理過時與 null 比較,日期一定比 null 大,全部都算新對話
+            "new_messages": {
+                "$filter": {
+                    "input": {"$ifNull": ["$input_history", []]},
+                    "as": "m",
+                    "cond": {"$gt": [
+                        "$$m.timestamp",
+                        {"$ifNull": ["$last_summary_time", None]}
+                    ]}
+                }
+            }
+        }},
+        {"$addFields": {"new_count": {"$size": "$new_messages"}}}
+    ]
+
+
+def history_status_result(users: List[Dict], count_threshold: int) -> Dict:
+    """整理 history_status_pipeline 的結果"""
+    if not users:
+        return dict(EMPTY_HISTORY_STATUS, new_messages=[])
+
+    user = users[0]
+    last_time = user.get("last_summary_time")
+
+    return {
+        "summary": user.get("preferences_summary"),
+        "new_messages": user["new_messages"],
+        "needs_summary": (
+            user["new_count"] >= count_threshold or
+            not last_time  # 沒整理過也要整理
+        ),
+        "last_summary_time": last_time
+    }
+
+
+def summary_update(summary: str, summarized_until: Optional[datetime] = None) -> Dict:
+    """
+    update_summary 的 update
+
+    summarized_until: 摘要涵蓋的最後一則訊息時間,None 時為現在
+        (背景整理期間新進的訊息時間較晚,下次仍會列入 new_messages)
+    """
+    return {
+        "$set": {
+            "preferences_summary": summary,
+            "last_summary_time": summarized_until or now()
+        }
+    }
@@ -0,0 +1,169 @@
+"""非同步版本與同步版本的行為一致性測試
+
+需要本機的 MongoDB(MONGODB_URI 或 mongodb://localhost:27017),連不到時略過。
+不需要 MongoDB 的一致性測試見 test_async_parity.py。
+"""
+
+import asyncio
+import os
+
+import pytest
+from pymongo import AsyncMongoClient
+from pymongo.errors import PyMongoError
+
+from feature.nosql_mongo.mongo_rec.async_mongo_ctrl import (
+    AsyncMongoDBManage_favorite,
+    AsyncMongoDBManage_unsatisfied,
+)
+from feature.nosql_mongo.mongo_rec.mongo_client import close_async_mongo_clients
+from feature.nosql_mongo.mongo_trip.async_mongodb_handler import AsyncTripDBHandler
+from feature.nosql_mongo.mongo_trip.plan_schema import LATEST_PLAN_PROJECTION
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+CONFIG = {"MONGODB_URI": MONGODB_URI}
+LINE_ID = "async_handler_test_user"
+REQUIREMENT = {"start_time": "09:00", "end_time": "21:00", "transport_mode": "driving"}
+ITINERARY = [
+    {
+        "step": step,
+        "name": f"地點{step}",
+        "label": "景點",
+        "hours": {"start": "09:00", "end": "21:00"},
+        "lat": 25.03,
+        "lon": 121.56,
+        "start_time": f"{9 + step:02d}:00",
+        "end_time": f"{9 + step:02d}:50",
+        "duration": 50,
+        "transport": {"mode": "開車", "time": 10},
+    }
+    for step in range(3)
+]
+PLACE = {
+    "name": "測試咖啡廳",
+    "rating": 4.5,
+    "address": "台北市",
+    "location_url": "https://maps.google.com",
+    "image_url": "https://example.com/a.jpg",
+}
+
+
+async def _ping():
+    client = AsyncMongoClient(MONGODB_URI, serverSelectionTimeoutMS=500)
+    try:
+        await client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        await client.close()
+
+
+pytestmark = pytest.mark.skipif(
+    not asyncio.run(_ping()), reason=f"無法連線到 MongoDB: {MONGODB_URI}")
+
+
+def run(coro_func):
+    """在新的 event loop 執行,結束前關閉該 loop 的共用連線"""
+    async def main():
+        try:
+            return await coro_func()
+        finally:
+            await close_async_mongo_clients()
+    return asyncio.run(main())
+
+
+def test_trip_handler_matches_sync():
+    """非同步 TripDBHandler 寫入的資料,同步版本讀回的結果相同"""
+    from feature.nosql_mongo.mongo_trip.mongodb_handler import TripDBHandler
+    sync_handler = TripDBHandler()
+
+    async def scenario():
+        handler = AsyncTripDBHandler()
+        await handler.clear_user_data(LINE_ID)
+        try:
+            assert await handler.record_user_input(LINE_ID, "旅遊推薦我想去台北玩")
+            assert not await handler.record_user_input(LINE_ID, "顯示我的收藏")
+            assert await handler.update_user_dislike(LINE_ID, "我不喜歡夜市")
+
+            assert await handler.save_plan(LINE_ID, "第一次", REQUIREMENT, ITINERARY) == 1
+            assert await handler.save_plan(LINE_ID, "第二次", REQUIREMENT, ITINERARY) == 2
+            assert await handler.update_plan_restart_index(LINE_ID, 2, 1, "btn-1")
+            assert not await handler.update_plan_restart_index(LINE_ID, 2, 1, "btn-1")
+
+            history = await handler.get_input_history(LINE_ID)
+            assert [h["text"] for h in history] == ["我想去台北玩", "我不喜歡夜市"]
+            assert history == sync_handler.get_input_history(LINE_ID)
+
+            latest = await handler.get_latest_plan(LINE_ID, projection=LATEST_PLAN_PROJECTION)
+            assert latest == sync_handler.get_latest_plan(
+                LINE_ID, projection=LATEST_PLAN_PROJECTION)
+            assert latest["restart_index"] == 1
+
+            full = await handler.get_plan_by_index(LINE_ID, 1, with_details=True)
+            assert full["itinerary"] == ITINERARY
+            assert full == sync_handler.get_plan_by_index(LINE_ID, 1, with_details=True)
+
+            status = await handler.get_history_status(LINE_ID)
+            assert status == sync_handler.get_history_status(LINE_ID)
+            assert status["needs_summary"] and len(status["new_messages"]) == 2
+
+            assert await handler.update_summary(LINE_ID, "喜歡台北")
+            status = await handler.get_history_status(LINE_ID)
+            assert status["summary"] == "喜歡台北" and status["new_messages"] == []
+        finally:
+            await handler.clear_user_data(LINE_ID)
+
+    run(scenario)
+
+
+def test_concurrent_save_plan():
+    """同一個 loop 內併發儲存,plan_index 不重複"""
+    async def scenario():
+        handler = AsyncTripDBHandler()
+        await handler.clear_user_data(LINE_ID)
+        try:
+            indexes = await asyncio.gather(*[
+                handler.save_plan(LINE_ID, f"第{i}次", REQUIREMENT, ITINERARY)
+                for i in range(10)
+            ])
+            assert sorted(indexes) == list(range(1, 11))
+        finally:
+            await handler.clear_user_data(LINE_ID)
+
+    run(scenario)
+
+
+def test_rec_managers():
+    """非同步的收藏與不滿意記錄管理器"""
+    async def scenario():
+        favorite = AsyncMongoDBManage_favorite(CONFIG)
+        unsatisfied = AsyncMongoDBManage_unsatisfied(CONFIG)
+        await unsatisfied.delete_user_record(LINE_ID)
+        await favorite.favorite_collection.delete_many({"line_user_id": LINE_ID})
+        try:
+            assert await favorite.test_connection()
+            assert not await favorite.check_user(LINE_ID)
+            assert await favorite.add_user(LINE_ID, "p0", PLACE)
+            for i in range(1, 11):
+                assert await favorite.fix_favorite(LINE_ID, f"p{i}", PLACE)
+            results = await favorite.show_favorite(LINE_ID)
+            assert len(results) == 10 and "p0" not in results
+            assert await favorite.check_place(LINE_ID, "p10")
+            assert await favorite.delete_favorite(LINE_ID, "p10")
+            assert not await favorite.check_place(LINE_ID, "p10")
+
+            query_info = {"line_user_id": LINE_ID, "query": "咖啡廳", "black_list": {"a"}}
+            assert await unsatisfied.add_unsatisfied(query_info)
+            assert await unsatisfied.compare_query({"line_user_id": LINE_ID, "query": "咖啡廳"})
+            assert await unsatisfied.update_blacklist(LINE_ID, ["b"])
+            records = await unsatisfied.get_user_records(LINE_ID)
+            assert set(records[0]["black_list"]) == {"a", "b"}
+        finally:
+            await unsatisfied.delete_user_record(LINE_ID)
+            await favorite.favorite_collection.delete_many({"line_user_id": LINE_ID})
+
+    run(scenario)
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
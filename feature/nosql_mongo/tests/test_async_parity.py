@@ -0,0 +1,279 @@
+"""非同步版本與同步版本在 mongomock 上的行為一致性測試
+
+不需要 MongoDB: 把 mongomock 的 collection 包成 AsyncMongoClient 的介面(方法回傳 coroutine),
+同一組操作分別交給同步與非同步版本執行,比對每一步的回傳值與最後的資料。
+需要真實 MongoDB 的測試(併發、AsyncMongoClient 本身)見 test_async_handlers.py。
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from feature.nosql_mongo.mongo_rec import async_mongo_ctrl, mongo_client
+from feature.nosql_mongo.mongo_rec.async_mongo_ctrl import (
+    AsyncMongoDBManage_favorite,
+    AsyncMongoDBManage_unsatisfied,
+)
+from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_disat import MongoDBManage_unsatisfied
+from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_favo import MongoDBManage_favorite
+from feature.nosql_mongo.mongo_trip.async_mongodb_handler import AsyncMongoDBManager, AsyncTripDBHandler
+from feature.nosql_mongo.mongo_trip.mongodb_handler import TripDBHandler
+from feature.nosql_mongo.mongo_trip.mongodb_manager import MongoDBManager
+from feature.nosql_mongo.mongo_trip.plan_schema import LATEST_PLAN_PROJECTION
+
+CONFIG = {"MONGODB_URI": "mongodb://parity-test:27017"}
+SYNC_ID = "parity_sync_user"
+ASYNC_ID = "parity_async_user"
+TRIP_COLLECTIONS = ("planner_records", "planner_details", "user_preferences", "plan_counters")
+REQUIREMENT = {"start_time": "09:00", "end_time": "21:00", "transport_mode": "driving"}
+ITINERARY = [
+    {
+        "step": step,
+        "name": f"地點{step}",
+        "label": "景點",
+        "hours": {"start": "09:00", "end": "21:00"},
+        "lat": 25.03,
+        "lon": 121.56,
+        "start_time": f"{9 + step:02d}:00",
+        "end_time": f"{9 + step:02d}:50",
+        "duration": 50,
+        "transport": {"mode": "開車", "time": 10},
+    }
+    for step in range(3)
+]
+PLACE = {
+    "name": "測試咖啡廳",
+    "rating": 4.5,
+    "address": "台北市",
+    "location_url": "https://maps.google.com",
+    "image_url": "https://example.com/a.jpg",
+}
+
+
+class AsyncCursor:
+    """find / aggregate 的結果,提供 to_list"""
+
+    def __init__(self, cursor):
+        self.docs = list(cursor)
+
+    async def to_list(self, length=None):
+        return self.docs if length is None else self.docs[:length]
+
+
+class AsyncCollection:
+    """mongomock collection 的非同步介面(與 pymongo 的 AsyncCollection 相同: find 直接回傳 cursor,其餘要 await)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self.collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline):
+        return AsyncCursor(self.collection.aggregate(pipeline))
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.db[name])
+
+
+class AsyncClient:
+    def __init__(self, client):
+        self.client = client
+        self.admin = AsyncCollection(client.admin)   # admin.command 同樣要 await
+
+    def __getitem__(self, name):
+        return AsyncDatabase(self.client[name])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """同步與非同步版本共用同一個 mongomock client"""
+    client = mongomock.MongoClient()
+    mongo_client.close_mongo_clients()
+    monkeypatch.setattr(mongo_client, "MongoClient", lambda uri, server_api=None: client)
+    monkeypatch.setattr(async_mongo_ctrl, "get_async_mongo_client", lambda uri: AsyncClient(client))
+    yield client
+    mongo_client.close_mongo_clients()
+
+
+@pytest.fixture
+def trip_handlers(client, monkeypatch):
+    """建立使用 mongomock 的 TripDBHandler 與 AsyncTripDBHandler(索引由各自的版本建立)"""
+    db = client.travel_router
+    sync_db = SimpleNamespace(**{name: db[name] for name in TRIP_COLLECTIONS})
+    async_db = SimpleNamespace(**{name: AsyncCollection(db[name]) for name in TRIP_COLLECTIONS})
+
+    MongoDBManager._create_indexes(sync_db)
+    asyncio.run(AsyncMongoDBManager.create_indexes(async_db))
+    # MongoDBManager 為 singleton,直接換掉 instance
+    monkeypatch.setattr(MongoDBManager, "_instance", sync_db)
+    return TripDBHandler(), AsyncTripDBHandler(db=async_db)
+
+
+def run_both(sync_obj, async_obj, steps):
+    """
+    依序執行 (方法名稱, 參數) 並回傳兩個版本的結果
+
+    參數以 ASYNC_ID 表示用戶(包含 dict 參數的 line_user_id),
+    同步版本換成 SYNC_ID,兩個版本各自寫入自己的用戶
+    """
+    def for_sync(arg):
+        if isinstance(arg, str) and arg == ASYNC_ID:
+            return SYNC_ID
+        if isinstance(arg, dict) and arg.get("line_user_id") == ASYNC_ID:
+            return {**arg, "line_user_id": SYNC_ID}
+        return arg
+
+    sync_results = [getattr(sync_obj, name)(*map(for_sync, args)) for name, args in steps]
+
+    async def scenario():
+        return [await getattr(async_obj, name)(*args) for name, args in steps]
+
+    return sync_results, asyncio.run(scenario())
+
+
+def test_trip_handler_matches_sync(trip_handlers):
+    """TripDBHandler 與 AsyncTripDBHandler 每一步的結果相同"""
+    sync_handler, async_handler = trip_handlers
+    steps = [
+        ("record_user_input", (ASYNC_ID, "旅遊推薦我想去台北玩")),
+        ("record_user_input", (ASYNC_ID, "顯示我的收藏")),
+        ("update_user_dislike", (ASYNC_ID, "我不喜歡夜市")),
+        ("save_plan", (ASYNC_ID, "第一次", REQUIREMENT, ITINERARY)),
+        ("save_plan", (ASYNC_ID, "第二次", REQUIREMENT, ITINERARY)),
+        ("update_plan_restart_index", (ASYNC_ID, 2, 1, "btn-1")),
+        ("update_plan_restart_index", (ASYNC_ID, 2, 1, "btn-1")),
+        ("update_plan_restart_index", (ASYNC_ID, 9, 1, "btn-2")),
+    ]
+    sync_results, async_results = run_both(sync_handler, async_handler, steps)
+    assert async_results == sync_results == [True, False, True, 1, 2, True, False, False]
+
+    # 非同步版本寫入的資料,兩個版本讀回的結果相同
+    async def reads():
+        return (
+            await async_handler.get_input_history(ASYNC_ID),
+            await async_handler.get_latest_plan(ASYNC_ID, projection=LATEST_PLAN_PROJECTION),
+            await async_handler.get_plan_by_index(ASYNC_ID, 1, with_details=True),
+            await async_handler.get_plan_by_index(ASYNC_ID, 9),
+            await async_handler.get_history_status(ASYNC_ID),
+        )
+
+    history, latest, full, missing, status = asyncio.run(reads())
+    assert [h["text"] for h in history] == ["我想去台北玩", "我不喜歡夜市"]
+    assert history == sync_handler.get_input_history(ASYNC_ID)
+    assert latest == sync_handler.get_latest_plan(ASYNC_ID, projection=LATEST_PLAN_PROJECTION)
+    assert latest["restart_index"] == 1
+    assert full["itinerary"] == ITINERARY
+    assert full == sync_handler.get_plan_by_index(ASYNC_ID, 1, with_details=True)
+    assert missing is None
+    assert status == sync_handler.get_history_status(ASYNC_ID)
+    assert status["needs_summary"] and len(status["new_messages"]) == 2
+
+    # 整理摘要後沒有新對話,清除後沒有任何資料
+    assert asyncio.run(async_handler.update_summary(ASYNC_ID, "喜歡台北"))
+    status = asyncio.run(async_handler.get_history_status(ASYNC_ID))
+    assert status == sync_handler.get_history_status(ASYNC_ID)
+    assert status["summary"] == "喜歡台北" and status["new_messages"] == []
+
+    assert asyncio.run(async_handler.clear_user_data(ASYNC_ID))
+    assert asyncio.run(async_handler.get_latest_plan(ASYNC_ID)) is None
+    assert sync_handler.get_input_history(ASYNC_ID) == []
+
+
+def test_save_plan_resyncs_counter(trip_handlers):
+    """計數器遺失時,兩個版本都會在 plan_index 衝突後推進計數器再儲存"""
+    sync_handler, async_handler = trip_handlers
+    for line_id in (SYNC_ID, ASYNC_ID):
+        assert sync_handler.save_plan(line_id, "第一次", REQUIREMENT, ITINERARY) == 1
+        sync_handler.db.plan_counters.delete_one({"_id": line_id})
+
+    sync_results, async_results = run_both(sync_handler, async_handler, [
+        ("save_plan", (ASYNC_ID, "第二次", REQUIREMENT, ITINERARY)),
+        ("save_plan", (ASYNC_ID, "第三次", REQUIREMENT, ITINERARY)),
+    ])
+    assert async_results == sync_results == [2, 3]
+
+
+def test_favorite_matches_sync(client):
+    """MongoDBManage_favorite 與非同步版本每一步的結果與最後的收藏相同"""
+    steps = [
+        ("check_user", (ASYNC_ID,)),
+        ("show_favorite", (ASYNC_ID,)),
+        ("fix_favorite", (ASYNC_ID, "p0", PLACE)),      # 用戶不存在
+        ("add_user", (ASYNC_ID, "p0", PLACE)),
+        ("check_user", (ASYNC_ID,)),
+        ("fix_favorite", (ASYNC_ID, "p0", PLACE)),      # 已收藏
+    ]
+    steps += [("fix_favorite", (ASYNC_ID, f"p{i}", PLACE)) for i in range(1, 11)]
+    steps += [
+        ("check_place", (ASYNC_ID, "p0")),              # 超過上限被移除
+        ("check_place", (ASYNC_ID, "p10")),
+        ("delete_favorite", (ASYNC_ID, "p10")),
+        ("delete_favorite", (ASYNC_ID, "p10")),
+        ("show_favorite", (ASYNC_ID,)),
+        ("test_connection", ()),
+    ]
+    sync_results, async_results = run_both(
+        MongoDBManage_favorite(CONFIG), AsyncMongoDBManage_favorite(CONFIG), steps)
+
+    assert async_results == sync_results
+    assert async_results[:6] == [False, None, False, True, True, False]
+    assert sorted(async_results[-2]) == sorted(f"p{i}" for i in range(1, 10))
+
+    # 刪除最後一個收藏後移除整個文件
+    async def remove_all():
+        favorite = AsyncMongoDBManage_favorite(CONFIG)
+        for i in range(1, 10):
+            assert await favorite.delete_favorite(ASYNC_ID, f"p{i}")
+        return await favorite.check_user(ASYNC_ID)
+
+    assert not asyncio.run(remove_all())
+
+
+def test_unsatisfied_matches_sync(client):
+    """MongoDBManage_unsatisfied 與非同步版本每一步的結果與最後的記錄相同"""
+    query = {"query": "咖啡廳"}
+    steps = [
+        ("check_user_exists", (ASYNC_ID,)),
+        ("update_blacklist", (ASYNC_ID, ["a"])),        # 沒有記錄
+        ("delete_user_record", (ASYNC_ID,)),
+        ("add_unsatisfied", ({"line_user_id": ASYNC_ID, **query, "black_list": {"a"}},)),
+        ("check_user_exists", (ASYNC_ID,)),
+        ("compare_query", ({"line_user_id": ASYNC_ID, **query},)),
+        ("compare_query", ({"line_user_id": ASYNC_ID, "query": "火鍋"},)),
+        ("update_blacklist", (ASYNC_ID, ["b"])),
+        ("update_query_info", ({"line_user_id": ASYNC_ID, "query": "火鍋", "black_list": []},)),
+        ("test_connection", ()),
+    ]
+    sync_obj = MongoDBManage_unsatisfied(CONFIG)
+    async_obj = AsyncMongoDBManage_unsatisfied(CONFIG)
+    sync_results, async_results = run_both(sync_obj, async_obj, steps)
+    assert async_results == sync_results
+    assert async_results[:6] == [False, False, False, True, True, True]
+
+    sync_records = sync_obj.get_user_records(SYNC_ID)
+    async_records = asyncio.run(async_obj.get_user_records(ASYNC_ID))
+    assert [r["query"] for r in async_records] == [r["query"] for r in sync_records] == ["火鍋"]
+    assert all(isinstance(r["_id"], str) for r in async_records)
+
+    assert asyncio.run(async_obj.delete_user_record(ASYNC_ID))
+    assert asyncio.run(async_obj.get_user_records(ASYNC_ID)) == []
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
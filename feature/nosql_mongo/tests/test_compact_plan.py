@@ -0,0 +1,152 @@
+import time
+
+import bson
+import pytest
+
+from feature.nosql_mongo.mongo_trip.migrations import migrate_planner_records
+from feature.nosql_mongo.mongo_trip.mongodb_handler import TripDBHandler
+from feature.nosql_mongo.mongo_trip.plan_schema import (
+    ITINERARY_FIELDS,
+    LATEST_PLAN_PROJECTION,
+    PLAN_SCHEMA_VERSION,
+)
+
+REQUIREMENT = {"start_time": "09:00", "end_time": "21:00", "transport_mode": "driving"}
+
+
+def make_item(step):
+    """與 BasePlanningStrategy._create_itinerary_item 相同格式的行程點"""
+    return {
+        "step": step,
+        "place_id": f"ChIJplace{step}",
+        "name": f"地點{step}",
+        "label": "景點",
+        "hours": {"start": "09:00", "end": "21:00"},
+        "lat": 25.03 + step / 1000,
+        "lon": 121.56 + step / 1000,
+        "date": "2024-12-25",
+        "start_time": f"{9 + step:02d}:00",
+        "end_time": f"{9 + step:02d}:50",
+        "duration": 50,
+        "transport": {
+            "mode": "開車",
+            "mode_eng": "driving",
+            "travel_distance": 3.2,
+            "time": 10,
+            "period": f"{8 + step:02d}:50-{9 + step:02d}:00",
+        },
+        # Google Directions 回傳的路線(含每一步與 polyline)
+        "route_info": {
+            "legs": [{"distance": {"text": "3.2 公里"}, "duration": {"text": "10 分鐘"}}],
+            "steps": [
+                {
+                    "html_instructions": f"向<b>東</b>走{i}00公尺",
+                    "distance": {"text": f"{i}00 公尺", "value": i * 100},
+                    "duration": {"text": "1 分鐘", "value": 60},
+                    "polyline": {"points": "a~l~Fjk~uOwHJy@P" * 8},
+                }
+                for i in range(1, 13)
+            ],
+        },
+        "route_url": f"https://www.google.com/maps/place/?q=place_id:ChIJplace{step}",
+        "period": "morning",
+    }
+
+
+ITINERARY = [make_item(step) for step in range(8)]
+
+
+def legacy_record(line_id, plan_index):
+    """舊版 save_plan 寫入的文件(itinerary 內含 hours)"""
+    legacy_fields = ITINERARY_FIELDS + ("hours",)
+    return {
+        "line_id": line_id,
+        "plan_index": plan_index,
+        "input_text": "我想去台北玩",
+        "requirement": REQUIREMENT,
+        "itinerary": [{k: item[k] for k in legacy_fields} for item in ITINERARY],
+    }
+
+
+@pytest.fixture
+def db_handler():
+    """建立資料庫handler"""
+    return TripDBHandler()
+
+
+@pytest.fixture
+def test_line_id(db_handler):
+    """測試用的LINE ID,測試後清理資料"""
+    line_id = "compact_plan_test_user"
+    db_handler.clear_user_data(line_id)
+    yield line_id
+    db_handler.clear_user_data(line_id)
+
+
+def test_save_plan_compact_schema(db_handler, test_line_id):
+    """測試 planner_records 只存精簡欄位,明細可依需要讀回"""
+    plan_index = db_handler.save_plan(test_line_id, "我想去台北玩", REQUIREMENT, ITINERARY)
+
+    record = db_handler.get_plan_by_index(test_line_id, plan_index)
+    assert record["schema_version"] == PLAN_SCHEMA_VERSION
+    assert all(set(item) == set(ITINERARY_FIELDS) for item in record["itinerary"])
+
+    full = db_handler.get_plan_by_index(test_line_id, plan_index, with_details=True)
+    assert full["itinerary"] == ITINERARY
+
+
+def test_latest_plan_projection(db_handler, test_line_id):
+    """測試每次對話讀取的最新規劃只包含需要的欄位"""
+    db_handler.save_plan(test_line_id, "第一次", REQUIREMENT, ITINERARY)
+    db_handler.save_plan(test_line_id, "第二次", REQUIREMENT, ITINERARY)
+
+    latest = db_handler.get_latest_plan(test_line_id, projection=LATEST_PLAN_PROJECTION)
+    assert set(latest) == {"plan_index", "itinerary"}
+    assert latest["plan_index"] == 2
+
+
+def test_migrate_legacy_records(db_handler, test_line_id):
+    """測試舊格式文件轉換後,讀回的行程與原本相同,且可重複執行"""
+    db_handler.db.planner_records.insert_many(
+        [legacy_record(test_line_id, i) for i in (1, 2)])
+
+    assert migrate_planner_records(db_handler.db) >= 2
+    assert migrate_planner_records(db_handler.db) == 0
+
+    legacy_itinerary = legacy_record(test_line_id, 1)["itinerary"]
+    record = db_handler.get_plan_by_index(test_line_id, 1)
+    assert record["schema_version"] == PLAN_SCHEMA_VERSION
+    assert "hours" not in record["itinerary"][0]
+    assert db_handler.attach_plan_details(test_line_id, 1, record["itinerary"]) == legacy_itinerary
+
+
+def test_size_and_latency_report(db_handler, test_line_id):
+    """比較舊格式完整讀取與精簡格式 + projection 的文件大小與讀取耗時"""
+    db_handler.db.planner_records.insert_one(legacy_record(test_line_id, 1))
+    db_handler.save_plan(test_line_id, "我想去台北玩", REQUIREMENT, ITINERARY)
+
+    legacy = db_handler.get_plan_by_index(test_line_id, 1)
+    compact = db_handler.get_plan_by_index(test_line_id, 2)
+    full_itinerary = {"itinerary": ITINERARY}
+
+    def timeit(func, n=200):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    def read(plan_index, projection=None):
+        return lambda: db_handler.db.planner_records.find_one(
+            {"line_id": test_line_id, "plan_index": plan_index}, projection)
+
+    print(f"\n完整行程(含 route_info): {len(bson.encode(full_itinerary)) / 1024:.1f} KB")
+    print(f"舊格式文件: {len(bson.encode(legacy)) / 1024:.1f} KB")
+    print(f"精簡格式文件: {len(bson.encode(compact)) / 1024:.1f} KB")
+    print(f"舊格式完整讀取: {timeit(read(1)) * 1e3:.2f} ms")
+    print(f"精簡格式 + projection: {timeit(read(2, LATEST_PLAN_PROJECTION)) * 1e3:.2f} ms")
+
+    assert len(bson.encode(compact)) < len(bson.encode(legacy))
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from feature.nosql_mongo.mongo_rec.favorite_cache import CachedFavoriteManager, FavoriteCache
+
+CONFIG = {"MONGODB_URI": os.getenv("MONGODB_URI", "mongodb://localhost:27017")}
+USER_ID = "favorite_cache_test_user"
+PLACE = {
+    "name": "測試咖啡廳",
+    "rating": 4.5,
+    "address": "台北市",
+    "location_url": "https://maps.google.com",
+    "image_url": "https://example.com/a.jpg",
+}
+
+
+class CountingCollection:
+    """計算 find_one 次數的 collection 代理"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.find_one_calls = 0
+
+    def find_one(self, *args, **kwargs):
+        self.find_one_calls += 1
+        return self.collection.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+@pytest.fixture
+def cache():
+    return FavoriteCache(ttl=300, max_users=2)
+
+
+@pytest.fixture
+def manager(cache):
+    """建立使用快取的管理器,測試前後清除測試用戶"""
+    manager = CachedFavoriteManager(CONFIG, cache)
+    manager.favorite_collection.delete_many({"line_user_id": USER_ID})
+    manager.favorite_collection = CountingCollection(manager.favorite_collection)
+    yield manager
+    manager.favorite_collection.delete_many({"line_user_id": USER_ID})
+
+
+def test_reads_share_one_round_trip(manager):
+    """check_user / check_place / show_favorite 只讀一次資料庫"""
+    manager.add_user(USER_ID, "p1", PLACE)
+    collection = manager.favorite_collection
+    collection.find_one_calls = 0
+
+    assert manager.check_user(USER_ID)
+    assert manager.check_place(USER_ID, "p1")
+    assert not manager.check_place(USER_ID, "p2")
+    assert set(manager.show_favorite(USER_ID)) == {"p1"}
+    assert collection.find_one_calls == 1
+
+
+def test_mutations_invalidate(manager):
+    """新增、修改、刪除後讀到最新的收藏"""
+    assert not manager.check_user(USER_ID)
+    assert manager.add_user(USER_ID, "p1", PLACE)
+    assert manager.check_user(USER_ID)
+
+    assert manager.fix_favorite(USER_ID, "p2", PLACE)
+    assert manager.check_place(USER_ID, "p2")
+
+    assert manager.delete_favorite(USER_ID, "p1")
+    assert set(manager.show_favorite(USER_ID)) == {"p2"}
+
+    # 其他管理器(另一個請求)共用同一份快取
+    other = CachedFavoriteManager(CONFIG, manager.cache)
+    assert other.delete_favorite(USER_ID, "p2")
+    assert manager.show_favorite(USER_ID) is None
+
+
+def test_ttl_and_size_bound():
+    """過期的快取重新讀取,超過用戶上限時移除最久沒用到的"""
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        return {"p1": PLACE}
+
+    cache = FavoriteCache(ttl=0, max_users=2)
+    cache.get("u1", loader)
+    cache.get("u1", loader)
+    assert loads == ["u1", "u1"]
+
+    cache = FavoriteCache(ttl=300, max_users=2)
+    for user_id in ("u1", "u2", "u1", "u3", "u1", "u2"):
+        cache.get(user_id, loader)
+    assert loads[2:] == ["u1", "u2", "u3", "u2"]
+    assert cache.hits == 2
+
+
+def test_invalidate_during_load_is_not_cached():
+    """讀取期間有寫入並 invalidate 時,舊的讀取結果不會存入快取"""
+    cache = FavoriteCache(ttl=300, max_users=2)
+    stored = {"results": {"p1": PLACE}}
+    loads = []
+
+    def slow_loader(user_id):
+        # 模擬讀到舊資料後,另一個請求完成寫入並讓快取失效
+        results = dict(stored["results"])
+        loads.append(user_id)
+        if len(loads) == 1:
+            stored["results"] = {"p1": PLACE, "p2": PLACE}
+            cache.invalidate(user_id)
+        return results
+
+    assert cache.get("u1", slow_loader).place_ids == {"p1"}
+    assert cache.get("u1", slow_loader).place_ids == {"p1", "p2"}
+    assert cache.get("u1", slow_loader).place_ids == {"p1", "p2"}
+    assert loads == ["u1", "u1"]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,127 @@
+import time
+from datetime import datetime, timedelta
+
+import bson
+import pytest
+
+from feature.nosql_mongo.mongo_trip.mongodb_handler import MAX_INPUT_HISTORY, TripDBHandler
+
+USER_COUNT = 5
+MESSAGE_COUNT = 10_000
+
+
+@pytest.fixture
+def db_handler():
+    """建立資料庫handler"""
+    return TripDBHandler()
+
+
+@pytest.fixture
+def heavy_users(db_handler):
+    """建立數個已有 10k 則輸入記錄的用戶(模擬沒有上限時累積的舊資料)"""
+    start = datetime(2024, 1, 1)
+    line_ids = [f"load_test_user_{i}" for i in range(USER_COUNT)]
+    for line_id in line_ids:
+        db_handler.db.user_preferences.delete_one({"line_id": line_id})
+        db_handler.db.user_preferences.insert_one({
+            "line_id": line_id,
+            "preferences_summary": "喜歡文青咖啡廳",
+            # 只有最後 5 則在上次整理之後
+            "last_summary_time": start + timedelta(minutes=MESSAGE_COUNT - 6),
+            "input_history": [
+                {"timestamp": start + timedelta(minutes=i), "text": f"訊息{i}"}
+                for i in range(MESSAGE_COUNT)
+            ]
+        })
+    yield line_ids
+    for line_id in line_ids:
+        db_handler.clear_user_data(line_id)
+
+
+def legacy_history_status(db_handler, line_id, count_threshold=10):
+    """原本的做法: 讀整份文件,在 Python 端過濾"""
+    user = db_handler.db.user_preferences.find_one({"line_id": line_id})
+    last_time = user.get("last_summary_time")
+    messages = user.get("input_history", [])
+    new_messages = [m for m in messages if m["timestamp"] > last_time]
+    return {
+        "summary": user.get("preferences_summary"),
+        "new_messages": new_messages,
+        "needs_summary": len(new_messages) >= count_threshold or not last_time,
+        "last_summary_time": last_time
+    }
+
+
+def document_size(db_handler, line_id):
+    user = db_handler.db.user_preferences.find_one({"line_id": line_id})
+    return len(bson.encode(user))
+
+
+def test_history_status_matches_legacy(db_handler, heavy_users):
+    """測試只取新對話的結果與原本讀整份文件相同"""
+    for line_id in heavy_users:
+        status = db_handler.get_history_status(line_id)
+        assert status == legacy_history_status(db_handler, line_id)
+        assert [m["text"] for m in status["new_messages"]] == [
+            f"訊息{i}" for i in range(MESSAGE_COUNT - 5, MESSAGE_COUNT)
+        ]
+
+
+def test_record_user_input_caps_history(db_handler, heavy_users):
+    """測試寫入新訊息時 input_history 會被截到 MAX_INPUT_HISTORY 筆"""
+    line_id = heavy_users[0]
+    before = document_size(db_handler, line_id)
+
+    assert db_handler.record_user_input(line_id, "新的訊息")
+    assert db_handler.update_user_dislike(line_id, "我不喜歡遼寧街夜市(夜市)")
+
+    history = db_handler.get_input_history(line_id)
+    assert len(history) == MAX_INPUT_HISTORY
+    assert [m["text"] for m in history[-2:]] == ["新的訊息", "我不喜歡遼寧街夜市(夜市)"]
+
+    status = db_handler.get_history_status(line_id)
+    assert [m["text"] for m in status["new_messages"]][-2:] == ["新的訊息", "我不喜歡遼寧街夜市(夜市)"]
+
+    print(f"\n文件大小: {before / 1024:.0f} KB → {document_size(db_handler, line_id) / 1024:.0f} KB")
+
+
+def test_update_summary_until_keeps_later_messages(db_handler, heavy_users):
+    """摘要只標記到整理的最後一則,整理期間新進的訊息仍在 new_messages"""
+    line_id = heavy_users[0]
+    status = db_handler.get_history_status(line_id)
+    summarized_until = status["new_messages"][-1]["timestamp"]
+
+    # 背景整理期間又收到一則
+    assert db_handler.record_user_input(line_id, "整理期間的訊息")
+    assert db_handler.update_summary(line_id, "喜歡文青咖啡廳與夜市", summarized_until=summarized_until)
+
+    status = db_handler.get_history_status(line_id)
+    assert status["summary"] == "喜歡文青咖啡廳與夜市"
+    assert [m["text"] for m in status["new_messages"]] == ["整理期間的訊息"]
+
+
+def test_history_status_load(db_handler, heavy_users):
+    """比較 10k 則記錄的用戶,原本與截斷後每則訊息讀取歷史的耗時"""
+    def timeit(func):
+        start = time.perf_counter()
+        for line_id in heavy_users:
+            func(line_id)
+        return (time.perf_counter() - start) / len(heavy_users)
+
+    legacy = timeit(lambda line_id: legacy_history_status(db_handler, line_id))
+    uncapped = timeit(db_handler.get_history_status)
+
+    # 每個用戶再說一句話,input_history 就會被截斷
+    for line_id in heavy_users:
+        db_handler.record_user_input(line_id, "觸發截斷")
+    capped = timeit(db_handler.get_history_status)
+
+    print(f"\n原本(讀整份文件): {legacy * 1e3:.1f} ms/次")
+    print(f"只取新對話(10k 則): {uncapped * 1e3:.1f} ms/次")
+    print(f"只取新對話(截斷為 {MAX_INPUT_HISTORY} 則): {capped * 1e3:.1f} ms/次")
+
+    assert capped < legacy
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
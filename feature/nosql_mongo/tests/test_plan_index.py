@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from feature.nosql_mongo.mongo_trip.mongodb_handler import TripDBHandler
+
+ITINERARY = [{
+    "step": 1,
+    "place_id": "ChIJxxxxxx",
+    "date": "2024-12-25",
+    "name": "台北101",
+    "label": "景點",
+    "lat": 25.0339,
+    "lon": 121.5645,
+    "period": "morning",
+    "start_time": "10:00",
+    "end_time": "12:00",
+    "hours": "09:00 - 22:00",
+    "transport": {"mode": "開車", "time": 10, "period": "09:50-10:00"},
+    "duration": 120
+}]
+
+
+@pytest.fixture
+def db_handler():
+    """建立資料庫handler"""
+    return TripDBHandler()
+
+
+@pytest.fixture
+def test_line_id(db_handler):
+    """測試用的LINE ID,測試後清理資料"""
+    line_id = "plan_index_test_user"
+    db_handler.clear_user_data(line_id)
+    yield line_id
+    db_handler.clear_user_data(line_id)
+
+
+def save(db_handler, line_id, text="我想去台北玩"):
+    return db_handler.save_plan(
+        line_id=line_id,
+        input_text=text,
+        requirement={"start_time": "09:00", "end_time": "21:00"},
+        itinerary=ITINERARY
+    )
+
+
+def test_plan_index_sequential(db_handler, test_line_id):
+    """測試 plan_index 從 1 開始依序遞增,清除資料後重新計算"""
+    assert [save(db_handler, test_line_id) for _ in range(3)] == [1, 2, 3]
+    assert db_handler.get_latest_plan(test_line_id)["plan_index"] == 3
+
+    db_handler.clear_user_data(test_line_id)
+    assert save(db_handler, test_line_id) == 1
+
+
+def test_plan_index_concurrent(db_handler, test_line_id):
+    """測試同一用戶同時儲存多筆規劃時 plan_index 不會重複"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        indexes = list(executor.map(
+            lambda i: save(db_handler, test_line_id, f"規劃{i}"), range(20)))
+
+    assert sorted(indexes) == list(range(1, 21))
+    assert db_handler.db.planner_records.count_documents({"line_id": test_line_id}) == 20
+
+
+def test_plan_index_continues_existing_records(db_handler, test_line_id):
+    """測試計數器建立前就有規劃記錄的用戶,會接續最大的 plan_index"""
+    db_handler.db.planner_records.insert_many([
+        {"line_id": test_line_id, "plan_index": i, "itinerary": []}
+        for i in (1, 2)
+    ])
+
+    assert save(db_handler, test_line_id) == 3
+    assert save(db_handler, test_line_id) == 4
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
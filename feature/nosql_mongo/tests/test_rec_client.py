@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from feature.nosql_mongo.mongo_rec import mongo_client
+from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_disat import MongoDBManage_unsatisfied
+from feature.nosql_mongo.mongo_rec.mongoDB_ctrl_favo import MongoDBManage_favorite
+
+CONFIG = {"MONGODB_URI": "mongodb://test-host:27017"}
+
+
+class FakeClient:
+    """記錄建立次數、create_index 與 close 呼叫的 MongoClient"""
+
+    created = 0
+
+    def __init__(self, uri, server_api=None):
+        FakeClient.created += 1
+        self.index_calls = []
+        self.closed = False
+
+    def __getitem__(self, name):
+        # client[db][collection] 都回傳自己,只記錄 create_index
+        return self
+
+    def create_index(self, keys):
+        self.index_calls.append(keys)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    """以 FakeClient 取代 MongoClient,並清空共用連線"""
+    FakeClient.created = 0
+    mongo_client.close_mongo_clients()
+    monkeypatch.setattr(mongo_client, "MongoClient", FakeClient)
+    yield
+    mongo_client.close_mongo_clients()
+
+
+def test_managers_share_one_client():
+    """測試每次建立管理器都使用同一個 MongoClient,且不再建立索引"""
+    managers = [
+        MongoDBManage_unsatisfied(CONFIG),
+        MongoDBManage_favorite(CONFIG),
+        MongoDBManage_unsatisfied(CONFIG),
+        MongoDBManage_favorite(CONFIG),
+    ]
+
+    assert FakeClient.created == 1
+    assert all(m.client is managers[0].client for m in managers)
+    assert managers[0].client.index_calls == []
+
+
+def test_close_keeps_shared_pool_open():
+    """測試管理器的 close 不會關閉共用連線"""
+    manager = MongoDBManage_favorite(CONFIG)
+    manager.close()
+
+    assert not manager.client.closed
+    assert MongoDBManage_favorite(CONFIG).client is manager.client
+
+
+def test_ensure_indexes_runs_once():
+    """測試索引只在第一次 ensure_indexes 時建立"""
+    assert mongo_client.ensure_indexes(CONFIG)
+    assert mongo_client.ensure_indexes(CONFIG)
+
+    client = mongo_client.get_mongo_client(CONFIG["MONGODB_URI"])
+    assert client.index_calls == [[("line_user_id", 1)], "line_user_id"]
+
+
+def test_ensure_indexes_failure_is_logged():
+    """建立索引失敗時以 error 記錄並回傳 False,再次呼叫才會重試"""
+    client = mongo_client.get_mongo_client(CONFIG["MONGODB_URI"])
+    with patch.object(client, "create_index", side_effect=PyMongoError("connection refused")), \
+            patch.object(mongo_client, "logger") as logger:
+        assert not mongo_client.ensure_indexes(CONFIG)
+    logger.error.assert_called_once()
+
+    assert mongo_client.ensure_indexes(CONFIG)
+    assert client.index_calls == [[("line_user_id", 1)], "line_user_id"]
+
+
+def test_missing_uri():
+    """測試未設定 MONGODB_URI 時的行為與原本一致"""
+    assert not mongo_client.ensure_indexes({})
+    with pytest.raises(ValueError):
+        MongoDBManage_unsatisfied({})
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -1,47 +1,29 @@
-from feature.plan.utils.Filter_Criteria.check_class import filter_by_label_type
-from feature.plan.utils.Filter_Criteria.check_budget import filter_by_budget
-from feature.plan.utils.Filter_Criteria.check_distance import filter_by_distance
-from feature.plan.utils.Filter_Criteria.check_date import filter_by_weekday
-from feature.plan.utils.Filter_Criteria.check_time import filter_by_time_without_weekday
+import heapq
+import math
+
+import numpy as np
+import pandas as pd
+
+from feature.plan.utils.Filter_Criteria.filter_engine import PointColumns, attribute_mask, filter_place_ids
 from feature.plan.utils.Norma_lization.similarity_score_normalized import normalize_similarity
-from feature.plan.utils.Norma_lization.comment_score_normalized import normalize_and_match, load_extracted_data
+from feature.plan.utils.Norma_lization.comment_score_normalized import normalize_and_match, normalize_comment_scores
+from feature.sql_csv.emotion_table import get_emotion_table
 from feature.plan.utils.Norma_lization.distances_score_normalized import calculate_reverse_normalized_distances_no_threshold
 
 
-def main(points, user_requirements):
+def main(points, user_requirements, distance_method="geodesic"):
     """
     根據使用者需求篩選符合條件的餐廳。
     
+    所有條件在 filter_engine 中以欄位陣列 + 布林遮罩一次計算，
+    結果與逐一呼叫 Filter_Criteria 各函式後取交集相同。
+    
     :param points: 資料列表。
     :param user_requirements: 使用者需求列表。
+    :param distance_method: "geodesic"(預設，與 filter_by_distance 一致) | "haversine"。
     :return: 符合條件的餐廳 placeID 列表。
     """
-    user_filters = user_requirements[0]
-    matching_placeID = set(r['placeID'] for r in points)
-
-    # 篩選條件
-    desired_label = user_filters["類別"]
-    if desired_label != "none":
-        matching_placeID.intersection_update(filter_by_label_type(points, desired_label))
-
-    user_budget = user_filters["預算"]
-    if user_budget != "none":
-        matching_placeID.intersection_update(filter_by_budget(points, user_budget))
-
-    # max_distance_km, start_location 檢查在 llm 端已確認
-    start_location = user_filters["出發地點"]
-    max_distance_km = user_filters["可接受距離門檻(KM)"]
-    matching_placeID.intersection_update(filter_by_distance(points, start_location, max_distance_km))
-
-    user_weekday = user_filters["星期別"]
-    if user_weekday != "none":
-        matching_placeID.intersection_update(filter_by_weekday(points, user_weekday))
-
-    user_arrival_time = user_filters["時間"]
-    if user_arrival_time != "none":
-        matching_placeID.intersection_update(filter_by_time_without_weekday(points, user_arrival_time))
-
-    return list(matching_placeID)
+    return filter_place_ids(points, user_requirements[0], distance_method)
 
 
 def calculate_weighted_scores(points, user_location, weights):
@@ -55,8 +37,8 @@ def calculate_weighted_scores(points, user_location, weights):
     """
     points = normalize_similarity(points)
     emotion_analysis_path = r"./data/emotion_analysis.csv"
-    extracted_data = load_extracted_data(emotion_analysis_path)
-    points = normalize_and_match(points, extracted_data).to_dict(orient="records")
+    emotion_table = get_emotion_table(emotion_analysis_path)
+    points = normalize_and_match(points, emotion_table).to_dict(orient="records")
 
     distance_scores = calculate_reverse_normalized_distances_no_threshold(points, user_location)
     distance_map = {d['placeID']: d['distance_normalized_score'] for d in distance_scores}
@@ -85,27 +67,80 @@ def filter_and_calculate_scores(points, user_requirements, weights):
     """
     篩選地點並計算加權總分。
     
+    篩選與計分合併為一次處理，結果與 main() + calculate_weighted_scores() 相同:
+    1. 類別/預算/星期/時間 以布林遮罩篩選，haversine 排除一定超出距離門檻的點
+    2. 剩下的點各算一次 geodesic，同時用於距離篩選與距離分數
+    3. 只取前 10 名(heapq.nlargest)，不排序整個列表
+    
     :param points: 地點資料列表。
     :param user_requirements: 使用者需求列表。
     :param weights: 權重字典，包含距離、評論分數、相似性。
     :return: 排序後的前 10 地點列表（僅包含指定欄位）。
     """
-    # 篩選符合條件的 placeID
-    filtered_placeID = main(points, user_requirements)
+    if not points:
+        print("No places match the given criteria.")
+        return []
 
-    # 從原始資料中篩選符合條件的地點
-    filtered_points = [point for point in points if point['placeID'] in filtered_placeID]
+    user_filters = user_requirements[0]
+    user_location = user_filters["出發地點"]  # 預設台北車站
+    max_distance_km = user_filters["可接受距離門檻(KM)"]
+
+    # 篩選符合條件的地點(距離只對可能在範圍內的點算 geodesic)
+    columns = PointColumns(points)
+    candidates = np.flatnonzero(
+        attribute_mask(columns, user_filters) & columns.maybe_within(user_location, max_distance_km)
+    )
+    distances = columns.geodesic_km(candidates, user_location)
+    passed = {
+        columns.place_ids[i]: distance
+        for i, distance in zip(candidates, distances)
+        if distance <= max_distance_km
+    }
+
+    # 與原本相同，placeID 符合條件的所有資料列都保留(依原順序)
+    selected = [point for point in points if point['placeID'] in passed]
 
     # 檢查篩選結果是否為空
-    if not filtered_points:
+    if not selected:
         print("No places match the given criteria.")
         return []
 
-    # 計算加權總分並排序
-    user_location = user_requirements[0]["出發地點"]  # 預設台北車站
-    sorted_points = calculate_weighted_scores(filtered_points, user_location, weights)
-    
-    return sorted_points
+    # 相似性標準化(與 normalize_similarity 相同的計算方式)
+    similarities = [point['retrival_score'] for point in selected]
+    min_similarity, max_similarity = min(similarities), max(similarities)
+    similarity_scores = [
+        round(((score - min_similarity) / (max_similarity - min_similarity)) * 100, 2)
+        for score in similarities
+    ]
+
+    # 評論分數: 只取這些候選的 總體評價 做 min-max
+    emotion_table = get_emotion_table(r"./data/emotion_analysis.csv")
+    comment_scores = normalize_comment_scores(
+        emotion_table.gather_rating(point['placeID'] for point in selected)
+    ).tolist()
+
+    # 加權總分(距離沿用篩選時算好的 geodesic)
+    weighted_scores = [
+        weights['distance'] * round((1 / (1 + passed[point['placeID']])) * 100, 2) +
+        weights['comments'] * comment_score +
+        weights['similarity'] * similarity_score
+        for point, comment_score, similarity_score in zip(selected, comment_scores, similarity_scores)
+    ]
+
+    # 取前 10 名; 有 NaN(找不到評論資料)時排序結果取決於比較順序，改用與原本相同的完整排序
+    order = range(len(selected))
+    if any(math.isnan(score) for score in weighted_scores):
+        top = sorted(order, key=weighted_scores.__getitem__, reverse=True)[:10]
+    else:
+        top = heapq.nlargest(10, order, key=weighted_scores.__getitem__)
+
+    # 過濾需要的欄位; 經過 DataFrame 讓型別轉換(缺值補 NaN 等)與原本一致
+    required_fields = {'placeID', 'place_name', 'rating', 'lat', 'lon', 'new_avg_cost','address', 'hours', 'location_url', 'image_url'}
+    fields_df = pd.DataFrame([
+        {k: v for k, v in point.items() if k in required_fields}
+        for point in selected
+    ])
+    return fields_df.iloc[top].to_dict(orient="records")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+# feature/plan/tests/test_comment_score_normalized.py
+
+import os
+import random
+import time
+
+import pandas as pd
+import pytest
+
+from feature.plan.utils.Norma_lization.comment_score_normalized import (
+    load_extracted_data,
+    normalize_and_match,
+)
+from feature.sql_csv.emotion_table import EMOTION_ANALYSIS_PATH, get_emotion_table
+
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(EMOTION_ANALYSIS_PATH),
+    reason="需要在專案根目錄執行(找不到 data/emotion_analysis.csv)"
+)
+
+
+def legacy_normalize_and_match(points, extracted_data):
+    """原本的實作: 整份資料轉 DataFrame 後篩選、標準化、merge"""
+    extracted_df = pd.DataFrame(extracted_data)
+    points_df = pd.DataFrame(points)
+    placeID_in_points = points_df["placeID"].unique()
+    filtered = extracted_df[extracted_df["placeID"].isin(placeID_in_points)].copy()
+    filtered["comment_score_normalized"] = (
+        (filtered["總體評價"] - filtered["總體評價"].min()) /
+        (filtered["總體評價"].max() - filtered["總體評價"].min())
+    ) * 100
+    filtered["comment_score_normalized"] = filtered["comment_score_normalized"].round(2)
+    return pd.merge(points_df, filtered, on="placeID", how="left")
+
+
+def make_points(k, seed=0, unknown=0, duplicates=0):
+    """從真實 placeID 抽樣產生 points,可加入找不到的與重複的 placeID"""
+    rng = random.Random(seed)
+    place_ids = rng.sample(get_emotion_table().place_ids.tolist(), k)
+    place_ids += [f"unknown_{i}" for i in range(unknown)]
+    place_ids += rng.sample(place_ids, duplicates)
+    rng.shuffle(place_ids)
+    return [
+        {'placeID': pid, 'place_name': f'店{i}', 'retrival_score': rng.random()}
+        for i, pid in enumerate(place_ids)
+    ]
+
+
+@pytest.mark.parametrize("k, unknown, duplicates", [
+    (1, 0, 0),
+    (13, 0, 3),
+    (200, 5, 10),
+    (1000, 0, 0),
+])
+def test_parity_with_legacy(k, unknown, duplicates):
+    """測試與原本 merge 版本的 DataFrame 完全相同"""
+    points = make_points(k, seed=k, unknown=unknown, duplicates=duplicates)
+    expected = legacy_normalize_and_match(points, load_extracted_data(EMOTION_ANALYSIS_PATH))
+
+    pd.testing.assert_frame_equal(normalize_and_match(points, get_emotion_table()), expected)
+    # 舊的 List[Dict] 介面仍可使用
+    pd.testing.assert_frame_equal(
+        normalize_and_match(points, load_extracted_data(EMOTION_ANALYSIS_PATH)), expected
+    )
+
+
+def test_parity_edge_cases():
+    """測試全部找不到、評價全相同(除以 0)的情況"""
+    unknown = [{'placeID': 'nope_1'}, {'placeID': 'nope_2'}]
+    extracted = load_extracted_data(EMOTION_ANALYSIS_PATH)
+    pd.testing.assert_frame_equal(
+        normalize_and_match(unknown, get_emotion_table()),
+        legacy_normalize_and_match(unknown, extracted),
+    )
+
+    same = [
+        {'placeID': 'a', '總體評價': 7.0},
+        {'placeID': 'b', '總體評價': 7.0},
+    ]
+    points = [{'placeID': 'a'}, {'placeID': 'b'}, {'placeID': 'c'}]
+    pd.testing.assert_frame_equal(
+        normalize_and_match(points, same),
+        legacy_normalize_and_match(points, same),
+    )
+
+
+def test_gather_benchmark():
+    """比較原本每次請求(讀 CSV + 轉換 + merge)與 O(k) 取值的成本"""
+    points = make_points(200, seed=1)
+    table = get_emotion_table()
+
+    def old_request():
+        data = pd.read_csv(EMOTION_ANALYSIS_PATH)
+        extracted = data[["placeID", "總體評價"]].to_dict(orient="records")
+        return legacy_normalize_and_match(points, extracted)
+
+    def timeit(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    old = timeit(old_request, 3)
+    old_cached = timeit(
+        lambda: legacy_normalize_and_match(points, load_extracted_data(EMOTION_ANALYSIS_PATH)), 10
+    )
+    new = timeit(lambda: normalize_and_match(points, table), 50)
+
+    print(f"\n原本(每次讀 CSV + merge, k=200): {old * 1e3:.1f} ms")
+    print(f"原本 merge(資料已在記憶體): {old_cached * 1e3:.1f} ms")
+    print(f"索引取值 + min-max: {new * 1e3:.2f} ms")
+
+    assert new < old_cached
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
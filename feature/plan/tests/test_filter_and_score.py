@@ -0,0 +1,136 @@
+# feature/plan/tests/test_filter_and_score.py
+
+import copy
+import math
+import os
+import random
+import time
+
+import pytest
+
+from feature.llm.utils.extractor.schemas import validate_plan_basic
+from feature.plan.Contextual_Search_Main import calculate_weighted_scores, filter_and_calculate_scores
+from feature.plan.utils.Filter_Criteria.check_class import LABEL_MAPPING
+from feature.plan.tests.test_filter_engine import legacy_main, make_requirement
+from feature.plan.tests.test_filter_engine import make_points as make_filter_points
+from feature.sql_csv.emotion_table import EMOTION_ANALYSIS_PATH, get_emotion_table
+
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(EMOTION_ANALYSIS_PATH),
+    reason="需要在專案根目錄執行(找不到 data/emotion_analysis.csv)"
+)
+
+WEIGHTS = {'distance': 0.2, 'comments': 0.3, 'similarity': 0.5}
+
+
+def legacy_filter_and_calculate_scores(points, user_requirements, weights):
+    """原本的實作: 取交集 → 串列掃描 → 標準化 → DataFrame → 全部排序"""
+    points = copy.deepcopy(points)
+    filtered_placeID = list(legacy_main(points, user_requirements))
+    filtered_points = [point for point in points if point['placeID'] in filtered_placeID]
+    if not filtered_points:
+        return []
+    user_location = user_requirements[0]["出發地點"]
+    return calculate_weighted_scores(filtered_points, user_location, WEIGHTS)
+
+
+def make_points(n, seed=0, unknown_ratio=0.0, extra_fields=True):
+    """以真實 placeID 產生 points,可混入評論資料中找不到的 placeID"""
+    rng = random.Random(seed)
+    place_ids = rng.sample(get_emotion_table().place_ids.tolist(), n)
+    points = make_filter_points(n, seed=seed)
+    for point, place_id in zip(points, place_ids):
+        point['placeID'] = place_id if rng.random() >= unknown_ratio else f"unknown_{place_id}"
+        point['rating'] = round(rng.uniform(3, 5), 1)
+        if extra_fields:
+            point['address'] = f"台北市某路{rng.randint(1, 300)}號"
+            point['location_url'] = f"https://www.google.com/maps/place/?q=place_id:{place_id}"
+            point['image_url'] = 'https://example.com/image.jpg'
+    return points
+
+
+def comparable(results):
+    """NaN 無法以 == 比較,轉成字串並保留欄位順序與型別"""
+    return [
+        [(k, type(v).__name__, 'NaN' if isinstance(v, float) and math.isnan(v) else v) for k, v in r.items()]
+        for r in results
+    ]
+
+
+@pytest.mark.parametrize("seed, unknown_ratio, user_requirements", [
+    (1, 0.0, make_requirement()),
+    (2, 0.0, make_requirement(類別='餐廳', 預算=300)),
+    (3, 0.0, make_requirement(類別='景點', 星期別=6, 時間='10:30')),
+    (4, 0.1, make_requirement(預算=250, **{"可接受距離門檻(KM)": 30})),
+    (5, 0.0, make_requirement(時間='12:00', **{"可接受距離門檻(KM)": 5})),
+])
+def test_parity_with_legacy(seed, unknown_ratio, user_requirements):
+    """測試回傳的前 10 名(順序、欄位、型別)與原本完全相同"""
+    points = make_points(1000, seed=seed, unknown_ratio=unknown_ratio)
+    expected = legacy_filter_and_calculate_scores(points, user_requirements, WEIGHTS)
+    got = filter_and_calculate_scores(points, user_requirements, WEIGHTS)
+    assert comparable(got) == comparable(expected)
+    assert got
+
+
+def test_parity_missing_fields_and_duplicates():
+    """測試缺欄位(補 NaN)、價格缺值與重複 placeID 的情況"""
+    points = make_points(300, seed=9, extra_fields=False)
+    points += copy.deepcopy(points[:20])
+    requirement = make_requirement(**{"可接受距離門檻(KM)": 40})
+    expected = legacy_filter_and_calculate_scores(points, requirement, WEIGHTS)
+    assert comparable(filter_and_calculate_scores(points, requirement, WEIGHTS)) == comparable(expected)
+
+
+@pytest.mark.parametrize("category", ["咖啡廳", "景點"])
+def test_llm_category_filters_results(category):
+    """Cloud_C 的 類別 經過認證後保留,推薦結果只含該類別的地點"""
+    points = make_points(300, seed=5)
+    llm_output = [{
+        "星期別": "none", "時間": "none", "類別": category, "預算": "none",
+        "出發地點": [25.0478, 121.5171], "可接受距離門檻(KM)": 30, "交通方式": "開車",
+    }]
+    user_requirements = validate_plan_basic(llm_output).value
+    assert user_requirements[0]["類別"] == category
+
+    results = filter_and_calculate_scores(copy.deepcopy(points), user_requirements, WEIGHTS)
+    labels = {point['placeID']: point['new_label_type'] for point in points}
+    assert results
+    assert all(labels[r['placeID']] in LABEL_MAPPING[category] for r in results)
+
+    # 不指定類別時包含其他類別
+    unfiltered = filter_and_calculate_scores(copy.deepcopy(points), make_requirement(**{"可接受距離門檻(KM)": 30}), WEIGHTS)
+    assert any(labels[r['placeID']] not in LABEL_MAPPING[category] for r in unfiltered)
+
+
+def test_no_match():
+    points = make_points(50, seed=3)
+    requirement = make_requirement(**{"可接受距離門檻(KM)": 0.001})
+    assert filter_and_calculate_scores(points, requirement, WEIGHTS) == []
+    assert filter_and_calculate_scores([], requirement, WEIGHTS) == []
+
+
+def test_fused_benchmark():
+    """比較 1000 個檢索結果(recommandation 的 limit=1000)從篩選到前 10 名的成本"""
+    points = make_points(1000, seed=11)
+    requirement = make_requirement(**{"可接受距離門檻(KM)": 20})
+
+    def timeit(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    get_emotion_table()
+    old = timeit(lambda: legacy_filter_and_calculate_scores(points, requirement, WEIGHTS), 3)
+    new = timeit(lambda: filter_and_calculate_scores(points, requirement, WEIGHTS), 5)
+
+    print(f"\n原本(篩選 + 串列掃描 + DataFrame + geodesic 兩次 + 全部排序): {old * 1e3:.1f} ms")
+    print(f"合併流程: {new * 1e3:.1f} ms")
+
+    assert new < old
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
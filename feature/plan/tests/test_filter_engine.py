@@ -0,0 +1,150 @@
+# feature/plan/tests/test_filter_engine.py
+
+import random
+import time
+
+import pytest
+from geopy.distance import geodesic
+
+from feature.plan.Contextual_Search_Main import main
+from feature.plan.utils.Filter_Criteria.check_class import LABEL_MAPPING, filter_by_label_type
+from feature.plan.utils.Filter_Criteria.check_budget import filter_by_budget
+from feature.plan.utils.Filter_Criteria.check_distance import filter_by_distance
+from feature.plan.utils.Filter_Criteria.check_date import filter_by_weekday
+from feature.plan.utils.Filter_Criteria.check_time import filter_by_time_without_weekday
+from feature.plan.utils.Filter_Criteria.filter_engine import PointColumns, filter_place_ids
+
+
+TAIPEI_STATION = (25.0478, 121.5171)
+LABELS = sorted({label for labels in LABEL_MAPPING.values() for label in labels}) + ['其他', None]
+SLOTS = [
+    [{'start': '09:00', 'end': '21:00'}],
+    [{'start': '11:15', 'end': '14:00'}, {'start': '17:00', 'end': '20:00'}],
+    [{'start': '16:00', 'end': '23:00'}],
+    [{'start': '00:00', 'end': '23:59'}],
+    [{'start': '8:00', 'end': '14:00'}],
+]
+
+
+def legacy_main(points, user_requirements):
+    """原本的實作: 五個條件各自跑迴圈後取交集"""
+    user_filters = user_requirements[0]
+    matching = set(r['placeID'] for r in points)
+    if user_filters["類別"] != "none":
+        matching.intersection_update(filter_by_label_type(points, user_filters["類別"]))
+    if user_filters["預算"] != "none":
+        matching.intersection_update(filter_by_budget(points, user_filters["預算"]))
+    matching.intersection_update(
+        filter_by_distance(points, user_filters["出發地點"], user_filters["可接受距離門檻(KM)"])
+    )
+    if user_filters["星期別"] != "none":
+        matching.intersection_update(filter_by_weekday(points, user_filters["星期別"]))
+    if user_filters["時間"] != "none":
+        matching.intersection_update(filter_by_time_without_weekday(points, user_filters["時間"]))
+    return matching
+
+
+def make_points(n, seed=0):
+    """產生台北附近的隨機 points,格式與 plan_point_make 相同"""
+    rng = random.Random(seed)
+    points = []
+    for i in range(n):
+        hours = {
+            day: 'none' if rng.random() < 0.2 else rng.choice(SLOTS)
+            for day in range(1, 8)
+        }
+        points.append({
+            'placeID': f'place_{i}',
+            'place_name': f'店{i}',
+            'retrival_score': rng.uniform(0.6, 0.9),
+            'lat': TAIPEI_STATION[0] + rng.uniform(-0.3, 0.3),
+            'lon': TAIPEI_STATION[1] + rng.uniform(-0.3, 0.3),
+            'new_label_type': rng.choice(LABELS),
+            'new_avg_cost': None if rng.random() < 0.05 else rng.choice([100, 150, 250, 350, 500, 800]),
+            'hours': hours,
+        })
+    return points
+
+
+def make_requirement(**overrides):
+    requirement = {
+        "星期別": "none",
+        "時間": "none",
+        "類別": "none",
+        "預算": "none",
+        "出發地點": TAIPEI_STATION,
+        "可接受距離門檻(KM)": 15,
+        "交通類別": "步行",
+    }
+    requirement.update(overrides)
+    return [requirement]
+
+
+REQUIREMENTS = [
+    make_requirement(),
+    make_requirement(類別='餐廳', 預算=300),
+    make_requirement(類別='景點', 星期別=6, 時間='10:30'),
+    make_requirement(類別='咖啡廳', 預算=200, 星期別=1, 時間='14:00', **{"可接受距離門檻(KM)": 8}),
+    make_requirement(時間='23:59', **{"可接受距離門檻(KM)": 30}),
+    make_requirement(星期別=8),
+]
+
+
+@pytest.mark.parametrize("user_requirements", REQUIREMENTS)
+def test_parity_with_legacy(user_requirements):
+    """測試與原本各條件取交集的結果完全相同"""
+    points = make_points(1000, seed=42)
+    assert set(main(points, user_requirements)) == legacy_main(points, user_requirements)
+
+
+def test_distance_parity_at_threshold():
+    """測試剛好落在門檻附近(haversine 與 geodesic 判斷不同)的點仍與原本一致"""
+    points = make_points(300, seed=7)
+    threshold = 10.0
+    # 把每個點移到 geodesic 距離剛好在門檻附近
+    for i, point in enumerate(points):
+        bearing = (i * 37) % 360
+        target = threshold + (i % 21 - 10) * 0.002
+        destination = geodesic(kilometers=target).destination(TAIPEI_STATION, bearing)
+        point['lat'], point['lon'] = destination.latitude, destination.longitude
+
+    expected = set(filter_by_distance(points, TAIPEI_STATION, threshold))
+    columns = PointColumns(points)
+    got = set(columns.place_ids[columns.distance_mask(TAIPEI_STATION, threshold)].tolist())
+    assert got == expected
+
+    # 只用 haversine 時,門檻附近會有差異
+    haversine = set(columns.place_ids[
+        columns.distance_mask(TAIPEI_STATION, threshold, method="haversine")
+    ].tolist())
+    assert haversine != expected
+
+
+def test_empty_points():
+    assert filter_place_ids([], make_requirement()[0]) == []
+
+
+def test_filter_benchmark():
+    """比較 1000 個檢索結果(recommandation 的 limit=1000)的篩選成本"""
+    points = make_points(1000, seed=1)
+    user_requirements = make_requirement(類別='餐廳', 預算=300, 星期別=3, 時間='12:00')
+
+    def timeit(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    old = timeit(lambda: legacy_main(points, user_requirements), 3)
+    new = timeit(lambda: main(points, user_requirements), 10)
+    fast = timeit(lambda: main(points, user_requirements, distance_method="haversine"), 10)
+
+    print(f"\n原本(逐點迴圈 + geodesic + strptime, n=1000): {old * 1e3:.1f} ms")
+    print(f"向量化(haversine + 門檻附近 geodesic): {new * 1e3:.2f} ms")
+    print(f"向量化(只用 haversine): {fast * 1e3:.2f} ms")
+
+    assert new < old
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -1,3 +1,22 @@
+LABEL_MAPPING = {
+    '餐廳': ['餐廳', '咖啡廳', '小吃'],
+    '咖啡廳': ['咖啡廳', '甜品店/飲料店'],
+    '小吃': ['小吃', '甜品店/飲料店'],
+    '景點': [
+        '一般商店',
+        '日用品商店',
+        '休閒設施',
+        '伴手禮商店',
+        '室內旅遊景點',
+        '室外旅遊景點',
+        '購物商場',
+        '文化/歷史景點',
+        '自然景點',
+        '一般商店',
+    ],
+}
+
+
 def filter_by_label_type(points, desired_label:str):
     """
     根據指定的 label_type 篩選  一般商店
@@ -20,30 +39,11 @@ def filter_by_label_type(points, desired_label:str):
     :return: 符合條件的 placeID 列表。
     """
 
-    label_mapping = {
-        '餐廳': ['餐廳', '咖啡廳', '小吃'],
-        '咖啡廳': ['咖啡廳', '甜品店/飲料店'],
-        '小吃': ['小吃', '甜品店/飲料店'],
-        '景點': [
-            '一般商店',
-            '日用品商店',
-            '休閒設施',
-            '伴手禮商店',
-            '室內旅遊景點',
-            '室外旅遊景點',
-            '購物商場',
-            '文化/歷史景點',
-            '自然景點',
-            '一般商店',
-        ],
-    }
-
-
     matching_places = []
     for points in points:
         
         label = points.get("new_label_type")
-        label_required = label_mapping[desired_label]
+        label_required = LABEL_MAPPING[desired_label]
         if label in label_required:
             matching_places.append(points['placeID'])
     return matching_places
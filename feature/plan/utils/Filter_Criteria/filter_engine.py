@@ -0,0 +1,262 @@
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from geopy.distance import geodesic
+
+from feature.plan.utils.Filter_Criteria.check_class import LABEL_MAPPING
+
+# 平均地球半徑(公里),與 WGS84 測地線距離的相對誤差在 0.6% 以內
+EARTH_RADIUS_KM = 6371.0088
+
+# haversine 與 geodesic 的誤差緩衝,落在門檻 ±1% 內的點才用 geodesic 重算
+GEODESIC_REFINE_RATIO = 0.01
+
+
+@lru_cache(maxsize=2048)
+def time_to_minutes(value):
+    """
+    'HH:MM' 轉成當天的分鐘數,解析規則與 check_time 的 strptime 相同。
+    營業時間字串種類很少,快取後每個字串只解析一次。
+    """
+    parsed = datetime.strptime(value, '%H:%M')
+    return parsed.hour * 60 + parsed.minute
+
+
+def haversine_km(lat, lon, start_location):
+    """
+    向量化 haversine 距離。
+
+    :param lat: np.ndarray，緯度。
+    :param lon: np.ndarray，經度。
+    :param start_location: 出發地 (lat, lon)。
+    :return: np.ndarray，距離（公里）。
+    """
+    start_lat, start_lon = np.radians(float(start_location[0])), np.radians(float(start_location[1]))
+    lat, lon = np.radians(lat), np.radians(lon)
+    a = (
+        np.sin((lat - start_lat) / 2) ** 2 +
+        np.cos(start_lat) * np.cos(lat) * np.sin((lon - start_lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class PointColumns:
+    """
+    把 points (List[Dict]) 一次轉成欄位陣列，之後所有條件都用布林遮罩計算。
+
+    :param points: 資料列表，每個地點包含 placeID、new_label_type、new_avg_cost、lat、lon、hours。
+    """
+
+    def __init__(self, points):
+        n = len(points)
+        self.size = n
+        self.place_ids = np.array([p['placeID'] for p in points], dtype=object)
+        # 類別轉成整數代碼,篩選時只需比對代碼
+        self.label_codes = {}
+        self.labels = np.array(
+            [self.label_codes.setdefault(p.get("new_label_type"), len(self.label_codes)) for p in points],
+            dtype=np.int64,
+        )
+        self.cost = np.array(
+            [np.nan if p.get("new_avg_cost") is None else p["new_avg_cost"] for p in points],
+            dtype=float,
+        )
+
+        # 經緯度與營業時間在條件用到時才轉換(與原本一樣,缺少或格式錯誤時才會報錯)
+        self._points = points
+        self._lat = None
+        self._lon = None
+
+        self._day_open = None
+        self._slots = None
+
+    @property
+    def lat(self):
+        if self._lat is None:
+            self._lat = np.array([p['lat'] for p in self._points], dtype=float)
+        return self._lat
+
+    @property
+    def lon(self):
+        if self._lon is None:
+            self._lon = np.array([p['lon'] for p in self._points], dtype=float)
+        return self._lon
+
+    @property
+    def day_open(self):
+        """(n, 7) 布林矩陣，星期 1~7 是否營業"""
+        if self._day_open is None:
+            day_open = np.zeros((self.size, 7), dtype=bool)
+            for i, p in enumerate(self._points):
+                hours = p.get("hours", {})
+                for day in range(1, 8):
+                    if day in hours and hours[day] != 'none':
+                        day_open[i, day - 1] = True
+            self._day_open = day_open
+        return self._day_open
+
+    @property
+    def slots(self):
+        """攤平所有營業時段: (所屬地點, 開始分鐘, 結束分鐘)"""
+        if self._slots is None:
+            owners, starts, ends = [], [], []
+            for i, p in enumerate(self._points):
+                for time_ranges in p.get("hours", {}).values():
+                    if time_ranges == 'none':
+                        continue
+                    for time_range in time_ranges:
+                        owners.append(i)
+                        starts.append(time_to_minutes(time_range['start']))
+                        ends.append(time_to_minutes(time_range['end']))
+            self._slots = (
+                np.array(owners, dtype=np.int64),
+                np.array(starts, dtype=np.int64),
+                np.array(ends, dtype=np.int64),
+            )
+        return self._slots
+
+    def label_mask(self, desired_label):
+        """類別篩選，對應 filter_by_label_type"""
+        label_required = LABEL_MAPPING[desired_label]
+        allowed = [code for label, code in self.label_codes.items() if label in label_required]
+        return np.isin(self.labels, allowed)
+
+    def budget_mask(self, user_budget, tolerance=150):
+        """預算篩選，對應 filter_by_budget(沒有價格的地點為 NaN,比較結果為 False)"""
+        with np.errstate(invalid="ignore"):
+            return (self.cost >= user_budget - tolerance) & (self.cost <= user_budget + tolerance)
+
+    def distances_km(self, start_location, method="geodesic", max_distance_km=None):
+        """
+        計算與出發地的距離。
+
+        :param method: "haversine" 只用向量化 haversine；
+                       "geodesic" 與 filter_by_distance 結果完全一致，
+                       只有落在門檻附近的點才以 geopy geodesic 重算。
+        :param max_distance_km: 篩選門檻，給定時 geodesic 只重算門檻附近的點。
+        :return: np.ndarray，距離（公里）。
+        """
+        distances = haversine_km(self.lat, self.lon, start_location)
+        if method == "haversine":
+            return distances
+        if method != "geodesic":
+            raise ValueError(f"未知的距離計算方式: {method}")
+
+        if max_distance_km is None:
+            refine = np.ones(self.size, dtype=bool)
+        else:
+            margin = max_distance_km * GEODESIC_REFINE_RATIO + 1e-6
+            refine = np.abs(distances - max_distance_km) <= margin
+
+        for i in np.flatnonzero(refine):
+            distances[i] = geodesic(start_location, (self.lat[i], self.lon[i])).kilometers
+        return distances
+
+    def distance_mask(self, start_location, max_distance_km, method="geodesic"):
+        """距離篩選，對應 filter_by_distance"""
+        distances = self.distances_km(start_location, method, max_distance_km)
+        return distances <= max_distance_km
+
+    def maybe_within(self, start_location, max_distance_km):
+        """
+        以 haversine 排除一定超出門檻的點(誤差緩衝 GEODESIC_REFINE_RATIO)。
+        回傳 True 的點仍需以 geodesic 確認。
+        """
+        distances = haversine_km(self.lat, self.lon, start_location)
+        margin = max_distance_km * GEODESIC_REFINE_RATIO + 1e-6
+        return distances <= max_distance_km + margin
+
+    def geodesic_km(self, rows, start_location):
+        """
+        以 geopy geodesic 計算指定列的距離,與 filter_by_distance 的結果相同。
+
+        :param rows: 要計算的列號。
+        :return: List[float]，距離（公里）。
+        """
+        return [
+            geodesic(start_location, (self._points[i]['lat'], self._points[i]['lon'])).kilometers
+            for i in rows
+        ]
+
+    def weekday_mask(self, weekday):
+        """星期篩選，對應 filter_by_weekday"""
+        if isinstance(weekday, (int, np.integer)) and 1 <= weekday <= 7:
+            return self.day_open[:, weekday - 1].copy()
+        # 非 1~7 的值照原本的方式逐筆判斷
+        return np.array(
+            [weekday in p.get("hours", {}) and p["hours"][weekday] != 'none' for p in self._points],
+            dtype=bool,
+        )
+
+    def time_mask(self, arrival_time):
+        """到達時間篩選(忽略星期)，對應 filter_by_time_without_weekday"""
+        arrival = time_to_minutes(arrival_time)
+        owner, start, end = self.slots
+        hit = (start <= arrival) & (arrival <= end)
+        return np.bincount(owner[hit], minlength=self.size) > 0
+
+
+def filter_mask(columns, user_filters, distance_method="geodesic"):
+    """
+    依使用者需求計算所有條件的布林遮罩。
+
+    :param columns: PointColumns。
+    :param user_filters: user_requirements[0]。
+    :param distance_method: "geodesic"(預設，與原本結果一致) | "haversine"。
+    :return: np.ndarray[bool]，每個地點是否符合所有條件。
+    """
+    mask = attribute_mask(columns, user_filters)
+
+    # max_distance_km, start_location 檢查在 llm 端已確認
+    mask &= columns.distance_mask(
+        user_filters["出發地點"],
+        user_filters["可接受距離門檻(KM)"],
+        distance_method,
+    )
+    return mask
+
+
+def attribute_mask(columns, user_filters):
+    """
+    距離以外的條件(類別、預算、星期、時間)的布林遮罩。
+
+    :param columns: PointColumns。
+    :param user_filters: user_requirements[0]。
+    :return: np.ndarray[bool]。
+    """
+    mask = np.ones(columns.size, dtype=bool)
+
+    desired_label = user_filters["類別"]
+    if desired_label != "none":
+        mask &= columns.label_mask(desired_label)
+
+    user_budget = user_filters["預算"]
+    if user_budget != "none":
+        mask &= columns.budget_mask(user_budget)
+
+    user_weekday = user_filters["星期別"]
+    if user_weekday != "none":
+        mask &= columns.weekday_mask(user_weekday)
+
+    user_arrival_time = user_filters["時間"]
+    if user_arrival_time != "none":
+        mask &= columns.time_mask(user_arrival_time)
+
+    return mask
+
+
+def filter_place_ids(points, user_filters, distance_method="geodesic"):
+    """
+    篩選符合所有條件的 placeID。
+
+    :param points: 資料列表。
+    :param user_filters: user_requirements[0]。
+    :param distance_method: "geodesic" | "haversine"。
+    :return: 符合條件的 placeID 列表（依輸入順序、不重複）。
+    """
+    if not points:
+        return []
+    columns = PointColumns(points)
+    mask = filter_mask(columns, user_filters, distance_method)
+    return list(dict.fromkeys(columns.place_ids[mask].tolist()))
@@ -1,52 +1,60 @@
+import numpy as np
 import pandas as pd
 
+from feature.sql_csv.emotion_table import EmotionTable, get_emotion_table
+
 def load_extracted_data(emotion_analysis_path):
     """
     從 CSV 文件中提取 placeID 和 總體評價。
     
-    :param file_path: CSV 文件的路徑。
-    :return: 提取的數據列表 (List[Dict])。
+    與 trip 端共用同一份 process 內快取,只有第一次呼叫會讀檔。
+    
+    :param emotion_analysis_path: CSV 文件的路徑。
+    :return: 提取的數據列表 (List[Dict]),為共用資料請勿修改。
     """
-    # 加載 CSV 文件
-    data = pd.read_csv(emotion_analysis_path)
-
-    # 提取 placeID 和 總體評價
-    extracted_data = data[["placeID", "總體評價"]].to_dict(orient="records")
-    return extracted_data
+    return get_emotion_table(emotion_analysis_path).records()
 
 
 def normalize_and_match(points, extracted_data):
     """
     僅將 points 中的 placeID 參與標準化，並匹配結果。
     
+    以 placeID → 列號 索引直接取出 k 個候選的 總體評價,
+    只對這 k 筆做 min-max,不必把整份資料轉成 DataFrame 再 merge。
+    
     :param points: List[Dict]，包含 placeID 的資料列表。
-    :param extracted_data: List[Dict]，包含 placeID 和 總體評價 的數據。
+    :param extracted_data: EmotionTable 或 List[Dict](包含 placeID 和 總體評價)。
     :return: DataFrame，包含匹配結果和標準化評價。
     """
-    # 將 extracted_data 轉為 DataFrame
-    extracted_df = pd.DataFrame(extracted_data)
+    if not isinstance(extracted_data, EmotionTable):
+        extracted_data = EmotionTable.from_records(extracted_data)
 
     # 將 points 轉為 DataFrame
     points_df = pd.DataFrame(points)
 
-    # 只保留 points 中有的 placeID
-    placeID_in_points = points_df["placeID"].unique()
-    filtered_extracted_df = extracted_df[extracted_df["placeID"].isin(placeID_in_points)].copy()
+    # 取出每個 point 對應的 總體評價,找不到的為 NaN
+    ratings = extracted_data.gather_rating(points_df["placeID"])
 
-    # 對 "總體評價" 欄位進行標準化
-    if "總體評價" in filtered_extracted_df.columns:
-        filtered_extracted_df["comment_score_normalized"] = (
-            (filtered_extracted_df["總體評價"] - filtered_extracted_df["總體評價"].min()) /
-            (filtered_extracted_df["總體評價"].max() - filtered_extracted_df["總體評價"].min())
-        ) * 100
+    points_df["總體評價"] = ratings
+    points_df["comment_score_normalized"] = normalize_comment_scores(ratings)
 
-        # 四捨五入到小數點後兩位
-        filtered_extracted_df["comment_score_normalized"] = filtered_extracted_df["comment_score_normalized"].round(2)
+    return points_df
 
-    # 合併兩個 DataFrame，根據 placeID 匹配
-    merged_df = pd.merge(points_df, filtered_extracted_df, on="placeID", how="left")
 
-    return merged_df
+def normalize_comment_scores(ratings):
+    """
+    對 總體評價 做 min-max 標準化(×100,四捨五入到小數點後兩位)。
+    
+    :param ratings: np.ndarray，找不到的 placeID 為 NaN，不參與 min / max。
+    :return: np.ndarray，標準化後的分數，找不到或最大最小值相同時為 NaN。
+    """
+    if np.isnan(ratings).all():
+        return np.full(len(ratings), np.nan)
+
+    low, high = np.nanmin(ratings), np.nanmax(ratings)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = (ratings - low) / (high - low) * 100
+    return np.round(normalized, 2)
 
 
 if __name__ == "__main__":
@@ -54,7 +62,7 @@ if __name__ == "__main__":
     emotion_analysis_path = r"./data/emotion_analysis.csv"
 
     # 從文件中提取數據
-    extracted_data = load_extracted_data(emotion_analysis_path)
+    extracted_data = get_emotion_table(emotion_analysis_path)
 
     # 測試數據
     points = [
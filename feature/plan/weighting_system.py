@@ -1,5 +1,6 @@
 from feature.plan.utils.Norma_lization.similarity_score_normalized import normalize_similarity
-from feature.plan.utils.Norma_lization.comment_score_normalized import normalize_and_match, load_extracted_data
+from feature.plan.utils.Norma_lization.comment_score_normalized import normalize_and_match
+from feature.sql_csv.emotion_table import get_emotion_table
 from feature.plan.utils.Norma_lization.distances_score_normalized import calculate_reverse_normalized_distances_no_threshold
 
 def calculate_weighted_scores(points, user_location, weights):
@@ -16,8 +17,8 @@ def calculate_weighted_scores(points, user_location, weights):
 
     # 步驟 2: 加載評論數據並標準化評論總分
     emotion_analysis_path =r"./data/emotion_analysis.csv"
-    extracted_data = load_extracted_data(emotion_analysis_path)
-    points = normalize_and_match(points, extracted_data).to_dict(orient="records")
+    emotion_table = get_emotion_table(emotion_analysis_path)
+    points = normalize_and_match(points, emotion_table).to_dict(orient="records")
 
     # 步驟 3: 計算距離的反向標準化分數
     distance_scores = calculate_reverse_normalized_distances_no_threshold(points, user_location)
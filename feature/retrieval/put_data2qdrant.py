@@ -22,7 +22,7 @@ def file_2_Qdrant_point(placeID: str,
 
         ```
         return models.PointStruct(
-                id = str(uuid.uuid4()),  # 隨機生成
+                id = point_id(placeID),  # placeID 的 UUIDv5
                 vector= vector,     # 嵌入向量
                 payload= {
                     'placeID' : placeID,
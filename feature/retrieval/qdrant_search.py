@@ -34,7 +34,8 @@ class qdrant_search:
     - method :
 
         ```
-        .cloud_search( input_query: list[str] = ["形容客戶行程的一句話"] )
+        .embed( input_query: list[str] = ["形容客戶行程的一句話"] )
+        .cloud_search( input_query: list[str] = ["形容客戶行程的一句話"], vector=None )
         .trip_search( input_query: dict[list] = { "上午" : "形容客戶行程的一句話"})
         ```
     '''
@@ -60,7 +61,17 @@ class qdrant_search:
         
 
 
-    def __search_query(self, input_query):
+    def embed(self, input_query) -> list[float]:
+        '''
+        - 將 ["形容客戶行程的一句話"] 向量化 (dim = 1024)
+        - 可以先取得向量做其他用途(例如情境搜索的語意快取),再傳給 cloud_search(vector=...) 避免重複向量化
+        '''
+        config = self.config
+        embedding_data = jina_embedding(input_query, '', config['jina_url'], config['jina_headers_Authorization'])
+        return embedding_data['embedding']
+
+
+    def __search_query(self, input_query, vector=None):
         '''
         - 主函數，負責搜尋
         - output :  
@@ -76,9 +87,9 @@ class qdrant_search:
         '''
         config = self.config
 
-         # 1. 將 ["形容客戶行程的一句話"] 直接向量化
-        embedding_data = jina_embedding(input_query, '', config['jina_url'], config['jina_headers_Authorization'])
-        vector = embedding_data['embedding']   # dim = 1024
+         # 1. 將 ["形容客戶行程的一句話"] 直接向量化(已經有向量時略過)
+        if vector is None:
+            vector = self.embed(input_query)   # dim = 1024
 
         # 2. 使用 vector 搜尋 qdrant 回傳 '相似度 > 某個分數' 的資料
         qdrant_obj = qdrant_manager(collection_name=self.colleciton_name, 
@@ -88,13 +99,14 @@ class qdrant_search:
         return result
 
 
-    def cloud_search(self, input_query: list[str])-> list[dict]:
+    def cloud_search(self, input_query: list[str], vector: list[float] = None)-> list[dict]:
         '''
         - 對情境搜尋
         - input :
 
             ```
             input_query: list[str] = ["形容客戶行程的一句話"]
+            vector: input_query 已經算好的向量(.embed 的結果),None 時重新向量化
             ```
         - output :
 
@@ -107,7 +119,7 @@ class qdrant_search:
             }]
             ```
         '''
-        result = self.__search_query(input_query)
+        result = self.__search_query(input_query, vector)
         return result
     
     def trip_search(self, input_query: dict)-> dict[list]: 
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient, models
+
+from feature.retrieval.utils.qdrant_control import benchmark_black_list, qdrant_manager
+
+DIM = 64
+N_POINTS = 2000
+
+# 本機模式會對 create_payload_index 發出警告(索引沒有作用,過濾結果相同)
+pytestmark = pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).tolist()
+
+
+@pytest.fixture
+def manager():
+    """本機 in-memory Qdrant,建立桶子並放入 N_POINTS 個點"""
+    manager = qdrant_manager('blacklist_test', qdrant_client=QdrantClient(":memory:"))
+    manager.create_collection(size=DIM)
+    manager.qdrant_client.upsert(
+        collection_name='blacklist_test',
+        points=[manager.make_point(f'place-{i}', vector, {'model': '測試資料'})
+                for i, vector in enumerate(vectors(N_POINTS))],
+        wait=True,
+    )
+    return manager
+
+
+def test_point_id_is_deterministic(manager):
+    """同一個 placeID 的 point id 固定,重複 upsert 不會新增點"""
+    assert qdrant_manager.point_id('place-1') == qdrant_manager.point_id('place-1')
+    assert qdrant_manager.point_id('place-1') != qdrant_manager.point_id('place-2')
+
+    point = manager.make_point('place-1', vectors(1, seed=1)[0], {'model': '測試資料'})
+    manager.qdrant_client.upsert(collection_name='blacklist_test', points=[point], wait=True)
+    assert manager.qdrant_client.count(collection_name='blacklist_test').count == N_POINTS
+
+
+def test_payload_index():
+    """缺少的索引才建立(本機模式不保存 payload index,以 mock 的 client 檢查呼叫)"""
+    client = MagicMock()
+    client.get_collection.return_value.payload_schema = {}
+    manager = qdrant_manager('view_restaurant', qdrant_client=client)
+
+    assert manager.create_payload_indexes() == ['placeID']
+    client.create_payload_index.assert_called_once_with(
+        collection_name='view_restaurant', field_name='placeID',
+        field_schema=models.PayloadSchemaType.KEYWORD, wait=True)
+
+    client.reset_mock()
+    client.get_collection.return_value.payload_schema = {'placeID': MagicMock()}
+    assert manager.create_payload_indexes() == []
+    client.create_payload_index.assert_not_called()
+
+
+def test_is_same_placeID(manager):
+    assert manager.is_same_placeID('place-10')
+    assert not manager.is_same_placeID('place-not-exist')
+
+
+def test_search_excludes_black_list(manager):
+    query = vectors(1, seed=2)[0]
+    top = list(manager.search_vector(query, score_threshold=-1, limit=20)[0])
+    black_list = top[:5]
+
+    result = manager.search_vector(query, score_threshold=-1, limit=20, black_list=black_list)[0]
+    assert not set(black_list) & set(result)
+    assert list(result)[:15] == top[5:]
+
+
+def test_black_list_benchmark(manager):
+    """黑名單 0 / 100 / 1000 筆時的搜尋耗時(本機 in-memory 模式,正式環境用 qdrant_control.py 的 __main__)"""
+    result = benchmark_black_list(manager, vectors(1, seed=3)[0], sizes=(0, 100, 1000), repeat=3)
+
+    print("\n" + ", ".join(f"黑名單 {size} 筆: {seconds * 1000:.1f} ms" for size, seconds in result.items()))
+    assert list(result) == [0, 100, 1000]
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
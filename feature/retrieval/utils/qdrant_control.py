@@ -1,7 +1,13 @@
+import time
+import uuid
+
 from dotenv import dotenv_values
 from qdrant_client import QdrantClient
 from qdrant_client import models
 
+# point id 由 placeID 決定(UUIDv5),同一個地點重複 upsert 只會覆蓋
+PLACE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'travel-router/placeID')
+
 class qdrant_manager:
     '''
     - #### 查詢
@@ -10,6 +16,7 @@ class qdrant_manager:
         get_collections()
         get_points(limit=10)
         is_same_placeID(placeID: str) -> bool
+        search_vector(vector, score_threshold, limit, black_list=[])
         ```
     ---
     - #### 刪除
@@ -23,6 +30,7 @@ class qdrant_manager:
     
         ```
         create_collection(size=1024, distance=models.Distance.COSINE)
+        create_payload_indexes()      # 建立 PAYLOAD_INDEXES 的 payload index(已存在的略過)
         ```
     ---
     - #### 增加
@@ -35,12 +43,19 @@ class qdrant_manager:
         qdrant_upsert_data( points: list[dict])
         ```
     '''
+    # 需要 payload index 的欄位(黑名單 must_not、存在檢查都以 placeID 過濾)
+    # 目前 payload 只有 placeID 與 model_set,之後加入類別等欄位時在這裡加上
+    PAYLOAD_INDEXES = {
+        'placeID': models.PayloadSchemaType.KEYWORD,
+    }
+
     def __init__(   self,
                     collection_name: str|None = 'collection_name', 
                     qdrant_url: str = 'your_qdrant_url', 
-                    qdrant_api_key: str = 'your_qdrant_api_key')-> any:
-        # 加載環境變量
-        self.qdrant_client = QdrantClient(
+                    qdrant_api_key: str = 'your_qdrant_api_key',
+                    qdrant_client: QdrantClient|None = None)-> any:
+        # 加載環境變量(可直接傳入已建立的 client,例如 QdrantClient(":memory:"))
+        self.qdrant_client = qdrant_client or QdrantClient(
                 url=qdrant_url, 
                 api_key=qdrant_api_key,
                 timeout=20,
@@ -65,13 +80,20 @@ class qdrant_manager:
             print(index, collection.name)
         print("="*50)   
 
+    @staticmethod
+    def point_id(placeID: str|int) -> str:
+        '''
+        placeID 對應的 point id (UUIDv5),同一個 placeID 永遠相同
+        '''
+        return str(uuid.uuid5(PLACE_ID_NAMESPACE, str(placeID)))
+
     def is_same_placeID(self, placeID: str) -> bool:
         '''
-        尋找桶內有沒有相同的點
+        尋找桶內有沒有相同的點(以 placeID 過濾 scroll 一筆,不做向量搜尋)
         '''
-        result = self.qdrant_client.search(
+        points, _ = self.qdrant_client.scroll(
                         collection_name=self.collection_name,
-                        query_filter=models.Filter(
+                        scroll_filter=models.Filter(
                             must=[
                                 models.FieldCondition(
                                     key="placeID",
@@ -81,18 +103,19 @@ class qdrant_manager:
                                 )
                             ]
                         ),
-                        query_vector=[0.]*1024,
-                        # limit=10,
+                        limit=1,
+                        with_payload=False,
+                        with_vectors=False,
                     )
         
-        return len(result) > 0   # 若有 result 時返回 true
+        return len(points) > 0   # 若有 point 時返回 true
 
     def search_vector(self, vector: list ,score_threshold: float, limit: int, black_list: list=[]):
         '''
         - 使用 vector 搜尋向量相似點
         - limit 設定回傳上限
         - score 設置回傳score threshhold
-        - black_list 設定要過濾的 placeID 清單
+        - black_list 設定要過濾的 placeID 清單(在 Qdrant 端以 placeID 的 payload index 過濾)
         - 回傳 : 
         
             ```
@@ -104,25 +127,24 @@ class qdrant_manager:
                 }]
             ```
         '''
-        # 建立過濾條件：placeID 不在 black_list 中
-        filter_condition = {
-            "must_not": [
-                {
-                    "key": "placeID",
-                    "match": {
-                        "any": black_list
-                    }
-                }
+        # 建立過濾條件：placeID 不在 black_list 中(沒有黑名單時不帶過濾條件)
+        filter_condition = models.Filter(
+            must_not=[
+                models.FieldCondition(
+                    key="placeID",
+                    match=models.MatchAny(any=list(black_list)),
+                )
             ]
-        } # if len(black_list)>0 else None
+        ) if len(black_list) > 0 else None
 
-        result = self.qdrant_client.search(
+        result = self.qdrant_client.query_points(
                 collection_name = self.collection_name,
-                query_vector = vector,
+                query = vector,
                 score_threshold = score_threshold,
                 limit=limit,
                 query_filter = filter_condition,
-            )
+                with_payload = ['placeID'],
+            ).points
         match_data = {}
         for point in result:
             placeID = point.payload['placeID']
@@ -218,9 +240,32 @@ class qdrant_manager:
                             vectors_config=models.VectorParams(size=size, distance=distance),
                             )
         print(f"創建 {self.collection_name} 成功")
+        self.create_payload_indexes()
         self.get_collections()
         return 
 
+    def create_payload_indexes(self) -> list[str]:
+        '''
+        - 建立 PAYLOAD_INDEXES 內的 payload index,已經存在的略過
+        - 只新增索引不改動資料,正式桶子也可以執行(舊的桶子補上索引)
+        - 回傳這次新建立索引的欄位
+        '''
+        existing = self.qdrant_client.get_collection(self.collection_name).payload_schema or {}
+        created = []
+        for field_name, field_schema in self.PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            self.qdrant_client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True,
+            )
+            created.append(field_name)
+        if created:
+            print(f"{self.collection_name} 建立 payload index: {created}")
+        return created
+
     def make_point( self,
                     placeID: str|int,
                     vector: list, 
@@ -246,7 +291,7 @@ class qdrant_manager:
         ---
         ```
         return models.PointStruct(
-                    id = str(uuid.uuid4()),  # 隨機生成
+                    id = point_id(placeID),  # placeID 的 UUIDv5
                     vector= vector,     # 嵌入向量
                     payload= {  
                         'placeID' : placeID,
@@ -255,10 +300,10 @@ class qdrant_manager:
                 )
         ```
         * upsert need batch of points : list type
+        * 同一個 placeID 的 id 固定,重複 upsert 會覆蓋原本的點而不是新增
         '''
-        import uuid
         point = models.PointStruct(
-                    id = str(uuid.uuid4()),  # 隨機生成
+                    id = self.point_id(placeID),  # placeID 的 UUIDv5
                     vector= vector,     # 嵌入向量
                     payload= { 
                         'placeID' : placeID,
@@ -322,6 +367,35 @@ class qdrant_manager:
 
 
 
+def benchmark_black_list(manager: qdrant_manager,
+                         vector: list,
+                         sizes: tuple = (0, 100, 1000),
+                         limit: int = 1000,
+                         score_threshold: float = -1,
+                         repeat: int = 5) -> dict[int, float]:
+    '''
+    - 比較不同黑名單數量下 search_vector 的平均耗時(秒)
+    - 黑名單取自桶內的 placeID,不足時補上不存在的 placeID
+    - 回傳 : { 黑名單數量 : 平均秒數 }
+    '''
+    points, _ = manager.qdrant_client.scroll(collection_name=manager.collection_name,
+                                             limit=max(max(sizes), 1),
+                                             with_payload=['placeID'],
+                                             with_vectors=False)
+    place_ids = [point.payload['placeID'] for point in points]
+    place_ids += [f'missing-{i}' for i in range(max(sizes) - len(place_ids))]
+
+    result = {}
+    for size in sizes:
+        black_list = place_ids[:size]
+        manager.search_vector(vector, score_threshold, limit, black_list)    # 預熱
+        start = time.perf_counter()
+        for _ in range(repeat):
+            manager.search_vector(vector, score_threshold, limit, black_list)
+        result[size] = (time.perf_counter() - start) / repeat
+    return result
+
+
 if __name__ == "__main__":
     config = dotenv_values("./.env")
     qdrant_obj = qdrant_manager(None, config.get("qdrant_url"), config.get("qdrant_api_key"))
@@ -342,4 +416,11 @@ if __name__ == "__main__":
                      # 'ChIJ-_1rl4WpQjQRFIxRQ1xCpw0'
                      ]
     )
-    print(result)
\ No newline at end of file
+    print(result)
+
+    # ---------------------------------------------------------------------------------------
+    # 黑名單過濾的耗時(正式桶子不改動資料,只補上缺少的 payload index)
+    qdrant_obj = qdrant_manager('view_restaurant', config.get("qdrant_url"), config.get("qdrant_api_key"))
+    qdrant_obj.create_payload_indexes()
+    for size, seconds in benchmark_black_list(qdrant_obj, vector=[0.1] * 1024).items():
+        print(f"黑名單 {size:>4} 筆: {seconds * 1000:.1f} ms")
@@ -1,3 +1,4 @@
 from .sql_csv import pandas_search
+from .emotion_table import get_emotion_table, get_duration_lookup
 
-__all__ = ['pandas_search']
+__all__ = ['pandas_search', 'get_emotion_table', 'get_duration_lookup']
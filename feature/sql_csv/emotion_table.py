@@ -0,0 +1,227 @@
+"""emotion_analysis.csv 的共用查詢表
+
+trip 端(停留時間)與 plan 端(總體評價)都需要這份資料,
+原本兩邊每次請求都 pd.read_csv 整份 3MB 的 CSV(包含很長的 解釋 欄位)。
+
+這裡改成:
+1. 只讀需要的三個欄位(usecols)
+2. 每個 process 只載入一次,之後直接回傳記憶體中的表
+3. 第一次讀 CSV 後寫一份 .npz 快取,下次啟動(例如 gunicorn 其他 worker)直接載入,
+   CSV 比快取新時會自動重建
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+EMOTION_ANALYSIS_PATH = 'data/emotion_analysis.csv'
+
+# 只讀取需要的欄位,跳過 環境/食物/服務/解釋 等長文字
+USECOLS = ['placeID', '停留時間', '總體評價']
+
+# 設成 0 可停用 .npz 快取(例如唯讀的檔案系統)
+BINARY_CACHE_ENABLED = os.getenv('EMOTION_TABLE_BINARY_CACHE', '1') == '1'
+
+
+class EmotionTable:
+    """以 NumPy 欄位儲存的 emotion_analysis 資料
+
+    Attributes:
+        place_ids: np.ndarray[str] - placeID
+        duration: np.ndarray[int] - 停留時間(分鐘)
+        rating: np.ndarray[float] - 總體評價
+    """
+
+    def __init__(self, place_ids: np.ndarray, duration: np.ndarray, rating: np.ndarray):
+        self.place_ids = place_ids
+        self.duration = duration
+        self.rating = rating
+        self._row_index: Optional[Dict[str, int]] = None
+        self._duration_lookup: Optional[Dict[str, int]] = None
+        self._records: Optional[List[Dict]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.place_ids)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'EmotionTable':
+        """由 [{'placeID': ..., '總體評價': ...}, ...] 建立(缺少 停留時間 時補 0)"""
+        return cls(
+            place_ids=np.array([r['placeID'] for r in records], dtype=str),
+            duration=np.array([r.get('停留時間', 0) for r in records], dtype='int32'),
+            rating=np.array([r['總體評價'] for r in records], dtype='float64'),
+        )
+
+    def row_index(self) -> Dict[str, int]:
+        """取得 placeID → 列號 的索引(第一次呼叫時建立)
+
+        Returns:
+            Dict[str, int]: 共用的字典,請勿修改
+        """
+        if self._row_index is None:
+            with self._lock:
+                if self._row_index is None:
+                    self._row_index = {
+                        place_id: row
+                        for row, place_id in enumerate(self.place_ids.tolist())
+                    }
+        return self._row_index
+
+    def gather_rating(self, place_ids: Iterable[str]) -> np.ndarray:
+        """取出指定 placeID 的 總體評價,找不到的為 NaN
+
+        Args:
+            place_ids: Iterable[str] - 要查詢的 placeID(可重複)
+
+        Returns:
+            np.ndarray: 與輸入等長的 float 陣列
+        """
+        index = self.row_index()
+        rows = np.fromiter(
+            (index.get(place_id, -1) for place_id in place_ids), dtype=np.int64
+        )
+        ratings = np.full(len(rows), np.nan)
+        found = rows >= 0
+        ratings[found] = self.rating[rows[found]]
+        return ratings
+
+    def duration_lookup(self) -> Dict[str, int]:
+        """取得 placeID → 停留時間 的查找字典(第一次呼叫時建立)
+
+        Returns:
+            Dict[str, int]: 共用的字典,請勿修改
+        """
+        if self._duration_lookup is None:
+            with self._lock:
+                if self._duration_lookup is None:
+                    self._duration_lookup = dict(
+                        zip(self.place_ids.tolist(), self.duration.tolist())
+                    )
+        return self._duration_lookup
+
+    def records(self) -> List[Dict]:
+        """取得 [{'placeID': ..., '總體評價': ...}, ...](第一次呼叫時建立)
+
+        Returns:
+            List[Dict]: 共用的列表,請勿修改
+        """
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    self._records = [
+                        {'placeID': place_id, '總體評價': rating}
+                        for place_id, rating in zip(
+                            self.place_ids.tolist(), self.rating.tolist()
+                        )
+                    ]
+        return self._records
+
+
+def _cache_path(csv_path: str) -> str:
+    """CSV 對應的 .npz 快取路徑"""
+    return os.path.splitext(csv_path)[0] + '.npz'
+
+
+def _read_csv(csv_path: str) -> EmotionTable:
+    """只讀取需要的欄位建立 EmotionTable"""
+    df = pd.read_csv(
+        csv_path,
+        usecols=USECOLS,
+        dtype={'placeID': str, '停留時間': 'int32', '總體評價': 'float64'},
+    )
+    return EmotionTable(
+        place_ids=df['placeID'].to_numpy(dtype=str),
+        duration=df['停留時間'].to_numpy(),
+        rating=df['總體評價'].to_numpy(),
+    )
+
+
+def _load_binary(cache_path: str) -> EmotionTable:
+    """從 .npz 快取載入(不允許 pickle)"""
+    with np.load(cache_path, allow_pickle=False) as data:
+        return EmotionTable(
+            place_ids=data['place_ids'],
+            duration=data['duration'],
+            rating=data['rating'],
+        )
+
+
+def _save_binary(cache_path: str, table: EmotionTable) -> None:
+    """寫入 .npz 快取,失敗時略過(快取只是加速用)"""
+    tmp_path = cache_path + '.tmp.npz'
+    try:
+        np.savez(
+            tmp_path,
+            place_ids=table.place_ids,
+            duration=table.duration,
+            rating=table.rating,
+        )
+        # 先寫暫存檔再改名,避免其他 worker 讀到寫一半的檔案
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"寫入 emotion_analysis 快取失敗,略過: {str(e)}")
+
+
+def load_emotion_table(csv_path: str, use_binary_cache: bool = BINARY_CACHE_ENABLED) -> EmotionTable:
+    """讀取 emotion_analysis 資料(不經過 process 內的快取)
+
+    Args:
+        csv_path: str - CSV 路徑
+        use_binary_cache: bool - 是否使用 .npz 快取
+
+    Returns:
+        EmotionTable: 載入完成的資料表
+    """
+    if not use_binary_cache:
+        return _read_csv(csv_path)
+
+    cache_path = _cache_path(csv_path)
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+            return _load_binary(cache_path)
+    except (OSError, ValueError, KeyError):
+        # 沒有快取、快取過期或損毀時重新讀 CSV
+        pass
+
+    table = _read_csv(csv_path)
+    _save_binary(cache_path, table)
+    return table
+
+
+_tables: Dict[str, EmotionTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_emotion_table(csv_path: str = EMOTION_ANALYSIS_PATH) -> EmotionTable:
+    """取得 process 內共用的 EmotionTable,第一次呼叫時才載入
+
+    Args:
+        csv_path: str - CSV 路徑,預設為 data/emotion_analysis.csv
+
+    Returns:
+        EmotionTable: 共用的資料表
+    """
+    key = os.path.abspath(csv_path)
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                table = load_emotion_table(csv_path)
+                _tables[key] = table
+    return table
+
+
+def get_duration_lookup(csv_path: str = EMOTION_ANALYSIS_PATH) -> Dict[str, int]:
+    """取得 placeID → 停留時間 的共用查找字典"""
+    return get_emotion_table(csv_path).duration_lookup()
+
+
+def clear_emotion_table_cache() -> None:
+    """清除 process 內的快取(測試或資料更新後使用)"""
+    with _tables_lock:
+        _tables.clear()
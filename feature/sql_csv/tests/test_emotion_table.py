@@ -0,0 +1,113 @@
+# feature/sql_csv/tests/test_emotion_table.py
+
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from feature.sql_csv.emotion_table import (
+    EMOTION_ANALYSIS_PATH,
+    clear_emotion_table_cache,
+    get_duration_lookup,
+    get_emotion_table,
+    load_emotion_table,
+)
+from feature.plan.utils.Norma_lization.comment_score_normalized import load_extracted_data
+
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(EMOTION_ANALYSIS_PATH),
+    reason="需要在專案根目錄執行(找不到 data/emotion_analysis.csv)"
+)
+
+
+@pytest.fixture
+def csv_copy(tmp_path):
+    """複製一份 CSV 到暫存目錄,避免在 data/ 底下產生快取檔"""
+    path = tmp_path / 'emotion_analysis.csv'
+    shutil.copy(EMOTION_ANALYSIS_PATH, path)
+    clear_emotion_table_cache()
+    yield str(path)
+    clear_emotion_table_cache()
+
+
+def test_duration_lookup_matches_full_read(csv_copy):
+    """測試查找字典與原本 read_csv + set_index 的結果一致"""
+    expected = pd.read_csv(csv_copy).set_index('placeID')['停留時間'].to_dict()
+    assert get_duration_lookup(csv_copy) == expected
+
+
+def test_extracted_data_matches_full_read(csv_copy):
+    """測試 plan 端 load_extracted_data 的輸出不變"""
+    expected = pd.read_csv(csv_copy)[["placeID", "總體評價"]].to_dict(orient="records")
+    assert load_extracted_data(csv_copy) == expected
+
+
+def test_loaded_once_per_process(csv_copy):
+    """測試同一路徑只載入一次,trip / plan 共用同一份表"""
+    table = get_emotion_table(csv_copy)
+    assert get_emotion_table(csv_copy) is table
+    assert get_duration_lookup(csv_copy) is table.duration_lookup()
+    assert load_extracted_data(csv_copy) is table.records()
+
+
+def test_binary_cache_roundtrip(csv_copy):
+    """測試 .npz 快取寫入後可直接載入,且內容一致"""
+    cache_path = os.path.splitext(csv_copy)[0] + '.npz'
+    from_csv = load_emotion_table(csv_copy)
+    assert os.path.exists(cache_path)
+
+    from_cache = load_emotion_table(csv_copy)
+    assert from_cache.place_ids.tolist() == from_csv.place_ids.tolist()
+    assert from_cache.duration.tolist() == from_csv.duration.tolist()
+    assert from_cache.rating.tolist() == from_csv.rating.tolist()
+
+
+def test_binary_cache_invalidated_when_csv_changes(csv_copy):
+    """測試 CSV 比快取新時會重新讀取"""
+    load_emotion_table(csv_copy)
+    cache_path = os.path.splitext(csv_copy)[0] + '.npz'
+
+    df = pd.read_csv(csv_copy)
+    df.loc[0, '停留時間'] = 999
+    df.to_csv(csv_copy, index=False)
+    later = os.path.getmtime(cache_path) + 10
+    os.utime(csv_copy, (later, later))
+
+    table = load_emotion_table(csv_copy)
+    assert table.duration[0] == 999
+
+
+def test_startup_and_request_benchmark(csv_copy):
+    """比較原本每次請求讀整份 CSV 與共用查找表的成本"""
+    def old_request():
+        df = pd.read_csv(csv_copy)
+        return df.set_index('placeID')['停留時間'].to_dict()
+
+    def timeit(func, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return (time.perf_counter() - start) / n
+
+    old = timeit(old_request, 3)
+    usecols = timeit(lambda: load_emotion_table(csv_copy, use_binary_cache=False), 3)
+    load_emotion_table(csv_copy)  # 建立 .npz
+    binary = timeit(lambda: load_emotion_table(csv_copy), 3)
+
+    get_duration_lookup(csv_copy)
+    warm = timeit(lambda: get_duration_lookup(csv_copy), 1000)
+
+    print(f"\n原本每次請求(read_csv 全欄位 + to_dict): {old * 1e3:.1f} ms")
+    print(f"啟動: usecols 讀 CSV: {usecols * 1e3:.1f} ms")
+    print(f"啟動: .npz 快取: {binary * 1e3:.1f} ms")
+    print(f"每次請求(已載入): {warm * 1e6:.2f} µs")
+
+    assert binary < old
+    assert warm < old / 100
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -10,6 +10,9 @@ from ..models.place import PlaceDetail
 from ..services.time_service import TimeService
 from ..services.geo_service import GeoService
 from ..evaluator.place_scoring import PlaceScoring
+from ..utils.logger import get_logger
+
+logger = get_logger('planner.strategy')
 
 
 class BasePlanningStrategy:
@@ -112,7 +115,7 @@ class BasePlanningStrategy:
             suitable_places.append(place)
 
         if not suitable_places:
-            print(f"沒有符合{current_period}時段的地點")
+            logger.debug("沒有符合%s時段的地點", current_period)
             return None
 
         # 3. 計算直線距離並評分
@@ -134,7 +137,7 @@ class BasePlanningStrategy:
                 scored_places.append((place, score))
 
         if not scored_places:
-            print("沒有在可接受距離內的地點")
+            logger.debug("沒有在可接受距離內的地點")
             return None
 
         # 4. 取評分最高的前3-5個地點
@@ -260,7 +263,10 @@ class BasePlanningStrategy:
             self.visited_places.add(current_location.name)
             self._itinerary.append(start_item)
 
-        print(f"\n=== 開始規劃行程 ===")
+        logger.info(
+            "開始規劃行程",
+            extra={'data': {'candidates': len(available_places)}}
+        )
 
         # 初始化規劃狀態
         remaining_places = available_places.copy()
@@ -279,7 +285,7 @@ class BasePlanningStrategy:
             )
 
             if not next_place:
-                print("找不到合適的下一個地點,結束規劃")
+                logger.debug("找不到合適的下一個地點,結束規劃")
                 break
 
             place, travel_info = next_place
@@ -304,8 +310,11 @@ class BasePlanningStrategy:
                 mode=self.travel_mode,
                 departure_time=departure_time
             )
-            print(self.end_location)
-            print(1)
+            logger.debug(
+                "第%d輪: 候選 %s, 返回終點 %s 需 %s 分鐘",
+                iteration, place.name, self.end_location.name,
+                to_home_info['duration_minutes']
+            )
 
             final_time = self._calculate_arrival_time(
                 departure_time,
@@ -314,7 +323,7 @@ class BasePlanningStrategy:
 
             # 檢查是否超過結束時間
             if final_time > self.end_time:
-                print("加入此地點後會超過結束時間,直接返回終點")
+                logger.debug("加入此地點後會超過結束時間,直接返回終點")
                 break
 
             # 建立行程項目
@@ -372,9 +381,14 @@ class BasePlanningStrategy:
             self._itinerary.append(end_item)
             self.total_distance += final_travel_info['distance_km']
 
-        print(f"\n=== 行程規劃完成 ===")
-        print(f"規劃地點數: {len(self._itinerary)}")
-        print(f"總行程距離: {self.total_distance:.0f} 公里")
+        logger.info(
+            "行程規劃完成",
+            extra={'data': {
+                'places': len(self._itinerary),
+                'total_distance_km': round(self.total_distance),
+                'iterations': iteration - 1,
+            }}
+        )
 
         return self._itinerary
 
@@ -2,13 +2,16 @@
 
 
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..evaluator.place_scoring import PlaceScoring
 from ..models.place import PlaceDetail
 from .strategy import BasePlanningStrategy
-from ..services.geo_service import GeoService
+from ..services.geo_service import GeoService, Timer
 from ..services.time_service import TimeService
 from ..utils.navigation_translator import NavigationTranslator
+from ..utils.logger import get_logger, trace_context
+
+logger = get_logger('planner.system')
 
 
 class TripPlanningSystem:
@@ -21,8 +24,12 @@ class TripPlanningSystem:
     4. 策略系統：執行實際的規劃邏輯
     """
 
-    def __init__(self):
-        """初始化規劃系統並連結所有需要的服務"""
+    def __init__(self, timer: Optional[Timer] = None):
+        """初始化規劃系統並連結所有需要的服務
+
+        Args:
+            timer: 傳給 GeoService 的計時器,用來量測 Google Maps 呼叫(選填)
+        """
         # 初始化時間服務，設定預設用餐時間
         self.time_service = TimeService(
             lunch_time="12:00",   # 預設中午12點用餐
@@ -30,7 +37,7 @@ class TripPlanningSystem:
         )
 
         # 初始化其他服務
-        self.geo_service = GeoService()
+        self.geo_service = GeoService(timer=timer)
         self.place_scoring = PlaceScoring(
             time_service=self.time_service,
             geo_service=self.geo_service
@@ -66,6 +73,20 @@ class TripPlanningSystem:
         """
         start_time = datetime.now()
 
+        with trace_context():
+            return self._plan_trip(
+                locations, requirement, previous_trip, restart_index, start_time
+            )
+
+    def _plan_trip(
+        self,
+        locations: List[Dict],
+        requirement: Dict,
+        previous_trip: List[Dict],
+        restart_index: int,
+        start_time: datetime
+    ) -> List[Dict]:
+        """plan_trip 的實作,在追蹤ID的範圍內執行"""
         try:
             # 把 requirement 的 key 中文改成英文
             requirement = self._convert_keys(requirement)
@@ -142,55 +163,72 @@ class TripPlanningSystem:
 
             # 記錄執行時間
             self.execution_time = (datetime.now() - start_time).total_seconds()
+            logger.info(
+                "行程規劃耗時 %.2f 秒", self.execution_time,
+                extra={'data': {'execution_time': self.execution_time}}
+            )
 
             return itinerary
 
-        except Exception as e:
-            print(f"行程規劃失敗: {str(e)}")
+        except Exception:
+            logger.exception("行程規劃失敗")
             raise
 
 
-    def print_itinerary(self, itinerary: List[Dict], show_navigation: bool = False) -> None:
-        """輸出行程規劃結果
+    def format_itinerary(self, itinerary: List[Dict], show_navigation: bool = False) -> str:
+        """將行程規劃結果整理成可閱讀的文字
 
         Args:
             itinerary: List[Dict] - 規劃好的行程列表
-            show_navigation: bool - 是否顯示詳細導航資訊
+            show_navigation: bool - 是否包含詳細導航資訊
+
+        Returns:
+            str - 行程與統計資訊
         """
-        print("\n=== 行程規劃結果 ===")
+        lines = ["\n=== 行程規劃結果 ==="]
 
         total_travel_time = 0
         total_duration = 0
 
         for plan in itinerary:
-            # 顯示地點資訊
-            print(f"\n[地點 {plan['step']}] "
-                  f"Period: {plan['period']}")
-            print(f"名稱: {plan['name']},"
-                  f" Label: {plan['label']},"
-                  f" 營業時間: {plan['hours']}")
-            print(f"時間: {plan['start_time']} - {plan['end_time']}")
-            print(f"停留: {plan['duration']}分鐘", end=' ')
-            print(f"交通: {plan['transport']['mode']}"
-                  f"({plan['transport']['time']}分鐘)")
-
-            # 如果需要，顯示詳細導航
+            # 地點資訊
+            lines.append(f"\n[地點 {plan['step']}] "
+                         f"Period: {plan['period']}")
+            lines.append(f"名稱: {plan['name']},"
+                         f" Label: {plan['label']},"
+                         f" 營業時間: {plan['hours']}")
+            lines.append(f"時間: {plan['start_time']} - {plan['end_time']}")
+            lines.append(f"停留: {plan['duration']}分鐘 "
+                         f"交通: {plan['transport']['mode']}"
+                         f"({plan['transport']['time']}分鐘)")
+
+            # 如果需要，加入詳細導航
             if show_navigation and 'route_info' in plan:
-                print("\n前往下一站的導航:")
-                print(NavigationTranslator.format_navigation(
+                lines.append("\n前往下一站的導航:")
+                lines.append(NavigationTranslator.format_navigation(
                     plan['route_info']))
 
             total_travel_time += plan['transport']['time']
             total_duration += plan['duration']
 
-        # 顯示統計資訊
-        print("\n=== 統計資訊 ===")
-        print(f"總景點數: {len(itinerary)}個")
-        print(f"總時間: {(total_duration + total_travel_time)/60:.1f}小時")
-        print(f"- 遊玩時間: {total_duration/60:.1f}小時")
-        print(f"- 交通時間: {total_travel_time/60:.1f}小時")
+        # 統計資訊
+        lines.append("\n=== 統計資訊 ===")
+        lines.append(f"總景點數: {len(itinerary)}個")
+        lines.append(f"總時間: {(total_duration + total_travel_time)/60:.1f}小時")
+        lines.append(f"- 遊玩時間: {total_duration/60:.1f}小時")
+        lines.append(f"- 交通時間: {total_travel_time/60:.1f}小時")
+
+        lines.append(f"規劃耗時: {self.execution_time:.2f}秒")
+        return "\n".join(lines)
 
-        print(f"規劃耗時: {self.execution_time:.2f}秒")
+    def print_itinerary(self, itinerary: List[Dict], show_navigation: bool = False) -> None:
+        """輸出行程規劃結果(命令列工具用,服務請求路徑請改用 logger 搭配 format_itinerary)
+
+        Args:
+            itinerary: List[Dict] - 規劃好的行程列表
+            show_navigation: bool - 是否顯示詳細導航資訊
+        """
+        print(self.format_itinerary(itinerary, show_navigation))
 
     def _get_start_location(self, start_point: str) -> PlaceDetail:
         """處理起點設定
@@ -228,7 +266,7 @@ class TripPlanningSystem:
                 self.start_time)
             return PlaceDetail(**location)
         except Exception as e:
-            print(f"無法取得起點資訊，使用預設起點: {str(e)}")
+            logger.warning("無法取得起點資訊，使用預設起點: %s", e)
             return PlaceDetail(**default_location)
 
     def _get_end_location(self, end_point: str) -> PlaceDetail:
@@ -263,7 +301,7 @@ class TripPlanningSystem:
                 self.end_time)
             return PlaceDetail(**location)
         except Exception as e:
-            print(f"無法取得終點資訊，使用起點作為終點: {str(e)}")
+            logger.warning("無法取得終點資訊，使用起點作為終點: %s", e)
             return self.start_location
 
     def _get_location_info(self, place_name: str) -> Dict:
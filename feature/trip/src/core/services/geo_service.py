@@ -1,13 +1,25 @@
 # src/core/services/geo_service.py
 
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Callable, ContextManager, Dict, List, Tuple, Optional, Union
 import math
 import googlemaps
 from ..models.place import PlaceDetail
 from ..utils.cache_decorator import geo_cache
+from ..utils.logger import get_logger
 from ...config import GOOGLE_MAPS_API_KEY
 
+logger = get_logger('services.geo')
+
+# 計時器: 傳入階段名稱,回傳包住 Google Maps 呼叫的 context manager
+Timer = Callable[[str], ContextManager]
+
+
+def _no_timer(stage: str) -> ContextManager:
+    """未注入計時器時不做任何事"""
+    return nullcontext()
+
 
 class GeoService:
     """地理服務類別
@@ -36,13 +48,19 @@ class GeoService:
         'bicycling': 15   # 騎車
     }
 
-    def __init__(self):
-        """初始化地理服務"""
+    def __init__(self, timer: Optional[Timer] = None):
+        """初始化地理服務
+
+        Args:
+            timer: 計時器(例如 feature.monitoring.span),
+                   會以 'google_maps_directions' / 'google_maps_geocode' 包住 API 呼叫,預設不計時
+        """
+        self.timer = timer or _no_timer
         try:
             self.maps_client = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
             self.has_google_maps = True
         except Exception as e:
-            print(f"警告：Google Maps 服務初始化失敗: {str(e)}")
+            logger.warning("Google Maps 服務初始化失敗: %s", e)
             self.has_google_maps = False
 
     def calculate_distance(self,
@@ -114,7 +132,7 @@ class GeoService:
             if self.has_google_maps:
                 return self._get_google_maps_route(origin, destination, mode, departure_time)
         except Exception as e:
-            print(f"警告：Google Maps 路線規劃失敗，切換到備用方案: {str(e)}")
+            logger.warning("Google Maps 路線規劃失敗，切換到備用方案: %s", e)
 
         # API 失敗時使用預估方式
         return self._calculate_estimated_travel_info(origin, destination, mode)
@@ -134,12 +152,13 @@ class GeoService:
         dest_str = f"{destination['lat']},{destination['lon']}"
 
         # 呼叫 Google Maps API
-        result = self.maps_client.directions(
-            origin=origin_str,
-            destination=dest_str,
-            mode=mode,
-            departure_time=departure_time
-        )
+        with self.timer('google_maps_directions'):
+            result = self.maps_client.directions(
+                origin=origin_str,
+                destination=dest_str,
+                mode=mode,
+                departure_time=departure_time
+            )
 
         if not result:
             raise RuntimeError("無法取得路線資訊")
@@ -415,7 +434,8 @@ class GeoService:
             if not self.has_google_maps:
                 raise RuntimeError("Google Maps API 未初始化")
 
-            result = self.maps_client.geocode(address)
+            with self.timer('google_maps_geocode'):
+                result = self.maps_client.geocode(address)
             if not result:
                 raise RuntimeError(f"找不到地點: {address}")
 
@@ -3,6 +3,10 @@
 from datetime import datetime, time, timedelta
 from typing import Any, Dict, List, Union, Tuple, Optional
 
+from ..utils.logger import get_logger
+
+logger = get_logger('services.time')
+
 
 class TimeService:
     """時間管理服務
@@ -64,22 +68,22 @@ class TimeService:
         if self.current_period == 'morning':
             if abs(current_minutes - lunch_minutes) <= self.MEAL_WINDOW:
                 self.current_period = 'lunch'
-                print("轉換時段: morning -> lunch")
+                logger.debug("轉換時段: morning -> lunch")
 
         elif self.current_period == 'lunch':
             if self.lunch_completed:
                 self.current_period = 'afternoon'
-                print("轉換時段: lunch -> afternoon")
+                logger.debug("轉換時段: lunch -> afternoon")
 
         elif self.current_period == 'afternoon':
             if abs(current_minutes - dinner_minutes) <= self.MEAL_WINDOW:
                 self.current_period = 'dinner'
-                print("轉換時段: afternoon -> dinner")
+                logger.debug("轉換時段: afternoon -> dinner")
 
         elif self.current_period == 'dinner':
             if self.dinner_completed:
                 self.current_period = 'night'
-                print("轉換時段: dinner -> night")
+                logger.debug("轉換時段: dinner -> night")
 
         return self.current_period
 
@@ -107,7 +111,7 @@ class TimeService:
         self.current_period = 'morning'
         self.lunch_completed = False
         self.dinner_completed = False
-        print("已重置所有時段狀態")
+        logger.debug("已重置所有時段狀態")
 
     def _parse_time(self, time_str: str) -> Optional[time]:
         """解析時間字串為 time 物件
@@ -3,10 +3,15 @@
 from .validator import TripValidator
 from .navigation_translator import NavigationTranslator
 from .cache_decorator import cached, geo_cache
+from .logger import get_logger, setup_logging, trace_context, lazy
 
 __all__ = [
     'TripValidator',
     'NavigationTranslator',
     'cached',
-    'geo_cache'
+    'geo_cache',
+    'get_logger',
+    'setup_logging',
+    'trace_context',
+    'lazy'
 ]
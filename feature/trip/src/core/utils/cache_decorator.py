@@ -5,6 +5,10 @@ from typing import Callable, TypeVar
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from .logger import get_logger
+
+logger = get_logger('utils.cache')
+
 T = TypeVar('T')  # 定義泛型型別，用於函數回傳值
 
 
@@ -92,7 +96,7 @@ def geo_cache(maxsize: int = 256):
             return key
 
         except Exception as e:
-            print(f"建立快取鍵值時發生錯誤: {str(e)}")
+            logger.warning("建立快取鍵值時發生錯誤: %s", e)
             return f"error_key_{datetime.now(ZoneInfo('Asia/Taipei')).timestamp()}"
 
     def decorator(func):
@@ -106,7 +110,7 @@ def geo_cache(maxsize: int = 256):
 
             # 檢查快取
             if cache_key in cache:
-                print(f"使用快取的路線資訊: {cache_key}")
+                logger.debug("使用快取的路線資訊: %s", cache_key)
                 return cache[cache_key]
 
             # 執行原始函數
@@ -114,7 +118,6 @@ def geo_cache(maxsize: int = 256):
 
             # 存入快取
             cache[cache_key] = result
-            # print(f"新增路線資訊到快取: {cache_key}")
 
             # 管理快取大小
             if len(cache) > maxsize:
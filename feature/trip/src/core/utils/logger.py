@@ -0,0 +1,187 @@
+# src/core/utils/logger.py
+
+import json
+import logging
+import os
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+# 所有行程模組的 logger 都掛在這個命名空間底下
+ROOT_LOGGER_NAME = 'trip'
+
+# 預設等級,可由環境變數 TRIP_LOG_LEVEL 覆寫
+DEFAULT_LEVEL = 'WARNING'
+
+# 每個請求的追蹤ID,ContextVar 在 thread / asyncio 間各自獨立
+_trace_id: ContextVar[Optional[str]] = ContextVar('trip_trace_id', default=None)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """取得 trip 命名空間下的 logger
+
+    Args:
+        name: str - 子模組名稱,例如 'planner.strategy'
+
+    Returns:
+        logging.Logger - 名稱為 'trip.<name>' 的 logger
+    """
+    if name.startswith(ROOT_LOGGER_NAME + '.') or name == ROOT_LOGGER_NAME:
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def new_trace_id() -> str:
+    """產生新的追蹤ID(12碼十六進位)"""
+    return uuid.uuid4().hex[:12]
+
+
+def get_trace_id() -> Optional[str]:
+    """取得目前請求的追蹤ID,沒有則回傳None"""
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str] = None) -> str:
+    """設定目前請求的追蹤ID
+
+    Args:
+        trace_id: Optional[str] - 指定的追蹤ID,未指定則自動產生
+
+    Returns:
+        str - 設定後的追蹤ID
+    """
+    trace_id = trace_id or new_trace_id()
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+@contextmanager
+def trace_context(trace_id: Optional[str] = None) -> Iterator[str]:
+    """在區塊內套用追蹤ID,離開時還原
+
+    若外層已經有追蹤ID且沒有指定新的,沿用外層的ID,
+    讓 controller 設定的ID能一路帶到 planner。
+
+    使用範例:
+        >>> with trace_context() as trace_id:
+        >>>     logger.info("開始規劃")
+    """
+    current = _trace_id.get()
+    token = _trace_id.set(trace_id or current or new_trace_id())
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+class lazy:
+    """延遲求值的 log 參數
+
+    只有在訊息真的被輸出時才會呼叫 func,
+    適合包裝成本較高的字串組合(例如整份行程的 repr)。
+
+    使用範例:
+        >>> logger.debug("行程內容: %s", lazy(format_itinerary, itinerary))
+    """
+
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func: Callable[..., Any], *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args, **self.kwargs))
+
+    __repr__ = __str__
+
+
+class TraceIdFilter(logging.Filter):
+    """把目前的追蹤ID寫入 LogRecord.trace_id"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = _trace_id.get() or '-'
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """輸出單行 JSON 的結構化 formatter
+
+    固定欄位: ts, level, logger, trace_id, msg
+    透過 extra={'data': {...}} 傳入的欄位會合併到輸出中
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'trace_id': getattr(record, 'trace_id', None) or _trace_id.get() or '-',
+            'msg': record.getMessage(),
+        }
+
+        data = getattr(record, 'data', None)
+        if isinstance(data, dict):
+            payload.update(data)
+
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    structured: Optional[bool] = None,
+    stream=None
+) -> logging.Logger:
+    """設定 trip 命名空間的輸出
+
+    重複呼叫只會替換既有的 handler,不會重複輸出。
+
+    Args:
+        level: Optional[str] - log 等級,預設讀取 TRIP_LOG_LEVEL,否則為 WARNING
+        structured: Optional[bool] - 是否輸出 JSON,預設讀取 TRIP_LOG_FORMAT(json/text)
+        stream: 輸出目標,預設為 stderr
+
+    Returns:
+        logging.Logger - 設定完成的 'trip' logger
+    """
+    level = (level or os.getenv('TRIP_LOG_LEVEL') or DEFAULT_LEVEL).upper()
+    if structured is None:
+        structured = os.getenv('TRIP_LOG_FORMAT', 'json').lower() == 'json'
+
+    handler = logging.StreamHandler(stream)
+    handler.addFilter(TraceIdFilter())
+    if structured:
+        handler.setFormatter(StructuredFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s'
+        ))
+
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for old in list(root.handlers):
+        if getattr(old, '_trip_handler', False):
+            root.removeHandler(old)
+    handler._trip_handler = True
+    root.addHandler(handler)
+    root.setLevel(level)
+    root.propagate = False
+
+    return root
+
+
+__all__ = [
+    'get_logger',
+    'new_trace_id',
+    'get_trace_id',
+    'set_trace_id',
+    'trace_context',
+    'lazy',
+    'TraceIdFilter',
+    'StructuredFormatter',
+    'setup_logging',
+]
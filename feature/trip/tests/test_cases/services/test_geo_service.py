@@ -0,0 +1,49 @@
+# tests/test_cases/services/test_geo_service.py
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+from feature.trip.src.core.services.geo_service import GeoService
+
+ROUTE = [{'legs': [{'distance': {'value': 3200}, 'duration': {'value': 600}}]}]
+GEOCODE = [{'geometry': {'location': {'lat': 25.17, 'lng': 121.44}}}]
+
+
+def make_service(timer=None):
+    """建立 GeoService 並以假的 Google Maps client 取代 API 呼叫"""
+    service = GeoService(timer=timer)
+    service.has_google_maps = True
+    service.maps_client = MagicMock()
+    service.maps_client.directions.return_value = ROUTE
+    service.maps_client.geocode.return_value = GEOCODE
+    return service
+
+
+def test_timer_wraps_google_maps_calls():
+    """注入的計時器會包住 directions 與 geocode 呼叫"""
+    stages = []
+
+    @contextmanager
+    def timer(stage):
+        stages.append(stage)
+        yield
+
+    service = make_service(timer)
+    route = service._get_google_maps_route(
+        {'lat': 25.17, 'lon': 121.44}, {'lat': 25.05, 'lon': 121.52}, 'driving', None)
+    location = service.geocode('淡水捷運站')
+
+    assert stages == ['google_maps_directions', 'google_maps_geocode']
+    assert route['distance_km'] == 3.2
+    assert location['lon'] == 121.44
+
+
+def test_no_timer_by_default():
+    """未注入計時器時照常呼叫 API"""
+    service = make_service()
+
+    route = service._get_google_maps_route(
+        {'lat': 25.17, 'lon': 121.44}, {'lat': 25.05, 'lon': 121.52}, 'driving', None)
+
+    assert route['duration_minutes'] == 10
+    service.maps_client.directions.assert_called_once()
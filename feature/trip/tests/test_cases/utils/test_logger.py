@@ -0,0 +1,112 @@
+# tests/test_cases/utils/test_logger.py
+
+import io
+import json
+import os
+import time
+
+import pytest
+
+from feature.trip.src.core.utils.logger import (
+    get_logger,
+    get_trace_id,
+    lazy,
+    setup_logging,
+    trace_context,
+)
+
+
+@pytest.fixture
+def log_stream():
+    """把 trip logger 導到記憶體,測試結束後還原為 WARNING"""
+    stream = io.StringIO()
+    setup_logging(level='DEBUG', structured=True, stream=stream)
+    yield stream
+    setup_logging(level='WARNING', structured=True)
+
+
+def test_logger_namespace():
+    """測試 logger 名稱都掛在 trip 底下"""
+    assert get_logger('planner.strategy').name == 'trip.planner.strategy'
+    assert get_logger('trip.services.geo').name == 'trip.services.geo'
+
+
+def test_structured_output_with_trace_id(log_stream):
+    """測試輸出為單行 JSON 且帶有追蹤ID與額外欄位"""
+    logger = get_logger('test')
+
+    with trace_context('abc123') as trace_id:
+        logger.info("規劃完成", extra={'data': {'places': 5}})
+
+    record = json.loads(log_stream.getvalue().strip())
+    assert trace_id == 'abc123'
+    assert record['trace_id'] == 'abc123'
+    assert record['msg'] == "規劃完成"
+    assert record['places'] == 5
+    assert record['logger'] == 'trip.test'
+
+
+def test_trace_context_nesting():
+    """測試內層沿用外層的追蹤ID,離開後還原"""
+    assert get_trace_id() is None
+
+    with trace_context() as outer:
+        with trace_context() as inner:
+            assert inner == outer
+        with trace_context('other') as replaced:
+            assert replaced == 'other'
+        assert get_trace_id() == outer
+
+    assert get_trace_id() is None
+
+
+def test_lazy_not_evaluated_when_disabled():
+    """測試 debug 關閉時 lazy 參數不會被求值"""
+    setup_logging(level='WARNING')
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "expensive"
+
+    get_logger('test').debug("內容: %s", lazy(expensive))
+    assert calls == []
+
+
+def test_lazy_evaluated_when_enabled(log_stream):
+    """測試 debug 開啟時 lazy 參數才會被求值"""
+    get_logger('test').debug("內容: %s", lazy(lambda: "expensive"))
+    assert "內容: expensive" in log_stream.getvalue()
+
+
+def test_disabled_debug_benchmark():
+    """比較 print 與關閉狀態的 logger.debug 成本
+
+    模擬 gunicorn + PYTHONUNBUFFERED=1 的情境: 每一行都直接寫入檔案
+    """
+    setup_logging(level='WARNING')
+    logger = get_logger('benchmark')
+    iterations = 20000
+    end_location = {'name': '台北車站', 'lat': 25.0478, 'lon': 121.5170}
+
+    with open(os.devnull, 'w', buffering=1) as devnull:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            print(end_location, file=devnull)
+            print(1, file=devnull)
+        print_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        logger.debug("第%d輪: 返回終點 %s", i, end_location)
+    log_time = time.perf_counter() - start
+
+    print(f"\nprint: {print_time * 1e6 / iterations:.2f} µs/次")
+    print(f"logger.debug(關閉): {log_time * 1e6 / iterations:.2f} µs/次")
+    print(f"每次迭代節省: {(print_time - log_time) * 1e6 / iterations:.2f} µs")
+
+    assert log_time < print_time
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -1,7 +1,11 @@
+import time
+
 from feature.llm.LLM import LLM_Manager
 from feature.retrieval.qdrant_search import qdrant_search
 from feature.plan.Contextual_Search_Main import filter_and_calculate_scores
 from feature.sql_csv import sql_csv
+from feature.monitoring import REGISTRY, request_timer, span
+from main.main_plan.semantic_cache import get_semantic_cache, normalize_requirements
 
 def recommandation(user_Q: str, config: dict[str, str]) -> list[dict]:
     """
@@ -16,40 +20,34 @@ def recommandation(user_Q: str, config: dict[str, str]) -> list[dict]:
             - 推薦的地點列表
             - 查詢相關信息(用於存儲到MongoDB)
     """
+    with request_timer('plan'):
+        return _recommandation(user_Q, config)
+
+
+def _recommandation(user_Q: str, config: dict[str, str]) -> list[dict]:
+    """recommandation 的實際流程,各階段耗時由 span 記錄"""
     # 初始化 LLM 物件
     LLM_obj = LLM_Manager(config['ChatGPT_api_key'])
     weights = {'distance': 0.2, 'comments': 0.3, 'similarity': 0.5}
     
     # 獲取 LLM 分析結果
-    results = LLM_obj.Cloud_fun(user_Q)
+    with span('llm_cloud', 'plan'):
+        results = LLM_obj.Cloud_fun(user_Q)
     
     # 提取分析結果
     cloud_description = results[0]  # LLM解析資料:形容客戶行程的一句話
     special_requirements = results[1]  # LLM解析資料:確認是否具有特殊要求
     user_requirements = results[2]  # LLM解析資料:客戶基本要求資料
     
-    # 向量搜索
+    # 向量搜索、SQL過濾、評分(先查語意快取)
     qdrant_obj = qdrant_search(
         collection_name='view_restaurant',
         config=config,
         score_threshold=0.6,
         limit=1000,
     )
-    vector_results = qdrant_obj.cloud_search(cloud_description)
-    
-    # SQL過濾
-    sql_results = sql_csv.pandas_search(
-        system='plan',
-        system_input=vector_results,
-        special_request_list=special_requirements
-    )
-    
-    # 最終過濾和評分
-    final_results = filter_and_calculate_scores(
-        sql_results,
-        user_requirements,
-        weights
-    )
+    final_results = cached_search(qdrant_obj, cloud_description, special_requirements,
+                                  user_requirements, weights, pipeline='plan')
     
     # 準備MongoDB存儲用的資訊
     query_info = {
@@ -63,6 +61,53 @@ def recommandation(user_Q: str, config: dict[str, str]) -> list[dict]:
     
     return final_results, query_info
 
+
+def cached_search(qdrant_obj, cloud_description, special_requirements, user_requirements,
+                  weights, black_list=(), pipeline='plan') -> list[dict]:
+    """
+    向量搜索 → SQL 過濾 → 評分,先查語意快取(見 semantic_cache.py)
+
+    形容句只向量化一次,同時用於查快取與向量搜索。
+    查快取的耗時記錄在 stage="semantic_cache_hit" / "semantic_cache_miss",次數即命中率。
+    """
+    cache = get_semantic_cache()
+    with span('embedding', pipeline):
+        vector = qdrant_obj.embed(cloud_description)
+
+    if cache is not None:
+        requirements_key = normalize_requirements(user_requirements, special_requirements, weights)
+        start = time.perf_counter()
+        hit = cache.lookup(vector, requirements_key, black_list)
+        stage = 'semantic_cache_hit' if hit is not None else 'semantic_cache_miss'
+        REGISTRY.observe(pipeline, stage, time.perf_counter() - start)
+        if hit is not None:
+            return hit.results
+
+    # 向量搜索
+    with span('vector_retrieval', pipeline):
+        vector_results = qdrant_obj.cloud_search(cloud_description, vector=vector)
+
+    # SQL過濾
+    with span('get_places', pipeline):
+        sql_results = sql_csv.pandas_search(
+            system='plan',
+            system_input=vector_results,
+            special_request_list=special_requirements
+        )
+
+    # 最終過濾和評分
+    with span('filter_and_score', pipeline):
+        final_results = filter_and_calculate_scores(
+            sql_results,
+            user_requirements,
+            weights
+        )
+
+    if cache is not None:
+        cache.store(vector, requirements_key, final_results, str(cloud_description), black_list)
+    return final_results
+
+
 if __name__ == "__main__":
     from pprint import pprint
     from dotenv import dotenv_values
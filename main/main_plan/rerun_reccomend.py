@@ -1,8 +1,8 @@
 from feature.llm.LLM import LLM_Manager
 from feature.retrieval.qdrant_search import qdrant_search
 from feature.retrieval.utils import jina_embedding, json2txt, qdrant_control
-from feature.plan.Contextual_Search_Main import filter_and_calculate_scores
-from feature.sql_csv import sql_csv
+from feature.monitoring import request_timer
+from main.main_plan.recommandation_service import cached_search
 from typing import Dict, List, Tuple, Any
 
 def rerun_rec(query_info: Dict[str, Any], config: Dict[str, str]) -> List[Dict[str, Any]]:
@@ -16,9 +16,15 @@ def rerun_rec(query_info: Dict[str, Any], config: Dict[str, str]) -> List[Dict[s
     返回:
         List[Dict[str, Any]]: 推薦的地點列表
     """
+    with request_timer('plan_rerun'):
+        return _rerun_rec(query_info, config)
+
+
+def _rerun_rec(query_info: Dict[str, Any], config: Dict[str, str]) -> List[Dict[str, Any]]:
+    """rerun_rec 的實際流程,各階段耗時由 span 記錄"""
     weights = {'distance': 0.2, 'comments': 0.4, 'similarity': 0.4}
     print("1. MongoDB black_list:", query_info["black_list"])
-    # 向量搜索，直接在此階段使用黑名單過濾
+    # 向量搜索，直接在此階段使用黑名單過濾(快取結果也依黑名單判斷是否可用)
     qdrant_obj = qdrant_search(
         collection_name='view_restaurant',
         config=config,
@@ -26,20 +32,14 @@ def rerun_rec(query_info: Dict[str, Any], config: Dict[str, str]) -> List[Dict[s
         limit=1000,
         black_list=list(query_info["black_list"])  # 將 set 轉換為 list
     )
-    vector_results = qdrant_obj.cloud_search(query_info["query_of_llm"])
-    
-    # SQL過濾
-    sql_results = sql_csv.pandas_search(
-        system='plan',
-        system_input=vector_results,
-        special_request_list=query_info["special_requirement"]
-    )
-    
-    # 最終過濾和評分
-    final_results = filter_and_calculate_scores(
-        sql_results,
+    final_results = cached_search(
+        qdrant_obj,
+        query_info["query_of_llm"],
+        query_info["special_requirement"],
         query_info["user_requirement"],
-        weights
+        weights,
+        black_list=query_info["black_list"],
+        pipeline='plan_rerun'
     )
 
     print("重跑成功")
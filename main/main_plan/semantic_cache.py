@@ -0,0 +1,284 @@
+"""
+情境搜索結果的語意快取
+
+很多情境搜索只是換句話說(「推薦淡水好吃的餐廳」、「淡水有什麼好吃」),
+LLM 整理出的形容句很接近、基本需求與特殊需求相同,向量檢索 → CSV → 計分的結果也幾乎一樣。
+這裡以形容句的向量(原本向量檢索就要算,不多花一次 embedding)加上正規化後的需求當 key:
+    - 需求(user_requirements、special_requirements、weights)必須完全相同
+    - 形容句向量的 cosine 相似度 >= threshold
+    - 未過期(ttl)
+    - 黑名單: 快取結果不能含有本次黑名單內的地點,且快取建立時的黑名單必須是本次黑名單的子集合
+      (否則被排除的地點可能排在更前面),不符合時視為未命中,重新檢索補足
+
+環境變數:
+    PLAN_CACHE            on(預設) / off
+    PLAN_CACHE_THRESHOLD  cosine 相似度門檻(預設 0.95,可用本檔的 tune 工具離線調整)
+    PLAN_CACHE_TTL        保存秒數(預設 1800)
+    PLAN_CACHE_SIZE       process 內最多保存的筆數(預設 256)
+
+門檻調整:
+    python -m main.main_plan.semantic_cache -f pairs.tsv
+    # pairs.tsv 一行一組: 查詢A<TAB>查詢B<TAB>1(應該共用結果)/0(不應該)
+    # 以 .env 的 jina 設定向量化,列出各門檻的命中率、precision 與 recall
+"""
+
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL = 1800
+DEFAULT_MAX_ENTRIES = 256
+
+
+def normalize_requirements(user_requirements: Any, special_requirements: Any, weights: Dict) -> str:
+    """
+    需求正規化成字串 key: dict 依 key 排序,經緯度取到小數 3 位(約 100 公尺),tuple 與 list 視為相同
+    """
+    def normalize(value):
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, float):
+            return round(value, 3)
+        return value
+
+    return json.dumps(
+        [normalize(user_requirements), normalize(special_requirements), normalize(weights)],
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CacheHit(NamedTuple):
+    results: List[Dict]     # 排序後的推薦結果(複本)
+    similarity: float       # 與快取查詢的 cosine 相似度
+    query: str              # 快取建立時的形容句
+
+
+class _Entry(NamedTuple):
+    vector: np.ndarray
+    results: List[Dict]
+    place_ids: frozenset
+    black_list: frozenset
+    query: str
+    expires_at: float
+
+
+class SemanticResultCache:
+    """
+    以 (需求 key, 形容句向量) 查詢的推薦結果快取(thread-safe)
+
+    Args:
+        threshold: cosine 相似度門檻
+        ttl: 每筆快取的有效秒數
+        max_entries: 最多保存的筆數(超過時移除最久沒用到的)
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[str, _Entry]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(
+        self,
+        vector: Sequence[float],
+        requirements_key: str,
+        black_list: Iterable[str] = ()
+    ) -> Optional[CacheHit]:
+        """
+        找出需求相同、相似度最高且 >= threshold 的快取結果
+
+        Returns:
+            Optional[CacheHit]: 未命中時回傳 None
+        """
+        query_vector = _unit(vector)
+        black_list = frozenset(black_list)
+        now = time.time()
+
+        with self._lock:
+            best_id, best_similarity = None, self.threshold
+            for entry_id, (key, entry) in list(self._entries.items()):
+                if entry.expires_at <= now:
+                    del self._entries[entry_id]
+                    continue
+                if key != requirements_key:
+                    continue
+                if not entry.black_list <= black_list or entry.place_ids & black_list:
+                    continue
+                similarity = float(np.dot(query_vector, entry.vector))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            entry = self._entries[best_id][1]
+            # 呼叫端會修改結果(例如加上 LINE 訊息欄位),回傳複本
+            return CacheHit(copy.deepcopy(entry.results), best_similarity, entry.query)
+
+    def store(
+        self,
+        vector: Sequence[float],
+        requirements_key: str,
+        results: List[Dict],
+        query: str = '',
+        black_list: Iterable[str] = ()
+    ) -> None:
+        """保存一次完整檢索的結果(空結果不保存)"""
+        if not results:
+            return
+        entry = _Entry(
+            vector=_unit(vector),
+            results=copy.deepcopy(results),
+            place_ids=frozenset(result.get('placeID') for result in results),
+            black_list=frozenset(black_list),
+            query=query,
+            expires_at=time.time() + self.ttl,
+        )
+        with self._lock:
+            self._entries[self._next_id] = (requirements_key, entry)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """命中率: {"hits", "misses", "ratio", "entries"}"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ratio": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticResultCache]:
+    """
+    取得 process 共用的快取,第一次呼叫時依環境變數建立
+
+    Returns:
+        Optional[SemanticResultCache]: PLAN_CACHE=off 時回傳 None
+    """
+    global _default_cache
+    if os.getenv("PLAN_CACHE", "on") == "off":
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = SemanticResultCache(
+                    threshold=float(os.getenv("PLAN_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+                    ttl=float(os.getenv("PLAN_CACHE_TTL", DEFAULT_TTL)),
+                    max_entries=int(os.getenv("PLAN_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+                )
+    return _default_cache
+
+
+def tune_threshold(
+    pairs: Sequence[Tuple[Sequence[float], Sequence[float], bool]],
+    thresholds: Iterable[float] = (0.85, 0.88, 0.9, 0.92, 0.94, 0.95, 0.96, 0.97, 0.98)
+) -> List[Dict]:
+    """
+    依標記好的查詢組合評估各門檻
+
+    Args:
+        pairs: [(向量A, 向量B, 是否應該共用結果)]
+        thresholds: 要評估的門檻
+
+    Returns:
+        List[Dict]: 每個門檻的 {"threshold", "hit_ratio", "precision", "recall", "f1"}
+            hit_ratio 為相似度達到門檻(會命中快取)的比例,precision 為命中中應該共用的比例
+    """
+    similarities = np.array([float(np.dot(_unit(a), _unit(b))) for a, b, _ in pairs])
+    labels = np.array([bool(same) for _, _, same in pairs])
+
+    report = []
+    for threshold in thresholds:
+        hit = similarities >= threshold
+        true_hits = int(np.sum(hit & labels))
+        precision = true_hits / int(np.sum(hit)) if hit.any() else 1.0
+        recall = true_hits / int(np.sum(labels)) if labels.any() else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        report.append({
+            "threshold": threshold,
+            "hit_ratio": float(hit.mean()) if len(hit) else 0.0,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        })
+    return report
+
+
+def best_threshold(report: List[Dict], min_precision: float = 0.98) -> Optional[float]:
+    """precision 達到 min_precision 的門檻中命中率最高者(同命中率取較高門檻),都不達到時回傳 None"""
+    candidates = [row for row in report if row["precision"] >= min_precision]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda row: (row["hit_ratio"], row["threshold"]))["threshold"]
+
+
+if __name__ == "__main__":
+    from dotenv import dotenv_values
+
+    from feature.retrieval.utils.jina_embedding import jina_embedding
+
+    parser = argparse.ArgumentParser(description="以標記好的查詢組合調整語意快取門檻")
+    parser.add_argument("-f", "--file", required=True, help="TSV: 查詢A<TAB>查詢B<TAB>1/0")
+    parser.add_argument("--env", default="./.env", help="jina 設定所在的 .env")
+    parser.add_argument("--min-precision", type=float, default=0.98)
+    args = parser.parse_args()
+
+    config = dotenv_values(args.env)
+    vectors = {}
+
+    def embed(text):
+        if text not in vectors:
+            vectors[text] = jina_embedding([text], '', config['jina_url'],
+                                           config['jina_headers_Authorization'])['embedding']
+        return vectors[text]
+
+    with open(args.file, encoding="utf-8") as f:
+        rows = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+    pairs = [(embed(a), embed(b), label.strip() == "1") for a, b, label in rows]
+
+    report = tune_threshold(pairs)
+    for row in report:
+        print(f"門檻 {row['threshold']:.2f}: 命中率 {row['hit_ratio']:.0%}, "
+              f"precision {row['precision']:.2f}, recall {row['recall']:.2f}, f1 {row['f1']:.2f}")
+    print(f"建議門檻(precision >= {args.min_precision}): {best_threshold(report, args.min_precision)}")
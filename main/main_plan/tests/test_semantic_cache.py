@@ -0,0 +1,120 @@
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from feature.monitoring import REGISTRY
+from main.main_plan import recommandation_service
+from main.main_plan.semantic_cache import (
+    SemanticResultCache,
+    best_threshold,
+    normalize_requirements,
+    tune_threshold,
+)
+
+WEIGHTS = {'distance': 0.2, 'comments': 0.3, 'similarity': 0.5}
+USER_REQ = [{'星期別': 'none', '時間': 'none', '類別': '餐廳', '預算': 'none',
+             '出發地點': (25.1690, 121.4456), '可接受距離門檻(KM)': 30, '交通方式': '大眾運輸'}]
+SPECIAL = [{'適合兒童': False, 'wi-fi': False}]
+KEY = normalize_requirements(USER_REQ, SPECIAL, WEIGHTS)
+RESULTS = [{'placeID': f'P{i}', 'place_name': f'店家{i}'} for i in range(10)]
+
+
+def vector(angle):
+    """與 [1, 0] 夾角 angle(弧度)的單位向量,cosine 相似度 = cos(angle)"""
+    return [float(np.cos(angle)), float(np.sin(angle))]
+
+
+@pytest.fixture
+def cache():
+    return SemanticResultCache(threshold=0.95, ttl=60, max_entries=3)
+
+
+def test_paraphrase_hits(cache):
+    cache.store(vector(0), KEY, RESULTS, query="淡水好吃的餐廳")
+
+    hit = cache.lookup(vector(0.2), KEY)        # cos(0.2) = 0.98
+    assert hit is not None and hit.results == RESULTS and hit.query == "淡水好吃的餐廳"
+    assert cache.lookup(vector(0.5), KEY) is None   # cos(0.5) = 0.88
+    assert cache.stats() == {"hits": 1, "misses": 1, "ratio": 0.5, "entries": 1}
+
+
+def test_requirements_must_match(cache):
+    cache.store(vector(0), KEY, RESULTS)
+    other = normalize_requirements([{**USER_REQ[0], '類別': '景點'}], SPECIAL, WEIGHTS)
+    assert cache.lookup(vector(0), other) is None
+
+
+def test_requirements_normalized():
+    """tuple/list、dict 順序與經緯度的微小差異視為相同需求"""
+    reordered = [{**dict(reversed(list(USER_REQ[0].items()))), '出發地點': [25.16901, 121.44561]}]
+    assert normalize_requirements(reordered, SPECIAL, WEIGHTS) == KEY
+
+
+def test_ttl(cache, monkeypatch):
+    cache.store(vector(0), KEY, RESULTS)
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.lookup(vector(0), KEY) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_black_list(cache):
+    """結果含黑名單地點,或快取建立時排除了本次沒排除的地點時,不使用快取"""
+    cache.store(vector(0), KEY, RESULTS, black_list={'X1'})
+
+    assert cache.lookup(vector(0), KEY) is None                      # 快取的黑名單不是子集合
+    assert cache.lookup(vector(0), KEY, black_list={'X1', 'P3'}) is None   # 結果含黑名單地點
+    assert cache.lookup(vector(0), KEY, black_list={'X1', 'X2'}) is not None
+
+
+def test_results_are_copies(cache):
+    cache.store(vector(0), KEY, RESULTS)
+    cache.lookup(vector(0), KEY).results[0]['place_name'] = '被修改'
+    assert cache.lookup(vector(0), KEY).results[0]['place_name'] == '店家0'
+
+
+def test_lru_eviction(cache):
+    for i in range(4):
+        cache.store(vector(i), KEY, [{'placeID': f'P{i}'}])
+    assert cache.lookup(vector(0), KEY) is None
+    assert cache.lookup(vector(3), KEY).results == [{'placeID': 'P3'}]
+
+
+def test_tune_threshold():
+    pairs = [(vector(0), vector(a), True) for a in (0.1, 0.2, 0.3)] + \
+            [(vector(0), vector(a), False) for a in (0.25, 0.6, 1.0)]
+    report = {row["threshold"]: row for row in tune_threshold(pairs, thresholds=(0.9, 0.96, 0.98))}
+
+    # cos(0.25) = 0.969: 0.96 會把不該共用的組合當成命中
+    assert report[0.96]["precision"] < 1.0
+    assert report[0.98]["precision"] == 1.0 and report[0.98]["recall"] == pytest.approx(2 / 3)
+    assert best_threshold(list(report.values()), min_precision=1.0) == 0.98
+
+
+def test_cached_search_skips_retrieval(monkeypatch):
+    """相似的形容句第二次不做向量搜索、SQL 與評分,命中次數記錄在 REGISTRY"""
+    cache = SemanticResultCache(threshold=0.95)
+    monkeypatch.setattr(recommandation_service, "get_semantic_cache", lambda: cache)
+    pandas_search = MagicMock(return_value=[{'placeID': 'P0'}])
+    score = MagicMock(return_value=RESULTS)
+    monkeypatch.setattr(recommandation_service.sql_csv, "pandas_search", pandas_search)
+    monkeypatch.setattr(recommandation_service, "filter_and_calculate_scores", score)
+    REGISTRY.clear()
+
+    qdrant_obj = MagicMock()
+    qdrant_obj.embed.side_effect = [vector(0), vector(0.1)]
+    for query in (["推薦淡水好吃的餐廳"], ["淡水有什麼好吃的餐廳"]):
+        results = recommandation_service.cached_search(qdrant_obj, query, SPECIAL, USER_REQ, WEIGHTS)
+        assert results == RESULTS
+
+    qdrant_obj.cloud_search.assert_called_once_with(["推薦淡水好吃的餐廳"], vector=vector(0))
+    assert pandas_search.call_count == 1 and score.call_count == 1
+    assert REGISTRY.get('plan', 'semantic_cache_hit').snapshot()[2] == 1
+    assert REGISTRY.get('plan', 'semantic_cache_miss').snapshot()[2] == 1
+    REGISTRY.clear()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
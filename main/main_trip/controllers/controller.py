@@ -1,21 +1,29 @@
 import os
+import time
 from dotenv import load_dotenv
-from typing import Dict, List, Tuple
-from concurrent.futures import ThreadPoolExecutor
-
-import pandas as pd
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from feature.llm.LLM import LLM_Manager
+from feature.llm.context_builder import ContextBuilder
+from feature.llm.fast_intent import FastIntent, parse_trip_request
 from feature.retrieval.qdrant_search import qdrant_search
 from feature.sql_csv.sql_csv import pandas_search
+from feature.sql_csv.emotion_table import get_duration_lookup
 from feature.nosql_mongo.mongo_trip.db_helper import trip_db
+from feature.nosql_mongo.mongo_trip.plan_schema import LATEST_PLAN_PROJECTION
 from feature.trip import TripPlanningSystem
+from feature.monitoring import REGISTRY, request_timer, span, timed
+from feature.trip.src.core.utils.logger import get_logger
+from main.main_trip.history_summarizer import HistorySummarizer
+
+logger = get_logger('controller')
 
 
 class TripController:
     """行程規劃系統控制器"""
 
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, history_summarizer: HistorySummarizer = None):
         """
         初始化控制器
 
@@ -26,10 +34,13 @@ class TripController:
                 - qdrant_url: Qdrant 資料庫 URL
                 - qdrant_api_key: Qdrant API 金鑰
                 - ChatGPT_api_key: ChatGPT API 金鑰
+            history_summarizer: 背景整理歷史摘要(選填,多個控制器應共用同一個)
         """
         self.config = config
         self.LLM_obj = LLM_Manager(self.config['ChatGPT_api_key'])
-        self.trip_planner = TripPlanningSystem()
+        self.context_builder = ContextBuilder()
+        self.history_summarizer = history_summarizer or HistorySummarizer(lambda: self.LLM_obj)
+        self.trip_planner = TripPlanningSystem(timer=span)
 
     def process_message(
         self,
@@ -46,6 +57,11 @@ class TripController:
         Returns:
             str: 規劃好的行程或錯誤訊息
         """
+        with request_timer('trip'):
+            return self._process_message(input_text, line_id)
+
+    def _process_message(self, input_text: str, line_id: str) -> List[Dict]:
+        """process_message 的實際流程,各階段耗時由 span / timed 記錄"""
         try:
             if line_id is None:
                 line_id = "test_user_id"  # 這裡先寫死測試用
@@ -54,28 +70,60 @@ class TripController:
             # trip_db.record_user_input(line_id, input_text)
 
             # 2. 取得之前的行程
-            latest = trip_db.get_latest_plan(line_id=line_id)
+            with span('mongo_get_latest_plan'):
+                latest = trip_db.get_latest_plan(
+                    line_id=line_id, projection=LATEST_PLAN_PROJECTION)
             latest_itinerary = latest.get('itinerary') if latest else None
 
-            # 3. 準備給LLM的文字(包含歷史整理)
-            input_for_LLM = self._prepare_input_text(
-                text=input_text,
-                line_id=line_id,
-                previous_trip=latest_itinerary
-            )
-
-            # 4. LLM意圖分析
-            period_describe, unique_requirement, base_requirement, restart_index = (
-                self._analyze_intent(text=input_for_LLM)
-            )
+            # 3. 取得歷史狀態(摘要與尚未整理的新對話)
+            with span('mongo_history_status'):
+                history = trip_db.get_history_status(line_id)
+
+            # 固定格式的輸入(例如「隨便規劃台北一日遊」)以規則解析;
+            # 沒有任何使用者脈絡時才略過 LLM,否則解析出的欄位覆蓋 LLM 的結果
+            start = time.perf_counter()
+            fast_intent = self._fast_intent(input_text)
+            if fast_intent is not None and not has_user_context(history, latest):
+                REGISTRY.observe('trip', 'fast_intent', time.perf_counter() - start)
+                period_describe, unique_requirement, base_requirement, restart_index = fast_intent.thinking
+                placeIDs = self._vector_retrieval(period_describe)
+            else:
+                # 準備給LLM的文字(包含歷史整理)
+                input_for_LLM = self._prepare_input_text(
+                    text=input_text,
+                    line_id=line_id,
+                    previous_trip=latest_itinerary,
+                    history=history
+                )
+
+                # 4. LLM意圖分析(各段分別完成)
+                intent = self._analyze_intent(text=input_for_LLM)
+
+                # 5. Thinking_A 認證後就開始向量檢索,其他段落同時繼續呼叫 LLM
+                with span('llm_intent'):
+                    period_describe = intent['Thinking_A'].result()
+                placeIDs = self._vector_retrieval(period_describe)
+
+                # 檢索完成時其餘段落通常也已完成,這裡只記錄剩下的等待時間
+                with span('llm_intent_rest'):
+                    unique_requirement = intent['Thinking_B'].result()
+                    base_requirement = intent['Thinking_C'].result()
+                    restart_index = intent['restart'].result()
+
+                # 有未解析的否定詞(「不要開車」)時以 LLM 的判斷為準
+                if fast_intent is not None and fast_intent.slots and not fast_intent.negated:
+                    base_requirement = [{**base_requirement[0], **fast_intent.slots}]
 
             if latest and 'restart_index' in latest:
                 restart_index = latest.get('restart_index', 0)
             else:
                 restart_index = int(restart_index[0]) if restart_index else 0
 
-            # 5. 向量檢索
-            placeIDs = self._vector_retrieval(period_describe)
+            # 從中間重新規劃時,之前的點會放進新行程,需要營業時間等明細
+            if latest_itinerary and restart_index and restart_index > 0:
+                with span('mongo_get_plan_details'):
+                    latest_itinerary = trip_db.attach_plan_details(
+                        line_id, latest['plan_index'], latest_itinerary)
 
             # 6. 取得景點詳細資料
             location_details = self._get_places(placeIDs, unique_requirement)
@@ -90,36 +138,56 @@ class TripController:
             )
 
             # 8. 儲存規劃結果
-            trip_db.save_plan(
-                line_id=line_id,
-                input_text=input_text,
-                requirement=base_requirement,
-                itinerary=result
-            )
+            with span('mongo_save_plan'):
+                trip_db.save_plan(
+                    line_id=line_id,
+                    input_text=input_text,
+                    requirement=base_requirement,
+                    itinerary=result
+                )
 
             return result
 
         except Exception as e:
             return f"抱歉，系統發生錯誤: {str(e)}"
 
-    def _analyze_intent(
-        self,
-        text: str,
-    ) -> Tuple[List[Dict], List[Dict], List[Dict], List[int]]:
+    def _fast_intent(self, text: str) -> Optional[FastIntent]:
         """
-        分析使用者意圖
+        以規則解析固定格式的輸入(見 feature/llm/fast_intent.py)
+
+        TRIP_FAST_PATH=off 時停用。是否略過 LLM 由呼叫端依使用者脈絡決定(見 has_user_context),
+        略過時耗時記錄在 stage="fast_intent",與 llm_intent 的次數比即為快速路徑的比例(見 fast_path_report)。
+
+        Returns:
+            Optional[FastIntent]: 信心度足夠時的解析結果(thinking 與 Thinking_fun 格式相同),否則為 None
+        """
+        if os.getenv('TRIP_FAST_PATH', 'on') == 'off':
+            return None
+
+        result = parse_trip_request(text)
+        if result.thinking is None:
+            return None
+
+        logger.debug("本機解析(信心度 %.2f): %s", result.confidence, result.slots)
+        return result
+
+    def _analyze_intent(self, text: str) -> Dict[str, Future]:
+        """
+        分析使用者意圖,各段分別回傳 Future(不等待 LLM 回應)
 
         Args:
             text (str): 使用者輸入
 
         Returns:
-            Tuple[List[Dict], List[Dict], List[Dict[str, Union[int, str, None]]]]:
-                - List[Dict]: 旅遊各時段形容詞 (對應圖中的 'a')
-                - List[Dict]: 特殊需求 (對應圖中的 'b')
-                - List[Dict[str, Union[int, str, None]]]: 客戶基本要求 (對應圖中的 'c')
+            Dict[str, Future]:
+                - 'Thinking_A': List[Dict] 旅遊各時段形容詞 (對應圖中的 'a')
+                - 'Thinking_B': List[Dict] 特殊需求 (對應圖中的 'b')
+                - 'Thinking_C': List[Dict[str, Union[int, str, None]]] 客戶基本要求 (對應圖中的 'c')
+                - 'restart': List[int] 從第幾個行程點重新規劃
         """
-        return self.LLM_obj.Thinking_fun(text)
+        return self.LLM_obj.Thinking_futures(text)
 
+    @timed('vector_retrieval')
     def _vector_retrieval(self, period_describe: List[Dict]) -> Dict:
         """
         平行處理多個時段的向量搜尋
@@ -176,6 +244,7 @@ class TripController:
         except Exception as e:
             raise Exception(f"向量搜尋發生錯誤: {str(e)}")
 
+    @timed('get_places')
     def _get_places(self, placeIDs: Dict, unique_requirement: List[Dict]) -> List[Dict]:
         """
         從資料庫取得景點詳細資料
@@ -202,6 +271,7 @@ class TripController:
             special_request_list=unique_requirement,
         )
 
+    @timed('add_duration')
     def _add_duration(self, places: List[Dict]) -> List[Dict]:
         """為地點加入停留時間資訊
 
@@ -212,12 +282,8 @@ class TripController:
             List[Dict] - 加入duration後的地點列表
         """
         try:
-            # 讀取duration資料
-            duration_df = pd.read_csv('data/emotion_analysis.csv')
-
-            # 建立查找字典
-            duration_dict = duration_df.set_index(
-                'placeID')['停留時間'].to_dict()
+            # 共用的 placeID → 停留時間 查找字典(每個 process 只載入一次)
+            duration_dict = get_duration_lookup()
 
             # 為每個地點加入duration
             for place in places:
@@ -236,6 +302,7 @@ class TripController:
             # 發生錯誤時返回原始資料
             return places
 
+    @timed('planner')
     def _plan_trip(
         self,
         location_details: List[Dict],
@@ -262,66 +329,63 @@ class TripController:
             restart_index=restart_index
         )
 
+    @timed('prepare_input')
     def _prepare_input_text(
         self,
         text: str = "",
         line_id: str = "test_user_id",
-        previous_trip: List[Dict] = None
+        previous_trip: List[Dict] = None,
+        history: Dict = None
     ) -> str:
         """準備給LLM的輸入文字
 
+        Args:
+            history: trip_db.get_history_status 的結果,None 時在這裡讀取
+
         Returns:
             str: 組合後的輸入文字
         """
         # 取得歷史狀態
-        history = trip_db.get_history_status(line_id)
+        if history is None:
+            with span('mongo_history_status'):
+                history = trip_db.get_history_status(line_id)
         # if not history:
         #     return text
 
-        # 需要整理就先整理和儲存
+        # 需要整理時交給背景執行,這次先用目前的摘要與尚未整理的新對話
         if history["needs_summary"]:
-            messages = [m["text"] for m in history["new_messages"]]
-            # 如果有舊摘要就加入
-            if history["summary"]:
-                messages.insert(0, history["summary"])
-
-            try:
-                # 過濾None並轉字串
-                valid_messages = [
-                    str(msg) for msg in messages if msg is not None
-                ]
-                if valid_messages:
-                    # 整理歷史
-                    summary = self.LLM_obj.summarize_history(
-                        "\n".join(valid_messages)
-                    )
-                else:
-                    summary = "目前沒有可總結的歷史對話"
-            except Exception as e:
-                print(f"處理歷史訊息時發生錯誤: {str(e)}")
-                summary = "總結歷史訊息時發生錯誤"
-
-            trip_db.update_summary(line_id, summary)
-            # 用新摘要
-            history["summary"] = summary
-            history["new_messages"] = []
-
-        # 組合輸入
-        parts = []
-
-        if history["summary"]:
-            parts.append(f"用戶歷史偏好:\n{history['summary']}")
-
-        if history["new_messages"]:
-            parts.append("新對話:\n" + "\n".join(m["text"]
-                         for m in history["new_messages"]))
+            self.history_summarizer.notify(line_id)
+
+        # 組合輸入(token 預算內,之前的行程只保留名稱、時段與時間)
+        input_text, report = self.context_builder.build(
+            text=text,
+            summary=history["summary"],
+            new_messages=[m["text"] for m in history["new_messages"]],
+            previous_trip=previous_trip
+        )
+        logger.debug("LLM 輸入: %d tokens(原本 %d,省下 %d,捨棄 %d 則新對話)",
+                     report.tokens, report.baseline_tokens, report.saved, report.dropped_messages)
 
-        if previous_trip:
-            parts.append("之前的行程:\n" + str(previous_trip))
+        return input_text
 
-        parts.append(f"當前輸入:\n{text}")
 
-        return "\n\n".join(parts)
+def has_user_context(history: Dict, latest: Optional[Dict]) -> bool:
+    """
+    使用者是否有 LLM 需要參考的脈絡:
+        - 歷史摘要
+        - 規則無法解析的新對話(例如取消景點時記錄的「我不喜歡X」、「想吃火鍋」);
+          input_history 記錄的是指令原文(「旅遊推薦」、「旅遊推薦 早上十點出發」),
+          能完整解析的固定格式輸入(包含目前這則)不算脈絡
+        - 等待從中間重新規劃的行程(取消景點後 restart_index > 0);
+          一般的之前行程不影響本次規劃,不算脈絡
+    """
+    if latest and (latest.get('restart_index') or 0) > 0:
+        return True
+    if not history:
+        return False
+    if history.get("summary"):
+        return True
+    return any(parse_trip_request(m["text"]).thinking is None for m in history.get("new_messages", []))
 
 
 def format_history_for_llm(history: List[Dict]) -> str:
@@ -351,6 +415,41 @@ def format_history_for_llm(history: List[Dict]) -> str:
     return formatted
 
 
+def fast_path_report(registry=REGISTRY) -> Dict:
+    """快速路徑的比例與省下的時間(依本 worker 的直方圖估算)
+
+    LLM 路徑每次的耗時以 prepare_input + llm_intent + llm_intent_rest 的平均計算,
+    快速路徑命中一次省下的時間為其與 fast_intent 平均耗時的差。
+
+    Returns:
+        Dict: {
+            "fast": 命中次數, "llm": 走 LLM 的次數, "ratio": 命中比例,
+            "saved_seconds": 估計省下的總秒數
+        }
+    """
+    def stats(stage):
+        histogram = registry.get('trip', stage)
+        if histogram is None:
+            return 0.0, 0
+        _, total, count = histogram.snapshot()
+        return total, count
+
+    fast_total, fast = stats('fast_intent')
+    _, llm = stats('llm_intent')
+    llm_mean = sum(
+        total / count for total, count in map(stats, ('prepare_input', 'llm_intent', 'llm_intent_rest'))
+        if count
+    )
+    fast_mean = fast_total / fast if fast else 0.0
+
+    return {
+        "fast": fast,
+        "llm": llm,
+        "ratio": fast / (fast + llm) if fast + llm else 0.0,
+        "saved_seconds": max(llm_mean - fast_mean, 0.0) * fast if llm else 0.0,
+    }
+
+
 def init_config():
     """初始化設定
 
@@ -0,0 +1,139 @@
+"""
+背景整理歷史摘要
+
+原本在規劃請求中(TripController._prepare_input_text)同步呼叫 summarize_history,
+新對話滿 10 則或第一次對話時,那次請求要多等一次 LLM 呼叫。
+改為 record_user_input 記錄成功後呼叫 notify(line_id),在背景執行緒檢查並整理,
+請求只使用目前已有的摘要(加上尚未整理的新對話)。
+
+同一個用戶同時只會有一個整理在執行(每個 worker 各自計算),
+整理期間新進的訊息不會被標記為已整理(見 queries.summary_update 的 summarized_until)。
+
+環境變數:
+    HISTORY_SUMMARY_WORKERS  背景整理的執行緒數(預設 2)
+
+使用方式:
+```python
+summarizer = HistorySummarizer(get_llm=lambda: LLM_Manager(api_key))
+if trip_db.record_user_input(line_id, text):
+    summarizer.notify(line_id)
+```
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Set
+
+from feature.llm.LLM import LLM_Manager
+from feature.monitoring import span
+from feature.nosql_mongo.mongo_trip.db_helper import trip_db
+
+# 新對話滿幾則就整理一次(與 get_history_status 預設相同)
+SUMMARY_THRESHOLD = 10
+
+
+class HistorySummarizer:
+    """
+    Args:
+        get_llm: 第一次整理時才建立 LLM_Manager(避免啟動時就需要 API 金鑰)
+        db: TripDBHandler,預設為共用的 trip_db
+        threshold: 新對話滿幾則就整理
+        max_workers: 背景執行緒數,None 時依 HISTORY_SUMMARY_WORKERS
+    """
+
+    def __init__(
+        self,
+        get_llm: Callable[[], LLM_Manager],
+        db=None,
+        threshold: int = SUMMARY_THRESHOLD,
+        max_workers: Optional[int] = None
+    ):
+        self._get_llm = get_llm
+        self._llm = None
+        self.db = db or trip_db
+        self.threshold = threshold
+        self.max_workers = max_workers or int(os.getenv('HISTORY_SUMMARY_WORKERS', 2))
+
+        self._executor = None
+        self._lock = threading.Lock()
+        # 正在整理的用戶(每個用戶的鎖),整理中再收到 notify 時直接略過
+        self._running: Set[str] = set()
+
+    @property
+    def llm(self) -> LLM_Manager:
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    self._llm = self._get_llm()
+        return self._llm
+
+    def _acquire(self, line_id: str) -> bool:
+        with self._lock:
+            if line_id in self._running:
+                return False
+            self._running.add(line_id)
+            return True
+
+    def _release(self, line_id: str) -> None:
+        with self._lock:
+            self._running.discard(line_id)
+
+    def notify(self, line_id: str) -> Optional[Future]:
+        """
+        用戶有新訊息時呼叫,在背景檢查是否需要整理(不會丟出例外)
+
+        Returns:
+            Optional[Future]: 背景工作,結果為是否更新了摘要;已有整理在執行時為 None
+        """
+        if line_id in self._running:
+            return None
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='summary')
+                executor = self._executor
+            return executor.submit(self.summarize, line_id)
+        except RuntimeError as e:  # 已經 shutdown
+            print(f"排入歷史整理失敗: {str(e)}")
+            return None
+
+    def summarize(self, line_id: str) -> bool:
+        """
+        需要時整理該用戶的歷史並寫回 update_summary(同一用戶同時只執行一個)
+
+        Returns:
+            bool: 是否更新了摘要
+        """
+        if not self._acquire(line_id):
+            return False
+        try:
+            history = self.db.get_history_status(line_id, count_threshold=self.threshold)
+            if not history or not history["needs_summary"] or not history["new_messages"]:
+                return False
+
+            messages = [str(m["text"]) for m in history["new_messages"] if m.get("text") is not None]
+            # 如果有舊摘要就加入
+            if history["summary"]:
+                messages.insert(0, history["summary"])
+
+            with span('llm_summarize', 'history'):
+                summary = self.llm.summarize_history("\n".join(messages))
+            # 只標記到這次整理的最後一則訊息,整理期間的新訊息留到下次
+            summarized_until = max(m["timestamp"] for m in history["new_messages"])
+            return self.db.update_summary(line_id, summary, summarized_until=summarized_until)
+
+        except Exception as e:
+            # 失敗時不更新,下次有新訊息時會再嘗試
+            print(f"背景整理歷史失敗: {str(e)}")
+            return False
+        finally:
+            self._release(line_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止背景執行緒(程式結束或測試時使用)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,187 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from feature.line.handlers import command_handler as command_handler_module
+from feature.line.handlers.command_handler import CommandHandler
+from feature.llm.LLM import LLM_Manager
+from feature.llm.tests.fake_thinking import BASIC, FakeChatCompletion
+from feature.monitoring import REGISTRY
+from feature.nosql_mongo.mongo_trip.db_helper import trip_db
+from main.main_trip.controllers import controller as controller_module
+from main.main_trip.controllers.controller import TripController, fast_path_report
+
+EMPTY_HISTORY = {"summary": None, "new_messages": [], "needs_summary": False, "last_summary_time": None}
+
+
+def build_controller():
+    """LLM 以 FakeChatCompletion 回應,檢索與規劃以 mock 取代"""
+    controller = TripController({"ChatGPT_api_key": "test_api_key"}, history_summarizer=MagicMock())
+    controller.LLM_obj = LLM_Manager("test_api_key", use_cache=False)
+    controller._vector_retrieval = MagicMock(return_value={})
+    controller._get_places = lambda placeIDs, unique_requirement: []
+    controller._add_duration = lambda places: places
+    controller._plan_trip = MagicMock(return_value=[])
+    return controller
+
+
+@pytest.fixture
+def make_controller():
+    """依歷史狀態與之前的行程建立 controller"""
+    patches = []
+
+    def make(history=EMPTY_HISTORY, latest=None):
+        trip_db = MagicMock(get_latest_plan=MagicMock(return_value=latest),
+                            get_history_status=MagicMock(return_value=history))
+        patcher = patch.object(controller_module, "trip_db", trip_db)
+        patcher.start()
+        patches.append(patcher)
+        return build_controller()
+
+    yield make
+    for patcher in patches:
+        patcher.stop()
+
+
+@pytest.fixture
+def controller(make_controller):
+    return make_controller()
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+def test_template_input_skips_llm(controller):
+    """固定格式的輸入不呼叫 LLM,解析出的欄位傳給規劃"""
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message("早上十點從西門町出發,開車", "U_test")
+
+    create.assert_not_called()
+    kwargs = controller._plan_trip.call_args.kwargs
+    assert kwargs["base_requirement"][0]["出發時間"] == "10:00"
+    assert kwargs["base_requirement"][0]["交通方式"] == "開車"
+    assert kwargs["restart_index"] == 0
+    assert len(controller._vector_retrieval.call_args.args[0]) == 5
+
+
+def test_free_text_uses_llm(controller):
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message("帶小孩去淡水玩", "U_test")
+
+    assert create.call_count == 4
+    assert controller._plan_trip.call_args.kwargs["base_requirement"][0]["出發地點"] == "淡水捷運站"
+
+
+def test_fast_path_disabled(controller, monkeypatch):
+    monkeypatch.setenv("TRIP_FAST_PATH", "off")
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message("隨便規劃台北一日遊", "U_test")
+    assert create.call_count == 4
+
+
+@pytest.mark.parametrize("history, latest", [
+    # 取消景點時記錄的不喜歡,尚未整理成摘要
+    ({**EMPTY_HISTORY, "new_messages": [{"text": "我不喜歡西門紅樓(景點)"}, {"text": "旅遊推薦"}]}, None),
+    ({**EMPTY_HISTORY, "new_messages": [{"text": "想吃火鍋"}]}, None),
+    ({**EMPTY_HISTORY, "summary": "喜歡吃火鍋"}, None),
+    # 等待從第 2 個景點重新規劃
+    (EMPTY_HISTORY, {"itinerary": [{"step": 1, "name": "台北101"}], "plan_index": 1, "restart_index": 2}),
+])
+def test_user_context_uses_llm(make_controller, history, latest):
+    """有歷史摘要、無法解析的新對話或等待重新規劃的行程時仍呼叫 LLM,解析出的欄位覆蓋 LLM 的結果"""
+    controller = make_controller(history, latest)
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message("隨便規劃台北一日遊,早上十點出發", "U_test")
+
+    assert create.call_count == 4
+    kwargs = controller._plan_trip.call_args.kwargs
+    assert kwargs["base_requirement"][0]["出發地點"] == "淡水捷運站"
+    assert kwargs["base_requirement"][0]["出發時間"] == "10:00"
+
+
+@pytest.mark.parametrize("text", ["隨便規劃台北一日遊,不要騎車", "隨便規劃台北一日遊,明天不要騎車"])
+def test_negation_keeps_llm_result(controller, text):
+    """有否定詞時呼叫 LLM,且不以解析出的欄位覆蓋 LLM 的結果"""
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message(text, "U_test")
+
+    assert create.call_count == 4
+    assert controller._plan_trip.call_args.kwargs["base_requirement"][0] == BASIC
+
+
+@pytest.mark.parametrize("history, latest", [
+    # input_history 記錄的是指令原文(「旅遊推薦 早上十點出發」去掉指令後保留開頭空白)
+    ({**EMPTY_HISTORY, "new_messages": [{"text": "旅遊推薦"}, {"text": " 早上十點出發"}]}, None),
+    # 之前的行程沒有要重新規劃
+    (EMPTY_HISTORY, {"itinerary": [{"step": 1, "name": "台北101"}], "plan_index": 1}),
+])
+def test_template_history_is_not_context(make_controller, history, latest):
+    controller = make_controller(history, latest)
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        controller.process_message("隨便規劃台北一日遊", "U_test")
+    create.assert_not_called()
+
+
+@pytest.fixture
+def line_user():
+    """實際寫入 trip_db 的測試用戶,前後清除"""
+    line_id = "fast_path_test_user"
+    trip_db.clear_user_data(line_id)
+    yield line_id
+    trip_db.clear_user_data(line_id)
+
+
+# 規劃結果以 mock 取代,回覆用的最小 bubble
+BUBBLE = {"type": "bubble", "body": {"type": "box", "layout": "vertical", "contents": []}}
+
+
+def send_text(controller, text, line_id):
+    """與 app.handle_message 相同: 先 record_user_input,再由 CommandHandler 解析並執行旅遊推薦"""
+    trip_db.record_user_input(line_id, text)
+    handler = CommandHandler(MagicMock())
+    command, parameter = handler.parse_command(text)
+    assert command == "旅遊推薦"
+    with patch.object(command_handler_module, "run_trip_planner",
+                      lambda text, line_id: controller.process_message(text, line_id)), \
+            patch.object(command_handler_module, "First", return_value=BUBBLE):
+        handler.handle_trip_command(MagicMock(reply_token="test_token"), parameter, line_id)
+    request = handler.messaging_api.reply_message_with_http_info.call_args.args[0]
+    assert request.messages[0].alt_text == "一日遊行程"
+
+
+def test_command_sequence(line_user):
+    """實際的 record_user_input → handle_trip_command 流程: 指令與之前的行程不影響快速路徑,取消景點後才呼叫 LLM"""
+    controller = build_controller()
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create) as create:
+        send_text(controller, "旅遊推薦", line_user)
+        send_text(controller, "旅遊推薦 早上十點出發", line_user)
+        assert create.call_count == 0
+        assert controller._plan_trip.call_args.kwargs["base_requirement"][0]["出發時間"] == "10:00"
+
+        # 取消第 2 個景點(app.handle_postback 的 cancel_ 按鈕)
+        plan_index = trip_db.get_latest_plan(line_user)["plan_index"]
+        assert trip_db.update_plan_restart_index(line_user, plan_index, 2, f"cancel_{plan_index}_2")
+        trip_db.update_user_dislike(line_user, "我不喜歡西門紅樓(景點)")
+        send_text(controller, "旅遊推薦", line_user)
+        assert create.call_count == 4
+
+
+def test_fast_path_report(controller):
+    """快速路徑比例與估計省下的時間"""
+    with patch('openai.ChatCompletion.create', side_effect=FakeChatCompletion().create):
+        for text in ["旅遊推薦", "隨便規劃台北一日遊", "明天開車", "帶小孩去淡水玩"]:
+            controller.process_message(text, "U_test")
+
+    report = fast_path_report()
+    print(f"\n快速路徑: {report}")
+    assert report["fast"] == 3 and report["llm"] == 1
+    assert report["ratio"] == 0.75
+    assert report["saved_seconds"] >= 0
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
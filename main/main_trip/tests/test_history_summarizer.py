@@ -0,0 +1,133 @@
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from main.main_trip.controllers import controller as controller_module
+from main.main_trip.controllers.controller import TripController
+from main.main_trip.history_summarizer import HistorySummarizer
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+class FakeTripDB:
+    """只實作 get_history_status / update_summary 的記憶體版 trip_db"""
+
+    def __init__(self, messages, summary=None):
+        self.messages = [{"timestamp": START + timedelta(minutes=i), "text": text}
+                         for i, text in enumerate(messages)]
+        self.summary = summary
+        self.last_summary_time = None
+        self.updates = []
+
+    def get_history_status(self, line_id, count_threshold=10):
+        new = [m for m in self.messages
+               if self.last_summary_time is None or m["timestamp"] > self.last_summary_time]
+        return {
+            "summary": self.summary,
+            "new_messages": new,
+            "needs_summary": len(new) >= count_threshold or not self.last_summary_time,
+            "last_summary_time": self.last_summary_time,
+        }
+
+    def update_summary(self, line_id, summary, summarized_until=None):
+        self.updates.append((line_id, summary, summarized_until))
+        self.summary, self.last_summary_time = summary, summarized_until
+        return True
+
+
+class FakeLLM:
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+        self.started = threading.Event()
+
+    def summarize_history(self, text):
+        self.calls.append(text)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return f"摘要({len(self.calls)})"
+
+
+@pytest.fixture
+def make_summarizer():
+    summarizers = []
+
+    def make(db, llm):
+        summarizer = HistorySummarizer(lambda: llm, db=db, max_workers=2)
+        summarizers.append(summarizer)
+        return summarizer
+
+    yield make
+    for summarizer in summarizers:
+        summarizer.shutdown()
+
+
+def test_notify_summarizes_in_background(make_summarizer):
+    """滿門檻時在背景整理,舊摘要與新對話一起送給 LLM,標記到最後一則訊息"""
+    db = FakeTripDB([f"訊息{i}" for i in range(10)], summary="喜歡咖啡廳")
+    db.last_summary_time = START - timedelta(minutes=1)
+    llm = FakeLLM()
+
+    assert make_summarizer(db, llm).notify("U1").result(timeout=5)
+
+    assert llm.calls == ["\n".join(["喜歡咖啡廳"] + [f"訊息{i}" for i in range(10)])]
+    assert db.updates == [("U1", "摘要(1)", START + timedelta(minutes=9))]
+
+
+def test_below_threshold_skips_llm(make_summarizer):
+    db = FakeTripDB(["訊息"] * 3, summary="喜歡咖啡廳")
+    db.last_summary_time = START - timedelta(minutes=1)
+    llm = FakeLLM()
+
+    assert make_summarizer(db, llm).notify("U1").result(timeout=5) is False
+    assert llm.calls == [] and db.updates == []
+
+
+def test_one_summary_per_user_at_a_time(make_summarizer):
+    """同一用戶整理中再收到訊息時不會重複整理"""
+    gate = threading.Event()
+    db = FakeTripDB(["第一則"])
+    llm = FakeLLM(gate)
+    summarizer = make_summarizer(db, llm)
+
+    first = summarizer.notify("U1")
+    assert llm.started.wait(5)
+    # 整理中: notify 直接略過,直接呼叫 summarize 也不會執行
+    assert summarizer.notify("U1") is None
+    assert summarizer.summarize("U1") is False
+
+    gate.set()
+    assert first.result(timeout=5)
+    assert len(llm.calls) == 1 and len(db.updates) == 1
+
+
+def test_llm_error_keeps_old_summary(make_summarizer):
+    db = FakeTripDB(["第一則"], summary="舊摘要")
+    llm = MagicMock()
+    llm.summarize_history.side_effect = TimeoutError("LLM 逾時")
+
+    assert make_summarizer(db, llm).notify("U1").result(timeout=5) is False
+    assert db.updates == [] and db.summary == "舊摘要"
+
+
+def test_prepare_input_does_not_wait_for_summary():
+    """規劃請求不呼叫 summarize_history,使用目前的摘要與未整理的新對話"""
+    db = FakeTripDB([f"訊息{i}" for i in range(12)], summary="喜歡咖啡廳")
+    db.last_summary_time = START - timedelta(minutes=1)
+    summarizer = MagicMock()
+
+    with patch.object(controller_module, "trip_db", db):
+        controller = TripController({"ChatGPT_api_key": "test_api_key"}, history_summarizer=summarizer)
+        controller.LLM_obj = MagicMock()
+        text = controller._prepare_input_text("不想去星巴克", line_id="U1")
+
+    summarizer.notify.assert_called_once_with("U1")
+    controller.LLM_obj.summarize_history.assert_not_called()
+    assert "喜歡咖啡廳" in text and "訊息11" in text and text.endswith("不想去星巴克")
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -0,0 +1,97 @@
+"""
+Thinking_A 認證後提早開始向量檢索的耗時比較
+
+假的 LLM 依 system prompt 設定延遲,向量檢索以固定延遲模擬,比較:
+    sequential - 等 Thinking_fun 四段全部完成才開始檢索(原本的流程)
+    pipelined  - TripController.process_message(Thinking_A 完成就開始檢索)
+
+延遲可以用環境變數調整(秒),例如:
+    FAKE_LATENCY_A=0.8 FAKE_LATENCY_C=2.0 FAKE_LATENCY_RETRIEVAL=1.0 \
+        python -m pytest -s main/main_trip/tests/test_pipeline_overlap.py
+"""
+
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from feature.llm.LLM import LLM_Manager
+from feature.llm.tests.fake_thinking import FakeChatCompletion
+from feature.llm.utils import system_prompt
+from main.main_trip.controllers import controller as controller_module
+from main.main_trip.controllers.controller import TripController
+
+LATENCIES = {
+    system_prompt.Thinking_A: float(os.getenv("FAKE_LATENCY_A", 0.2)),
+    system_prompt.Thinking_B: float(os.getenv("FAKE_LATENCY_B", 0.3)),
+    system_prompt.Thinking_C: float(os.getenv("FAKE_LATENCY_C", 0.5)),
+    system_prompt.restart: float(os.getenv("FAKE_LATENCY_RESTART", 0.4)),
+}
+RETRIEVAL_LATENCY = float(os.getenv("FAKE_LATENCY_RETRIEVAL", 0.3))
+
+
+@pytest.fixture
+def controller():
+    with patch.object(controller_module, "trip_db", MagicMock(get_latest_plan=MagicMock(return_value=None))):
+        controller = TripController({"ChatGPT_api_key": "test_api_key"})
+        controller.LLM_obj = LLM_Manager("test_api_key", use_cache=False)
+        controller._prepare_input_text = lambda text, **kwargs: text
+        controller._get_places = lambda placeIDs, unique_requirement: []
+        controller._add_duration = lambda places: places
+        controller._plan_trip = MagicMock(return_value=[])
+        yield controller
+
+
+def fake_retrieval(started):
+    def retrieval(period_describe):
+        started.append(time.perf_counter())
+        time.sleep(RETRIEVAL_LATENCY)
+        return {list(p)[0]: [] for p in period_describe}
+    return retrieval
+
+
+def test_retrieval_starts_after_thinking_a(controller):
+    """Thinking_A 完成就開始檢索,不等其他段落;其他段落照常傳給規劃"""
+    fake = FakeChatCompletion(latencies=LATENCIES)
+    started = []
+    controller._vector_retrieval = fake_retrieval(started)
+
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        controller.process_message("下禮拜六帶小孩去淡水玩", "U_test")
+
+    slowest = max(fake.finished.values())
+    assert started[0] < slowest
+    assert started[0] >= fake.finished[system_prompt.Thinking_A]
+
+    kwargs = controller._plan_trip.call_args.kwargs
+    assert kwargs["base_requirement"][0]["出發地點"] == "淡水捷運站"
+    assert kwargs["restart_index"] == 0
+
+
+def test_benchmark_sequential_vs_pipelined(controller):
+    """耗時比較: pipelined 約為 max(最慢的 LLM, Thinking_A + 檢索)"""
+    fake = FakeChatCompletion(latencies=LATENCIES)
+    controller._vector_retrieval = fake_retrieval([])
+
+    with patch('openai.ChatCompletion.create', side_effect=fake.create):
+        start = time.perf_counter()
+        period_describe = controller.LLM_obj.Thinking_fun("下禮拜六帶小孩去淡水玩", mode="split")[0]
+        controller._vector_retrieval(period_describe)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        controller.process_message("下禮拜六帶小孩去淡水玩", "U_test")
+        pipelined = time.perf_counter() - start
+
+    expected = max(max(LATENCIES.values()), LATENCIES[system_prompt.Thinking_A] + RETRIEVAL_LATENCY)
+    print(f"\nsequential: {sequential * 1e3:.0f} ms, pipelined: {pipelined * 1e3:.0f} ms "
+          f"(預期約 {expected * 1e3:.0f} ms)")
+
+    saved = min(RETRIEVAL_LATENCY, max(LATENCIES.values()) - LATENCIES[system_prompt.Thinking_A])
+    if saved > 0.1:
+        assert pipelined < sequential - saved / 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", "-s", __file__])
@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock, patch
+
 import pytest
 
 from feature.trip import TripPlanningSystem
@@ -34,5 +36,20 @@ def test_print_itinerary():
         pytest.fail(f"print_itinerary failed with error: {str(e)}")
 
 
+def test_run_trip_planner_no_stdout(capsys):
+    """請求路徑不輸出行程到 stdout,預設 log 層級下也不整理行程文字"""
+    from main.main_trip import trip_service
+
+    controller = MagicMock()
+    controller.process_message.return_value = [{"step": 1}]
+    with patch.object(trip_service, "get_trip_controller", return_value=controller):
+        result = trip_service.run_trip_planner(text="淡水一日遊", line_id="test_user")
+
+    assert result == [{"step": 1}]
+    assert capsys.readouterr().out == ""
+    controller.trip_planner.print_itinerary.assert_not_called()
+    controller.trip_planner.format_itinerary.assert_not_called()
+
+
 if __name__ == "__main__":
     pytest.main(["-v", "-s", __file__])
@@ -1,6 +1,55 @@
+import threading
 from typing import Dict, List
 
+from feature.llm.LLM import LLM_Manager
 from main.main_trip.controllers.controller import TripController, init_config
+from main.main_trip.history_summarizer import HistorySummarizer
+from feature.trip.src.core.utils.logger import get_logger, lazy
+
+logger = get_logger('trip_service')
+
+# 每個執行緒共用一個 TripController(TripPlanningSystem 在規劃時會保存狀態,不能跨執行緒共用)
+_local = threading.local()
+_config = None
+_config_lock = threading.Lock()
+_summarizer = None
+
+
+def get_config() -> dict:
+    """取得共用的設定(第一次呼叫時才載入環境變數)"""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = init_config()
+    return _config
+
+
+def get_history_summarizer() -> HistorySummarizer:
+    """取得共用的背景歷史整理(每個 worker 一個,同一用戶的整理不會同時執行)"""
+    global _summarizer
+    if _summarizer is None:
+        with _config_lock:
+            if _summarizer is None:
+                _summarizer = HistorySummarizer(
+                    lambda: LLM_Manager(get_config()['ChatGPT_api_key']))
+    return _summarizer
+
+
+def get_trip_controller() -> TripController:
+    """取得目前執行緒的 TripController,第一次呼叫時建立
+
+    LLM_Manager 與 TripPlanningSystem 會在同一個執行緒的多次規劃間重複使用,
+    數量上限為處理事件的執行緒數。
+
+    Returns:
+        TripController: 目前執行緒專用的控制器
+    """
+    controller = getattr(_local, 'controller', None)
+    if controller is None:
+        controller = TripController(get_config(), get_history_summarizer())
+        _local.controller = controller
+    return controller
 
 
 def run_trip_planner(
@@ -20,14 +69,16 @@ def run_trip_planner(
     """
 
     try:
-        controller_instance = TripController(init_config())
+        controller_instance = get_trip_controller()
 
         result = controller_instance.process_message(
             input_text=text,
             line_id=line_id,
         )
 
-        controller_instance.trip_planner.print_itinerary(result)
+        # 只在 debug 層級才整理行程文字,不在請求路徑寫 stdout(錯誤時 result 為訊息字串)
+        if isinstance(result, list):
+            logger.debug("%s", lazy(controller_instance.trip_planner.format_itinerary, result))
         return result
 
     except Exception as e: